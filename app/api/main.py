@@ -5,11 +5,13 @@ Exposes endpoints for job submission, status tracking, and result retrieval.
 
 import json
 import uuid
-from typing import Optional, Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Optional, Dict, Any, List, Tuple
 from datetime import datetime
 
 try:
-    from flask import Flask, request, jsonify
+    from flask import Flask, Response, request, jsonify
     from flask_cors import CORS
 except ImportError:
     print("Flask is required. Install with: pip install flask")
@@ -21,9 +23,13 @@ from app.common.models import (
     JobProgress,
     VideoResult,
     Storyboard,
+    progress_generation,
 )
 from app.common.config import Config
 from app.common.utils import setup_logging, log_job_event, job_cache
+from app.common.job_logs import get_job_log_store
+from app.orchestrator.main import get_orchestrator
+from app.orchestrator.prefetch import get_prefetch_worker
 from app.api.jobs_service import (
     parse_date_range,
     matches_filters,
@@ -52,6 +58,11 @@ class VideoGenerationAPI:
         CORS(self.app, resources={r"/mcp/*": {"origins": "*"}}, supports_credentials=True)
         self.jobs: Dict[str, VideoRequest] = {}
         self.job_progress: Dict[str, JobProgress] = {}
+        # Serialized /mcp/jobs pages by query string, valid while their ETag is current
+        self._epoch = uuid.uuid4().hex[:8]
+        self._list_cache: "OrderedDict[bytes, Tuple[str, bytes]]" = OrderedDict()
+        self._list_cache_lock = threading.Lock()
+        self._jobs_lock = threading.Lock()
         self._setup_routes()
 
     def _setup_routes(self):
@@ -69,31 +80,12 @@ class VideoGenerationAPI:
                 data = request.get_json()
                 
                 # Validate required fields
-                if not data.get("prompt"):
-                    return jsonify({"error": "Missing required field: prompt"}), 400
+                error = self._validate_job_data(data)
+                if error:
+                    return jsonify({"error": error}), 400
 
-                # Create video request
-                job_request = VideoRequest(
-                    id=str(uuid.uuid4()),
-                    prompt=data.get("prompt", ""),
-                    duration_target=data.get("duration_target", 60),
-                    style=data.get("style", "cinematic"),
-                    voice=data.get("voice", "en-US-neutral"),
-                    language=data.get("language", "en"),
-                    scene_count=data.get("scene_count"),
-                    callback_url=data.get("callback_url"),
-                    priority=data.get("priority", 5),
-                )
-
-                # Store job
-                self.jobs[job_request.id] = job_request
-                
-                # Initialize progress
-                self.job_progress[job_request.id] = JobProgress(
-                    job_id=job_request.id,
-                    status=JobStatus.PENDING,
-                    total_scenes=job_request.scene_count or 0,
-                )
+                job_request, job_progress = self._new_job(data)
+                self._add_jobs([(job_request, job_progress)])
 
                 # Log job submission
                 log_job_event(
@@ -122,6 +114,57 @@ class VideoGenerationAPI:
             except Exception as e:
                 logger.error(f"Error in /generate: {str(e)}", exc_info=True)
                 return jsonify({"error": str(e)}), 500
+
+        @self.app.route("/mcp/generate/batch", methods=["POST"])
+        def generate_batch():
+            """
+            Submit many jobs at once: a JSON array, {"requests": [...]}, or NDJSON.
+            Every request is validated first; if any is invalid nothing is queued.
+            """
+            try:
+                items, errors = self._parse_batch()
+                if items is None:
+                    return jsonify({"error": 'Expected a JSON array, {"requests": [...]}, or NDJSON'}), 400
+                if not items:
+                    return jsonify({"error": "Batch is empty"}), 400
+                if len(items) > Config.GENERATE_BATCH_MAX:
+                    return jsonify({
+                        "error": f"Batch too large: {len(items)} requests (max {Config.GENERATE_BATCH_MAX})"
+                    }), 413
+
+                for index, data in enumerate(items):
+                    if index not in errors:
+                        error = self._validate_job_data(data)
+                        if error:
+                            errors[index] = error
+                if errors:
+                    return jsonify({
+                        "error": "Invalid requests in batch; nothing was queued",
+                        "errors": [{"index": i, "error": errors[i]} for i in sorted(errors)],
+                    }), 400
+
+                new_jobs = [self._new_job(data) for data in items]
+                self._add_jobs(new_jobs)
+                job_ids = [job_request.id for job_request, _ in new_jobs]
+
+                # One log line and one queue update for the whole batch
+                batch_id = f"batch_{uuid.uuid4()}"
+                log_job_event(batch_id, "batch_submitted", "PENDING", {"count": len(job_ids), "job_ids": job_ids})
+                if WebSocketEventManager:
+                    WebSocketEventManager.broadcast_queue_update(*self._queue_counts())
+
+                logger.info(f"Batch {batch_id} queued {len(job_ids)} jobs")
+                return jsonify({
+                    "batch_id": batch_id,
+                    "job_ids": job_ids,
+                    "count": len(job_ids),
+                    "status": "accepted",
+                }), 202
+
+            except Exception as e:
+                logger.error(f"Error in /generate/batch: {str(e)}", exc_info=True)
+                return jsonify({"error": str(e)}), 500
+
         @self.app.route("/mcp/jobs", methods=["GET"])
         def list_jobs():
             """List all jobs with filtering and pagination."""
@@ -142,6 +185,17 @@ class VideoGenerationAPI:
                 if offset < 0:
                     offset = 0
 
+                # Relative date ranges change as time passes, so only absolute
+                # listings are cached and answered conditionally
+                etag = None
+                if date_range == "all":
+                    etag = f"jobs-{self._epoch}-{progress_generation()}-{len(self.jobs)}"
+                    if etag in request.if_none_match:
+                        return self._not_modified(etag)
+                    cached = self._list_cache.get(request.query_string)
+                    if cached and cached[0] == etag:
+                        return self._json_response(cached[1], etag)
+
                 # Build filters dict
                 filters = {}
                 if status_filter:
@@ -153,7 +207,7 @@ class VideoGenerationAPI:
 
                 # Filter and sort jobs
                 filtered_jobs = []
-                for job_id, job_req in self.jobs.items():
+                for job_id, job_req in list(self.jobs.items()):
                     job_prog = self.job_progress.get(job_id)
                     if matches_filters({"status": job_prog.status.value if job_prog else "pending", "priority": job_req.priority}, filters):
                         filtered_jobs.append(build_job_dict(job_id, job_req, job_prog))
@@ -170,9 +224,12 @@ class VideoGenerationAPI:
                 jobs_page = filtered_jobs[offset:offset + limit]
 
                 # Get summary statistics
-                summary = get_job_summary(self.jobs)
+                summary = get_job_summary({
+                    job_id: {"status": prog.status.value}
+                    for job_id, prog in self.job_progress.items()
+                })
 
-                return jsonify({
+                body = json.dumps({
                     "jobs": jobs_page,
                     "pagination": {
                         "total": total,
@@ -182,25 +239,74 @@ class VideoGenerationAPI:
                         "pages": pages,
                     },
                     "summary": summary,
-                }), 200
+                }).encode()
+                if etag:
+                    with self._list_cache_lock:
+                        self._list_cache[request.query_string] = (etag, body)
+                        self._list_cache.move_to_end(request.query_string)
+                        while len(self._list_cache) > 64:
+                            self._list_cache.popitem(last=False)
+                return self._json_response(body, etag)
 
             except Exception as e:
                 logger.error(f"Error in /jobs: {str(e)}", exc_info=True)
                 return jsonify({"error": str(e)}), 500
         @self.app.route("/mcp/status/<job_id>", methods=["GET"])
         def status(job_id: str):
-            """Get job status and progress."""
+            """
+            Get job status and progress.
+            With ?since=<version> this long-polls: the response is held until the
+            job's version differs from since, or ?wait seconds pass.
+            """
             try:
                 if job_id not in self.job_progress:
                     return jsonify({"error": "Job not found"}), 404
 
                 progress = self.job_progress[job_id]
-                return jsonify(progress.to_dict()), 200
+                since = request.args.get("since", type=int)
+                if since is not None and not progress.is_terminal:
+                    wait = request.args.get("wait", Config.STATUS_WAIT_MAX, type=float)
+                    progress.wait_for_change(since, max(0.0, min(wait, Config.STATUS_WAIT_MAX)))
+                # Read the tag before serializing so it is never newer than the body
+                etag = progress.etag
+                if since is None and etag in request.if_none_match:
+                    return self._not_modified(etag)
+                return self._json_response(progress.to_json(), etag)
 
             except Exception as e:
                 logger.error(f"Error in /status: {str(e)}", exc_info=True)
                 return jsonify({"error": str(e)}), 500
 
+        @self.app.route("/mcp/status/<job_id>/stream", methods=["GET"])
+        def status_stream(job_id: str):
+            """Stream job status changes as Server-Sent Events until the job ends."""
+            if job_id not in self.job_progress:
+                return jsonify({"error": "Job not found"}), 404
+
+            since = request.headers.get("Last-Event-ID", type=int)
+            if since is None:
+                since = request.args.get("since", type=int)
+            return Response(
+                self._status_events(self.job_progress[job_id], since),
+                mimetype="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @self.app.route("/mcp/logs/<job_id>", methods=["GET"])
+        def job_logs(job_id: str):
+            """Read a job's log lines after a sequence number (?after=seq&limit=n)."""
+            try:
+                if job_id not in self.jobs:
+                    return jsonify({"error": "Job not found"}), 404
+
+                after = max(0, request.args.get("after", 0, type=int))
+                limit = min(max(1, request.args.get("limit", 500, type=int)), 1000)
+                return jsonify(get_job_log_store().read(job_id, after=after, limit=limit)), 200
+
+            except Exception as e:
+                logger.error(f"Error in /logs: {str(e)}", exc_info=True)
+                return jsonify({"error": str(e)}), 500
+
         @self.app.route("/mcp/result/<job_id>", methods=["GET"])
         def result(job_id: str):
             """Get job result."""
@@ -249,6 +355,15 @@ class VideoGenerationAPI:
 
                 progress.status = JobStatus.CANCELLED
                 log_job_event(job_id, "job_cancelled", "CANCELLED")
+                progress.add_log("Job cancelled", "WARNING")
+
+                if WebSocketEventManager:
+                    WebSocketEventManager.broadcast_job_status(
+                        job_id,
+                        JobStatus.CANCELLED.value,
+                        int(progress.overall_progress),
+                        "Job cancelled",
+                    )
                 
                 return jsonify({
                     "job_id": job_id,
@@ -261,31 +376,43 @@ class VideoGenerationAPI:
 
         @self.app.route("/mcp/prefetch", methods=["POST"])
         def prefetch():
-            """Pre-warm assets for a prompt."""
+            """
+            Warm the scene, search, clip and TTS caches for a prompt so a later
+            /mcp/generate starts fast. Prefetches are not listed as jobs.
+            """
             try:
-                data = request.get_json()
-                if not data.get("prompt"):
-                    return jsonify({"error": "Missing required field: prompt"}), 400
-
-                # Create a prefetch job
-                prefetch_request = VideoRequest(
-                    id=f"prefetch_{uuid.uuid4()}",
-                    prompt=data.get("prompt", ""),
-                    priority=10,  # High priority
-                )
+                data = request.get_json(silent=True)
+                error = self._validate_job_data(data)
+                if error:
+                    return jsonify({"error": error}), 400
+
+                task = get_prefetch_worker().submit(VideoRequest(
+                    prompt=data["prompt"],
+                    duration_target=data.get("duration_target", 60),
+                    style=data.get("style", "cinematic"),
+                    voice=data.get("voice", "en-US-neutral"),
+                    language=data.get("language", "en"),
+                    scene_count=data.get("scene_count"),
+                    priority=1,  # idle capacity only
+                ))
 
-                self.jobs[prefetch_request.id] = prefetch_request
-                log_job_event(prefetch_request.id, "prefetch_initiated", "PENDING")
-                
                 return jsonify({
-                    "prefetch_id": prefetch_request.id,
-                    "status": "prefetch_queued",
+                    "prefetch_id": task.id,
+                    "status": "prefetch_queued" if task.status == "queued" else f"prefetch_{task.status}",
                 }), 202
 
             except Exception as e:
                 logger.error(f"Error in /prefetch: {str(e)}", exc_info=True)
                 return jsonify({"error": str(e)}), 500
 
+        @self.app.route("/mcp/prefetch/<prefetch_id>", methods=["GET"])
+        def prefetch_status(prefetch_id: str):
+            """Get the progress of a prefetch."""
+            task = get_prefetch_worker().get(prefetch_id)
+            if task is None:
+                return jsonify({"error": "Prefetch not found"}), 404
+            return jsonify(task.to_dict()), 200
+
         @self.app.route("/mcp/storyboard/<job_id>", methods=["GET"])
         def get_storyboard(job_id: str):
             """Get intermediate storyboard for a job."""
@@ -304,6 +431,52 @@ class VideoGenerationAPI:
                 logger.error(f"Error in /storyboard: {str(e)}", exc_info=True)
                 return jsonify({"error": str(e)}), 500
 
+        @self.app.route("/mcp/storyboard/<job_id>", methods=["PATCH"])
+        def edit_storyboard(job_id: str):
+            """
+            Edit a finished job's storyboard and re-render only what changed.
+            Pass ?render=false to store the edit without re-rendering.
+            """
+            try:
+                job_request = self.jobs.get(job_id)
+                if job_request is None:
+                    return jsonify({"error": "Job not found"}), 404
+                if not job_cache.get(f"storyboard_{job_id}"):
+                    return jsonify({"error": "Storyboard not yet available"}), 404
+
+                progress = self.job_progress[job_id]
+                if not progress.is_terminal:
+                    return jsonify({
+                        "error": f"Cannot edit storyboard while job is {progress.status.value}"
+                    }), 409
+
+                orchestrator = get_orchestrator()
+                try:
+                    diff = orchestrator.edit_storyboard(job_request, progress, request.get_json(silent=True))
+                except ValueError as e:
+                    return jsonify({"error": str(e)}), 400
+
+                rerender = diff.changed and request.args.get("render", "true").lower() != "false"
+                if rerender:
+                    progress.status = JobStatus.PENDING
+                    progress.overall_progress = 0.0
+                    threading.Thread(
+                        target=orchestrator.rerender_job,
+                        args=(job_request, progress, diff),
+                        daemon=True,
+                    ).start()
+
+                return jsonify({
+                    "job_id": job_id,
+                    "diff": diff.to_dict(),
+                    "rerender": rerender,
+                    "storyboard": job_cache.get(f"storyboard_{job_id}"),
+                }), 202 if rerender else 200
+
+            except Exception as e:
+                logger.error(f"Error in PATCH /storyboard: {str(e)}", exc_info=True)
+                return jsonify({"error": str(e)}), 500
+
         @self.app.errorhandler(404)
         def not_found(error):
             return jsonify({"error": "Endpoint not found"}), 404
@@ -313,9 +486,131 @@ class VideoGenerationAPI:
             logger.error(f"Internal server error: {str(error)}")
             return jsonify({"error": "Internal server error"}), 500
 
+    @staticmethod
+    def _validate_job_data(data: Any) -> Optional[str]:
+        """Return an error message if a generate request is invalid."""
+        if not isinstance(data, dict):
+            return "Request must be a JSON object"
+        if not data.get("prompt"):
+            return "Missing required field: prompt"
+        if not isinstance(data["prompt"], str):
+            return "Field prompt must be a string"
+        for key in ("duration_target", "scene_count", "priority"):
+            value = data.get(key)
+            if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+                return f"Field {key} must be a number"
+        if not isinstance(data.get("dedupe", True), bool):
+            return "Field dedupe must be a boolean"
+        if data.get("quality", "medium") not in ("low", "medium", "high"):
+            return "Field quality must be one of: low, medium, high"
+        return None
+
+    @staticmethod
+    def _new_job(data: Dict[str, Any]) -> Tuple[VideoRequest, JobProgress]:
+        """Build the request and initial progress for a validated generate request."""
+        job_request = VideoRequest(
+            id=str(uuid.uuid4()),
+            prompt=data.get("prompt", ""),
+            duration_target=data.get("duration_target", 60),
+            style=data.get("style", "cinematic"),
+            voice=data.get("voice", "en-US-neutral"),
+            language=data.get("language", "en"),
+            scene_count=data.get("scene_count"),
+            callback_url=data.get("callback_url"),
+            priority=data.get("priority", 5),
+            dedupe=data.get("dedupe", True),
+            quality=data.get("quality", "medium"),
+        )
+        job_progress = JobProgress(
+            job_id=job_request.id,
+            status=JobStatus.PENDING,
+            total_scenes=job_request.scene_count or 0,
+        )
+        return job_request, job_progress
+
+    def _add_jobs(self, new_jobs: List[Tuple[VideoRequest, JobProgress]]):
+        """Store jobs together so no reader sees part of a batch, then queue them if this process runs jobs."""
+        with self._jobs_lock:
+            for job_request, job_progress in new_jobs:
+                self.jobs[job_request.id] = job_request
+                self.job_progress[job_request.id] = job_progress
+        if Config.API_RUN_JOBS:
+            orchestrator = get_orchestrator()
+            for job_request, job_progress in new_jobs:
+                orchestrator.submit(job_request, job_progress)
+
+    def _queue_counts(self) -> Tuple[int, int]:
+        """Number of queued and in-progress jobs."""
+        queued = processing = 0
+        for progress in list(self.job_progress.values()):
+            if progress.status == JobStatus.PENDING:
+                queued += 1
+            elif not progress.is_terminal:
+                processing += 1
+        return queued, processing
+
+    @staticmethod
+    def _parse_batch() -> Tuple[Optional[List[Any]], Dict[int, str]]:
+        """Requests in a batch body (None if unrecognised), and NDJSON parse errors by index."""
+        if request.mimetype in ("application/x-ndjson", "application/jsonl"):
+            items, errors = [], {}
+            lines = [line for line in request.get_data(as_text=True).splitlines() if line.strip()]
+            for index, line in enumerate(lines):
+                try:
+                    items.append(json.loads(line))
+                except ValueError as e:
+                    items.append(None)
+                    errors[index] = f"Invalid JSON: {e}"
+            return items, errors
+
+        data = request.get_json(silent=True)
+        if isinstance(data, dict):
+            data = data.get("requests")
+        if not isinstance(data, list):
+            return None, {}
+        return data, {}
+
+    @staticmethod
+    def _json_response(body: bytes, etag: Optional[str] = None, status: int = 200):
+        """Pre-serialized JSON, tagged so clients can revalidate with If-None-Match."""
+        response = Response(body, status=status, mimetype="application/json")
+        if etag:
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @staticmethod
+    def _not_modified(etag: str):
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def _status_events(self, progress: JobProgress, since: Optional[int] = None):
+        """
+        SSE frames for a job: the current state whenever its version moves past
+        since (intermediate changes coalesce into one frame), a comment line
+        as keep-alive while idle, and nothing more after a terminal status.
+        """
+        version = -1 if since is None else since
+        while True:
+            if progress.version != version:
+                data = progress.to_dict()
+                version = data["version"]
+                yield f"id: {version}\nevent: status\ndata: {json.dumps(data)}\n\n"
+            elif progress.is_terminal:
+                return
+            elif not progress.wait_for_change(version, Config.STATUS_STREAM_HEARTBEAT):
+                yield ": keep-alive\n\n"
+
     def run(self, host: str = Config.API_HOST, port: int = Config.API_PORT):
         """Start the API server."""
-        logger.info(f"Starting API server on {host}:{port}")
+        logger.info(f"Starting API server on {host}:{port} ({Config.API_ASYNC_MODE})")
+        if Config.API_ASYNC_MODE == "gevent":
+            # Each open status stream or long-poll is a greenlet instead of a thread
+            from gevent.pywsgi import WSGIServer
+            WSGIServer((host, port), self.app, log=None).serve_forever()
+            return
         self.app.run(host=host, port=port, debug=False, threaded=True)
 
 
@@ -326,6 +621,9 @@ def create_app():
 
 
 if __name__ == "__main__":
+    if Config.API_ASYNC_MODE == "gevent":
+        from gevent import monkey
+        monkey.patch_all()
     Config.validate()
     api = VideoGenerationAPI()
     api.run()
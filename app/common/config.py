@@ -25,11 +25,28 @@ class Config:
     WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")  # tiny, base, small, medium, large
     WHISPER_DEVICE = os.getenv("WHISPER_DEVICE", "cpu")  # cpu or cuda
     WHISPER_LANGUAGE_DETECTION = os.getenv("WHISPER_LANGUAGE_DETECTION", "true").lower() == "true"
+    WHISPER_INFERENCE_SLOTS = int(os.getenv("WHISPER_INFERENCE_SLOTS", "1"))  # per loaded model
+    WHISPER_MODEL_IDLE_TIMEOUT = float(os.getenv("WHISPER_MODEL_IDLE_TIMEOUT", "600"))  # seconds
+    WHISPER_POOL_MAX_MODELS = int(os.getenv("WHISPER_POOL_MAX_MODELS", "3"))
+    WHISPER_BATCHING_ENABLED = os.getenv("WHISPER_BATCHING_ENABLED", "false").lower() == "true"
+    WHISPER_BATCH_WINDOW_MS = float(os.getenv("WHISPER_BATCH_WINDOW_MS", "10"))
+    WHISPER_MAX_BATCH_SIZE = int(os.getenv("WHISPER_MAX_BATCH_SIZE", "8"))
+    WHISPER_LONGFORM_WORKERS = int(os.getenv("WHISPER_LONGFORM_WORKERS", "2"))  # processes
+    WHISPER_LONGFORM_MAX_CHUNK = float(os.getenv("WHISPER_LONGFORM_MAX_CHUNK", "30"))  # seconds
+    WHISPER_WORKER_HOST = os.getenv("WHISPER_WORKER_HOST", "0.0.0.0")
+    WHISPER_WORKER_PORT = int(os.getenv("WHISPER_WORKER_PORT", "8083"))
+    WHISPER_QUEUE_SIZE = int(os.getenv("WHISPER_QUEUE_SIZE", "16"))  # waiting requests before rejecting
+    WHISPER_REQUEST_TIMEOUT = float(os.getenv("WHISPER_REQUEST_TIMEOUT", "300"))  # seconds
+    ALIGNMENT_METHOD = os.getenv("ALIGNMENT_METHOD", "auto")  # auto, whisper, energy
 
     # TTS Configuration
-    TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")  # gtts, azure, aws
+    TTS_ENGINE = os.getenv("TTS_ENGINE", "gtts")  # gtts, espeak, tone
     TTS_LANGUAGE = os.getenv("TTS_LANGUAGE", "en")
     TTS_VOICE = os.getenv("TTS_VOICE", "en-US-neutral")
+    TTS_WORKERS = int(os.getenv("TTS_WORKERS", "4"))  # concurrent per-scene synthesis
+    TTS_CACHE_ENABLED = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", "/tmp/video_gen/tts_cache")
+    TTS_CACHE_SIZE_MB = int(os.getenv("TTS_CACHE_SIZE_MB", "500"))
 
     # FFmpeg Renderer
     FFMPEG_PRESET = os.getenv("FFMPEG_PRESET", "medium")  # ultrafast, fast, medium, slow
@@ -37,28 +54,75 @@ class Config:
     AUDIO_CODEC = os.getenv("AUDIO_CODEC", "aac")
     VIDEO_BITRATE = os.getenv("VIDEO_BITRATE", "5000k")
     AUDIO_BITRATE = os.getenv("AUDIO_BITRATE", "192k")
+    AUDIO_SAMPLE_RATE = int(os.getenv("AUDIO_SAMPLE_RATE", "48000"))
+    AUDIO_TARGET_LUFS = float(os.getenv("AUDIO_TARGET_LUFS", "-16"))
+    MUSIC_BED_FILE = os.getenv("MUSIC_BED_FILE", "")
+    MUSIC_BED_GAIN_DB = float(os.getenv("MUSIC_BED_GAIN_DB", "-18"))
+    MUSIC_DUCK_DB = float(os.getenv("MUSIC_DUCK_DB", "-12"))  # extra attenuation under narration
     TARGET_FPS = int(os.getenv("TARGET_FPS", "30"))
     TARGET_RESOLUTION = os.getenv("TARGET_RESOLUTION", "1920x1080")
+    PROBE_CACHE_DIR = os.getenv("PROBE_CACHE_DIR", "/tmp/video_gen/probe_cache")
+    SEGMENT_CACHE_ENABLED = os.getenv("SEGMENT_CACHE_ENABLED", "true").lower() == "true"  # encode per scene, reuse unchanged segments
+    SEGMENT_CACHE_DIR = os.getenv("SEGMENT_CACHE_DIR", "/tmp/video_gen/segment_cache")
+    SEGMENT_CACHE_SIZE_MB = int(os.getenv("SEGMENT_CACHE_SIZE_MB", "5000"))
+    RENDER_OUTPUT_DIR = os.getenv("RENDER_OUTPUT_DIR", "/tmp/video_gen/output")  # re-rendered videos, one directory per job
 
     # Service URLs (for inter-service communication)
     ORCHESTRATOR_URL = os.getenv("ORCHESTRATOR_URL", "http://orchestrator:8081")
     RETRIEVER_URL = os.getenv("RETRIEVER_URL", "http://retriever:8082")
     WHISPER_URL = os.getenv("WHISPER_URL", "http://whisper:8083")
     RENDERER_URL = os.getenv("RENDERER_URL", "http://renderer:8084")
+    # Comma-separated URLs above are treated as replicas of one service
+    USE_REMOTE_SERVICES = os.getenv("USE_REMOTE_SERVICES", "false").lower() == "true"
+    SERVICE_HEDGE_DELAY_MS = float(os.getenv("SERVICE_HEDGE_DELAY_MS", "200"))
+    SERVICE_BREAKER_THRESHOLD = int(os.getenv("SERVICE_BREAKER_THRESHOLD", "3"))  # consecutive failures
+    SERVICE_BREAKER_RESET = float(os.getenv("SERVICE_BREAKER_RESET", "30"))  # seconds before a probe
+    SERVICE_HEALTH_INTERVAL = float(os.getenv("SERVICE_HEALTH_INTERVAL", "2"))  # seconds
 
     # API Configuration
     API_HOST = os.getenv("API_HOST", "0.0.0.0")
     API_PORT = int(os.getenv("API_PORT", "8080"))
     API_WORKERS = int(os.getenv("API_WORKERS", "4"))
+    GENERATE_BATCH_MAX = int(os.getenv("GENERATE_BATCH_MAX", "500"))  # requests per /mcp/generate/batch
+    API_ASYNC_MODE = os.getenv("API_ASYNC_MODE", "threading")  # threading or gevent (cheap idle status waiters)
+    STATUS_WAIT_MAX = float(os.getenv("STATUS_WAIT_MAX", "30"))  # longest /mcp/status long-poll, seconds
+    STATUS_STREAM_HEARTBEAT = float(os.getenv("STATUS_STREAM_HEARTBEAT", "15"))  # SSE keep-alive interval
     
     # Job Queue and Cache
     REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
     JOB_CACHE_ENABLED = os.getenv("JOB_CACHE_ENABLED", "true").lower() == "true"
+    WS_EVENT_BROKER = os.getenv("WS_EVENT_BROKER", "redis")  # redis or local
+    WS_EVENT_CHANNEL = os.getenv("WS_EVENT_CHANNEL", "video_gen:job_events")
+    WS_MAX_EMIT_RATE = float(os.getenv("WS_MAX_EMIT_RATE", "4"))  # status flushes per second, 0 disables
+    WS_MAX_PENDING_LOGS = int(os.getenv("WS_MAX_PENDING_LOGS", "50"))  # per job between flushes
+    WS_REPLAY_BUFFER_SIZE = int(os.getenv("WS_REPLAY_BUFFER_SIZE", "200"))  # events kept per job for resubscribe
+    WS_REPLAY_MAX_JOBS = int(os.getenv("WS_REPLAY_MAX_JOBS", "1000"))
+    WS_ASYNC_MODE = os.getenv("WS_ASYNC_MODE", "threading")  # threading, eventlet, gevent, or aiohttp
     JOB_CACHE_TTL = int(os.getenv("JOB_CACHE_TTL", "86400"))  # 24 hours
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_WINDOW_SECONDS = float(os.getenv("DEDUP_WINDOW_SECONDS", "3600"))  # reuse completed results this long; 0 = only in-flight
+    JOB_LOG_BACKEND = os.getenv("JOB_LOG_BACKEND", "file")  # file or redis
+    JOB_LOG_DIR = os.getenv("JOB_LOG_DIR", "/tmp/video_gen/job_logs")
+    JOB_LOG_MAX_BYTES = int(os.getenv("JOB_LOG_MAX_BYTES", str(1024 * 1024)))  # per job, file backend
+    JOB_LOG_MAX_LINES = int(os.getenv("JOB_LOG_MAX_LINES", "5000"))  # per job, redis backend
+    JOB_LOG_TAIL = int(os.getenv("JOB_LOG_TAIL", "20"))  # lines carried in status payloads
 
     # Asset Caching
     ASSET_CACHE_ENABLED = os.getenv("ASSET_CACHE_ENABLED", "true").lower() == "true"
     ASSET_CACHE_SIZE_MB = int(os.getenv("ASSET_CACHE_SIZE_MB", "1000"))
+    PEXELS_SEARCH_CACHE_TTL = int(os.getenv("PEXELS_SEARCH_CACHE_TTL", "21600"))  # seconds; 0 disables
+    CLIP_STORE_ENABLED = os.getenv("CLIP_STORE_ENABLED", "true").lower() == "true"  # download selected clips locally
+    CLIP_STORE_DIR = os.getenv("CLIP_STORE_DIR", "/tmp/video_gen/clips")
+    CLIP_STORE_SIZE_MB = int(os.getenv("CLIP_STORE_SIZE_MB", "5000"))
+    CLIP_NORMALIZE = os.getenv("CLIP_NORMALIZE", "true").lower() == "true"  # re-encode to the render format on download
+    PREFETCH_WORKERS = int(os.getenv("PREFETCH_WORKERS", "1"))
+    PREFETCH_IDLE_JOBS = int(os.getenv("PREFETCH_IDLE_JOBS", "1"))  # prefetch only while fewer jobs are running; needs API_RUN_JOBS
+    PREFETCH_MAX_TASKS = int(os.getenv("PREFETCH_MAX_TASKS", "1000"))  # prefetch statuses kept
+    PREDICTIVE_PREFETCH_ENABLED = os.getenv("PREDICTIVE_PREFETCH_ENABLED", "true").lower() == "true"
+    PREDICTIVE_PREFETCH_INTERVAL = float(os.getenv("PREDICTIVE_PREFETCH_INTERVAL", "300"))  # seconds between warm passes
+    PREDICTIVE_PREFETCH_HALF_LIFE = float(os.getenv("PREDICTIVE_PREFETCH_HALF_LIFE", "86400"))  # popularity halves this often
+    PREDICTIVE_PREFETCH_TOP_QUERIES = int(os.getenv("PREDICTIVE_PREFETCH_TOP_QUERIES", "50"))
+    PREDICTIVE_PREFETCH_TOP_CLIPS = int(os.getenv("PREDICTIVE_PREFETCH_TOP_CLIPS", "50"))
 
     # Logging
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -68,9 +132,20 @@ class Config:
     ENABLE_STYLE_TRANSFER = os.getenv("ENABLE_STYLE_TRANSFER", "false").lower() == "true"
     ENABLE_WEBHOOKS = os.getenv("ENABLE_WEBHOOKS", "true").lower() == "true"
     WEBHOOK_TIMEOUT = int(os.getenv("WEBHOOK_TIMEOUT", "30"))
+    WEBHOOK_OUTBOX_PATH = os.getenv("WEBHOOK_OUTBOX_PATH", "/tmp/video_gen/webhooks.db")
+    WEBHOOK_WORKERS = int(os.getenv("WEBHOOK_WORKERS", "4"))
+    WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", "6"))
+    WEBHOOK_RETRY_BASE = float(os.getenv("WEBHOOK_RETRY_BASE", "2"))  # seconds, doubled per attempt
+    WEBHOOK_BATCH_WINDOW_MS = float(os.getenv("WEBHOOK_BATCH_WINDOW_MS", "0"))  # 0 disables batching
+    WEBHOOK_BATCH_MAX = int(os.getenv("WEBHOOK_BATCH_MAX", "20"))
 
     # Job Processing
     MAX_CONCURRENT_JOBS = int(os.getenv("MAX_CONCURRENT_JOBS", "5"))
+    API_RUN_JOBS = os.getenv("API_RUN_JOBS", "false").lower() == "true"  # run submitted jobs in the API process
+    SCHEDULER_POLICY = os.getenv("SCHEDULER_POLICY", "fifo")  # fifo, priority or sejf (shortest expected job first)
+    SCHEDULER_AGING = float(os.getenv("SCHEDULER_AGING", "0.5"))  # sejf: expected seconds forgiven per second waited
+    ETA_STATE_PATH = os.getenv("ETA_STATE_PATH", "/tmp/video_gen/eta_state.json")
+    ETA_FORGETTING = float(os.getenv("ETA_FORGETTING", "0.995"))  # weight kept by older observations per new one
     JOB_TIMEOUT = int(os.getenv("JOB_TIMEOUT", "3600"))  # 1 hour in seconds
     MAX_RETRIES = int(os.getenv("MAX_RETRIES", "3"))
     RETRY_DELAY = int(os.getenv("RETRY_DELAY", "5"))  # seconds
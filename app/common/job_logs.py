@@ -0,0 +1,286 @@
+"""
+Bounded, append-only storage for job log lines.
+Each line gets a per-job sequence number so clients can read a range with
+read(job_id, after=seq). The file store keeps one directory of segment files
+per job and drops whole segments, oldest first, once a job exceeds its size
+cap; the Redis store keeps a capped list per job and can be shared between
+processes. Job status payloads carry only a short tail of recent lines.
+"""
+
+import os
+import re
+import json
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+logger = setup_logging("JobLogs")
+
+# What a store may raise when its backend is unavailable; callers drop the line
+# rather than fail the job (redis errors do not subclass OSError)
+LOG_STORE_ERRORS = (OSError,) + ((redis.RedisError,) if redis is not None else ())
+
+
+def _entry(seq: int, message: str, level: str) -> Dict[str, Any]:
+    return {
+        "seq": seq,
+        "level": level,
+        "message": message,
+        "timestamp": datetime.utcnow().isoformat(),
+    }
+
+
+def _page(job_id: str, entries: List[Dict[str, Any]], after: int, first_seq: int, last_seq: int, limit: int):
+    """Shape a range read; 'truncated' means lines after `after` were already dropped."""
+    return {
+        "job_id": job_id,
+        "entries": entries,
+        "first_seq": first_seq,
+        "last_seq": last_seq,
+        "next_after": entries[-1]["seq"] if entries else max(after, first_seq - 1),
+        "has_more": bool(entries) and len(entries) >= limit and entries[-1]["seq"] < last_seq,
+        "truncated": after + 1 < first_seq,
+    }
+
+
+class _Segment:
+    __slots__ = ("first_seq", "path", "size")
+
+    def __init__(self, first_seq: int, path: str, size: int = 0):
+        self.first_seq = first_seq
+        self.path = path
+        self.size = size
+
+
+class _FileJobLog:
+    def __init__(self):
+        self.segments: List[_Segment] = []
+        self.last_seq = 0
+        self.lock = threading.Lock()
+
+
+class FileJobLogStore:
+    """Segmented append-only log files under root/<job_id>/, capped per job."""
+
+    def __init__(
+        self,
+        root: str = Config.JOB_LOG_DIR,
+        max_bytes: int = Config.JOB_LOG_MAX_BYTES,
+        segment_bytes: Optional[int] = None,
+    ):
+        self.root = root
+        self.max_bytes = max(1, max_bytes)
+        self.segment_bytes = segment_bytes or max(4096, self.max_bytes // 8)
+        self._jobs: Dict[str, _FileJobLog] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _job_dir(self, job_id: str) -> str:
+        return os.path.join(self.root, re.sub(r"[^A-Za-z0-9_.-]", "_", job_id))
+
+    def _job(self, job_id: str) -> _FileJobLog:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = self._load(job_id)
+            return job
+
+    def _load(self, job_id: str) -> _FileJobLog:
+        """Rebuild the segment index from disk (e.g. after a restart)."""
+        job = _FileJobLog()
+        job_dir = self._job_dir(job_id)
+        if not os.path.isdir(job_dir):
+            return job
+        for name in sorted(os.listdir(job_dir)):
+            if name.endswith(".log"):
+                path = os.path.join(job_dir, name)
+                job.segments.append(_Segment(int(name[:-4]), path, os.path.getsize(path)))
+        if job.segments:
+            last = job.segments[-1]
+            job.last_seq = last.first_seq - 1
+            for entry in self._read_segment(last.path):
+                job.last_seq = entry["seq"]
+        return job
+
+    @staticmethod
+    def _read_segment(path: str):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # partial line from an interrupted write
+        except FileNotFoundError:
+            return
+
+    def append(self, job_id: str, message: str, level: str = "INFO") -> int:
+        """Append a line and return its sequence number."""
+        job = self._job(job_id)
+        with job.lock:
+            seq = job.last_seq + 1
+            line = json.dumps(_entry(seq, message, level)) + "\n"
+            if not job.segments or job.segments[-1].size >= self.segment_bytes:
+                job_dir = self._job_dir(job_id)
+                os.makedirs(job_dir, exist_ok=True)
+                job.segments.append(_Segment(seq, os.path.join(job_dir, f"{seq:012d}.log")))
+            segment = job.segments[-1]
+            with open(segment.path, "a", encoding="utf-8") as f:
+                f.write(line)
+            segment.size += len(line.encode("utf-8"))
+            job.last_seq = seq
+
+            # Drop whole segments, oldest first, but always keep the one being written
+            total = sum(s.size for s in job.segments)
+            while total > self.max_bytes and len(job.segments) > 1:
+                oldest = job.segments.pop(0)
+                total -= oldest.size
+                try:
+                    os.remove(oldest.path)
+                except OSError:
+                    pass
+            return seq
+
+    def read(self, job_id: str, after: int = 0, limit: int = 500) -> Dict[str, Any]:
+        """Lines with seq > after, oldest first, at most limit of them."""
+        job = self._job(job_id)
+        with job.lock:
+            segments = list(job.segments)
+            last_seq = job.last_seq
+
+        first_seq = segments[0].first_seq if segments else last_seq + 1
+        entries: List[Dict[str, Any]] = []
+        for i, segment in enumerate(segments):
+            next_first = segments[i + 1].first_seq if i + 1 < len(segments) else None
+            if next_first is not None and next_first <= after + 1:
+                continue
+            for entry in self._read_segment(segment.path):
+                if entry["seq"] > after:
+                    entries.append(entry)
+                    if len(entries) >= limit:
+                        return _page(job_id, entries, after, first_seq, last_seq, limit)
+        return _page(job_id, entries, after, first_seq, last_seq, limit)
+
+    def tail(self, job_id: str, count: int = Config.JOB_LOG_TAIL) -> List[Dict[str, Any]]:
+        """The most recent count lines."""
+        job = self._job(job_id)
+        with job.lock:
+            last_seq = job.last_seq
+        return self.read(job_id, after=max(0, last_seq - count), limit=count)["entries"]
+
+    def delete(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.lock.acquire()
+        try:
+            shutil.rmtree(self._job_dir(job_id), ignore_errors=True)
+        finally:
+            if job is not None:
+                job.lock.release()
+
+
+class RedisJobLogStore:
+    """Capped Redis list per job; sequence numbers come from a per-job counter."""
+
+    def __init__(self, client, max_lines: int = Config.JOB_LOG_MAX_LINES, ttl: int = Config.JOB_CACHE_TTL):
+        self.client = client
+        self.max_lines = max(1, max_lines)
+        self.ttl = ttl
+
+    @staticmethod
+    def _keys(job_id: str):
+        return f"video_gen:job_log:{job_id}", f"video_gen:job_log_seq:{job_id}"
+
+    def append(self, job_id: str, message: str, level: str = "INFO") -> int:
+        lines_key, seq_key = self._keys(job_id)
+        # Counter and list change in one transaction, so the list always holds
+        # consecutive sequence numbers ending at the counter and each line's
+        # seq follows from its position
+        entry = _entry(0, message, level)
+        del entry["seq"]
+        pipe = self.client.pipeline(transaction=True)
+        pipe.incr(seq_key)
+        pipe.rpush(lines_key, json.dumps(entry))
+        pipe.ltrim(lines_key, -self.max_lines, -1)
+        pipe.expire(lines_key, self.ttl)
+        pipe.expire(seq_key, self.ttl)
+        return int(pipe.execute()[0])
+
+    @staticmethod
+    def _decode(raw: List[bytes], first_seq: int) -> List[Dict[str, Any]]:
+        entries = []
+        for i, line in enumerate(raw):
+            entry = json.loads(line)
+            entry["seq"] = first_seq + i
+            entries.append(entry)
+        return entries
+
+    def read(self, job_id: str, after: int = 0, limit: int = 500) -> Dict[str, Any]:
+        lines_key, seq_key = self._keys(job_id)
+        window = {}
+
+        def fetch(pipe):
+            # Retried by redis-py if an append moves the window meanwhile
+            last_seq = int(pipe.get(seq_key) or 0)
+            first_seq = last_seq - pipe.llen(lines_key) + 1
+            window.update(first_seq=first_seq, last_seq=last_seq, start=max(0, after + 1 - first_seq))
+            pipe.multi()
+            pipe.lrange(lines_key, window["start"], window["start"] + limit - 1)
+
+        raw = self.client.transaction(fetch, seq_key)[0]
+        entries = self._decode(raw, window["first_seq"] + window["start"])
+        return _page(job_id, entries, after, window["first_seq"], window["last_seq"], limit)
+
+    def tail(self, job_id: str, count: int = Config.JOB_LOG_TAIL) -> List[Dict[str, Any]]:
+        lines_key, seq_key = self._keys(job_id)
+        pipe = self.client.pipeline(transaction=True)
+        pipe.get(seq_key)
+        pipe.lrange(lines_key, -count, -1)
+        last_seq, raw = pipe.execute()
+        return self._decode(raw, int(last_seq or 0) - len(raw) + 1)
+
+    def delete(self, job_id: str):
+        self.client.delete(*self._keys(job_id))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_job_log_store():
+    """Get the process-wide job log store selected by JOB_LOG_BACKEND."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = _create_store()
+        return _store
+
+
+def set_job_log_store(store):
+    """Override the process-wide store (tests, embedded deployments)."""
+    global _store
+    with _store_lock:
+        _store = store
+
+
+def _create_store():
+    if Config.JOB_LOG_BACKEND == "redis" and redis is not None:
+        try:
+            # socket_timeout keeps a stalled Redis from hanging the job thread
+            client = redis.from_url(Config.REDIS_URL, socket_connect_timeout=2, socket_timeout=5)
+            client.ping()
+            logger.info("Storing job logs in Redis")
+            return RedisJobLogStore(client)
+        except Exception as e:
+            logger.warning(f"Redis unavailable ({e}); storing job logs in {Config.JOB_LOG_DIR}")
+    return FileJobLogStore()
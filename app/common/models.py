@@ -7,6 +7,24 @@ from enum import Enum
 from dataclasses import dataclass, asdict, field
 import json
 import uuid
+import threading
+
+
+# Bumped whenever any JobProgress is created or changes, so a listing can
+# tell whether anything moved without looking at every job
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+def _bump_generation():
+    global _generation
+    with _generation_lock:
+        _generation += 1
+
+
+def progress_generation() -> int:
+    """Counter that changes whenever any job's progress changes."""
+    return _generation
 
 
 class JobStatus(str, Enum):
@@ -52,6 +70,8 @@ class VideoRequest:
     scene_count: Optional[int] = None
     callback_url: Optional[str] = None
     priority: int = 5  # 1-10, higher is more important
+    quality: str = "medium"  # render quality: low, medium, high
+    dedupe: bool = True  # reuse the result of an identical recent or running job
     created_at: datetime = field(default_factory=datetime.utcnow)
     updated_at: datetime = field(default_factory=datetime.utcnow)
 
@@ -69,11 +89,68 @@ class JobProgress:
     status: JobStatus = JobStatus.PENDING
     overall_progress: float = 0.0  # 0-100
     current_step: str = ""
-    logs: List[str] = field(default_factory=list)
+    logs: List[str] = field(default_factory=list)  # recent lines only; see add_log
     estimated_time_remaining: float = 0.0  # seconds
     scenes_processed: int = 0
     total_scenes: int = 0
     error: Optional[str] = None
+    version: int = 0  # bumped on every field assignment
+    log_seq: int = 0  # sequence of the newest line in the job log store
+
+    def __post_init__(self):
+        object.__setattr__(self, '_changed', threading.Condition())
+        object.__setattr__(self, '_json', (-1, b''))
+        _bump_generation()
+
+    def __setattr__(self, name: str, value: Any):
+        object.__setattr__(self, name, value)
+        if name != 'version' and '_changed' in self.__dict__:
+            self.touch()
+
+    def touch(self):
+        """Record a change made in place (e.g. appending to logs) and wake waiters."""
+        with self._changed:
+            object.__setattr__(self, 'version', self.version + 1)
+            self._changed.notify_all()
+        _bump_generation()
+
+    def add_log(self, message: str, level: str = 'INFO') -> int:
+        """Append a line to the job's log store, keeping only a short tail here."""
+        from app.common.config import Config
+        from app.common.job_logs import get_job_log_store
+
+        seq = get_job_log_store().append(self.job_id, message, level)
+        with self._changed:
+            self.logs.append(message)
+            # Slicing with -0 would keep everything, so JOB_LOG_TAIL=0 needs an explicit bound
+            del self.logs[:max(0, len(self.logs) - max(0, Config.JOB_LOG_TAIL))]
+            object.__setattr__(self, 'log_seq', max(seq, self.log_seq))
+        self.touch()
+        return seq
+
+    def wait_for_change(self, since: int, timeout: float) -> bool:
+        """Block until version differs from since; False on timeout."""
+        with self._changed:
+            return self._changed.wait_for(lambda: self.version != since, timeout)
+
+    @property
+    def etag(self) -> str:
+        """Entity tag (unquoted) for the current version."""
+        return f'{self.job_id}-{self.version}'
+
+    def to_json(self) -> bytes:
+        """Serialized to_dict(), cached until the next change."""
+        version, body = self._json
+        if version != self.version:
+            with self._changed:
+                version = self.version
+                body = json.dumps(self.to_dict()).encode()
+            object.__setattr__(self, '_json', (version, body))
+        return body
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.status in (JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED)
 
     def to_dict(self) -> Dict[str, Any]:
         data = asdict(self)
@@ -0,0 +1,407 @@
+"""
+Load-aware HTTP client for calls between services.
+Each logical service may have several replicas (comma-separated URLs). Calls
+pick a replica by power-of-two choices on the load it last reported through
+/health, skip replicas whose circuit breaker is open, retry elsewhere when a
+replica is overloaded or unreachable, and can hedge idempotent requests by
+sending a second copy to another replica if the first is slow. Requests that
+are not idempotent are only retried when they provably never ran (connection
+refused, circuit open, or a 503 overload response), so a POST such as
+/process_audio is never executed twice.
+"""
+
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+    HTTPAdapter = None
+
+try:
+    from urllib3.exceptions import NewConnectionError
+except ImportError:
+    NewConnectionError = None
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+class ServiceUnavailableError(Exception):
+    """Raised when no replica of a service could handle a request."""
+
+
+# Gateway errors from a proxy mean the replica (or the path to it) is unhealthy;
+# other 5xx, and a 504 the replica sends itself with a JSON body (e.g. the
+# Whisper worker timing out a slow task), come from a replica that is up
+_BREAKER_STATUSES = (502, 504)
+
+
+def _never_sent(error: Exception) -> bool:
+    """Whether a transport error happened before the request reached the replica."""
+    if isinstance(error, ConnectionRefusedError):
+        return True
+    if requests is None:
+        return False
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if isinstance(error, requests.exceptions.ConnectionError) and error.args:
+        reason = getattr(error.args[0], "reason", error.args[0])
+        if isinstance(reason, ConnectionRefusedError):
+            return True
+        return NewConnectionError is not None and isinstance(reason, NewConnectionError)
+    return False
+
+
+def _json_body(response) -> Tuple[bool, Any]:
+    """(parsed, body); a non-JSON body (e.g. a proxy's HTML error page) is not parsed."""
+    if response.status_code == 204:
+        return True, None
+    try:
+        return True, response.json()
+    except ValueError:
+        return False, None
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures and lets one probe through after a cooldown."""
+
+    def __init__(
+        self,
+        failure_threshold: int = Config.SERVICE_BREAKER_THRESHOLD,
+        reset_timeout: float = Config.SERVICE_BREAKER_RESET,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; claims the probe when half open."""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def available(self) -> bool:
+        """Like allow() but without claiming the half-open probe."""
+        with self._lock:
+            state = self._state()
+            return state == "closed" or (state == "half_open" and not self._probing)
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probing = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+
+
+class Endpoint:
+    """One replica of a service and what we know about its load."""
+
+    def __init__(self, url: str, breaker: Optional[CircuitBreaker] = None):
+        self.url = url.rstrip("/")
+        self.breaker = breaker or CircuitBreaker()
+        self.queue_depth = 0
+        self.busy_slots = 0
+        self.inflight = 0
+        self.checked_at: Optional[float] = None
+
+    @property
+    def load(self) -> int:
+        """Reported backlog plus requests we have outstanding against it."""
+        return self.queue_depth + self.busy_slots + self.inflight
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.breaker.state,
+            "queue_depth": self.queue_depth,
+            "busy_slots": self.busy_slots,
+            "inflight": self.inflight,
+        }
+
+
+class _LocalResponse:
+    """Minimal response object returned by LocalTransport."""
+
+    def __init__(self, status_code: int, data: Any, body: bytes = b""):
+        self.status_code = status_code
+        self._data = data
+        self._body = body
+
+    def json(self) -> Any:
+        if self._data is None and self._body.strip():
+            raise ValueError("Response body is not JSON")
+        return self._data
+
+
+class LocalTransport:
+    """
+    Routes requests to in-process WSGI apps by base URL instead of the network.
+    Used to wire services together in tests and single-process development.
+    """
+
+    def __init__(self, apps: Dict[str, Any]):
+        self.clients = {url.rstrip("/"): app.test_client() for url, app in apps.items()}
+
+    def request(self, method: str, url: str, json: Any = None, timeout: Optional[float] = None):
+        for base, client in self.clients.items():
+            if url.startswith(base):
+                response = client.open(url[len(base):] or "/", method=method, json=json)
+                return _LocalResponse(response.status_code, response.get_json(silent=True), response.get_data())
+        raise ConnectionRefusedError(f"No local service registered for {url}")
+
+
+def _build_session(pool_size: int):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+class ServiceClient:
+    """Client for one logical service backed by one or more replicas."""
+
+    def __init__(
+        self,
+        name: str,
+        urls: List[str],
+        transport: Any = None,
+        timeout: float = 30.0,
+        hedge_delay: float = Config.SERVICE_HEDGE_DELAY_MS / 1000.0,
+        health_interval: float = Config.SERVICE_HEALTH_INTERVAL,
+        pool_size: int = 10,
+    ):
+        self.logger = setup_logging(f"ServiceClient.{name}")
+        self.name = name
+        self.endpoints = [Endpoint(url) for url in urls if url]
+        if not self.endpoints:
+            raise ValueError(f"No endpoints configured for service '{name}'")
+        if transport is None:
+            if requests is None:
+                raise ImportError("requests is required for service calls")
+            transport = _build_session(pool_size)
+        self.transport = transport
+        self.timeout = timeout
+        self.hedge_delay = hedge_delay
+        self.health_interval = health_interval
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix=f"{name}-call")
+
+    def refresh_health(self, force: bool = False):
+        """Poll /health on replicas whose load report is stale."""
+        now = time.monotonic()
+        for endpoint in self.endpoints:
+            if not force and endpoint.checked_at is not None and now - endpoint.checked_at < self.health_interval:
+                continue
+            if not endpoint.breaker.available():
+                continue
+            endpoint.checked_at = now
+            try:
+                response = self.transport.request("GET", f"{endpoint.url}/health", timeout=min(self.timeout, 2.0))
+                data = response.json() or {}
+                endpoint.queue_depth = int(data.get("queue_depth", 0))
+                endpoint.busy_slots = int(data.get("busy_slots", 0))
+                if response.status_code >= 500:
+                    endpoint.breaker.record_failure()
+            except Exception as e:
+                self.logger.warning(f"Health check failed for {endpoint.url}: {str(e)}")
+                endpoint.breaker.record_failure()
+
+    def choose(self, exclude: Tuple[Endpoint, ...] = ()) -> Optional[Endpoint]:
+        """Power of two choices among replicas that are not excluded or broken."""
+        candidates = [e for e in self.endpoints if e not in exclude and e.breaker.available()]
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        first, second = random.sample(candidates, 2)
+        return first if first.load <= second.load else second
+
+    def request(
+        self,
+        method: str,
+        path: str,
+        json: Any = None,
+        idempotent: bool = False,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        """
+        Send a request to the least-loaded replica and return its JSON body.
+        Overloaded (503) and unreachable replicas are skipped in favour of the
+        next choice; idempotent requests are hedged after hedge_delay. Other
+        failures are retried elsewhere only for idempotent requests, since the
+        replica may already have done the work.
+        """
+        self.refresh_health()
+        tried: Tuple[Endpoint, ...] = ()
+        last_error = "no replicas available"
+
+        while True:
+            endpoint = self.choose(tried)
+            if endpoint is None:
+                raise ServiceUnavailableError(f"{self.name}: {last_error}")
+            tried += (endpoint,)
+
+            hedge = None
+            if idempotent and self.hedge_delay > 0:
+                hedge = self.choose(tried)
+
+            if hedge is None:
+                ok, result, never_ran = self._send(endpoint, method, path, json, timeout)
+            else:
+                tried += (hedge,)
+                ok, result, never_ran = self._send_hedged(endpoint, hedge, method, path, json, timeout)
+
+            if ok:
+                return result
+            if not idempotent and not never_ran:
+                raise ServiceUnavailableError(f"{self.name}: {result} (not retried: request may have run)")
+            last_error = result
+
+    def _send_hedged(
+        self,
+        primary: Endpoint,
+        backup: Endpoint,
+        method: str,
+        path: str,
+        json: Any,
+        timeout: Optional[float],
+    ) -> Tuple[bool, Any, bool]:
+        """
+        Send to primary, and to backup too if primary has not answered in time.
+        A primary that fails before the hedge delay fails over to backup at once,
+        since the caller counts backup as tried.
+        """
+        futures = [self._executor.submit(self._send, primary, method, path, json, timeout)]
+        done, _ = wait(futures, timeout=self.hedge_delay)
+        if done and futures[0].result()[0]:
+            return futures[0].result()
+        self.logger.debug(f"{'Failing over' if done else 'Hedging'} {method} {path} to {backup.url}")
+        futures.append(self._executor.submit(self._send, backup, method, path, json, timeout))
+
+        pending = set(futures)
+        last: Tuple[bool, Any, bool] = (False, "no response", False)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                last = future.result()
+                if last[0]:
+                    return last
+        return last
+
+    def _send(
+        self,
+        endpoint: Endpoint,
+        method: str,
+        path: str,
+        json: Any,
+        timeout: Optional[float],
+    ) -> Tuple[bool, Any, bool]:
+        """
+        One attempt against one replica; returns (ok, body or error, never_ran),
+        where never_ran means the replica provably did not start the request.
+        """
+        if not endpoint.breaker.allow():
+            return False, f"circuit open for {endpoint.url}", True
+
+        with self._lock:
+            endpoint.inflight += 1
+        try:
+            response = self.transport.request(
+                method, f"{endpoint.url}{path}", json=json, timeout=timeout or self.timeout,
+            )
+        except Exception as e:
+            endpoint.breaker.record_failure()
+            self.logger.warning(f"{method} {endpoint.url}{path} failed: {str(e)}")
+            return False, str(e), _never_sent(e)
+        finally:
+            with self._lock:
+                endpoint.inflight -= 1
+
+        parsed, data = _json_body(response)
+        if response.status_code == 503:
+            # Overloaded, not broken: remember its backlog and go elsewhere
+            endpoint.breaker.record_success()
+            if isinstance(data, dict):
+                endpoint.queue_depth = int(data.get("queue_depth", endpoint.queue_depth + 1))
+                endpoint.busy_slots = int(data.get("busy_slots", endpoint.busy_slots))
+            return False, f"{endpoint.url} overloaded", True
+        if response.status_code >= 500:
+            if response.status_code in _BREAKER_STATUSES and not parsed:
+                endpoint.breaker.record_failure()
+            else:
+                # The replica answered; one failing handler should not cut off its other traffic
+                endpoint.breaker.record_success()
+            return False, f"{endpoint.url} returned {response.status_code}", False
+
+        endpoint.breaker.record_success()
+        if not parsed:
+            return False, f"{endpoint.url} returned a non-JSON {response.status_code} response", False
+        return True, data, False
+
+    def get(self, path: str, **kwargs) -> Any:
+        return self.request("GET", path, idempotent=True, **kwargs)
+
+    def post(self, path: str, json: Any = None, **kwargs) -> Any:
+        return self.request("POST", path, json=json, **kwargs)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        return [endpoint.to_dict() for endpoint in self.endpoints]
+
+
+_clients: Dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def _service_urls(name: str) -> List[str]:
+    urls = {
+        "retriever": Config.RETRIEVER_URL,
+        "whisper": Config.WHISPER_URL,
+        "renderer": Config.RENDERER_URL,
+    }.get(name)
+    if urls is None:
+        raise ValueError(f"Unknown service: {name}")
+    return [url.strip() for url in urls.split(",") if url.strip()]
+
+
+def get_service_client(name: str) -> ServiceClient:
+    """Get the shared client for a service configured by its *_URL setting."""
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = ServiceClient(name, _service_urls(name))
+        return _clients[name]
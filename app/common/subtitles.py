@@ -0,0 +1,227 @@
+"""
+Subtitle cue generation and SRT/VTT/ASS writers.
+Cues are streamed from word timings with line breaking constrained by
+characters per line and reading speed, and written directly to files
+without building intermediate lists.
+"""
+
+import os
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+from app.common.models import Subtitle
+
+
+MAX_CHARS_PER_LINE = 42
+MAX_LINES = 2
+MAX_CHARS_PER_SECOND = 17.0
+MIN_CUE_SECONDS = 1.0
+MAX_CUE_SECONDS = 7.0
+MAX_WORD_GAP = 0.8  # seconds of silence that always ends a cue
+MIN_CUE_GAP = 0.08  # seconds kept free between consecutive cues
+
+
+def _balanced_split(words: List[str], lines: int) -> List[str]:
+    """Split words into exactly `lines` lines, minimizing the longest one."""
+    if lines == 1:
+        return [" ".join(words)]
+    best = None
+    for split in range(1, len(words) - lines + 2):
+        rest = _balanced_split(words[split:], lines - 1)
+        candidate = [" ".join(words[:split])] + rest
+        longest = max(len(line) for line in candidate)
+        if best is None or longest < best[0]:
+            best = (longest, candidate)
+    return best[1]
+
+
+def break_lines(
+    words: List[str],
+    max_chars: int = MAX_CHARS_PER_LINE,
+    max_lines: int = MAX_LINES,
+) -> Optional[List[str]]:
+    """
+    Split words into as few lines as fit max_chars, at most max_lines,
+    balancing their lengths. Returns None when the words do not fit; a single
+    word longer than a line is returned as its own line.
+    """
+    text = " ".join(words)
+    if len(text) <= max_chars or len(words) < 2:
+        return [text]
+
+    for lines in range(2, min(max_lines, len(words)) + 1):
+        split = _balanced_split(words, lines)
+        if max(len(line) for line in split) <= max_chars:
+            return split
+    return None
+
+
+def generate_cues(
+    words: Iterable[Dict[str, Any]],
+    max_chars_per_line: int = MAX_CHARS_PER_LINE,
+    max_lines: int = MAX_LINES,
+    max_cps: float = MAX_CHARS_PER_SECOND,
+    min_duration: float = MIN_CUE_SECONDS,
+    max_duration: float = MAX_CUE_SECONDS,
+    speaker: str = "narrator",
+) -> Iterator[Subtitle]:
+    """
+    Stream subtitle cues from word timings ({"text", "start", "end"} in seconds).
+    A cue closes when its text would no longer fit, when it runs too long,
+    at long pauses, at sentence ends, or at clause ends once half full. Each
+    cue is extended toward the next one so it stays on screen long enough to
+    be read at max_cps.
+    """
+    max_chars = max_chars_per_line * max_lines
+    current: List[str] = []
+    start = end = 0.0
+    pending: Optional[Subtitle] = None
+
+    def close() -> Subtitle:
+        text = "\n".join(break_lines(current, max_chars_per_line, max_lines) or [" ".join(current)])
+        return Subtitle(text=text, start_time=start * 1000, end_time=end * 1000, speaker=speaker)
+
+    def settle(cue: Subtitle, next_start: Optional[float]) -> Subtitle:
+        """Stretch a cue for readability without overlapping the next one."""
+        chars = len(cue.text.replace("\n", " "))
+        needed = max(min_duration, chars / max_cps) * 1000
+        wanted = cue.start_time + needed
+        if cue.end_time < wanted:
+            limit = wanted if next_start is None else min(wanted, next_start * 1000 - MIN_CUE_GAP * 1000)
+            cue.end_time = max(cue.end_time, limit)
+        cue.start_time = int(round(cue.start_time))
+        cue.end_time = int(round(cue.end_time))
+        return cue
+
+    for word in words:
+        text = str(word.get("text", "")).strip()
+        if not text:
+            continue
+        w_start = float(word.get("start", end))
+        w_end = float(word.get("end", w_start))
+
+        if current:
+            length = len(" ".join(current)) + 1 + len(text)
+            if (
+                length > max_chars
+                or break_lines(current + [text], max_chars_per_line, max_lines) is None
+                or w_end - start > max_duration
+                or w_start - end > MAX_WORD_GAP
+                or current[-1].endswith((".", "!", "?"))
+                or (current[-1].endswith((",", ";", ":")) and length > max_chars // 2)
+            ):
+                cue = close()
+                if pending is not None:
+                    yield settle(pending, cue.start_time / 1000)
+                pending = cue
+                current = []
+
+        if not current:
+            start = w_start
+        current.append(text)
+        end = w_end
+
+    if current:
+        cue = close()
+        if pending is not None:
+            yield settle(pending, cue.start_time / 1000)
+        pending = cue
+    if pending is not None:
+        yield settle(pending, None)
+
+
+def cues_from_dicts(subtitles: Iterable[Dict[str, Any]]) -> Iterator[Subtitle]:
+    """Adapt serialized Subtitle dicts (as stored on storyboards) back to cues."""
+    for item in subtitles:
+        yield Subtitle(
+            text=item.get("text", ""),
+            start_time=item.get("start_time", 0),
+            end_time=item.get("end_time", 0),
+            speaker=item.get("speaker", "narrator"),
+        )
+
+
+def _timestamp(ms: float, separator: str) -> str:
+    ms = int(round(ms))
+    hours, ms = divmod(ms, 3600000)
+    minutes, ms = divmod(ms, 60000)
+    seconds, ms = divmod(ms, 1000)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}{separator}{ms:03d}"
+
+
+def _ass_timestamp(ms: float) -> str:
+    centis = int(round(ms / 10))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    seconds, centis = divmod(centis, 100)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}.{centis:02d}"
+
+
+def write_srt(cues: Iterable[Subtitle], fp: IO[str]) -> int:
+    """Write cues as SubRip. Returns the number of cues written."""
+    count = 0
+    for count, cue in enumerate(cues, start=1):
+        fp.write(f"{count}\n")
+        fp.write(f"{_timestamp(cue.start_time, ',')} --> {_timestamp(cue.end_time, ',')}\n")
+        fp.write(f"{cue.text}\n\n")
+    return count
+
+
+def write_vtt(cues: Iterable[Subtitle], fp: IO[str]) -> int:
+    """Write cues as WebVTT. Returns the number of cues written."""
+    fp.write("WEBVTT\n\n")
+    count = 0
+    for count, cue in enumerate(cues, start=1):
+        fp.write(f"{_timestamp(cue.start_time, '.')} --> {_timestamp(cue.end_time, '.')}\n")
+        fp.write(f"{cue.text}\n\n")
+    return count
+
+
+def write_ass(
+    cues: Iterable[Subtitle],
+    fp: IO[str],
+    width: int = 1920,
+    height: int = 1080,
+    font: str = "DejaVu Sans",
+    font_size: int = 48,
+) -> int:
+    """Write cues as Advanced SubStation Alpha for burn-in. Returns the cue count."""
+    fp.write(
+        "[Script Info]\n"
+        "ScriptType: v4.00+\n"
+        f"PlayResX: {width}\n"
+        f"PlayResY: {height}\n"
+        "WrapStyle: 2\n\n"
+        "[V4+ Styles]\n"
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, "
+        "BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, "
+        "BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n"
+        f"Style: Default,{font},{font_size},&H00FFFFFF,&H000000FF,&H00000000,&H80000000,"
+        "0,0,0,0,100,100,0,0,1,2,1,2,60,60,60,1\n\n"
+        "[Events]\n"
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+    count = 0
+    for count, cue in enumerate(cues, start=1):
+        text = cue.text.replace("{", "(").replace("}", ")").replace("\n", "\\N")
+        fp.write(
+            f"Dialogue: 0,{_ass_timestamp(cue.start_time)},{_ass_timestamp(cue.end_time)},"
+            f"Default,{cue.speaker},0,0,0,,{text}\n"
+        )
+    return count
+
+
+_WRITERS = {
+    "srt": write_srt,
+    "vtt": write_vtt,
+    "ass": write_ass,
+}
+
+
+def write_subtitles(cues: Iterable[Subtitle], path: str, fmt: Optional[str] = None, **options) -> int:
+    """Write cues to path in the format given by fmt or the file extension."""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip(".")).lower()
+    writer = _WRITERS.get(fmt)
+    if writer is None:
+        raise ValueError(f"Unsupported subtitle format: {fmt}")
+    with open(path, "w", encoding="utf-8") as fp:
+        return writer(cues, fp, **options)
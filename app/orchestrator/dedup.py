@@ -0,0 +1,148 @@
+"""
+Request fingerprinting and result deduplication.
+Jobs whose requests normalize to the same fingerprint produce the same video,
+so a new job can reuse the result of a recently completed one, or wait on an
+identical job that is still running, instead of going through the pipeline.
+"""
+
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from app.common.config import Config
+from app.common.models import JobProgress, VideoRequest
+
+
+def request_fingerprint(job_request: VideoRequest) -> str:
+    """Stable hash of the request fields that determine the output video."""
+    canonical = {
+        "prompt": " ".join(job_request.prompt.split()),
+        "duration_target": float(job_request.duration_target),
+        "style": job_request.style.strip().lower(),
+        "voice": job_request.voice.strip().lower(),
+        "language": job_request.language.strip().lower(),
+        "scene_count": job_request.scene_count,
+        "quality": job_request.quality,
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """A job currently producing the result for a fingerprint."""
+
+    def __init__(self, job_id: str, progress: Optional[JobProgress]):
+        self.job_id = job_id
+        self.progress = progress
+        self.done = threading.Event()
+        self.result: Optional[Dict[str, Any]] = None
+        self._callbacks: List[Callable[["_Flight"], None]] = []
+        self._lock = threading.Lock()
+
+    def add_done_callback(self, fn: Callable[["_Flight"], None]):
+        """Call fn(flight) once the leader finishes, or right away if it already has."""
+        with self._lock:
+            if not self.done.is_set():
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def finish(self, result: Optional[Dict[str, Any]]):
+        """Publish the leader's result (None if it failed) and run the callbacks on this thread."""
+        with self._lock:
+            self.result = result
+            self.done.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            fn(self)
+
+
+class Claim:
+    """Outcome of claiming a fingerprint: lead the work, reuse a result, or attach."""
+
+    LEAD = "lead"
+    COMPLETED = "completed"
+    ATTACH = "attach"
+
+    def __init__(self, kind: str, job_id: str, result: Optional[Dict[str, Any]] = None, flight: Optional[_Flight] = None):
+        self.kind = kind
+        self.job_id = job_id  # the job that produced (or is producing) the result
+        self.result = result
+        self.flight = flight
+
+
+class RequestDeduplicator:
+    """Tracks in-flight and recently completed jobs by request fingerprint."""
+
+    def __init__(
+        self,
+        window: float = Config.DEDUP_WINDOW_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.window = window
+        self.clock = clock
+        self._completed: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, fingerprint: str, job_id: str, progress: Optional[JobProgress] = None) -> Claim:
+        """Reuse a fresh result, attach to an in-flight job, or become the job that runs."""
+        with self._lock:
+            self._expire()
+            completed = self._completed.get(fingerprint)
+            if completed is not None:
+                source_id, result, _ = completed
+                return Claim(Claim.COMPLETED, source_id, result=result)
+
+            flight = self._inflight.get(fingerprint)
+            if flight is not None:
+                return Claim(Claim.ATTACH, flight.job_id, flight=flight)
+
+            flight = self._inflight[fingerprint] = _Flight(job_id, progress)
+            return Claim(Claim.LEAD, job_id, flight=flight)
+
+    def complete(self, fingerprint: str, job_id: str, result: Dict[str, Any]):
+        """Publish the leader's result to attached jobs and keep it for the freshness window."""
+        with self._lock:
+            flight = self._inflight.get(fingerprint)
+            if flight is not None and flight.job_id == job_id:
+                del self._inflight[fingerprint]
+            if self.window > 0:
+                self._completed[fingerprint] = (job_id, result, self.clock())
+                self._completed.move_to_end(fingerprint)
+        if flight is not None:
+            flight.finish(result)
+
+    def fail(self, fingerprint: str, job_id: str):
+        """Release attached jobs without a result; one of them will run instead."""
+        with self._lock:
+            flight = self._inflight.get(fingerprint)
+            if flight is None or flight.job_id != job_id:
+                return
+            del self._inflight[fingerprint]
+        flight.finish(None)
+
+    def forget(self, fingerprint: str, job_id: Optional[str] = None):
+        """
+        Drop a remembered result (e.g. after its output was deleted or edited).
+        With job_id, only drop it if that job produced it.
+        """
+        with self._lock:
+            completed = self._completed.get(fingerprint)
+            if completed is not None and (job_id is None or completed[0] == job_id):
+                del self._completed[fingerprint]
+
+    def _expire(self):
+        now = self.clock()
+        while self._completed:
+            fingerprint, (_, _, finished_at) = next(iter(self._completed.items()))
+            if now - finished_at <= self.window:
+                break
+            del self._completed[fingerprint]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"in_flight": len(self._inflight), "completed": len(self._completed)}
@@ -0,0 +1,184 @@
+"""
+Stage duration estimates learned from completed jobs.
+Each pipeline stage has its own recursive least squares model over a few job
+features (scene count, target duration, render quality, fraction of clips
+already in the clip store). Models update online with a forgetting factor, so
+estimates follow changes in load and hardware, and persist to a small JSON
+file. Estimates drive estimated_time_remaining, overall_progress and the
+shortest-expected-job-first scheduling policy.
+"""
+
+import os
+import json
+import math
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from app.common.config import Config
+from app.common.models import JobStatus, VideoRequest
+from app.common.utils import setup_logging
+
+
+STAGES = (
+    JobStatus.SCENE_PLANNING.value,
+    JobStatus.ASSET_RETRIEVAL.value,
+    JobStatus.AUDIO_PROCESSING.value,
+    JobStatus.RENDERING.value,
+)
+
+# Seconds per scene assumed for a stage before it has been observed
+_PRIOR_SECONDS_PER_SCENE = {
+    JobStatus.SCENE_PLANNING.value: 0.1,
+    JobStatus.ASSET_RETRIEVAL.value: 2.0,
+    JobStatus.AUDIO_PROCESSING.value: 1.5,
+    JobStatus.RENDERING.value: 4.0,
+}
+
+FEATURES = ("bias", "scenes", "duration_minutes", "quality_low", "quality_high", "clip_cache_hits")
+
+
+def job_features(job_request: VideoRequest, scene_count: Optional[int] = None, cache_hit_ratio: float = 0.0) -> List[float]:
+    """Feature vector for a job; scene count defaults to the planner's estimate."""
+    duration = float(job_request.duration_target)
+    if scene_count is None:
+        scene_count = job_request.scene_count or max(2, int(duration // 5))
+    quality = getattr(job_request, "quality", "medium")
+    return [
+        1.0,
+        float(scene_count),
+        duration / 60.0,
+        1.0 if quality == "low" else 0.0,
+        1.0 if quality == "high" else 0.0,
+        float(cache_hit_ratio),
+    ]
+
+
+_INITIAL_COVARIANCE = 1000.0
+
+
+class _StageModel:
+    """
+    Recursive least squares with exponential forgetting. Forgetting inflates
+    the covariance in directions the data never excites (a quality nobody
+    requests), so each variance is capped at its initial value to prevent windup.
+    """
+
+    def __init__(self, size: int, forgetting: float):
+        self.forgetting = forgetting
+        self.theta = [0.0] * size
+        self.p = [[_INITIAL_COVARIANCE if i == j else 0.0 for j in range(size)] for i in range(size)]
+        self.count = 0
+        self.mean_per_scene = 0.0
+
+    def predict(self, x: Sequence[float]) -> float:
+        return sum(t * v for t, v in zip(self.theta, x))
+
+    def update(self, x: Sequence[float], y: float):
+        px = [sum(row[j] * x[j] for j in range(len(x))) for row in self.p]
+        denom = self.forgetting + sum(x[i] * px[i] for i in range(len(x)))
+        gain = [v / denom for v in px]
+        error = y - self.predict(x)
+        self.theta = [t + g * error for t, g in zip(self.theta, gain)]
+        self.p = [
+            [(self.p[i][j] - gain[i] * px[j]) / self.forgetting for j in range(len(x))]
+            for i in range(len(x))
+        ]
+        # P <- D P D with D shrinking only the wound-up variances; keeps P positive semidefinite
+        scale = [min(1.0, math.sqrt(_INITIAL_COVARIANCE / self.p[i][i])) if self.p[i][i] > 0 else 1.0
+                 for i in range(len(x))]
+        if any(v < 1.0 for v in scale):
+            self.p = [[self.p[i][j] * scale[i] * scale[j] for j in range(len(x))] for i in range(len(x))]
+        self.count += 1
+        per_scene = y / max(1.0, x[1])
+        self.mean_per_scene += (per_scene - self.mean_per_scene) / min(self.count, 20)
+
+    def to_dict(self) -> Dict:
+        return {"theta": self.theta, "p": self.p, "count": self.count, "mean_per_scene": self.mean_per_scene}
+
+    def load(self, data: Dict):
+        if len(data.get("theta", [])) != len(self.theta):
+            return  # feature set changed; start over
+        self.theta = data["theta"]
+        self.p = data["p"]
+        self.count = data.get("count", 0)
+        self.mean_per_scene = data.get("mean_per_scene", 0.0)
+
+
+class StageEstimator:
+    """Per-stage duration models with ETA and progress helpers."""
+
+    def __init__(
+        self,
+        state_path: Optional[str] = Config.ETA_STATE_PATH,
+        forgetting: float = Config.ETA_FORGETTING,
+    ):
+        self.logger = setup_logging("StageEstimator")
+        self.state_path = state_path
+        self.models = {stage: _StageModel(len(FEATURES), forgetting) for stage in STAGES}
+        # Typical share of clips already stored, assumed until a job's assets are known
+        self.cache_hit_ratio = 0.0
+        self._lock = threading.Lock()
+        if state_path and os.path.exists(state_path):
+            try:
+                with open(state_path, "r") as f:
+                    state = json.load(f)
+                for stage, data in state.get("stages", {}).items():
+                    if stage in self.models:
+                        self.models[stage].load(data)
+                self.cache_hit_ratio = state.get("cache_hit_ratio", 0.0)
+            except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+                self.logger.warning(f"Ignoring unreadable estimator state {state_path}: {str(e)}")
+
+    def predict(self, stage: str, x: Sequence[float]) -> float:
+        """Expected seconds for a stage. Falls back to per-scene averages until the model has enough data."""
+        with self._lock:
+            model = self.models[stage]
+            if model.count >= len(FEATURES):
+                estimate = model.predict(x)
+            elif model.count:
+                estimate = model.mean_per_scene * max(1.0, x[1])
+            else:
+                estimate = _PRIOR_SECONDS_PER_SCENE[stage] * max(1.0, x[1])
+        return max(0.0, estimate)
+
+    def expected_total(self, x: Sequence[float]) -> float:
+        return sum(self.predict(stage, x) for stage in STAGES)
+
+    def remaining(self, stage: str, x: Sequence[float], elapsed_in_stage: float = 0.0) -> float:
+        """Seconds left: the rest of the current stage plus all later stages."""
+        index = STAGES.index(stage)
+        current = max(0.0, self.predict(stage, x) - elapsed_in_stage)
+        return current + sum(self.predict(later, x) for later in STAGES[index + 1:])
+
+    def progress(self, stage: str, x: Sequence[float], elapsed_in_stage: float = 0.0) -> float:
+        """Percent of the job's expected work done, capped below 100 until completion."""
+        index = STAGES.index(stage)
+        done = sum(self.predict(earlier, x) for earlier in STAGES[:index])
+        done += min(elapsed_in_stage, self.predict(stage, x))
+        total = self.expected_total(x)
+        if total <= 0:
+            return 100.0 * index / len(STAGES)
+        return min(99.0, 100.0 * done / total)
+
+    def observe(self, stage: str, x: Sequence[float], seconds: float):
+        with self._lock:
+            self.models[stage].update(list(x), seconds)
+
+    def observe_cache_hits(self, ratio: float):
+        with self._lock:
+            self.cache_hit_ratio += 0.1 * (ratio - self.cache_hit_ratio)
+
+    def save(self):
+        """Write the models atomically so restarts keep what was learned."""
+        if not self.state_path:
+            return
+        with self._lock:
+            state = {
+                "stages": {stage: model.to_dict() for stage, model in self.models.items()},
+                "cache_hit_ratio": self.cache_hit_ratio,
+            }
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
@@ -2,6 +2,7 @@
 Orchestrator service for job management, scene planning, and pipeline coordination.
 """
 
+import os
 import json
 import time
 from typing import List, Dict, Any, Optional
@@ -9,11 +10,6 @@ from datetime import datetime
 import re
 import threading
 
-try:
-    import requests
-except ImportError:
-    requests = None
-
 from app.common.models import (
     VideoRequest,
     Scene,
@@ -25,11 +21,53 @@ from app.common.models import (
 )
 from app.common.config import Config
 from app.common.utils import setup_logging, log_job_event, job_cache
+from app.common.job_logs import LOG_STORE_ERRORS
+from app.common.service_client import get_service_client, ServiceUnavailableError
+from app.orchestrator.webhooks import get_webhook_dispatcher
+from app.retriever.main import get_retriever_service
+from app.orchestrator.dedup import Claim, RequestDeduplicator, request_fingerprint
+from app.orchestrator.warmer import PredictiveWarmer
+from app.orchestrator.estimator import StageEstimator, job_features
+from app.orchestrator.scheduler import JobScheduler
+from app.orchestrator.storyboard_edit import (
+    StoryboardDiff,
+    apply_storyboard_patch,
+    diff_storyboards,
+    place_narration,
+    rebuild_audio_segments,
+    rebuild_subtitles,
+    scenes_to_narrate,
+)
+
+try:
+    from app.websocket.events import WebSocketEventManager
+except ImportError:
+    WebSocketEventManager = None
 
 
 logger = setup_logging("Orchestrator")
 
 
+def storyboard_narration(scenes: List[Dict[str, Any]]) -> str:
+    """The narration script for a storyboard's scenes, as sent to TTS."""
+    return " ".join(
+        scene.get("narration") or scene.get("description", "")
+        for scene in scenes
+    ).strip()
+
+
+def apply_scene_timings(storyboard: Dict[str, Any], timed_scenes: List[Dict[str, Any]]):
+    """Copy measured scene durations and timeline positions onto a storyboard, matched by scene id."""
+    timings = {scene["id"]: scene for scene in timed_scenes if scene.get("id")}
+    for scene in storyboard.get("scenes", []):
+        timed = timings.get(scene.get("id"))
+        if timed is not None:
+            for key in ("duration", "start_time", "end_time"):
+                scene[key] = timed[key]
+    if storyboard.get("scenes"):
+        storyboard["total_duration"] = storyboard["scenes"][-1]["end_time"]
+
+
 class ScenePlanner:
     """Plans video scenes from text prompts using NLP-inspired heuristics."""
 
@@ -95,8 +133,8 @@ class ScenePlanner:
             w.strip(',.!?;:') for w in words
             if len(w) > 3 and w.lower() not in stop_words
         ]
-        # Return unique keywords, up to max
-        return list(set(keywords))[:max_keywords]
+        # Unique keywords in prompt order, so every process builds the same search queries
+        return list(dict.fromkeys(k for k in keywords if k))[:max_keywords]
 
     def _determine_shot_type(self, text: str) -> str:
         """Determine shot type based on text cues."""
@@ -122,42 +160,408 @@ class JobOrchestrator:
         self.scene_planner = ScenePlanner()
         self.active_jobs: Dict[str, Dict[str, Any]] = {}
         self._lock = threading.Lock()
+        self.deduplicator = RequestDeduplicator()
+        # Leading job id -> progress of the identical jobs attached to it
+        self._followers: Dict[str, List[JobProgress]] = {}
+        # Warms popular clips only while fewer than PREFETCH_IDLE_JOBS jobs are running
+        self.warmer = PredictiveWarmer(
+            busy=lambda: self.running_jobs() >= Config.PREFETCH_IDLE_JOBS
+        )
+        self.estimator = StageEstimator()
+        self.scheduler = JobScheduler(run=self.orchestrate_job, estimate=self.expected_duration)
+
+    def submit(self, job_request: VideoRequest, job_progress: JobProgress) -> float:
+        """Queue a job for the worker pool; returns its expected run time in seconds."""
+        return self.scheduler.submit(job_request, job_progress)
+
+    def expected_duration(self, job_request: VideoRequest) -> float:
+        """Expected seconds for a job to run through the whole pipeline."""
+        return self.estimator.expected_total(
+            job_features(job_request, cache_hit_ratio=self.estimator.cache_hit_ratio)
+        )
 
     def orchestrate_job(self, job_request: VideoRequest, job_progress: JobProgress):
         """Main orchestration loop for a job."""
         job_id = job_request.id
-        
+        with self._lock:
+            self.active_jobs[job_id] = {"started_at": time.time(), "priority": job_request.priority}
+        try:
+            self._run_job(job_request, job_progress)
+        finally:
+            with self._lock:
+                self.active_jobs.pop(job_id, None)
+
+    def running_jobs(self) -> int:
+        """Number of generation jobs currently in the pipeline."""
+        with self._lock:
+            return len(self.active_jobs)
+
+    def _run_job(self, job_request: VideoRequest, job_progress: JobProgress):
+        job_id = job_request.id
+
+        fingerprint = None
+        if Config.DEDUP_ENABLED and job_request.dedupe:
+            fingerprint = request_fingerprint(job_request)
+            if self._reuse_identical_job(fingerprint, job_request, job_progress):
+                return
+
         try:
             log_job_event(job_id, "orchestration_started", "SCENE_PLANNING")
             
             # Step 1: Scene Planning
-            self._plan_scenes(job_id, job_request, job_progress)
+            self._run_stage(JobStatus.SCENE_PLANNING, self._plan_scenes, job_request, job_progress)
 
             # Step 2: Asset Retrieval
-            self._retrieve_assets(job_id, job_request, job_progress)
+            self._run_stage(JobStatus.ASSET_RETRIEVAL, self._retrieve_assets, job_request, job_progress)
 
             # Step 3: TTS and Audio Generation
-            self._generate_audio(job_id, job_request, job_progress)
+            self._run_stage(JobStatus.AUDIO_PROCESSING, self._generate_audio, job_request, job_progress)
 
             # Step 4: Rendering
-            self._render_video(job_id, job_request, job_progress)
+            self._run_stage(JobStatus.RENDERING, self._render_video, job_request, job_progress)
+            self._save_estimates()
+            if fingerprint:
+                # Finishes any attached jobs from this thread
+                self.deduplicator.complete(fingerprint, job_id, job_cache.get(f"result_{job_id}") or {})
+
+            if Config.PREDICTIVE_PREFETCH_ENABLED:
+                self.warmer.observe(job_id)
 
             # Mark as completed
             job_progress.status = JobStatus.COMPLETED
             job_progress.overall_progress = 100.0
+            job_progress.estimated_time_remaining = 0.0
             log_job_event(job_id, "orchestration_completed", "COMPLETED")
+            self._log(job_progress, "Video generation completed")
             self.logger.info(f"Job {job_id} completed successfully")
+            if WebSocketEventManager:
+                result = job_cache.get(f"result_{job_id}") or {}
+                WebSocketEventManager.broadcast_job_completed(
+                    job_id, result.get("video_url", ""), result.get("duration", 0)
+                )
 
         except Exception as e:
             self.logger.error(f"Error orchestrating job {job_id}: {str(e)}", exc_info=True)
+            if fingerprint:
+                self.deduplicator.fail(fingerprint, job_id)
             job_progress.status = JobStatus.FAILED
             job_progress.error = str(e)
+            job_progress.estimated_time_remaining = 0.0
             log_job_event(job_id, "orchestration_failed", "FAILED", {"error": str(e)})
+            self._log(job_progress, f"Job failed: {e}", "ERROR")
+            if WebSocketEventManager:
+                WebSocketEventManager.broadcast_job_failed(job_id, str(e))
+
+    def _reuse_identical_job(self, fingerprint: str, job_request: VideoRequest, job_progress: JobProgress) -> bool:
+        """
+        Complete the job from an identical one if possible. Returns False when
+        this job should run the pipeline itself (it now leads its fingerprint).
+        A job attached to one still in progress returns True at once; it is
+        finished from the leader's thread, so it never holds a worker.
+        """
+        claim = self.deduplicator.claim(fingerprint, job_request.id, job_progress)
+        if claim.kind == Claim.LEAD:
+            return False
+        if claim.kind == Claim.COMPLETED:
+            self._complete_from(job_request, job_progress, claim.job_id, claim.result)
+            return True
+
+        self._log(job_progress, f"Identical job {claim.job_id} is in progress; sharing its result")
+        self._follow(claim, job_request, job_progress)
+        return True
+
+    def _follow(self, claim: Claim, job_request: VideoRequest, job_progress: JobProgress):
+        """Mirror the leading job's progress and finish this job when the leader does."""
+        leader_id = claim.job_id
+        with self._lock:
+            self._followers.setdefault(leader_id, []).append(job_progress)
+        if claim.flight.progress is not None:
+            self._mirror(claim.flight.progress, job_progress)
+
+        def on_done(flight):
+            with self._lock:
+                followers = self._followers.get(leader_id, [])
+                if job_progress in followers:
+                    followers.remove(job_progress)
+                if not followers:
+                    self._followers.pop(leader_id, None)
+            if job_progress.status == JobStatus.CANCELLED:
+                return
+            if flight.result is not None:
+                self._complete_from(job_request, job_progress, leader_id, flight.result)
+                return
+            # The job we attached to failed; queue this one to claim again and likely run itself
+            job_progress.status = JobStatus.PENDING
+            self._log(job_progress, f"Identical job {leader_id} failed; running this job instead", "WARNING")
+            self.submit(job_request, job_progress)
+
+        claim.flight.add_done_callback(on_done)
+
+    def _mirror(self, leader: JobProgress, job_progress: JobProgress):
+        """Copy a running leader's stage, progress and ETA onto an attached job."""
+        if leader.is_terminal or job_progress.status == JobStatus.CANCELLED:
+            return
+        job_progress.status = leader.status
+        job_progress.overall_progress = leader.overall_progress
+        job_progress.estimated_time_remaining = leader.estimated_time_remaining
+        job_progress.current_step = leader.current_step
+        self._publish_progress(job_progress)
+
+    def _complete_from(self, job_request: VideoRequest, job_progress: JobProgress, source_id: str, source_result: Dict[str, Any]):
+        """Finish a job with the result of an identical job."""
+        job_id = job_request.id
+        result = dict(source_result, job_id=job_id, deduplicated_from=source_id)
+        job_cache.set(f"result_{job_id}", result)
+        storyboard = job_cache.get(f"storyboard_{source_id}")
+        if storyboard:
+            job_cache.set(f"storyboard_{job_id}", dict(storyboard, job_id=job_id))
+
+        if job_request.callback_url:
+            self._trigger_webhook(job_request.callback_url, result)
+
+        job_progress.status = JobStatus.COMPLETED
+        job_progress.overall_progress = 100.0
+        job_progress.estimated_time_remaining = 0.0
+        job_progress.current_step = f"Reused result of job {source_id}"
+        log_job_event(job_id, "job_deduplicated", "COMPLETED", {"source_job_id": source_id})
+        self._log(job_progress, job_progress.current_step)
+        if WebSocketEventManager:
+            WebSocketEventManager.broadcast_job_completed(
+                job_id, result.get("video_url", ""), result.get("duration", 0)
+            )
+
+    def edit_storyboard(self, job_request: VideoRequest, job_progress: JobProgress, patch: Dict[str, Any]) -> StoryboardDiff:
+        """
+        Apply a storyboard patch and store the edited storyboard. Narration audio
+        and subtitle cues are rebuilt only for scenes whose narration changed.
+        Raises ValueError if the patch is invalid or there is no storyboard yet.
+        """
+        job_id = job_request.id
+        old = job_cache.get(f"storyboard_{job_id}")
+        if not old:
+            raise ValueError("Storyboard not yet available")
+
+        new = apply_storyboard_patch(old, patch)
+        diff = diff_storyboards(old, new)
+        if not diff.changed:
+            return diff
+
+        new["audio_segments"] = rebuild_audio_segments(old, new, diff, job_request.language)
+        new["subtitles"] = rebuild_subtitles(old, new, diff)
+        new["version"] = old.get("version", 0) + 1
+        job_cache.set(f"storyboard_{job_id}", new)
+        # The remembered result no longer matches what this request now renders
+        self.deduplicator.forget(request_fingerprint(job_request), job_id)
+
+        log_job_event(job_id, "storyboard_edited", "COMPLETE", {
+            "rerender_scenes": diff.rerender_scenes,
+            "reused_scenes": diff.reused_scenes,
+            "removed": diff.removed,
+        })
+        self._log(
+            job_progress,
+            f"Storyboard edited: {len(diff.rerender_scenes)} scenes to re-render, "
+            f"{len(diff.reused_scenes)} reused, {len(diff.removed)} removed",
+        )
+        return diff
+
+    def rerender_job(self, job_request: VideoRequest, job_progress: JobProgress, diff: StoryboardDiff):
+        """
+        Render an edited storyboard again. Only changed scenes are narrated,
+        and the segment cache serves the encoded video of unchanged scenes.
+        """
+        job_id = job_request.id
+        try:
+            job_progress.error = None
+            # Only the changed scenes are encoded, so expect a render that size
+            x = job_features(job_request, len(diff.rerender_scenes) or 1, self._cache_hit_ratio(job_id) or 0.0)
+            job_progress.estimated_time_remaining = self.estimator.predict(JobStatus.RENDERING.value, x)
+            self._narrate_edit(job_id, job_request, job_progress, diff)
+            result = self._render_edit(job_id, job_request, job_progress)
+            result.update(rerendered_scenes=diff.rerender_scenes, reused_scenes=diff.reused_scenes)
+            job_cache.set(f"result_{job_id}", result)
+            if job_request.callback_url:
+                self._trigger_webhook(job_request.callback_url, result)
+
+            job_progress.status = JobStatus.COMPLETED
+            job_progress.overall_progress = 100.0
+            job_progress.estimated_time_remaining = 0.0
+            log_job_event(job_id, "rerender_completed", "COMPLETED")
+            self._log(job_progress, "Re-render completed")
+            if WebSocketEventManager:
+                WebSocketEventManager.broadcast_job_completed(
+                    job_id, result.get("video_url", ""), result.get("duration", 0)
+                )
+
+        except Exception as e:
+            self.logger.error(f"Error re-rendering job {job_id}: {str(e)}", exc_info=True)
+            job_progress.status = JobStatus.FAILED
+            job_progress.error = str(e)
+            job_progress.estimated_time_remaining = 0.0
+            log_job_event(job_id, "rerender_failed", "FAILED", {"error": str(e)})
+            self._log(job_progress, f"Re-render failed: {e}", "ERROR")
+            if WebSocketEventManager:
+                WebSocketEventManager.broadcast_job_failed(job_id, str(e))
+
+    def _narrate_edit(self, job_id: str, job_request: VideoRequest, job_progress: JobProgress, diff: StoryboardDiff):
+        """Synthesize and align narration for the edited scenes only."""
+        storyboard = job_cache.get(f"storyboard_{job_id}")
+        if not storyboard:
+            raise ValueError("Storyboard not found")
+        scenes = scenes_to_narrate(storyboard, diff)
+        if not scenes:
+            return
+
+        job_progress.status = JobStatus.AUDIO_PROCESSING
+        job_progress.current_step = f"Narrating {len(scenes)} edited scenes..."
+        self._publish_progress(job_progress)
+        self._log(job_progress, job_progress.current_step)
+
+        # Per-version names keep the new narration files apart from the audio unchanged scenes still use
+        narration_id = f"{job_id}_v{storyboard.get('version', 0)}"
+        narrated = None
+        if Config.USE_REMOTE_SERVICES:
+            narrated = self._request_remote_audio(narration_id, job_request, {"scenes": scenes})
+        if narrated is None:
+            narrated = self._narrate_locally(narration_id, job_request, scenes)
+        if narrated is None:
+            raise RuntimeError("Narration for the edited scenes is unavailable")
+
+        place_narration(storyboard, narrated)
+        job_cache.set(f"storyboard_{job_id}", storyboard)
+        log_job_event(job_id, "audio_generated", "COMPLETE", {"scenes": [scene["id"] for scene in scenes]})
+
+    def _narrate_locally(
+        self, job_id: str, job_request: VideoRequest, scenes: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """Narrate scenes with the in-process Whisper worker; None if it is unavailable."""
+        try:
+            from app.whisper_worker.main import get_whisper_service
+        except ImportError as e:
+            self.logger.warning(f"Local narration unavailable for {job_id}: {str(e)}")
+            return None
+
+        result = get_whisper_service().process_scenes_for_job(
+            job_id,
+            [Scene(**{k: v for k, v in scene.items() if k in Scene.__dataclass_fields__}) for scene in scenes],
+            job_request.language,
+            job_request.voice,
+        )
+        return None if result.get("error") else result
+
+    def _render_edit(self, job_id: str, job_request: VideoRequest, job_progress: JobProgress) -> Dict[str, Any]:
+        """Render the stored storyboard scene by scene and return the updated job result."""
+        from app.renderer.main import get_renderer_service
+
+        job_progress.status = JobStatus.RENDERING
+        job_progress.current_step = "Re-rendering edited storyboard..."
+        self._publish_progress(job_progress)
+        self._log(job_progress, job_progress.current_step)
+
+        # Each edit renders to its own path: jobs deduplicated against this one
+        # keep pointing at the earlier video, which must not change under them
+        storyboard = job_cache.get(f"storyboard_{job_id}") or {}
+        version = f"v{storyboard.get('version', 0)}"
+        output_path = os.path.join(Config.RENDER_OUTPUT_DIR, job_id, version, "output.mp4")
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        rendered = get_renderer_service().render_job(
+            job_id, output_path, storyboard.get("quality", job_request.quality),
+        )
+        if not rendered["success"]:
+            raise RuntimeError(rendered["error"] or "Rendering failed")
+
+        result = job_cache.get(f"result_{job_id}") or {}
+        result.pop("deduplicated_from", None)  # the job now has a video of its own
+        result.update(
+            job_id=job_id,
+            video_url=f"s3://videos/{job_id}/{version}/output.mp4",
+            thumbnail_url=f"s3://videos/{job_id}/{version}/thumbnail.jpg",
+            video_path=rendered["video_path"],
+            thumbnail_path=rendered["thumbnail_path"],
+            subtitle_paths=rendered["subtitle_paths"],
+            segments=rendered["segments"],
+            duration=storyboard.get("total_duration", job_request.duration_target),
+        )
+        self.logger.info(f"Re-render completed for job {job_id}: {rendered['segments']}")
+        return result
+
+    @staticmethod
+    def _cache_hit_ratio(job_id: str) -> Optional[float]:
+        """Share of the job's clips that were already in the clip store; None before retrieval."""
+        assets = job_cache.get(f"assets_{job_id}")
+        if not assets:
+            return None
+        return sum(1 for asset in assets.values() if asset.get("cached")) / len(assets)
+
+    def _job_features(self, job_request: VideoRequest, job_progress: JobProgress) -> List[float]:
+        """Estimator features from what is known so far: planned scenes, then clip store hits."""
+        cache_hit_ratio = self._cache_hit_ratio(job_request.id)
+        if cache_hit_ratio is None:
+            cache_hit_ratio = self.estimator.cache_hit_ratio
+        return job_features(job_request, job_progress.total_scenes or None, cache_hit_ratio)
+
+    def _run_stage(self, stage: JobStatus, run, job_request: VideoRequest, job_progress: JobProgress):
+        """
+        Run one pipeline stage, setting progress and ETA from the expected
+        stage durations, then teach the estimator how long the stage took.
+        """
+        x = self._job_features(job_request, job_progress)
+        # New estimates may shift the stage boundaries; never move the bar backwards
+        job_progress.overall_progress = max(job_progress.overall_progress, self.estimator.progress(stage.value, x))
+        job_progress.estimated_time_remaining = self.estimator.remaining(stage.value, x)
+
+        started = time.monotonic()
+        run(job_request.id, job_request, job_progress)
+        elapsed = time.monotonic() - started
+
+        # Features now reflect the stage's outcome (scene count, clip store hits)
+        x = self._job_features(job_request, job_progress)
+        self.estimator.observe(stage.value, x, elapsed)
+        cache_hit_ratio = self._cache_hit_ratio(job_request.id)
+        if stage == JobStatus.ASSET_RETRIEVAL and cache_hit_ratio is not None:
+            self.estimator.observe_cache_hits(cache_hit_ratio)
+
+        job_progress.overall_progress = max(
+            job_progress.overall_progress, self.estimator.progress(stage.value, x, float("inf"))
+        )
+        job_progress.estimated_time_remaining = self.estimator.remaining(stage.value, x, float("inf"))
+        self._publish_progress(job_progress)
+
+    def _save_estimates(self):
+        try:
+            self.estimator.save()
+        except OSError as e:
+            self.logger.warning(f"Could not save stage estimates: {str(e)}")
+
+    def _publish_progress(self, job_progress: JobProgress):
+        """Push the job's current stage and progress to WebSocket subscribers and attached jobs."""
+        with self._lock:
+            followers = list(self._followers.get(job_progress.job_id, ()))
+        for follower in followers:
+            self._mirror(job_progress, follower)
+        if WebSocketEventManager:
+            WebSocketEventManager.broadcast_job_status(
+                job_progress.job_id,
+                job_progress.status.value,
+                int(job_progress.overall_progress),
+                job_progress.current_step,
+            )
+
+    def _log(self, job_progress: JobProgress, message: str, level: str = "INFO"):
+        """Record a line in the job log and stream it to WebSocket subscribers."""
+        try:
+            job_progress.add_log(message, level)
+        except LOG_STORE_ERRORS as e:
+            self.logger.warning(f"Could not store log line for job {job_progress.job_id}: {e}")
+        if WebSocketEventManager:
+            WebSocketEventManager.broadcast_job_log(job_progress.job_id, level, message)
 
     def _plan_scenes(self, job_id: str, job_request: VideoRequest, job_progress: JobProgress):
         """Plan scenes for the job."""
         job_progress.status = JobStatus.SCENE_PLANNING
         job_progress.current_step = "Planning video scenes..."
+        self._publish_progress(job_progress)
+        self._log(job_progress, job_progress.current_step)
         
         try:
             scenes = self.scene_planner.plan_scenes(
@@ -176,10 +580,9 @@ class JobOrchestrator:
                 total_duration=job_request.duration_target,
             )
             
-            # Cache storyboard
-            job_cache.set(f"storyboard_{job_id}", storyboard.to_dict())
+            # Cache storyboard; the renderer reads the quality from it
+            job_cache.set(f"storyboard_{job_id}", dict(storyboard.to_dict(), quality=job_request.quality))
             
-            job_progress.overall_progress = 20.0
             self.logger.info(f"Scene planning completed for job {job_id}: {len(scenes)} scenes")
             log_job_event(job_id, "scenes_planned", "COMPLETE", {"scene_count": len(scenes)})
 
@@ -191,6 +594,8 @@ class JobOrchestrator:
         """Retrieve video assets."""
         job_progress.status = JobStatus.ASSET_RETRIEVAL
         job_progress.current_step = "Retrieving stock footage..."
+        self._publish_progress(job_progress)
+        self._log(job_progress, job_progress.current_step)
         
         try:
             # Get storyboard
@@ -198,10 +603,22 @@ class JobOrchestrator:
             if not storyboard_data:
                 raise ValueError("Storyboard not found")
 
-            # Simulate asset retrieval
-            time.sleep(0.5)
-            
-            job_progress.overall_progress = 40.0
+            scenes = [
+                Scene(**{k: v for k, v in scene.items() if k in Scene.__dataclass_fields__})
+                for scene in storyboard_data.get("scenes", [])
+            ]
+            # Search results and clips come from the shared caches when warm (see /mcp/prefetch)
+            assets = get_retriever_service().retrieve_assets_for_scenes(job_id, scenes)
+            for scene in storyboard_data.get("scenes", []):
+                asset = assets.get(scene["id"]) or {}
+                clip = asset.get("clip")
+                if clip is not None:
+                    scene["clip_id"] = clip.id
+                    scene["clip_url"] = clip.video_url
+                    if asset.get("path"):
+                        scene["clip_path"] = asset["path"]
+            job_cache.set(f"storyboard_{job_id}", storyboard_data)
+
             self.logger.info(f"Asset retrieval completed for job {job_id}")
             log_job_event(job_id, "assets_retrieved", "COMPLETE")
 
@@ -213,37 +630,49 @@ class JobOrchestrator:
         """Generate audio and subtitles."""
         job_progress.status = JobStatus.AUDIO_PROCESSING
         job_progress.current_step = "Generating audio and subtitles..."
+        self._publish_progress(job_progress)
+        self._log(job_progress, job_progress.current_step)
         
         try:
-            # Simulate audio generation
-            time.sleep(0.5)
-            
-            # Create sample audio segments and subtitles
-            audio_segments = [
-                AudioSegment(
-                    text="Beginning of narration",
-                    duration=5.0,
-                    start_time=0.0,
-                    language=job_request.language,
-                )
-            ]
-            
-            subtitles = [
-                Subtitle(
-                    text="Beginning of narration",
-                    start_time=0,
-                    end_time=5000,
-                )
-            ]
+            storyboard_data = job_cache.get(f"storyboard_{job_id}")
+
+            remote = None
+            if Config.USE_REMOTE_SERVICES and storyboard_data:
+                remote = self._request_remote_audio(job_id, job_request, storyboard_data)
+
+            if remote is not None:
+                # Scenes take the measured length of their narration
+                apply_scene_timings(storyboard_data, remote["scenes"])
+                audio_segments = remote["audio_segments"]
+                subtitles = remote["subtitles"]
+            else:
+                # Simulate audio generation
+                time.sleep(0.5)
+
+                # Create sample audio segments and subtitles
+                audio_segments = [
+                    AudioSegment(
+                        text="Beginning of narration",
+                        duration=5.0,
+                        start_time=0.0,
+                        language=job_request.language,
+                    ).to_dict()
+                ]
+
+                subtitles = [
+                    Subtitle(
+                        text="Beginning of narration",
+                        start_time=0,
+                        end_time=5000,
+                    ).to_dict()
+                ]
             
             # Update storyboard
-            storyboard_data = job_cache.get(f"storyboard_{job_id}")
             if storyboard_data:
-                storyboard_data["audio_segments"] = [a.to_dict() for a in audio_segments]
-                storyboard_data["subtitles"] = [s.to_dict() for s in subtitles]
+                storyboard_data["audio_segments"] = audio_segments
+                storyboard_data["subtitles"] = subtitles
                 job_cache.set(f"storyboard_{job_id}", storyboard_data)
             
-            job_progress.overall_progress = 60.0
             self.logger.info(f"Audio generation completed for job {job_id}")
             log_job_event(job_id, "audio_generated", "COMPLETE")
 
@@ -251,10 +680,43 @@ class JobOrchestrator:
             self.logger.error(f"Error generating audio for {job_id}: {str(e)}", exc_info=True)
             raise
 
+    def _request_remote_audio(
+        self, job_id: str, job_request: VideoRequest, storyboard_data: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Narrate each scene on the least-loaded Whisper worker; None to fall back locally.
+        The result carries the scenes resized to their measured narration.
+        """
+        scenes = storyboard_data.get("scenes", [])
+        if not storyboard_narration(scenes):
+            return None
+
+        try:
+            response = get_service_client("whisper").post(
+                "/process_scenes",
+                json={
+                    "job_id": job_id,
+                    "scenes": scenes,
+                    "language": job_request.language,
+                    "voice": job_request.voice,
+                },
+                timeout=Config.WHISPER_REQUEST_TIMEOUT,
+            )
+            result = (response or {}).get("result") or {}
+            if result.get("error") or not result.get("scenes"):
+                raise ServiceUnavailableError(result.get("error") or "empty scene audio result")
+            return result
+
+        except (ServiceUnavailableError, ValueError, ImportError) as e:
+            self.logger.warning(f"Remote audio unavailable for {job_id}, using local fallback: {str(e)}")
+            return None
+
     def _render_video(self, job_id: str, job_request: VideoRequest, job_progress: JobProgress):
         """Render final video."""
         job_progress.status = JobStatus.RENDERING
         job_progress.current_step = "Rendering video..."
+        self._publish_progress(job_progress)
+        self._log(job_progress, job_progress.current_step)
         
         try:
             # Simulate rendering
@@ -275,7 +737,6 @@ class JobOrchestrator:
             if job_request.callback_url:
                 self._trigger_webhook(job_request.callback_url, result)
             
-            job_progress.overall_progress = 100.0
             self.logger.info(f"Video rendering completed for job {job_id}")
             log_job_event(job_id, "video_rendered", "COMPLETE")
 
@@ -284,25 +745,16 @@ class JobOrchestrator:
             raise
 
     def _trigger_webhook(self, callback_url: str, result: Dict[str, Any]):
-        """Trigger callback webhook with result."""
+        """Queue the result for background delivery to the callback webhook."""
         if not Config.ENABLE_WEBHOOKS:
             return
         
         try:
-            if requests is None:
-                self.logger.warning("requests library not available for webhooks")
-                return
-            
-            response = requests.post(
-                callback_url,
-                json=result,
-                timeout=Config.WEBHOOK_TIMEOUT,
-            )
-            response.raise_for_status()
-            self.logger.info(f"Webhook triggered: {callback_url}")
+            get_webhook_dispatcher().enqueue(callback_url, result)
+            self.logger.info(f"Webhook queued: {callback_url}")
 
         except Exception as e:
-            self.logger.error(f"Error triggering webhook {callback_url}: {str(e)}")
+            self.logger.error(f"Error queueing webhook {callback_url}: {str(e)}")
 
 
 # Global orchestrator instance
@@ -0,0 +1,205 @@
+"""
+Background cache warming for prompts submitted to /mcp/prefetch.
+A low-priority worker plans the prompt's scenes, runs their Pexels searches,
+downloads and normalizes the selected clips into the clip store, and
+synthesizes the narration into the TTS cache, so a later /mcp/generate for the
+same prompt starts from warm caches. Prefetches are not jobs and never appear
+in the job index. Each stage waits until fewer than PREFETCH_IDLE_JOBS
+generation jobs are running, so prefetch only uses idle capacity.
+
+The running-job count is only visible when jobs run in this process
+(API_RUN_JOBS=true). Otherwise there is no load signal and prefetch is not
+throttled. Narration is warmed into this process's TTS cache, which helps only
+when jobs synthesize locally against the same TTS_CACHE_DIR, so the TTS stage
+is skipped when USE_REMOTE_SERVICES is on.
+"""
+
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from app.common.config import Config
+from app.common.models import VideoRequest
+from app.common.utils import setup_logging, log_job_event
+from app.orchestrator.dedup import request_fingerprint
+from app.orchestrator.main import ScenePlanner, get_orchestrator, storyboard_narration
+from app.retriever.main import get_retriever_service
+
+
+class PrefetchTask:
+    """Status of one prefetch request."""
+
+    def __init__(self, job_request: VideoRequest):
+        self.id = f"prefetch_{uuid.uuid4()}"
+        self.request = job_request
+        self.key = request_fingerprint(job_request)
+        self.status = "queued"  # queued, running, completed, failed
+        self.stages: Dict[str, Any] = {}
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.finished_at: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "prefetch_id": self.id,
+            "prompt": self.request.prompt,
+            "status": self.status,
+            "stages": self.stages,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+def _default_tts():
+    if Config.USE_REMOTE_SERVICES:
+        return None  # narration is synthesized, and cached, by the remote whisper worker
+    try:
+        from app.whisper_worker.main import get_whisper_service
+    except ImportError:
+        return None
+    return get_whisper_service().tts_processor
+
+
+def _default_busy(logger) -> Callable[[], bool]:
+    if not Config.API_RUN_JOBS:
+        logger.warning(
+            "Jobs run outside this process (API_RUN_JOBS=false); prefetch cannot see their load and is not throttled"
+        )
+        return lambda: False
+    return lambda: get_orchestrator().running_jobs() >= Config.PREFETCH_IDLE_JOBS
+
+
+class PrefetchWorker:
+    """Queue of prefetch tasks run by background threads at low priority."""
+
+    def __init__(
+        self,
+        planner: Optional[ScenePlanner] = None,
+        retriever=None,
+        tts=None,
+        busy: Optional[Callable[[], bool]] = None,
+        workers: int = Config.PREFETCH_WORKERS,
+        max_tasks: int = Config.PREFETCH_MAX_TASKS,
+        idle_poll: float = 0.5,
+    ):
+        self.logger = setup_logging("PrefetchWorker")
+        self.planner = planner or ScenePlanner()
+        self.retriever = retriever
+        self.tts = tts
+        if busy is None:
+            busy = _default_busy(self.logger)
+        self.busy = busy
+        self.workers = max(1, workers)
+        self.max_tasks = max_tasks
+        self.idle_poll = idle_poll
+        self._queue: "queue.Queue[PrefetchTask]" = queue.Queue()
+        self._tasks: "OrderedDict[str, PrefetchTask]" = OrderedDict()
+        self._pending: Dict[str, PrefetchTask] = {}  # fingerprint -> queued or running task
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def submit(self, job_request: VideoRequest) -> PrefetchTask:
+        """Queue a prompt; an identical prefetch that has not finished is returned instead."""
+        task = PrefetchTask(job_request)
+        with self._lock:
+            existing = self._pending.get(task.key)
+            if existing is not None:
+                return existing
+            self._pending[task.key] = task
+            self._tasks[task.id] = task
+            while len(self._tasks) > self.max_tasks:
+                oldest_id, oldest = next(iter(self._tasks.items()))
+                if oldest.status in ("queued", "running"):
+                    break
+                del self._tasks[oldest_id]
+            self._start()
+        log_job_event(task.id, "prefetch_queued", "PENDING", {"prompt_fingerprint": task.key[:16]})
+        self._queue.put(task)
+        return task
+
+    def get(self, task_id: str) -> Optional[PrefetchTask]:
+        with self._lock:
+            return self._tasks.get(task_id)
+
+    def _start(self):
+        """Start the worker threads on first use; caller holds the lock."""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._loop, name=f"prefetch-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _loop(self):
+        while True:
+            self.run(self._queue.get())
+
+    def _wait_for_idle(self):
+        while self.busy():
+            time.sleep(self.idle_poll)
+
+    def _stage(self, task: PrefetchTask, name: str, fn: Callable[[], Any]) -> Any:
+        self._wait_for_idle()
+        started = time.monotonic()
+        result = fn()
+        task.stages[name] = {"seconds": round(time.monotonic() - started, 3)}
+        return result
+
+    def run(self, task: PrefetchTask):
+        """Warm every cache for one task (runs on a worker thread)."""
+        job_request = task.request
+        retriever = self.retriever or get_retriever_service()
+        task.status = "running"
+        try:
+            scenes = self._stage(task, "scenes", lambda: self.planner.plan_scenes(
+                job_request.prompt, job_request.duration_target, job_request.scene_count,
+            ))
+            task.stages["scenes"]["count"] = len(scenes)
+
+            assets = self._stage(task, "search", lambda: retriever.pexels.get_best_clip(scenes))
+            task.stages["search"]["clips_found"] = sum(1 for a in assets.values() if a.get("clip"))
+
+            assets = self._stage(task, "clips", lambda: retriever.fetch_clips(assets))
+            task.stages["clips"]["stored"] = sum(1 for a in assets.values() if a.get("path"))
+
+            tts = self.tts or _default_tts()
+            if tts is not None:
+                narration = storyboard_narration([scene.to_dict() for scene in scenes])
+                synthesized = self._stage(task, "tts", lambda: tts.warm_cache(narration, job_request.language))
+                task.stages["tts"]["synthesized"] = synthesized
+
+            task.status = "completed"
+            log_job_event(task.id, "prefetch_completed", "COMPLETED", task.stages)
+        except Exception as e:
+            self.logger.error(f"Prefetch {task.id} failed: {str(e)}", exc_info=True)
+            task.status = "failed"
+            task.error = str(e)
+            log_job_event(task.id, "prefetch_failed", "FAILED", {"error": str(e)})
+        finally:
+            task.finished_at = datetime.utcnow().isoformat()
+            with self._lock:
+                if self._pending.get(task.key) is task:
+                    del self._pending[task.key]
+
+
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def get_prefetch_worker() -> PrefetchWorker:
+    """Get the process-wide prefetch worker."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = PrefetchWorker()
+        return _worker
+
+
+def set_prefetch_worker(worker: Optional[PrefetchWorker]):
+    """Override the process-wide worker (tests, embedded deployments)."""
+    global _worker
+    with _worker_lock:
+        _worker = worker
@@ -0,0 +1,98 @@
+"""
+Dispatch of queued generation jobs to a fixed pool of pipeline workers.
+SCHEDULER_POLICY picks the order in which waiting jobs start: "fifo" by
+submission, "priority" by VideoRequest.priority, or "sejf" (shortest expected
+job first) by the StageEstimator's expected run time. Running short jobs first
+lowers mean latency when the queue is backed up; SCHEDULER_AGING counts time
+spent waiting against a job's expected duration so long jobs still start.
+"""
+
+import time
+import queue
+import itertools
+import threading
+from typing import Callable, List, Optional, Tuple
+
+from app.common.config import Config
+from app.common.models import JobProgress, JobStatus, VideoRequest
+from app.common.utils import setup_logging, log_job_event
+
+
+POLICIES = ("fifo", "priority", "sejf")
+
+
+class JobScheduler:
+    """Priority queue of jobs drained by MAX_CONCURRENT_JOBS worker threads."""
+
+    def __init__(
+        self,
+        run: Callable[[VideoRequest, JobProgress], None],
+        estimate: Callable[[VideoRequest], float],
+        policy: str = Config.SCHEDULER_POLICY,
+        workers: int = Config.MAX_CONCURRENT_JOBS,
+        aging: float = Config.SCHEDULER_AGING,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.logger = setup_logging("JobScheduler")
+        if policy not in POLICIES:
+            self.logger.warning(f"Unknown scheduler policy {policy!r}; using fifo")
+            policy = "fifo"
+        self.run = run
+        self.estimate = estimate
+        self.policy = policy
+        self.workers = max(1, workers)
+        self.aging = aging
+        self.clock = clock
+        self._queue: "queue.PriorityQueue[Tuple[float, int, VideoRequest, JobProgress]]" = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    def _key(self, job_request: VideoRequest, expected: float) -> float:
+        if self.policy == "priority":
+            return -job_request.priority
+        if self.policy == "sejf":
+            # expected - aging * waited, ordered the same at any later time
+            return expected + self.aging * self.clock()
+        return 0.0  # fifo: submission order breaks the tie
+
+    def submit(self, job_request: VideoRequest, job_progress: JobProgress) -> float:
+        """Queue a job; returns its expected run time in seconds."""
+        expected = self.estimate(job_request)
+        job_progress.estimated_time_remaining = expected
+        self._queue.put((self._key(job_request, expected), next(self._seq), job_request, job_progress))
+        log_job_event(job_request.id, "job_scheduled", "PENDING", {
+            "policy": self.policy,
+            "expected_seconds": round(expected, 1),
+        })
+        with self._lock:
+            self._start()
+        return expected
+
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def next_job(self, timeout: Optional[float] = None) -> Optional[Tuple[VideoRequest, JobProgress]]:
+        """The next job to start, skipping cancelled ones; None if the queue stays empty."""
+        while True:
+            try:
+                _, _, job_request, job_progress = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                return None
+            if job_progress.status != JobStatus.CANCELLED:
+                return job_request, job_progress
+
+    def _start(self):
+        """Start the worker threads on first use; caller holds the lock."""
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{len(self._threads)}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _loop(self):
+        while True:
+            job_request, job_progress = self.next_job()
+            try:
+                self.run(job_request, job_progress)
+            except Exception as e:
+                self.logger.error(f"Job {job_request.id} crashed its worker: {str(e)}", exc_info=True)
@@ -0,0 +1,300 @@
+"""
+Storyboard editing at scene granularity.
+Applies a PATCH to a stored storyboard, diffs the result against the previous
+version scene by scene, and rebuilds only the narration audio and subtitle
+cues of scenes whose narration changed. Unchanged scenes keep their audio and
+cues (shifted if they moved on the timeline), and their encoded segments are
+reused by the renderer's segment cache. Changed scenes start with estimated
+cues and no audio until place_narration() fills in their synthesized speech.
+"""
+
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.common.models import AudioSegment, Scene
+from app.common.subtitles import generate_cues
+from app.whisper_worker.alignment import estimate_word_timings
+
+
+# Fields a client may change on a scene; timing is derived from durations
+EDITABLE_FIELDS = {
+    "description", "duration", "keywords", "shot_type", "narration",
+    "clip_id", "clip_url", "clip_path", "trim_start",
+}
+# Fields that change the encoded picture of a scene
+VISUAL_FIELDS = ("clip_id", "clip_url", "clip_path", "trim_start", "duration", "shot_type")
+
+
+def narration_text(scene: Dict[str, Any]) -> str:
+    """Text spoken over a scene (narration, or the description when there is none)."""
+    return " ".join((scene.get("narration") or scene.get("description") or "").split())
+
+
+def apply_storyboard_patch(storyboard: Dict[str, Any], patch: Any) -> Dict[str, Any]:
+    """
+    Return a new storyboard with the patch applied. The patch lists the scenes
+    in their new order: {"scenes": [{"id": ..., <changed fields>}, {<new scene>}]}.
+    Existing scenes are referenced by id and only the given fields change;
+    entries without an id are new scenes; scenes left out are removed.
+    Raises ValueError for malformed patches.
+    """
+    if not isinstance(patch, dict) or not isinstance(patch.get("scenes"), list):
+        raise ValueError('Patch must be an object with a "scenes" list')
+    unknown = set(patch) - {"scenes"}
+    if unknown:
+        raise ValueError(f"Unsupported storyboard fields: {', '.join(sorted(unknown))}")
+
+    existing = {scene["id"]: scene for scene in storyboard.get("scenes", [])}
+    seen = set()
+    scenes = []
+    for index, item in enumerate(patch["scenes"]):
+        if not isinstance(item, dict):
+            raise ValueError(f"Scene {index} must be an object")
+        fields = {k: v for k, v in item.items() if k != "id"}
+        bad = set(fields) - EDITABLE_FIELDS
+        if bad:
+            raise ValueError(f"Scene {index}: fields not editable: {', '.join(sorted(bad))}")
+        duration = fields.get("duration")
+        if duration is not None and (isinstance(duration, bool) or not isinstance(duration, (int, float)) or duration <= 0):
+            raise ValueError(f"Scene {index}: duration must be a positive number")
+
+        scene_id = item.get("id")
+        if scene_id is None:
+            scene = Scene(**{k: v for k, v in fields.items() if k in Scene.__dataclass_fields__}).to_dict()
+            scene.update({k: v for k, v in fields.items() if k not in scene})
+        elif scene_id not in existing:
+            raise ValueError(f"Scene {index}: unknown scene id {scene_id}")
+        elif scene_id in seen:
+            raise ValueError(f"Scene {index}: scene {scene_id} listed twice")
+        else:
+            scene = copy.deepcopy(existing[scene_id])
+            scene.update(fields)
+        seen.add(scene["id"])
+        scenes.append(scene)
+
+    if not scenes:
+        raise ValueError("A storyboard needs at least one scene")
+
+    edited = copy.deepcopy(storyboard)
+    timeline = 0.0
+    for scene in scenes:
+        scene["start_time"] = round(timeline, 3)
+        timeline += float(scene.get("duration", 0.0))
+        scene["end_time"] = round(timeline, 3)
+    edited["scenes"] = scenes
+    edited["total_duration"] = round(timeline, 3)
+    return edited
+
+
+@dataclass
+class StoryboardDiff:
+    """Scene-level changes between two versions of a storyboard."""
+    scenes: List[Dict[str, Any]] = field(default_factory=list)  # per new scene: id, change, visual, narration
+    removed: List[str] = field(default_factory=list)
+
+    def _ids(self, change: str) -> List[str]:
+        return [s["scene_id"] for s in self.scenes if s["change"] == change]
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.removed) or any(s["change"] in ("added", "modified") for s in self.scenes)
+
+    @property
+    def rerender_scenes(self) -> List[str]:
+        """Scenes whose segment must be encoded again."""
+        return self._ids("added") + self._ids("modified")
+
+    @property
+    def reused_scenes(self) -> List[str]:
+        """Scenes whose encoded segment can be reused, even if they moved."""
+        return self._ids("unchanged") + self._ids("retimed")
+
+    @property
+    def subtitle_ranges(self) -> List[Tuple[float, float]]:
+        """New-timeline ranges (seconds) whose subtitle cues were regenerated."""
+        return [
+            (s["start_time"], s["end_time"]) for s in self.scenes
+            if s["change"] == "added" or s["narration"]
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "changed": self.changed,
+            "scenes": self.scenes,
+            "removed": self.removed,
+            "rerender_scenes": self.rerender_scenes,
+            "reused_scenes": self.reused_scenes,
+            "subtitle_ranges": [list(r) for r in self.subtitle_ranges],
+        }
+
+
+def diff_storyboards(old: Dict[str, Any], new: Dict[str, Any]) -> StoryboardDiff:
+    """Classify each scene of the new storyboard against the old one."""
+    previous = {scene["id"]: scene for scene in old.get("scenes", [])}
+    diff = StoryboardDiff()
+    for scene in new.get("scenes", []):
+        entry = {
+            "scene_id": scene["id"],
+            "start_time": scene.get("start_time", 0.0),
+            "end_time": scene.get("end_time", 0.0),
+            "visual": False,
+            "narration": False,
+        }
+        before = previous.get(scene["id"])
+        if before is None:
+            entry.update(change="added", visual=True, narration=True)
+        else:
+            entry["visual"] = any(scene.get(f) != before.get(f) for f in VISUAL_FIELDS)
+            entry["narration"] = (
+                narration_text(scene) != narration_text(before)
+                or scene.get("duration") != before.get("duration")
+            )
+            if entry["visual"] or entry["narration"]:
+                entry["change"] = "modified"
+            elif scene.get("start_time") != before.get("start_time"):
+                entry["change"] = "retimed"
+            else:
+                entry["change"] = "unchanged"
+        diff.scenes.append(entry)
+
+    new_ids = {scene["id"] for scene in new.get("scenes", [])}
+    diff.removed = [scene_id for scene_id in previous if scene_id not in new_ids]
+    return diff
+
+
+def _scene_at(scenes: List[Dict[str, Any]], seconds: float) -> Optional[Dict[str, Any]]:
+    for scene in scenes:
+        if scene.get("start_time", 0.0) <= seconds < scene.get("end_time", 0.0):
+            return scene
+    return None
+
+
+def rebuild_subtitles(old: Dict[str, Any], new: Dict[str, Any], diff: StoryboardDiff) -> List[Dict[str, Any]]:
+    """
+    Subtitle cues for the edited storyboard. Cues of scenes whose narration is
+    unchanged are kept and shifted with their scene; changed and added scenes
+    get fresh cues estimated over the scene's duration.
+    """
+    old_scenes = old.get("scenes", [])
+    cues_by_scene: Dict[str, List[Dict[str, Any]]] = {}
+    for cue in old.get("subtitles", []):
+        midpoint = (cue.get("start_time", 0) + cue.get("end_time", 0)) / 2000.0
+        scene = _scene_at(old_scenes, midpoint)
+        if scene is not None:
+            cues_by_scene.setdefault(scene["id"], []).append(cue)
+
+    previous = {scene["id"]: scene for scene in old_scenes}
+    changes = {entry["scene_id"]: entry for entry in diff.scenes}
+    subtitles = []
+    for scene in new.get("scenes", []):
+        entry = changes[scene["id"]]
+        start = float(scene.get("start_time", 0.0))
+        if entry["change"] != "added" and not entry["narration"]:
+            shift_ms = (start - float(previous[scene["id"]].get("start_time", 0.0))) * 1000.0
+            for cue in cues_by_scene.get(scene["id"], []):
+                subtitles.append(dict(
+                    cue,
+                    start_time=round(cue["start_time"] + shift_ms, 3),
+                    end_time=round(cue["end_time"] + shift_ms, 3),
+                ))
+            continue
+
+        text = narration_text(scene)
+        words = [
+            dict(word, start=word["start"] + start, end=word["end"] + start)
+            for word in estimate_word_timings(text, float(scene.get("duration", 0.0)) or None)
+        ]
+        subtitles.extend(cue.to_dict() for cue in generate_cues(words))
+    return subtitles
+
+
+def rebuild_audio_segments(
+    old: Dict[str, Any], new: Dict[str, Any], diff: StoryboardDiff, language: str = "en"
+) -> List[Dict[str, Any]]:
+    """
+    Narration segments for the edited storyboard. Unchanged narration keeps its
+    audio (moved to the scene's new start); changed or added scenes get a new
+    segment without audio, to be synthesized (unchanged sentences come from
+    the TTS cache).
+    """
+    old_scenes = old.get("scenes", [])
+    audio_by_scene: Dict[str, List[Dict[str, Any]]] = {}
+    for segment in old.get("audio_segments", []):
+        scene = _scene_at(old_scenes, float(segment.get("start_time", 0.0)))
+        if scene is not None:
+            audio_by_scene.setdefault(scene["id"], []).append(segment)
+
+    previous = {scene["id"]: scene for scene in old_scenes}
+    changes = {entry["scene_id"]: entry for entry in diff.scenes}
+    segments = []
+    for scene in new.get("scenes", []):
+        entry = changes[scene["id"]]
+        start = float(scene.get("start_time", 0.0))
+        if entry["change"] != "added" and not entry["narration"]:
+            shift = start - float(previous[scene["id"]].get("start_time", 0.0))
+            for segment in audio_by_scene.get(scene["id"], []):
+                segments.append(dict(segment, start_time=round(float(segment["start_time"]) + shift, 3)))
+            continue
+
+        text = narration_text(scene)
+        if text:
+            segments.append(AudioSegment(
+                text=text,
+                duration=float(scene.get("duration", 0.0)),
+                start_time=start,
+                language=language,
+            ).to_dict())
+    return segments
+
+
+def scenes_to_narrate(storyboard: Dict[str, Any], diff: StoryboardDiff) -> List[Dict[str, Any]]:
+    """Scenes of the edited storyboard whose narration must be synthesized again."""
+    changes = {entry["scene_id"]: entry for entry in diff.scenes}
+    return [
+        scene for scene in storyboard.get("scenes", [])
+        if (changes[scene["id"]]["change"] == "added" or changes[scene["id"]]["narration"])
+        and narration_text(scene)
+    ]
+
+
+def place_narration(storyboard: Dict[str, Any], narrated: Dict[str, Any]):
+    """
+    Swap the placeholder audio and estimated cues of re-narrated scenes for
+    synthesized ones. narrated is a /process_scenes result for those scenes
+    alone: its audio and cues are moved from its own timeline to each scene's
+    position in the storyboard. Scenes keep their edited durations.
+    """
+    positions = {scene["id"]: scene for scene in storyboard.get("scenes", [])}
+    narrated_scenes = [scene for scene in narrated.get("scenes", []) if scene.get("id") in positions]
+    replaced = [positions[scene["id"]] for scene in narrated_scenes]
+
+    def shift(seconds: float) -> Optional[float]:
+        scene = _scene_at(narrated_scenes, seconds)
+        if scene is None:
+            return None
+        return float(positions[scene["id"]].get("start_time", 0.0)) - float(scene.get("start_time", 0.0))
+
+    segments = [
+        segment for segment in storyboard.get("audio_segments", [])
+        if _scene_at(replaced, float(segment.get("start_time", 0.0))) is None
+    ]
+    for segment in narrated.get("audio_segments", []):
+        offset = shift(float(segment.get("start_time", 0.0)))
+        if offset is not None:
+            segments.append(dict(segment, start_time=round(float(segment["start_time"]) + offset, 3)))
+    storyboard["audio_segments"] = sorted(segments, key=lambda s: float(s.get("start_time", 0.0)))
+
+    subtitles = [
+        cue for cue in storyboard.get("subtitles", [])
+        if _scene_at(replaced, (cue.get("start_time", 0) + cue.get("end_time", 0)) / 2000.0) is None
+    ]
+    for cue in narrated.get("subtitles", []):
+        offset = shift((cue.get("start_time", 0) + cue.get("end_time", 0)) / 2000.0)
+        if offset is not None:
+            subtitles.append(dict(
+                cue,
+                start_time=round(cue["start_time"] + offset * 1000.0, 3),
+                end_time=round(cue["end_time"] + offset * 1000.0, 3),
+            ))
+    storyboard["subtitles"] = sorted(subtitles, key=lambda c: c.get("start_time", 0))
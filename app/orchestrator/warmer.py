@@ -0,0 +1,180 @@
+"""
+Predictive cache warming from completed jobs.
+Each completed job's clip selections (the get_best_clip results cached under
+assets_{job_id}) feed recency-weighted counts of normalized search queries
+and clip ids. While the orchestrator has idle capacity, a background thread
+keeps the top queries' search results fresh and the top clips downloaded and
+normalized in the clip store, so common themes hit warm caches.
+"""
+
+import time
+import heapq
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.common.config import Config
+from app.common.models import PexelsClip
+from app.common.utils import setup_logging, job_cache
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class DecayingCounter:
+    """Counts whose weight halves every half_life seconds."""
+
+    def __init__(
+        self,
+        half_life: float = Config.PREDICTIVE_PREFETCH_HALF_LIFE,
+        max_items: int = 10000,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.half_life = half_life
+        self.max_items = max_items
+        self.clock = clock
+        self._counts: Dict[str, Tuple[float, float]] = {}  # key -> (score, as of)
+
+    def _decayed(self, score: float, since: float, now: float) -> float:
+        return score * 0.5 ** (max(0.0, now - since) / self.half_life)
+
+    def add(self, key: str, weight: float = 1.0):
+        now = self.clock()
+        score, since = self._counts.get(key, (0.0, now))
+        self._counts[key] = (self._decayed(score, since, now) + weight, now)
+        if len(self._counts) > self.max_items:
+            # Forget the weakest tenth rather than one key per insert
+            for weak, _ in self.top(len(self._counts))[-(self.max_items // 10 or 1):]:
+                del self._counts[weak]
+
+    def score(self, key: str) -> float:
+        if key not in self._counts:
+            return 0.0
+        score, since = self._counts[key]
+        return self._decayed(score, since, self.clock())
+
+    def top(self, n: int) -> List[Tuple[str, float]]:
+        """The n highest-scoring keys, best first."""
+        now = self.clock()
+        scored = ((key, self._decayed(score, since, now)) for key, (score, since) in self._counts.items())
+        return heapq.nlargest(n, scored, key=lambda item: item[1])
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._counts
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+
+class PredictiveWarmer:
+    """Learns popular queries and clips from completed jobs and keeps them cached."""
+
+    def __init__(
+        self,
+        retriever=None,
+        busy: Callable[[], bool] = lambda: False,
+        interval: float = Config.PREDICTIVE_PREFETCH_INTERVAL,
+        top_queries: int = Config.PREDICTIVE_PREFETCH_TOP_QUERIES,
+        top_clips: int = Config.PREDICTIVE_PREFETCH_TOP_CLIPS,
+        clock: Callable[[], float] = time.time,
+    ):
+        self.logger = setup_logging("PredictiveWarmer")
+        self.retriever = retriever
+        self.busy = busy
+        self.interval = interval
+        self.top_queries = top_queries
+        self.top_clips = top_clips
+        self.queries = DecayingCounter(clock=clock)
+        self.clips = DecayingCounter(clock=clock)
+        self._clip_info: Dict[str, PexelsClip] = {}
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def observe(self, job_id: str) -> bool:
+        """Count a completed job's queries and clips; False if it has no assets or was seen."""
+        assets = job_cache.get(f"assets_{job_id}")
+        if not assets:
+            return False
+
+        with self._lock:
+            if job_id in self._seen:
+                return False
+            self._seen[job_id] = None
+            while len(self._seen) > 10000:
+                self._seen.popitem(last=False)
+
+            for asset in assets.values():
+                query = normalize_query(asset.get("query") or "")
+                if query:
+                    self.queries.add(query)
+                clip = asset.get("clip")
+                if clip is not None:
+                    self.clips.add(clip.id)
+                    self._clip_info[clip.id] = clip
+            # Drop details of clips the counter has forgotten
+            if len(self._clip_info) > len(self.clips):
+                self._clip_info = {k: v for k, v in self._clip_info.items() if k in self.clips}
+        self._start()
+        return True
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None and self.interval > 0:
+                self._thread = threading.Thread(target=self._loop, name="predictive-warmer", daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.warm_once()
+            except Exception as e:
+                self.logger.error(f"Predictive warming failed: {str(e)}", exc_info=True)
+
+    def warm_once(self) -> Dict[str, Any]:
+        """Refresh the most popular searches and clips, stopping as soon as jobs need the capacity."""
+        stats = {"queries": 0, "clips": 0, "interrupted": False}
+        if self.busy():
+            stats["interrupted"] = True
+            return stats
+
+        if self.retriever is None:
+            from app.retriever.main import get_retriever_service
+            self.retriever = get_retriever_service()
+
+        with self._lock:
+            queries = [query for query, _ in self.queries.top(self.top_queries)]
+            clips = [self._clip_info[clip_id] for clip_id, _ in self.clips.top(self.top_clips)
+                     if clip_id in self._clip_info]
+
+        # Cached searches return immediately; expired ones are fetched again
+        for query in queries:
+            if self.busy():
+                stats["interrupted"] = True
+                return stats
+            self.retriever.pexels.search_clips(query, per_page=Config.PEXELS_MAX_RESULTS_PER_QUERY)
+            stats["queries"] += 1
+
+        store = self.retriever.clip_store
+        for clip in clips if store is not None else []:
+            if self.busy():
+                stats["interrupted"] = True
+                return stats
+            if store.ensure(clip.id, clip.video_url):
+                stats["clips"] += 1
+
+        self.logger.info(f"Warmed {stats['queries']} popular queries and {stats['clips']} popular clips")
+        return stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "jobs_observed": len(self._seen),
+                "top_queries": self.queries.top(10),
+                "top_clips": self.clips.top(10),
+            }
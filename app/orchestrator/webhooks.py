@@ -0,0 +1,250 @@
+"""
+Background webhook delivery.
+Notifications are written to a durable SQLite outbox and delivered by a
+background thread, so a slow or failing callback never blocks orchestration
+and survives restarts. Failed deliveries are retried with exponential
+backoff; events for the same callback URL can be batched into one request.
+"""
+
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:
+    requests = None
+    HTTPAdapter = None
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+class WebhookOutbox:
+    """Durable store of pending webhook deliveries."""
+
+    def __init__(self, path: str = Config.WEBHOOK_OUTBOX_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS deliveries ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " url TEXT NOT NULL,"
+                " payload TEXT NOT NULL,"
+                " status TEXT NOT NULL DEFAULT 'pending',"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " next_attempt_at REAL NOT NULL,"
+                " last_error TEXT,"
+                " created_at REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS deliveries_due ON deliveries (status, next_attempt_at)"
+            )
+            # Deliveries claimed by a previous process that died mid-flight
+            self._conn.execute("UPDATE deliveries SET status = 'pending' WHERE status = 'inflight'")
+
+    def add(self, url: str, payload: Dict[str, Any], deliver_at: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO deliveries (url, payload, next_attempt_at, created_at) VALUES (?, ?, ?, ?)",
+                (url, json.dumps(payload, default=str), deliver_at, time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim_due(self, now: float, batch_max: int) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Mark due deliveries in flight and return them grouped by URL.
+        Once a URL has anything due, fresh entries still inside their batching
+        window ride along with it; entries waiting on a retry backoff do not.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, payload, attempts FROM deliveries"
+                " WHERE status = 'pending' AND (next_attempt_at <= ? OR attempts = 0)"
+                " AND url IN (SELECT url FROM deliveries"
+                "  WHERE status = 'pending' AND next_attempt_at <= ?)"
+                " ORDER BY id",
+                (now, now),
+            ).fetchall()
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for row_id, url, payload, attempts in rows:
+                group = groups.setdefault(url, [])
+                if len(group) < batch_max:
+                    group.append({"id": row_id, "payload": json.loads(payload), "attempts": attempts})
+            ids = [item["id"] for group in groups.values() for item in group]
+            if ids:
+                self._conn.executemany(
+                    "UPDATE deliveries SET status = 'inflight' WHERE id = ?", [(i,) for i in ids]
+                )
+            return groups
+
+    def complete(self, ids: List[int]):
+        with self._lock:
+            self._conn.executemany("DELETE FROM deliveries WHERE id = ?", [(i,) for i in ids])
+
+    def retry(self, ids: List[int], error: str, next_attempt_at: float, max_attempts: int):
+        """Schedule another attempt, or park deliveries as dead after max_attempts."""
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE deliveries SET attempts = attempts + 1, last_error = ?, next_attempt_at = ?,"
+                " status = CASE WHEN attempts + 1 >= ? THEN 'dead' ELSE 'pending' END"
+                " WHERE id = ?",
+                [(error, next_attempt_at, max_attempts, i) for i in ids],
+            )
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT MIN(next_attempt_at) FROM deliveries WHERE status = 'pending'"
+            ).fetchone()
+            return row[0]
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM deliveries GROUP BY status"
+            ).fetchall())
+
+
+class WebhookDispatcher:
+    """Delivers outbox entries in the background with retries and batching."""
+
+    def __init__(
+        self,
+        outbox: Optional[WebhookOutbox] = None,
+        transport: Any = None,
+        workers: int = Config.WEBHOOK_WORKERS,
+        max_attempts: int = Config.WEBHOOK_MAX_ATTEMPTS,
+        retry_base: float = Config.WEBHOOK_RETRY_BASE,
+        batch_window: float = Config.WEBHOOK_BATCH_WINDOW_MS / 1000.0,
+        batch_max: int = Config.WEBHOOK_BATCH_MAX,
+        timeout: float = Config.WEBHOOK_TIMEOUT,
+    ):
+        self.logger = setup_logging("WebhookDispatcher")
+        self.outbox = outbox or WebhookOutbox()
+        self.transport = transport
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.batch_window = batch_window
+        self.batch_max = max(1, batch_max) if batch_window > 0 else 1
+        self.timeout = timeout
+        self._sessions: Dict[str, Any] = {}
+        self._sessions_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="webhook")
+        self._wake = threading.Condition()
+        self._inflight = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="webhook-dispatcher", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, url: str, payload: Dict[str, Any]) -> int:
+        """Persist a notification for delivery; returns immediately."""
+        delivery_id = self.outbox.add(url, payload, time.time() + self.batch_window)
+        with self._wake:
+            self._wake.notify_all()
+        return delivery_id
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until nothing is due or in flight. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._wake:
+                next_due = self.outbox.next_due()
+                if self._inflight == 0 and (next_due is None or next_due > time.time() + self.batch_window):
+                    return True
+                self._wake.wait(0.05)
+        return False
+
+    def stop(self):
+        with self._wake:
+            self._stopped = True
+            self._wake.notify_all()
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {**self.outbox.counts(), "inflight_batches": self._inflight}
+
+    def _session_for(self, url: str):
+        """One pooled session per callback host."""
+        if self.transport is not None:
+            return self.transport
+        host = urlsplit(url).netloc
+        with self._sessions_lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _run(self):
+        while True:
+            with self._wake:
+                if self._stopped:
+                    return
+                next_due = self.outbox.next_due()
+                delay = 1.0 if next_due is None else max(0.0, next_due - time.time())
+                if delay > 0:
+                    self._wake.wait(min(delay, 1.0))
+                    continue
+                batches = self.outbox.claim_due(time.time(), self.batch_max)
+                self._inflight += len(batches)
+
+            for url, items in batches.items():
+                self._executor.submit(self._deliver, url, items)
+
+    def _deliver(self, url: str, items: List[Dict[str, Any]]):
+        ids = [item["id"] for item in items]
+        if len(items) == 1:
+            body = items[0]["payload"]
+        else:
+            body = {"events": [item["payload"] for item in items]}
+
+        try:
+            if self.transport is None and requests is None:
+                raise RuntimeError("requests library not available for webhooks")
+            response = self._session_for(url).request("POST", url, json=body, timeout=self.timeout)
+            if not 200 <= response.status_code < 300:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            self.outbox.complete(ids)
+            self.logger.info(f"Webhook delivered: {url} ({len(ids)} events)")
+
+        except Exception as e:
+            attempts = max(item["attempts"] for item in items) + 1
+            delay = self.retry_base * (2 ** (attempts - 1)) * (1 + random.random() * 0.1)
+            self.outbox.retry(ids, str(e), time.time() + delay, self.max_attempts)
+            if attempts >= self.max_attempts:
+                self.logger.error(f"Giving up on webhook {url} after {attempts} attempts: {str(e)}")
+            else:
+                self.logger.warning(f"Webhook {url} failed ({str(e)}), retrying in {delay:.1f}s")
+
+        finally:
+            with self._wake:
+                self._inflight -= 1
+                self._wake.notify_all()
+
+
+_dispatcher: Optional[WebhookDispatcher] = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    """Get the global dispatcher, starting it on first use."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            _dispatcher = WebhookDispatcher()
+        return _dispatcher
@@ -0,0 +1,343 @@
+"""
+In-process audio engine for the renderer.
+Mixes narration segments at their timeline offsets, lays a looping music bed
+underneath with sidechain ducking, and normalizes loudness. All processing
+runs in fixed-size vectorized chunks over a memory-mapped PCM buffer, and the
+result is a single track that FFmpeg muxes without further audio filtering.
+"""
+
+import os
+import math
+import hashlib
+import tempfile
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import soundfile
+except ImportError:
+    soundfile = None
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+@dataclass
+class MixSource:
+    """An audio file placed on the output timeline."""
+    path: str
+    start_time: float = 0.0
+    gain_db: float = 0.0
+
+
+def _db_to_gain(db: float) -> float:
+    return 10.0 ** (db / 20.0)
+
+
+def fetch_audio(url: str, destination: str) -> bool:
+    """Download narration stored remotely (s3:// or http(s)://) to a local file."""
+    if url.startswith("s3://"):
+        if boto3 is None:
+            return False
+        bucket, _, key = url[len("s3://"):].partition("/")
+        boto3.client("s3").download_file(bucket, key, destination)
+        return True
+    if url.startswith(("http://", "https://")):
+        if requests is None:
+            return False
+        with requests.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(destination, "wb") as f:
+                for chunk in response.iter_content(chunk_size=1 << 20):
+                    f.write(chunk)
+        return True
+    return False
+
+
+class _ResamplingReader:
+    """Reads an audio file as float32 at the output rate and channel count."""
+
+    def __init__(self, path: str, sample_rate: int, channels: int, loop: bool = False):
+        self.file = soundfile.SoundFile(path)
+        self.ratio = self.file.samplerate / float(sample_rate)
+        self.channels = channels
+        self.loop = loop
+        self.frames = self.file.frames
+        # Length of the source expressed in output frames
+        self.length = int(math.floor(self.frames / self.ratio))
+
+    def close(self):
+        self.file.close()
+
+    def _read_range(self, first: int, last: int) -> "np.ndarray":
+        self.file.seek(first)
+        data = self.file.read(last - first, dtype="float32", always_2d=True)
+        if data.shape[1] == self.channels:
+            return data
+        mono = data.mean(axis=1, keepdims=True)
+        return np.repeat(mono, self.channels, axis=1)
+
+    def read(self, out_start: int, count: int) -> "np.ndarray":
+        """Output frames [out_start, out_start + count), zero padded past the end."""
+        out = np.zeros((count, self.channels), dtype=np.float32)
+        if self.frames == 0:
+            return out
+
+        positions = (np.arange(out_start, out_start + count) * self.ratio)
+        if self.loop:
+            positions = np.mod(positions, self.frames)
+        valid = positions < self.frames - 1 if self.ratio != 1.0 else positions < self.frames
+        if not valid.any():
+            return out
+
+        # Split wherever looping wraps around so each piece is one contiguous read
+        breaks = np.flatnonzero(np.diff(positions) < 0) + 1
+        for piece in np.split(np.arange(count), breaks):
+            piece = piece[valid[piece]]
+            if piece.size == 0:
+                continue
+            pos = positions[piece]
+            first = int(np.floor(pos[0]))
+            last = min(self.frames, int(np.ceil(pos[-1])) + 2)
+            data = self._read_range(first, last)
+            if self.ratio == 1.0:
+                out[piece] = data[(pos - first).astype(np.int64)]
+                continue
+            local = pos - first
+            index = np.arange(data.shape[0])
+            for channel in range(self.channels):
+                out[piece, channel] = np.interp(local, index, data[:, channel])
+        return out
+
+
+class AudioMixer:
+    """Mixes narration and a ducked music bed into one normalized track."""
+
+    def __init__(
+        self,
+        sample_rate: int = Config.AUDIO_SAMPLE_RATE,
+        channels: int = 2,
+        chunk_seconds: float = 10.0,
+        target_lufs: float = Config.AUDIO_TARGET_LUFS,
+        peak_dbfs: float = -1.0,
+        music_gain_db: float = Config.MUSIC_BED_GAIN_DB,
+        duck_db: float = Config.MUSIC_DUCK_DB,
+        duck_release: float = 0.4,
+        fetch: Callable[[str, str], bool] = fetch_audio,
+        fetch_dir: Optional[str] = None,
+    ):
+        self.logger = setup_logging("AudioMixer")
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.chunk = int(chunk_seconds * sample_rate)
+        self.target_lufs = target_lufs
+        self.peak = _db_to_gain(peak_dbfs)
+        self.music_gain = _db_to_gain(music_gain_db)
+        self.duck_gain = _db_to_gain(duck_db)
+        self.duck_release = duck_release
+        self.fetch = fetch
+        self.fetch_dir = fetch_dir or os.path.join(tempfile.gettempdir(), "video_gen", "narration")
+
+    @staticmethod
+    def is_available() -> bool:
+        return np is not None and soundfile is not None
+
+    def sources_from_segments(self, audio_segments: List[Dict[str, Any]]) -> List[MixSource]:
+        """
+        Build mix sources from storyboard audio segments. Remote audio is
+        downloaded first; every segment that cannot be used is logged.
+        """
+        sources = []
+        for index, segment in enumerate(audio_segments):
+            location = segment.get("audio_path") or segment.get("audio_url")
+            path = self._local_audio(location) if location else None
+            if path is None:
+                self.logger.warning(
+                    f"Skipping narration segment {index} ({location or 'no audio'}): audio not available locally"
+                )
+                continue
+            sources.append(MixSource(path=path, start_time=float(segment.get("start_time", 0.0))))
+        return sources
+
+    def _local_audio(self, location: str) -> Optional[str]:
+        """A local file for the audio at location, downloading remote audio once; None if unavailable."""
+        if "://" not in location:
+            return location if os.path.exists(location) else None
+
+        name = hashlib.sha256(location.encode("utf-8")).hexdigest()[:24]
+        path = os.path.join(self.fetch_dir, name + os.path.splitext(location)[1])
+        if os.path.exists(path):
+            return path
+
+        os.makedirs(self.fetch_dir, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if not self.fetch(location, tmp_path) or not os.path.exists(tmp_path):
+                return None
+            os.replace(tmp_path, path)
+            return path
+        except Exception as e:
+            self.logger.warning(f"Could not download narration {location}: {str(e)}")
+            return None
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def mix(
+        self,
+        narration: List[MixSource],
+        output_file: str,
+        duration: Optional[float] = None,
+        music_file: Optional[str] = None,
+    ) -> bool:
+        """
+        Render the final audio track to output_file (WAV).
+        duration defaults to the end of the last narration segment.
+        """
+        if not self.is_available():
+            self.logger.warning("numpy and soundfile are required for in-process mixing")
+            return False
+
+        readers = []
+        buffer_path = None
+        try:
+            for source in narration:
+                reader = _ResamplingReader(source.path, self.sample_rate, self.channels)
+                readers.append((source, reader, int(round(source.start_time * self.sample_rate))))
+
+            if duration is None:
+                duration = max(
+                    [(offset + r.length) / self.sample_rate for _, r, offset in readers] or [0.0]
+                )
+            total = int(math.ceil(duration * self.sample_rate))
+            if total == 0:
+                self.logger.warning("Nothing to mix")
+                return False
+
+            music = None
+            if music_file and os.path.exists(music_file):
+                music = _ResamplingReader(music_file, self.sample_rate, self.channels, loop=True)
+
+            fd, buffer_path = tempfile.mkstemp(suffix=".pcm")
+            os.close(fd)
+            mixbuf = np.memmap(buffer_path, dtype=np.float32, mode="w+", shape=(total, self.channels))
+
+            block = int(0.4 * self.sample_rate)  # 400 ms loudness blocks
+            block_energy: List[float] = []
+            duck_history = np.zeros(0, dtype=np.float32)
+
+            for start in range(0, total, self.chunk):
+                count = min(self.chunk, total - start)
+                voice = np.zeros((count, self.channels), dtype=np.float32)
+                for source, reader, offset in readers:
+                    lo = max(start, offset)
+                    hi = min(start + count, offset + reader.length)
+                    if lo >= hi:
+                        continue
+                    voice[lo - start:hi - start] += (
+                        reader.read(lo - offset, hi - lo) * _db_to_gain(source.gain_db)
+                    )
+
+                chunk = voice
+                if music is not None:
+                    bed = music.read(start, count) * self.music_gain
+                    envelope, duck_history = self._duck_envelope(voice, duck_history)
+                    chunk = voice + bed * envelope[:, None]
+
+                mixbuf[start:start + count] = chunk
+                usable = (count // block) * block
+                if usable:
+                    energy = np.mean(np.square(chunk[:usable]).reshape(-1, block, self.channels), axis=(1, 2))
+                    block_energy.extend(energy.tolist())
+
+            gain = self._normalization_gain(np.asarray(block_energy, dtype=np.float64))
+            peak = 0.0
+            for start in range(0, total, self.chunk):
+                peak = max(peak, float(np.max(np.abs(mixbuf[start:start + self.chunk]))) * gain)
+            if peak > self.peak:
+                gain *= self.peak / peak
+
+            with soundfile.SoundFile(
+                output_file, "w", samplerate=self.sample_rate,
+                channels=self.channels, subtype="PCM_16",
+            ) as out:
+                for start in range(0, total, self.chunk):
+                    out.write(np.clip(mixbuf[start:start + self.chunk] * gain, -1.0, 1.0))
+
+            self.logger.info(
+                f"Mixed {len(readers)} narration segments"
+                f"{' with music bed' if music is not None else ''} "
+                f"({duration:.1f}s, gain {20 * math.log10(gain) if gain > 0 else 0:.1f} dB)"
+            )
+            del mixbuf
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error mixing audio: {str(e)}", exc_info=True)
+            return False
+
+        finally:
+            for _, reader, _ in readers:
+                reader.close()
+            if buffer_path and os.path.exists(buffer_path):
+                os.remove(buffer_path)
+
+    def _duck_envelope(
+        self, voice: "np.ndarray", history: Optional["np.ndarray"] = None
+    ) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Per-sample music gain that dips while narration is present.
+        Presence is detected on 10 ms frames and smoothed with a release window
+        so the bed recovers gradually instead of pumping between words.
+        history is the previous chunk's trailing presence frames, so the
+        release carries across chunk boundaries; the updated history is
+        returned with the envelope.
+        """
+        count = voice.shape[0]
+        frame = max(1, self.sample_rate // 100)
+        n_frames = int(math.ceil(count / frame))
+        padded = np.zeros((n_frames * frame,), dtype=np.float32)
+        padded[:count] = np.abs(voice).max(axis=1)
+        present = (padded.reshape(n_frames, frame).max(axis=1) > 0.01).astype(np.float32)
+
+        width = max(1, int(self.duck_release * 100))
+        if history is None:
+            history = np.zeros(0, dtype=np.float32)
+        extended = np.concatenate((history, present))
+        kernel = np.ones(width, dtype=np.float32)
+        held = np.convolve(extended, kernel, mode="full")[:extended.size][history.size:] > 0
+        frame_gain = np.where(held, self.duck_gain, 1.0).astype(np.float32)
+
+        # Short linear ramps between frame gains to avoid clicks
+        centers = (np.arange(n_frames) + 0.5) * frame
+        envelope = np.interp(np.arange(count), centers, frame_gain).astype(np.float32)
+        return envelope, extended[-(width - 1):] if width > 1 else extended[:0]
+
+    def _normalization_gain(self, block_energy: "np.ndarray") -> float:
+        """Gain that brings gated block loudness to the target level."""
+        if block_energy.size == 0:
+            return 1.0
+        loudness = -0.691 + 10.0 * np.log10(block_energy + 1e-12)
+        gated = block_energy[loudness > -70.0]
+        if gated.size == 0:
+            return 1.0
+        relative = -0.691 + 10.0 * np.log10(gated.mean()) - 10.0
+        gated = gated[(-0.691 + 10.0 * np.log10(gated + 1e-12)) > relative]
+        integrated = -0.691 + 10.0 * np.log10(gated.mean())
+        return _db_to_gain(self.target_lufs - integrated)
@@ -12,6 +12,10 @@ from pathlib import Path
 from app.common.models import Storyboard, Scene, Subtitle
 from app.common.config import Config
 from app.common.utils import setup_logging, log_job_event, job_cache
+from app.common.subtitles import cues_from_dicts, write_subtitles
+from app.renderer.planner import RenderPlanner, RenderPlan
+from app.renderer.audio_mixer import AudioMixer
+from app.renderer.segments import SegmentRenderer
 
 
 logger = setup_logging("Renderer")
@@ -22,6 +26,8 @@ class FFmpegRenderer:
 
     def __init__(self):
         self.logger = setup_logging("FFmpegRenderer")
+        self.planner = RenderPlanner()
+        self.segments = SegmentRenderer() if Config.SEGMENT_CACHE_ENABLED else None
         self._check_ffmpeg()
 
     def _check_ffmpeg(self):
@@ -39,12 +45,23 @@ class FFmpegRenderer:
         except FileNotFoundError:
             self.logger.error("FFmpeg not found. Install with: apt-get install ffmpeg")
 
+    def plan_render(
+        self,
+        job_id: str,
+        storyboard: Dict[str, Any],
+        quality: str = "medium",
+    ) -> RenderPlan:
+        """Build the render plan for a storyboard without encoding anything."""
+        return self.planner.plan(job_id, storyboard, quality)
+
     def render_video(
         self,
         job_id: str,
         storyboard: Dict[str, Any],
         output_path: str,
         quality: str = "medium",
+        plan: Optional[RenderPlan] = None,
+        audio_track: Optional[str] = None,
     ) -> bool:
         """
         Render final video from storyboard.
@@ -57,7 +74,9 @@ class FFmpegRenderer:
             concat_file = f"/tmp/{job_id}_concat.txt"
             filter_file = f"/tmp/{job_id}_filter.txt"
             
-            self._create_concat_file(storyboard, concat_file)
+            subtitle_file = self.write_subtitle_track(job_id, storyboard, "ass")
+
+            self._create_concat_file(storyboard, concat_file, plan)
             self._create_filter_file(storyboard, filter_file)
 
             # Build FFmpeg command
@@ -65,6 +84,9 @@ class FFmpegRenderer:
                 concat_file,
                 output_path,
                 quality,
+                audio_track,
+                subtitle_file,
+                plan,
             )
 
             self.logger.debug(f"FFmpeg command: {' '.join(command)}")
@@ -94,10 +116,56 @@ class FFmpegRenderer:
             self.logger.error(f"Error rendering video: {str(e)}", exc_info=True)
             return False
 
-    def _create_concat_file(self, storyboard: Dict[str, Any], output_file: str):
+    def render_video_segmented(
+        self,
+        job_id: str,
+        storyboard: Dict[str, Any],
+        output_path: str,
+        plan: RenderPlan,
+        audio_track: Optional[str] = None,
+    ) -> Optional[Dict[str, int]]:
+        """
+        Render scene by scene through the segment cache, so only scenes that
+        changed since an earlier render are encoded again.
+        Returns the reused/encoded segment counts, or None on failure.
+        """
+        try:
+            self.logger.info(f"Starting segmented render for job {job_id}")
+            paths, counts = self.segments.render_segments(job_id, storyboard, plan)
+            self.segments.concat(job_id, paths, output_path, audio_track)
+            output_size = os.path.getsize(output_path) / (1024 * 1024)  # MB
+            self.logger.info(
+                f"Video rendered successfully: {output_path} ({output_size:.2f} MB)"
+            )
+            return counts
+        except subprocess.TimeoutExpired:
+            self.logger.error(f"FFmpeg timeout after {Config.JOB_TIMEOUT} seconds")
+            return None
+        except Exception as e:
+            self.logger.error(f"Error rendering video: {str(e)}", exc_info=True)
+            return None
+
+    def _create_concat_file(
+        self,
+        storyboard: Dict[str, Any],
+        output_file: str,
+        plan: Optional[RenderPlan] = None,
+    ):
         """Create FFmpeg concat file from scenes."""
         try:
             with open(output_file, 'w') as f:
+                if plan is not None:
+                    for segment in plan.segments:
+                        if segment.source and segment.mode != "placeholder":
+                            f.write(f"file '{segment.source}'\n")
+                            if segment.trim_start:
+                                f.write(f"inpoint {segment.trim_start}\n")
+                            f.write(f"duration {segment.duration}\n")
+                        else:
+                            f.write(f"file 'color=c=black:s={plan.width}x{plan.height}:d={segment.duration}'\n")
+                    self.logger.debug(f"Concat file created from render plan: {output_file}")
+                    return
+
                 for scene in storyboard.get("scenes", []):
                     # In MVP, use placeholder or generate frame
                     clip_url = scene.get("clip_url", "")
@@ -115,16 +183,31 @@ class FFmpegRenderer:
         except Exception as e:
             self.logger.error(f"Error creating concat file: {str(e)}", exc_info=True)
 
+    def write_subtitle_track(
+        self,
+        job_id: str,
+        storyboard: Dict[str, Any],
+        fmt: str = "srt",
+        output_dir: str = "/tmp",
+    ) -> Optional[str]:
+        """Stream the storyboard's subtitle cues to an SRT, VTT, or ASS file."""
+        subtitles = storyboard.get("subtitles", [])
+        if not subtitles:
+            return None
+
+        output_file = os.path.join(output_dir, f"{job_id}_subtitles.{fmt}")
+        options = {}
+        if fmt == "ass":
+            width, height = map(int, Config.TARGET_RESOLUTION.split('x'))
+            options = {"width": width, "height": height}
+        count = write_subtitles(cues_from_dicts(subtitles), output_file, fmt, **options)
+        self.logger.debug(f"Wrote {count} subtitle cues to {output_file}")
+        return output_file
+
     def _create_filter_file(self, storyboard: Dict[str, Any], output_file: str):
         """Create FFmpeg filter file for transitions and effects."""
         try:
             filters = []
-            
-            # Add caption filter if subtitles exist
-            subtitles = storyboard.get("subtitles", [])
-            if subtitles:
-                # Simple subtitle overlay using drawtext
-                filters.append("drawtext=fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf:fontsize=24")
 
             # Add transitions between scenes
             scene_count = len(storyboard.get("scenes", []))
@@ -155,8 +238,16 @@ class FFmpegRenderer:
         concat_file: str,
         output_path: str,
         quality: str,
+        audio_track: Optional[str] = None,
+        subtitle_file: Optional[str] = None,
+        plan: Optional[RenderPlan] = None,
     ) -> List[str]:
-        """Build FFmpeg command with appropriate parameters."""
+        """
+        Build FFmpeg command with appropriate parameters.
+        A pre-mixed audio_track is muxed as the only audio stream, encoded without filters.
+        Video is stream copied when the plan marks every segment "copy" and no
+        captions need burning in; otherwise it is transcoded.
+        """
         preset = Config.FFMPEG_PRESET
         if quality == "high":
             preset = "slow"
@@ -167,15 +258,40 @@ class FFmpegRenderer:
         resolution = Config.TARGET_RESOLUTION
         width, height = map(int, resolution.split('x'))
 
+        video_filter = f"scale={width}:{height},fps={Config.TARGET_FPS}"
+        if subtitle_file:
+            video_filter += f",subtitles={subtitle_file}"
+
         command = [
             "ffmpeg",
             "-f", "concat",
             "-safe", "0",
             "-i", concat_file,
-            "-c:v", Config.VIDEO_CODEC,
-            "-preset", preset,
-            "-b:v", Config.VIDEO_BITRATE,
-            "-vf", f"scale={width}:{height},fps={Config.TARGET_FPS}",
+        ]
+        if audio_track:
+            command += [
+                "-i", audio_track,
+                "-map", "0:v:0",
+                "-map", "1:a:0",
+            ]
+
+        stream_copy = (
+            plan is not None
+            and bool(plan.segments)
+            and all(segment.mode == "copy" for segment in plan.segments)
+            and not subtitle_file
+        )
+        if stream_copy:
+            command += ["-c:v", "copy"]
+        else:
+            command += [
+                "-c:v", Config.VIDEO_CODEC,
+                "-preset", preset,
+                "-b:v", Config.VIDEO_BITRATE,
+                "-vf", video_filter,
+            ]
+
+        command += [
             "-c:a", Config.AUDIO_CODEC,
             "-b:a", Config.AUDIO_BITRATE,
             "-y",  # Overwrite output file
@@ -267,6 +383,55 @@ class RendererService:
     def __init__(self):
         self.logger = setup_logging("RendererService")
         self.renderer = FFmpegRenderer()
+        self.mixer = AudioMixer()
+
+    def get_render_plan(
+        self,
+        job_id: str,
+        storyboard: Optional[Dict[str, Any]] = None,
+        quality: str = "medium",
+    ) -> RenderPlan:
+        """
+        Build and cache the render plan for a job so it can be inspected before rendering.
+        """
+        if storyboard is None:
+            storyboard = job_cache.get(f"storyboard_{job_id}")
+            if not storyboard:
+                raise ValueError("Storyboard not found in cache")
+
+        plan = self.renderer.plan_render(job_id, storyboard, quality)
+        job_cache.set(f"render_plan_{job_id}", plan.to_dict())
+        log_job_event(
+            job_id,
+            "render_planned",
+            "COMPLETE",
+            {"segments": len(plan.segments), "stream_copy": plan.copy_segments},
+        )
+        return plan
+
+    def mix_audio(
+        self,
+        job_id: str,
+        storyboard: Dict[str, Any],
+        duration: Optional[float] = None,
+    ) -> Optional[str]:
+        """
+        Mix narration and music into a single track for muxing.
+        Returns None when there is no local audio or the mixer is unavailable.
+        """
+        sources = self.mixer.sources_from_segments(storyboard.get("audio_segments", []))
+        if not sources or not self.mixer.is_available():
+            return None
+
+        output_file = f"/tmp/{job_id}_mix.wav"
+        if not self.mixer.mix(
+            sources,
+            output_file,
+            duration=duration or None,
+            music_file=storyboard.get("music_file") or Config.MUSIC_BED_FILE or None,
+        ):
+            return None
+        return output_file
 
     def render_job(
         self,
@@ -285,13 +450,25 @@ class RendererService:
             if not storyboard_data:
                 raise ValueError("Storyboard not found in cache")
 
+            plan = self.get_render_plan(job_id, storyboard_data, quality)
+            audio_track = self.mix_audio(job_id, storyboard_data, plan.total_duration)
+
             # Render video
-            success = self.renderer.render_video(
-                job_id,
-                storyboard_data,
-                output_path,
-                quality,
-            )
+            segments = None
+            if self.renderer.segments is not None:
+                segments = self.renderer.render_video_segmented(
+                    job_id, storyboard_data, output_path, plan, audio_track,
+                )
+                success = segments is not None
+            else:
+                success = self.renderer.render_video(
+                    job_id,
+                    storyboard_data,
+                    output_path,
+                    quality,
+                    plan=plan,
+                    audio_track=audio_track,
+                )
 
             if not success:
                 raise Exception("FFmpeg rendering failed")
@@ -300,15 +477,26 @@ class RendererService:
             thumbnail_path = output_path.replace(".mp4", "_thumb.jpg")
             self.renderer.extract_thumbnail(output_path, thumbnail_path, timestamp=1.0)
 
+            # Sidecar subtitle tracks next to the video
+            subtitle_paths = {}
+            for fmt in ("srt", "vtt"):
+                path = self.renderer.write_subtitle_track(
+                    job_id, storyboard_data, fmt, os.path.dirname(output_path) or ".",
+                )
+                if path:
+                    subtitle_paths[fmt] = path
+
             result = {
                 "job_id": job_id,
                 "video_path": output_path,
                 "thumbnail_path": thumbnail_path,
+                "subtitle_paths": subtitle_paths,
+                "segments": segments,
                 "success": True,
                 "error": None,
             }
 
-            log_job_event(job_id, "video_rendered", "COMPLETE")
+            log_job_event(job_id, "video_rendered", "COMPLETE", {"segments": segments})
             return result
 
         except Exception as e:
@@ -318,6 +506,7 @@ class RendererService:
                 "job_id": job_id,
                 "video_path": None,
                 "thumbnail_path": None,
+                "subtitle_paths": {},
                 "success": False,
                 "error": str(e),
             }
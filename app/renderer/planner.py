@@ -0,0 +1,352 @@
+"""
+Render planning for the renderer service.
+Probes clips once with ffprobe, caches the metadata by content hash, and
+builds a deterministic, serializable plan before any encoding starts.
+"""
+
+import os
+import json
+import hashlib
+import subprocess
+import threading
+from dataclasses import dataclass, asdict, field
+from typing import List, Dict, Any, Optional, Callable
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+# Codec names that are interchangeable with the configured encoder for stream copy
+_ENCODER_CODECS = {
+    "libx264": "h264",
+    "libx265": "hevc",
+    "libvpx-vp9": "vp9",
+}
+
+
+@dataclass
+class ClipProbe:
+    """Media metadata for a single clip, as reported by ffprobe."""
+    file_hash: str
+    duration: float = 0.0
+    video_codec: Optional[str] = None
+    width: int = 0
+    height: int = 0
+    fps: float = 0.0
+    pix_fmt: Optional[str] = None
+    keyframes: List[float] = field(default_factory=list)
+    gop_size: float = 0.0  # average seconds between keyframes
+    audio_codec: Optional[str] = None
+    audio_channels: int = 0
+    audio_sample_rate: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ClipProbe":
+        return cls(**data)
+
+
+@dataclass
+class SegmentPlan:
+    """Render instructions for one scene segment."""
+    scene_id: str
+    source: Optional[str]
+    file_hash: Optional[str]
+    mode: str  # copy, transcode, placeholder
+    trim_start: float = 0.0
+    duration: float = 0.0
+    timeline_start: float = 0.0
+    reasons: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class RenderPlan:
+    """Complete render plan for a job."""
+    job_id: str
+    quality: str
+    width: int
+    height: int
+    fps: int
+    segments: List[SegmentPlan] = field(default_factory=list)
+    total_duration: float = 0.0
+
+    @property
+    def copy_segments(self) -> int:
+        return sum(1 for s in self.segments if s.mode == "copy")
+
+    def fingerprint(self) -> str:
+        """Stable hash of the plan, independent of job id."""
+        data = self.to_dict()
+        data.pop("job_id", None)
+        encoded = json.dumps(data, sort_keys=True).encode()
+        return hashlib.sha256(encoded).hexdigest()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "quality": self.quality,
+            "width": self.width,
+            "height": self.height,
+            "fps": self.fps,
+            "segments": [s.to_dict() for s in self.segments],
+            "total_duration": round(self.total_duration, 3),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), sort_keys=True)
+
+
+def hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+    """Compute the SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_rate(rate: Optional[str]) -> float:
+    """Parse an ffprobe frame rate such as '30000/1001'."""
+    if not rate:
+        return 0.0
+    try:
+        if "/" in rate:
+            num, den = rate.split("/", 1)
+            return float(num) / float(den) if float(den) else 0.0
+        return float(rate)
+    except ValueError:
+        return 0.0
+
+
+def run_ffprobe(path: str, file_hash: str) -> ClipProbe:
+    """Probe a clip's streams and keyframe positions with ffprobe."""
+    result = subprocess.run(
+        [
+            "ffprobe", "-v", "error",
+            "-print_format", "json",
+            "-show_format", "-show_streams",
+            path,
+        ],
+        capture_output=True,
+        timeout=60,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode() if result.stderr else "ffprobe failed")
+
+    info = json.loads(result.stdout or b"{}")
+    probe = ClipProbe(
+        file_hash=file_hash,
+        duration=float(info.get("format", {}).get("duration", 0.0) or 0.0),
+    )
+
+    for stream in info.get("streams", []):
+        if stream.get("codec_type") == "video" and probe.video_codec is None:
+            probe.video_codec = stream.get("codec_name")
+            probe.width = int(stream.get("width", 0))
+            probe.height = int(stream.get("height", 0))
+            probe.fps = _parse_rate(stream.get("avg_frame_rate") or stream.get("r_frame_rate"))
+            probe.pix_fmt = stream.get("pix_fmt")
+        elif stream.get("codec_type") == "audio" and probe.audio_codec is None:
+            probe.audio_codec = stream.get("codec_name")
+            probe.audio_channels = int(stream.get("channels", 0))
+            probe.audio_sample_rate = int(stream.get("sample_rate", 0) or 0)
+
+    if probe.video_codec:
+        keyframes = subprocess.run(
+            [
+                "ffprobe", "-v", "error",
+                "-select_streams", "v:0",
+                "-skip_frame", "nokey",
+                "-show_entries", "frame=pts_time",
+                "-of", "csv=p=0",
+                path,
+            ],
+            capture_output=True,
+            timeout=120,
+        )
+        if keyframes.returncode == 0:
+            times = []
+            for line in keyframes.stdout.decode().splitlines():
+                line = line.strip().rstrip(",")
+                if line:
+                    try:
+                        times.append(round(float(line), 3))
+                    except ValueError:
+                        continue
+            probe.keyframes = sorted(times)
+            if len(times) > 1:
+                probe.gop_size = round((times[-1] - times[0]) / (len(times) - 1), 3)
+
+    return probe
+
+
+class ProbeCache:
+    """Persistent ffprobe metadata cache keyed by clip content hash."""
+
+    def __init__(
+        self,
+        cache_dir: str = Config.PROBE_CACHE_DIR,
+        probe_fn: Callable[[str, str], ClipProbe] = run_ffprobe,
+    ):
+        self.logger = setup_logging("ProbeCache")
+        self.cache_dir = cache_dir
+        self.probe_fn = probe_fn
+        self._memory: Dict[str, ClipProbe] = {}
+        # path -> (size, mtime_ns, hash) so unchanged files are not re-hashed
+        self._hashes: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def file_hash(self, path: str) -> str:
+        """Content hash of a file, memoized on size and mtime."""
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        digest = hash_file(path)
+        with self._lock:
+            self._hashes[path] = (stat.st_size, stat.st_mtime_ns, digest)
+        return digest
+
+    def _entry_path(self, file_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_hash}.json")
+
+    def get(self, path: str) -> ClipProbe:
+        """Return probe metadata for a clip, running ffprobe only on a miss."""
+        digest = self.file_hash(path)
+
+        with self._lock:
+            probe = self._memory.get(digest)
+        if probe is not None:
+            return probe
+
+        entry_path = self._entry_path(digest)
+        if os.path.exists(entry_path):
+            try:
+                with open(entry_path, "r") as f:
+                    probe = ClipProbe.from_dict(json.load(f))
+                self.logger.debug(f"Probe cache hit (disk): {digest[:12]}")
+            except (OSError, ValueError, TypeError) as e:
+                self.logger.warning(f"Discarding corrupt probe entry {entry_path}: {str(e)}")
+                probe = None
+
+        if probe is None:
+            self.logger.debug(f"Probe cache miss: {path}")
+            probe = self.probe_fn(path, digest)
+            tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(probe.to_dict(), f, sort_keys=True)
+            os.replace(tmp_path, entry_path)
+
+        with self._lock:
+            self._memory[digest] = probe
+        return probe
+
+
+class RenderPlanner:
+    """Builds render plans from a storyboard using cached clip metadata."""
+
+    def __init__(self, probe_cache: Optional[ProbeCache] = None):
+        self.logger = setup_logging("RenderPlanner")
+        self.probe_cache = probe_cache or ProbeCache()
+
+    def plan(
+        self,
+        job_id: str,
+        storyboard: Dict[str, Any],
+        quality: str = "medium",
+    ) -> RenderPlan:
+        """Produce a render plan for every scene in the storyboard."""
+        width, height = map(int, Config.TARGET_RESOLUTION.split("x"))
+        if quality == "low":
+            width, height = 1280, 720
+
+        plan = RenderPlan(
+            job_id=job_id,
+            quality=quality,
+            width=width,
+            height=height,
+            fps=Config.TARGET_FPS,
+        )
+
+        timeline = 0.0
+        for scene in storyboard.get("scenes", []):
+            segment = self._plan_segment(scene, plan, timeline)
+            plan.segments.append(segment)
+            timeline += segment.duration
+
+        plan.total_duration = timeline
+        self.logger.info(
+            f"Render plan for job {job_id}: {len(plan.segments)} segments, "
+            f"{plan.copy_segments} stream copy"
+        )
+        return plan
+
+    def _plan_segment(
+        self, scene: Dict[str, Any], plan: RenderPlan, timeline_start: float
+    ) -> SegmentPlan:
+        """Decide how a single scene will be produced."""
+        duration = float(scene.get("duration", Config.DEFAULT_SCENE_DURATION))
+        source = scene.get("clip_path") or scene.get("clip_url")
+        segment = SegmentPlan(
+            scene_id=scene.get("id", ""),
+            source=source,
+            file_hash=None,
+            mode="placeholder",
+            trim_start=float(scene.get("trim_start", 0.0)),
+            duration=round(duration, 3),
+            timeline_start=round(timeline_start, 3),
+        )
+
+        if not source or not os.path.exists(source):
+            segment.reasons.append("no local clip")
+            return segment
+
+        try:
+            probe = self.probe_cache.get(source)
+        except Exception as e:
+            self.logger.warning(f"Probe failed for {source}: {str(e)}")
+            segment.mode = "transcode"
+            segment.reasons.append("probe failed")
+            return segment
+
+        segment.file_hash = probe.file_hash
+
+        if probe.duration and segment.trim_start >= probe.duration:
+            segment.trim_start = 0.0
+            segment.reasons.append("trim point past end of clip")
+
+        transcode = []
+        if probe.video_codec != _ENCODER_CODECS.get(Config.VIDEO_CODEC, Config.VIDEO_CODEC):
+            transcode.append(f"codec {probe.video_codec}")
+        if (probe.width, probe.height) != (plan.width, plan.height):
+            transcode.append(f"resolution {probe.width}x{probe.height}")
+        if abs(probe.fps - plan.fps) > 0.01:
+            transcode.append(f"fps {probe.fps:.3f}")
+        if plan.quality == "high":
+            transcode.append("high quality filters")
+
+        # Stream copy can only cut on a keyframe; snap to the nearest one before the target
+        if segment.trim_start > 0:
+            starts = [k for k in probe.keyframes if k <= segment.trim_start]
+            if starts:
+                segment.trim_start = starts[-1]
+            else:
+                transcode.append("no keyframe before trim point")
+
+        # Never plan past the end of the source clip, measured from the final cut point
+        available = probe.duration - segment.trim_start
+        if probe.duration and duration > available:
+            segment.duration = round(available, 3)
+            segment.reasons.append("clip shorter than scene")
+
+        segment.reasons.extend(transcode)
+        segment.mode = "transcode" if transcode else "copy"
+        return segment
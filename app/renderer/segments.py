@@ -0,0 +1,229 @@
+"""
+Per-scene segment encoding with a content-addressed cache.
+Each scene is encoded to its own file, keyed by everything that determines its
+pixels (source hash, trim, duration, burned-in cues relative to the scene,
+encode settings) but not by its position on the timeline. Re-rendering an
+edited storyboard then re-encodes only the scenes that changed and joins the
+segments with a stream-copy concat.
+"""
+
+import os
+import json
+import hashlib
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+from app.common.subtitles import cues_from_dicts, write_subtitles
+from app.renderer.planner import RenderPlan, SegmentPlan
+
+
+def local_cues(subtitles: List[Dict[str, Any]], segment: SegmentPlan) -> List[Dict[str, Any]]:
+    """Cues overlapping a segment, clipped and shifted to segment-relative milliseconds."""
+    start_ms = segment.timeline_start * 1000.0
+    end_ms = start_ms + segment.duration * 1000.0
+    cues = []
+    for cue in subtitles:
+        if cue["end_time"] <= start_ms or cue["start_time"] >= end_ms:
+            continue
+        cues.append(dict(
+            cue,
+            start_time=round(max(cue["start_time"], start_ms) - start_ms, 3),
+            end_time=round(min(cue["end_time"], end_ms) - start_ms, 3),
+        ))
+    return cues
+
+
+def segment_key(segment: SegmentPlan, cues: List[Dict[str, Any]], plan: RenderPlan) -> str:
+    """Content key of an encoded segment; the same scene at another timeline position shares it."""
+    data = segment.to_dict()
+    for name in ("scene_id", "timeline_start", "reasons"):
+        data.pop(name, None)
+    if segment.file_hash:
+        data.pop("source", None)  # content hash identifies the clip regardless of path
+    canonical = {
+        "segment": data,
+        "cues": [{k: c.get(k) for k in ("text", "start_time", "end_time")} for c in cues],
+        "encode": [plan.quality, plan.width, plan.height, plan.fps,
+                   Config.VIDEO_CODEC, Config.VIDEO_BITRATE, Config.FFMPEG_PRESET],
+    }
+    encoded = json.dumps(canonical, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class SegmentCache:
+    """Least-recently-used directory of encoded segments, capped in bytes."""
+
+    def __init__(
+        self,
+        cache_dir: str = Config.SEGMENT_CACHE_DIR,
+        max_bytes: int = Config.SEGMENT_CACHE_SIZE_MB * 1024 * 1024,
+    ):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> size
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        # Oldest first, so a restart keeps the recency order roughly intact
+        names = [n for n in os.listdir(cache_dir) if n.endswith(".mp4") and ".tmp." not in n]
+        for name in sorted(names, key=lambda n: os.path.getmtime(os.path.join(cache_dir, n))):
+            self._entries[name[:-4]] = os.path.getsize(os.path.join(cache_dir, name))
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.mp4")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            path = self.path(key)
+            if not os.path.exists(path):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return path
+
+    def put(self, key: str, tmp_path: str) -> str:
+        """Move a freshly encoded file into the cache and evict past the size cap."""
+        path = self.path(key)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._entries[key] = os.path.getsize(path)
+            self._entries.move_to_end(key)
+            total = sum(self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                total -= size
+                try:
+                    os.remove(self.path(old_key))
+                except OSError:
+                    pass
+        return path
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"segments": len(self._entries), "bytes": sum(self._entries.values())}
+
+
+class SegmentRenderer:
+    """Encodes render plan segments one scene at a time, reusing cached ones."""
+
+    def __init__(
+        self,
+        cache: Optional[SegmentCache] = None,
+        runner: Callable[..., Any] = subprocess.run,
+    ):
+        self.logger = setup_logging("SegmentRenderer")
+        self.cache = cache or SegmentCache()
+        self.runner = runner
+
+    def _run(self, command: List[str]):
+        result = self.runner(command, capture_output=True, timeout=Config.JOB_TIMEOUT)
+        if result.returncode != 0:
+            error_msg = result.stderr.decode() if result.stderr else "Unknown error"
+            raise RuntimeError(f"FFmpeg error: {error_msg}")
+
+    def build_segment_command(
+        self,
+        segment: SegmentPlan,
+        plan: RenderPlan,
+        output_path: str,
+        subtitle_file: Optional[str] = None,
+    ) -> List[str]:
+        """FFmpeg command that encodes one segment to the plan's format, without audio."""
+        if segment.mode == "placeholder" or not segment.source:
+            command = [
+                "ffmpeg", "-f", "lavfi",
+                "-i", f"color=c=black:s={plan.width}x{plan.height}:r={plan.fps}:d={segment.duration}",
+            ]
+        else:
+            command = ["ffmpeg"]
+            if segment.trim_start:
+                command += ["-ss", str(segment.trim_start)]
+            command += ["-t", str(segment.duration), "-i", segment.source]
+
+        if segment.mode == "copy" and not subtitle_file:
+            command += ["-map", "0:v:0", "-c:v", "copy"]
+        else:
+            preset = Config.FFMPEG_PRESET
+            if plan.quality == "high":
+                preset = "slow"
+            elif plan.quality == "low":
+                preset = "ultrafast"
+            video_filter = f"scale={plan.width}:{plan.height},fps={plan.fps}"
+            if subtitle_file:
+                video_filter += f",subtitles={subtitle_file}"
+            command += [
+                "-map", "0:v:0",
+                "-c:v", Config.VIDEO_CODEC,
+                "-preset", preset,
+                "-b:v", Config.VIDEO_BITRATE,
+                "-vf", video_filter,
+            ]
+        return command + ["-an", "-y", output_path]
+
+    def render_segments(
+        self,
+        job_id: str,
+        storyboard: Dict[str, Any],
+        plan: RenderPlan,
+    ) -> Tuple[List[str], Dict[str, int]]:
+        """Encoded segment files in timeline order, and how many were reused vs encoded."""
+        subtitles = storyboard.get("subtitles", [])
+        paths = []
+        counts = {"reused": 0, "encoded": 0}
+        for index, segment in enumerate(plan.segments):
+            cues = local_cues(subtitles, segment)
+            key = segment_key(segment, cues, plan)
+            cached = self.cache.get(key)
+            if cached:
+                paths.append(cached)
+                counts["reused"] += 1
+                continue
+
+            subtitle_file = None
+            if cues:
+                subtitle_file = f"/tmp/{job_id}_segment_{index}.ass"
+                write_subtitles(cues_from_dicts(cues), subtitle_file, "ass", width=plan.width, height=plan.height)
+
+            tmp_path = f"{self.cache.path(key)}.{os.getpid()}.{threading.get_ident()}.tmp.mp4"
+            try:
+                self._run(self.build_segment_command(segment, plan, tmp_path, subtitle_file))
+                paths.append(self.cache.put(key, tmp_path))
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                if subtitle_file and os.path.exists(subtitle_file):
+                    os.remove(subtitle_file)
+            counts["encoded"] += 1
+
+        self.logger.info(
+            f"Segments for job {job_id}: {counts['encoded']} encoded, {counts['reused']} reused"
+        )
+        return paths, counts
+
+    def concat(
+        self,
+        job_id: str,
+        segment_paths: List[str],
+        output_path: str,
+        audio_track: Optional[str] = None,
+    ):
+        """Join segments without re-encoding video and mux the mixed audio track."""
+        concat_file = f"/tmp/{job_id}_segments.txt"
+        with open(concat_file, "w") as f:
+            for path in segment_paths:
+                f.write(f"file '{path}'\n")
+
+        command = ["ffmpeg", "-f", "concat", "-safe", "0", "-i", concat_file]
+        if audio_track:
+            command += ["-i", audio_track, "-map", "0:v:0", "-map", "1:a:0",
+                        "-c:a", Config.AUDIO_CODEC, "-b:a", Config.AUDIO_BITRATE, "-shortest"]
+        command += ["-c:v", "copy", "-movflags", "+faststart", "-y", output_path]
+        try:
+            self._run(command)
+        finally:
+            os.remove(concat_file)
@@ -0,0 +1,160 @@
+"""
+Local store of downloaded stock clips.
+Clips are fetched once, optionally re-encoded to the render format (target
+resolution, frame rate and codec, one keyframe per second) so the render
+planner can stream-copy them, and kept under a size budget, least recently
+used first. Generation jobs and prefetch share the same store.
+"""
+
+import os
+import re
+import subprocess
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+class ClipStore:
+    """Downloaded, normalized clips keyed by stock clip id."""
+
+    def __init__(
+        self,
+        root: str = Config.CLIP_STORE_DIR,
+        max_bytes: int = Config.CLIP_STORE_SIZE_MB * 1024 * 1024,
+        download: Optional[Callable[[str, str], bool]] = None,
+        normalize: bool = Config.CLIP_NORMALIZE,
+        runner: Callable[..., object] = subprocess.run,
+    ):
+        self.logger = setup_logging("ClipStore")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.download = download
+        self.normalize = normalize
+        self.runner = runner
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._lock = threading.Lock()
+        # clip id -> [fetch lock, threads using it]; dropped when the last one leaves
+        self._fetching: Dict[str, list] = {}
+        os.makedirs(root, exist_ok=True)
+        names = [n for n in os.listdir(root) if n.endswith(".mp4") and ".tmp." not in n]
+        for name in sorted(names, key=lambda n: os.path.getmtime(os.path.join(root, n))):
+            self._entries[name] = os.path.getsize(os.path.join(root, name))
+
+    @staticmethod
+    def _name(clip_id: str) -> str:
+        return re.sub(r"[^A-Za-z0-9_.-]", "_", str(clip_id)) + ".mp4"
+
+    def path(self, clip_id: str) -> str:
+        return os.path.join(self.root, self._name(clip_id))
+
+    def get(self, clip_id: str) -> Optional[str]:
+        """Local path of a stored clip, or None."""
+        name = self._name(clip_id)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            path = os.path.join(self.root, name)
+            if not os.path.exists(path):
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return path
+
+    def ensure(self, clip_id: str, video_url: str) -> Optional[str]:
+        """Local path of a clip, downloading and normalizing it on a miss; None on failure."""
+        path = self.get(clip_id)
+        if path or not video_url or self.download is None:
+            return path
+
+        with self._lock:
+            entry = self._fetching.setdefault(clip_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                path = self.get(clip_id)  # fetched by another thread meanwhile
+                if path:
+                    return path
+                return self._fetch(clip_id, video_url)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._fetching.pop(clip_id, None)
+
+    def _fetch(self, clip_id: str, video_url: str) -> Optional[str]:
+        path = self.path(clip_id)
+        suffix = f"{os.getpid()}.{threading.get_ident()}"
+        raw = f"{path}.{suffix}.tmp.raw"
+        normalized = f"{path}.{suffix}.tmp.mp4"
+        try:
+            if not self.download(video_url, raw) or not os.path.exists(raw):
+                return None
+            source = raw
+            if self.normalize:
+                if self._normalize(raw, normalized):
+                    source = normalized
+                else:
+                    self.logger.warning(f"Keeping clip {clip_id} as downloaded; normalization failed")
+            os.replace(source, path)
+        finally:
+            for leftover in (raw, normalized):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+
+        with self._lock:
+            name = self._name(clip_id)
+            self._entries[name] = os.path.getsize(path)
+            self._entries.move_to_end(name)
+            self._evict()
+        self.logger.info(f"Stored clip {clip_id}: {path}")
+        return path
+
+    def normalize_command(self, source: str, output: str) -> List[str]:
+        """FFmpeg command re-encoding a clip to the render format, without audio."""
+        width, height = map(int, Config.TARGET_RESOLUTION.split("x"))
+        fps = Config.TARGET_FPS
+        return [
+            "ffmpeg", "-i", source,
+            "-vf", (
+                f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+                f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,fps={fps}"
+            ),
+            "-c:v", Config.VIDEO_CODEC,
+            "-preset", Config.FFMPEG_PRESET,
+            "-b:v", Config.VIDEO_BITRATE,
+            "-pix_fmt", "yuv420p",
+            "-g", str(fps),  # a keyframe every second keeps stream-copy trims close to target
+            "-an",
+            "-movflags", "+faststart",
+            "-y", output,
+        ]
+
+    def _normalize(self, source: str, output: str) -> bool:
+        try:
+            result = self.runner(
+                self.normalize_command(source, output),
+                capture_output=True,
+                timeout=Config.JOB_TIMEOUT,
+            )
+        except (FileNotFoundError, subprocess.TimeoutExpired) as e:
+            self.logger.warning(f"FFmpeg unavailable for clip normalization: {str(e)}")
+            return False
+        return result.returncode == 0 and os.path.exists(output)
+
+    def _evict(self):
+        """Drop least recently used clips past the size budget; caller holds the lock."""
+        total = sum(self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            total -= size
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"clips": len(self._entries), "bytes": sum(self._entries.values())}
@@ -3,6 +3,7 @@ Asset retriever service for fetching video clips from Pexels.
 """
 
 import json
+import hashlib
 from typing import List, Dict, Any, Optional
 
 try:
@@ -13,6 +14,7 @@ except ImportError:
 from app.common.models import PexelsClip, Scene
 from app.common.config import Config
 from app.common.utils import setup_logging, log_job_event, job_cache
+from app.retriever.clip_store import ClipStore
 
 
 logger = setup_logging("Retriever")
@@ -29,10 +31,24 @@ class PexelsRetriever:
         if not self.api_key:
             self.logger.warning("PEXELS_API_KEY not configured. Pexels integration disabled.")
 
+    @staticmethod
+    def search_cache_key(query: str, per_page: int) -> str:
+        """job_cache key of a search, shared by jobs with the same normalized query."""
+        normalized = " ".join(query.lower().split())
+        digest = hashlib.sha1(f"{normalized}|{per_page}".encode("utf-8")).hexdigest()
+        return f"pexels_search_{digest}"
+
     def search_clips(self, query: str, per_page: int = 5) -> List[PexelsClip]:
         """
         Search for video clips matching query.
+        Results are reused from job_cache for PEXELS_SEARCH_CACHE_TTL seconds.
         """
+        cache_key = self.search_cache_key(query, per_page)
+        if Config.PEXELS_SEARCH_CACHE_TTL > 0:
+            cached = job_cache.get(cache_key)
+            if cached is not None:
+                return [PexelsClip(**clip) for clip in cached]
+
         if not self.api_key or requests is None:
             self.logger.warning(f"Cannot search clips without API key or requests library")
             return []
@@ -82,6 +98,8 @@ class PexelsRetriever:
                     self.logger.debug(f"Found clip: {clip.id} - {clip.duration}s")
 
             self.logger.info(f"Search query '{query}' returned {len(clips)} clips")
+            if Config.PEXELS_SEARCH_CACHE_TTL > 0:
+                job_cache.set(cache_key, [c.to_dict() for c in clips], ttl=Config.PEXELS_SEARCH_CACHE_TTL)
             return clips
 
         except requests.exceptions.RequestException as e:
@@ -133,12 +151,19 @@ class PexelsRetriever:
 
     def download_clip(self, clip_url: str, destination: str) -> bool:
         """
-        Download clip to local storage or object store.
-        In MVP, just log the intent; implement actual download in next phase.
+        Download clip to a local file, streaming it in chunks.
         """
+        if requests is None:
+            self.logger.warning("Cannot download clips without requests library")
+            return False
+
         try:
             self.logger.info(f"Downloading clip from {clip_url} to {destination}")
-            # Actual download would use requests or similar
+            with requests.get(clip_url, stream=True, timeout=60) as response:
+                response.raise_for_status()
+                with open(destination, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        f.write(chunk)
             return True
         except Exception as e:
             self.logger.error(f"Error downloading clip: {str(e)}")
@@ -151,13 +176,27 @@ class RetrieverService:
     def __init__(self):
         self.logger = setup_logging("RetrieverService")
         self.pexels = PexelsRetriever()
+        self.clip_store = (
+            ClipStore(download=self.pexels.download_clip) if Config.CLIP_STORE_ENABLED else None
+        )
+
+    def fetch_clips(self, assets: Dict[str, Any]) -> Dict[str, Any]:
+        """Make sure each selected clip is in the local clip store; adds its "path" and whether it was "cached"."""
+        for asset in assets.values():
+            clip = asset.get("clip")
+            asset["path"] = None
+            asset["cached"] = False
+            if clip is not None and self.clip_store is not None:
+                asset["cached"] = self.clip_store.get(clip.id) is not None
+                asset["path"] = self.clip_store.ensure(clip.id, clip.video_url)
+        return assets
 
     def retrieve_assets_for_scenes(self, job_id: str, scenes: List[Scene]) -> Dict[str, Any]:
         """Retrieve assets for all scenes in a job."""
         self.logger.info(f"Retrieving assets for {len(scenes)} scenes in job {job_id}")
 
         try:
-            assets = self.pexels.get_best_clip(scenes)
+            assets = self.fetch_clips(self.pexels.get_best_clip(scenes))
             
             # Cache assets
             job_cache.set(f"assets_{job_id}", assets)
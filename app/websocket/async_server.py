@@ -0,0 +1,131 @@
+"""
+Asyncio WebSocket server for high connection counts.
+Serves the same Socket.IO event contract as WebSocketServer, but every
+client is a coroutine on one event loop instead of an OS thread. Runs on
+aiohttp, or can be mounted under any ASGI server through asgi_app().
+"""
+import asyncio
+from typing import Optional
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+try:
+    from aiohttp import web
+except ImportError:
+    web = None
+
+from app.common.utils import get_logger
+from app.websocket.broadcaster import JobEventBroadcaster, ALL_JOBS_ROOM, CORS_ORIGINS, job_room
+
+logger = get_logger(__name__)
+
+
+class AsyncWebSocketServer(JobEventBroadcaster):
+    """Socket.IO server running on asyncio"""
+
+    def __init__(self, broker=None, async_mode: str = 'aiohttp', **kwargs):
+        if socketio is None:
+            raise ImportError('python-socketio is required for the asyncio WebSocket server')
+        self.sio = socketio.AsyncServer(async_mode=async_mode, cors_allowed_origins=CORS_ORIGINS)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.setup_event_handlers()
+        super().__init__(broker, **kwargs)
+
+    def setup_event_handlers(self):
+        """Setup WebSocket event handlers"""
+        sio = self.sio
+
+        @sio.event
+        async def connect(sid, environ):
+            logger.debug(f'Client connected: {sid}')
+            await sio.emit('connected', {'data': 'Connected to WebSocket server'}, to=sid)
+
+        @sio.event
+        async def disconnect(sid):
+            logger.debug(f'Client disconnected: {sid}')
+
+        @sio.on('subscribe_job')
+        async def subscribe_job(sid, data):
+            job_id = (data or {}).get('jobId')
+            if job_id:
+                await sio.enter_room(sid, job_room(job_id))
+                events, info = self.replay_missed(data)
+                for event, payload in events:
+                    await sio.emit(event, payload, to=sid)
+                await sio.emit('subscribed', info, to=sid)
+
+        @sio.on('unsubscribe_job')
+        async def unsubscribe_job(sid, data):
+            job_id = (data or {}).get('jobId')
+            if job_id:
+                await sio.leave_room(sid, job_room(job_id))
+
+        @sio.on('subscribe_jobs')
+        async def subscribe_jobs(sid, data=None):
+            await sio.enter_room(sid, ALL_JOBS_ROOM)
+            await sio.emit('subscribed', {'all': True}, to=sid)
+
+        @sio.on('unsubscribe_jobs')
+        async def unsubscribe_jobs(sid, data=None):
+            await sio.leave_room(sid, ALL_JOBS_ROOM)
+
+        @sio.on('get_active_jobs')
+        async def get_active_jobs(sid, data=None):
+            await sio.emit('active_jobs', {'count': len(sio.eio.sockets)}, to=sid)
+
+    async def start(self):
+        """Bind to the running loop; must be awaited before events are broadcast"""
+        self.loop = asyncio.get_running_loop()
+
+    def handle_broker_event(self, event: dict):
+        # Broker callbacks arrive on other threads; hop onto the event loop
+        if self.loop is None:
+            logger.debug('Dropping broker event received before the server started')
+            return
+        self.loop.call_soon_threadsafe(super().handle_broker_event, event)
+
+    def _emit(self, event: str, payload: dict, room=None):
+        self.loop.create_task(self.sio.emit(event, payload, to=room))
+
+    def _start_flusher(self):
+        self.loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        interval = 1.0 / self.max_emit_rate
+        while True:
+            await asyncio.sleep(interval)
+            self._flush_once()
+
+    def aiohttp_app(self):
+        """aiohttp application serving Socket.IO and /health"""
+        if web is None:
+            raise ImportError('aiohttp is required. Install with: pip install aiohttp')
+
+        async def health(request):
+            return web.json_response({
+                'status': 'healthy',
+                'service': 'websocket',
+                'mode': 'asyncio',
+                'clients': len(self.sio.eio.sockets),
+            })
+
+        async def on_startup(app):
+            await self.start()
+
+        app = web.Application()
+        self.sio.attach(app)
+        app.router.add_get('/health', health)
+        app.on_startup.append(on_startup)
+        return app
+
+    def asgi_app(self):
+        """ASGI application for uvicorn/hypercorn (create the server with async_mode='asgi')"""
+        return socketio.ASGIApp(self.sio, on_startup=self.start)
+
+    def run(self, host: str = '0.0.0.0', port: int = 8085):
+        """Run the server on aiohttp"""
+        logger.info(f'Starting asyncio WebSocket server on {host}:{port}')
+        web.run_app(self.aiohttp_app(), host=host, port=port, print=None)
@@ -0,0 +1,185 @@
+"""
+Transport-independent job event broadcasting.
+Builds the event payloads sent to clients, coalesces status and log events,
+and dispatches broker messages. The Flask-SocketIO and asyncio servers
+subclass it and only supply how to emit to a room and how to run the flush
+loop, so both expose the same event contract.
+"""
+import threading
+from datetime import datetime
+from typing import Optional
+
+from app.common.config import Config
+from app.common.utils import get_logger
+from app.websocket.broker import get_event_broker
+from app.websocket.coalescer import ProgressCoalescer
+from app.websocket.replay import EventReplayBuffer
+
+logger = get_logger(__name__)
+
+# Room joined by clients that follow every job (dashboards, job lists)
+ALL_JOBS_ROOM = 'jobs'
+
+CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:3001', 'http://127.0.0.1:3000', 'http://127.0.0.1:3001']
+
+
+def job_room(job_id: str) -> str:
+    return f'job_{job_id}'
+
+
+class JobEventBroadcaster:
+    """Base class holding the event contract shared by all server modes"""
+
+    def __init__(self, broker=None, max_emit_rate: float = Config.WS_MAX_EMIT_RATE):
+        # Status and log events are coalesced and flushed at most max_emit_rate times per second
+        self.max_emit_rate = max_emit_rate
+        self.coalescer = ProgressCoalescer(self._emit_statuses, self._emit_log) if max_emit_rate > 0 else None
+        self._flusher_started = False
+        self._flusher_lock = threading.Lock()
+        # Recent per-job events, replayed to clients that resubscribe with lastSeq
+        self.replay = EventReplayBuffer()
+        # Fan out events published by any producer process to this replica's rooms
+        self.broker = broker or get_event_broker()
+        self._unsubscribe = self.broker.subscribe(self.handle_broker_event)
+
+    def _emit(self, event: str, payload: dict, room: Optional[object] = None):
+        """Send an event to a room, a list of rooms, or everyone when room is None"""
+        raise NotImplementedError
+
+    def _start_flusher(self):
+        """Start a background loop that calls _flush_once every 1/max_emit_rate seconds"""
+        raise NotImplementedError
+
+    def replay_missed(self, data: dict):
+        """
+        Events a resubscribing client missed, from the 'lastSeq' and 'epoch'
+        it sent with subscribe_job, and the 'subscribed' acknowledgement
+        """
+        job_id = data['jobId']
+        last_seq = data.get('lastSeq')
+        try:
+            last_seq = None if last_seq is None else int(last_seq)
+        except (TypeError, ValueError):
+            last_seq = None
+        events, info = self.replay.since(job_id, last_seq, data.get('epoch'))
+        if events:
+            logger.debug(f'Replaying {len(events)} events for job {job_id} from seq {last_seq}')
+        return events, info
+
+    def handle_broker_event(self, event: dict):
+        """Dispatch an event received from the broker to the matching broadcast"""
+        handlers = {
+            'job_status': self.broadcast_job_status,
+            'job_log': self.broadcast_job_log,
+            'job_completed': self.broadcast_job_completed,
+            'job_failed': self.broadcast_job_failed,
+            'queue_update': self.broadcast_queue_update,
+        }
+        handler = handlers.get(event.get('event'))
+        if handler is None:
+            logger.warning(f'Ignoring unknown broker event: {event.get("event")}')
+            return
+        handler(**event.get('data', {}))
+
+    def broadcast_job_status(self, job_id: str, status: str, progress: int, message: str = None):
+        """Broadcast job status update to all subscribers"""
+        payload = {
+            'jobId': job_id,
+            'status': status,
+            'progress': progress,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+        if message:
+            payload['message'] = message
+
+        if self.coalescer is None:
+            self._emit_statuses([payload])
+            return
+        self.coalescer.offer_status(job_id, payload)
+        self._ensure_flusher()
+
+    def broadcast_job_log(self, job_id: str, level: str, message: str):
+        """Broadcast job log entry to all subscribers"""
+        payload = {
+            'jobId': job_id,
+            'level': level,
+            'message': message,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        if self.coalescer is None:
+            self._emit_log(payload)
+            return
+        self.coalescer.offer_log(job_id, payload)
+        self._ensure_flusher()
+
+    def broadcast_job_completed(self, job_id: str, video_url: str, duration: float):
+        """Broadcast job completion to all subscribers"""
+        if self.coalescer is not None:
+            self.coalescer.flush_job(job_id)
+        payload = {
+            'jobId': job_id,
+            'videoUrl': video_url,
+            'duration': duration,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        self.replay.record(job_id, 'job_completed', payload)
+        logger.info(f'Broadcasting job completed: {payload}')
+        self._emit('job_completed', payload, [job_room(job_id), ALL_JOBS_ROOM])
+
+    def broadcast_job_failed(self, job_id: str, error_message: str):
+        """Broadcast job failure to all subscribers"""
+        if self.coalescer is not None:
+            self.coalescer.flush_job(job_id)
+        payload = {
+            'jobId': job_id,
+            'errorMessage': error_message,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        self.replay.record(job_id, 'job_failed', payload)
+        logger.error(f'Broadcasting job failed: {payload}')
+        self._emit('job_failed', payload, [job_room(job_id), ALL_JOBS_ROOM])
+
+    def broadcast_queue_update(self, queued_count: int, processing_count: int):
+        """Broadcast queue status update to all clients"""
+        payload = {
+            'queued': queued_count,
+            'processing': processing_count,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+
+        logger.debug(f'Broadcasting queue update: {payload}')
+        self._emit('queue_updated', payload)
+
+    def _emit_statuses(self, updates: list):
+        """Send each update to its job room and one batch frame to list watchers"""
+        for payload in updates:
+            self.replay.record(payload['jobId'], 'job_status_update', payload)
+            logger.debug(f'Broadcasting job status: {payload}')
+            self._emit('job_status_update', payload, job_room(payload['jobId']))
+        self._emit(
+            'job_status_batch',
+            {'updates': updates, 'timestamp': datetime.utcnow().isoformat()},
+            ALL_JOBS_ROOM,
+        )
+
+    def _emit_log(self, payload: dict):
+        self.replay.record(payload['jobId'], 'job_log_entry', payload)
+        logger.debug(f'Broadcasting job log: {payload}')
+        self._emit('job_log_entry', payload, job_room(payload['jobId']))
+
+    def _ensure_flusher(self):
+        """Start the background flush loop on first use"""
+        with self._flusher_lock:
+            if self._flusher_started:
+                return
+            self._flusher_started = True
+        self._start_flusher()
+
+    def _flush_once(self):
+        try:
+            self.coalescer.flush()
+        except Exception as e:
+            logger.error(f'Failed to flush job events: {e}', exc_info=True)
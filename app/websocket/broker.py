@@ -0,0 +1,125 @@
+"""
+Event broker between job producers and WebSocket servers.
+Producers (API, orchestrator) publish job events once; every WebSocketServer
+replica subscribes and fans them out to its own rooms. Redis pub/sub carries
+events across processes; LocalBroker stands in when everything runs in one
+process or Redis is unreachable.
+"""
+import json
+import threading
+from typing import Any, Callable, Dict, List
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+from app.common.config import Config
+from app.common.utils import get_logger
+
+logger = get_logger(__name__)
+
+EventHandler = Callable[[Dict[str, Any]], None]
+
+
+class LocalBroker:
+    """In-process broker that delivers events synchronously to subscribers"""
+
+    def __init__(self):
+        self._handlers: List[EventHandler] = []
+        self._lock = threading.Lock()
+
+    def publish(self, event: Dict[str, Any]):
+        with self._lock:
+            handlers = list(self._handlers)
+        for handler in handlers:
+            try:
+                handler(event)
+            except Exception as e:
+                logger.error(f'Event handler failed: {e}', exc_info=True)
+
+    def subscribe(self, handler: EventHandler) -> Callable[[], None]:
+        """Register a handler; returns a function that unsubscribes it"""
+        with self._lock:
+            self._handlers.append(handler)
+
+        def unsubscribe():
+            with self._lock:
+                if handler in self._handlers:
+                    self._handlers.remove(handler)
+
+        return unsubscribe
+
+
+class RedisBroker:
+    """Redis pub/sub broker; each subscriber gets its own listener thread"""
+
+    def __init__(self, client, channel: str = Config.WS_EVENT_CHANNEL):
+        self.client = client
+        self.channel = channel
+
+    def publish(self, event: Dict[str, Any]):
+        self.client.publish(self.channel, json.dumps(event, default=str))
+
+    def subscribe(self, handler: EventHandler) -> Callable[[], None]:
+        stopped = threading.Event()
+
+        def listen():
+            delay = 0.5
+            while not stopped.is_set():
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                try:
+                    pubsub.subscribe(self.channel)
+                    delay = 0.5
+                    while not stopped.is_set():
+                        message = pubsub.get_message(timeout=1.0)
+                        if message and message.get('type') == 'message':
+                            try:
+                                handler(json.loads(message['data']))
+                            except Exception as e:
+                                logger.error(f'Event handler failed: {e}', exc_info=True)
+                except Exception as e:
+                    # Resubscribe with backoff if Redis drops the connection
+                    logger.warning(f'Redis subscription lost ({e}), retrying in {delay:.1f}s')
+                    stopped.wait(delay)
+                    delay = min(delay * 2, 30.0)
+                finally:
+                    pubsub.close()
+
+        thread = threading.Thread(target=listen, name='ws-redis-subscriber', daemon=True)
+        thread.start()
+        return stopped.set
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_event_broker():
+    """Get the process-wide broker, preferring Redis when configured and reachable"""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = _create_broker()
+        return _broker
+
+
+def set_event_broker(broker):
+    """Override the process-wide broker (tests, embedded deployments)"""
+    global _broker
+    with _broker_lock:
+        _broker = broker
+
+
+def _create_broker():
+    if Config.WS_EVENT_BROKER == 'redis' and redis is not None:
+        try:
+            # socket_timeout bounds publishes to a stalled Redis; it must exceed
+            # the subscriber's 1s get_message poll
+            client = redis.from_url(Config.REDIS_URL, socket_connect_timeout=2, socket_timeout=5)
+            client.ping()
+            logger.info(f'Publishing job events through Redis channel {Config.WS_EVENT_CHANNEL}')
+            return RedisBroker(client)
+        except Exception as e:
+            logger.warning(f'Redis unavailable ({e}); job events stay in-process')
+    return LocalBroker()
@@ -0,0 +1,88 @@
+"""
+Coalescing buffer for job progress broadcasts.
+Status updates keep only the latest value per job and are flushed at a
+bounded rate; log lines are queued per job and the oldest intermediate lines
+are dropped when a job logs faster than clients can be sent them.
+"""
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Tuple
+
+from app.common.config import Config
+
+
+class ProgressCoalescer:
+    """Buffers job status and log events between flushes"""
+
+    def __init__(
+        self,
+        emit_statuses: Callable[[List[Dict[str, Any]]], None],
+        emit_log: Callable[[Dict[str, Any]], None],
+        max_pending_logs: int = Config.WS_MAX_PENDING_LOGS,
+    ):
+        self.emit_statuses = emit_statuses
+        self.emit_log = emit_log
+        self.max_pending_logs = max(1, max_pending_logs)
+        self._statuses: Dict[str, Dict[str, Any]] = {}
+        self._logs: Dict[str, Tuple[Deque[Dict[str, Any]], List[int]]] = {}
+        self._lock = threading.Lock()
+        self.dropped_logs = 0
+        self.coalesced_statuses = 0
+
+    def offer_status(self, job_id: str, payload: Dict[str, Any]):
+        """Replace any pending status for the job with this one"""
+        with self._lock:
+            if job_id in self._statuses:
+                self.coalesced_statuses += 1
+            self._statuses[job_id] = payload
+
+    def offer_log(self, job_id: str, payload: Dict[str, Any]):
+        """Queue a log line, dropping the oldest pending line when over the limit"""
+        with self._lock:
+            lines, dropped = self._logs.setdefault(
+                job_id, (deque(maxlen=self.max_pending_logs), [0])
+            )
+            if len(lines) == lines.maxlen:
+                dropped[0] += 1
+                self.dropped_logs += 1
+            lines.append(payload)
+
+    def flush(self):
+        """Emit everything pending: log lines first, then one status batch"""
+        with self._lock:
+            statuses = list(self._statuses.values())
+            logs = self._logs
+            self._statuses = {}
+            self._logs = {}
+
+        for job_id, (lines, dropped) in logs.items():
+            self._emit_logs(job_id, lines, dropped[0])
+        if statuses:
+            self.emit_statuses(statuses)
+
+    def flush_job(self, job_id: str):
+        """Emit a single job's pending events now (before a terminal event)"""
+        with self._lock:
+            status = self._statuses.pop(job_id, None)
+            logs = self._logs.pop(job_id, None)
+
+        if logs is not None:
+            self._emit_logs(job_id, logs[0], logs[1][0])
+        if status is not None:
+            self.emit_statuses([status])
+
+    def _emit_logs(self, job_id: str, lines: Deque[Dict[str, Any]], dropped: int):
+        if dropped:
+            self.emit_log({
+                'jobId': job_id,
+                'level': 'WARNING',
+                'message': f'{dropped} log lines dropped',
+                'dropped': dropped,
+                'timestamp': lines[0]['timestamp'],
+            })
+        for line in lines:
+            self.emit_log(line)
+
+    def pending(self) -> bool:
+        with self._lock:
+            return bool(self._statuses or self._logs)
@@ -1,9 +1,15 @@
 """
 WebSocket Event Manager - Bridges API and microservices to WebSocket broadcasts
+
+Events are published to the shared broker (Redis pub/sub, or an in-process
+stand-in) and every WebSocketServer replica fans them out to its rooms, so
+producers do not need to share a process with a WebSocket server.
 """
 import logging
 from typing import Optional, Dict, Any
 
+from app.websocket.broker import get_event_broker
+
 logger = logging.getLogger(__name__)
 
 # Store reference to WebSocket server (set during app initialization)
@@ -21,55 +27,37 @@ def get_ws_server():
     return _ws_server_instance
 
 
+def _publish(event: str, **data):
+    try:
+        get_event_broker().publish({'event': event, 'data': data})
+    except Exception as e:
+        logger.error(f'Failed to publish {event}: {e}', exc_info=True)
+
+
 class WebSocketEventManager:
     """Manager for broadcasting events to connected WebSocket clients"""
 
     @staticmethod
     def broadcast_job_status(job_id: str, status: str, progress: int, message: str = None):
         """Broadcast job status update"""
-        ws = get_ws_server()
-        if ws:
-            try:
-                ws.broadcast_job_status(job_id, status, progress, message)
-            except Exception as e:
-                logger.error(f'Failed to broadcast job status: {e}', exc_info=True)
+        _publish('job_status', job_id=job_id, status=status, progress=progress, message=message)
 
     @staticmethod
     def broadcast_job_log(job_id: str, level: str, message: str):
         """Broadcast job log entry"""
-        ws = get_ws_server()
-        if ws:
-            try:
-                ws.broadcast_job_log(job_id, level, message)
-            except Exception as e:
-                logger.error(f'Failed to broadcast job log: {e}', exc_info=True)
+        _publish('job_log', job_id=job_id, level=level, message=message)
 
     @staticmethod
     def broadcast_job_completed(job_id: str, video_url: str, duration: float):
         """Broadcast job completion"""
-        ws = get_ws_server()
-        if ws:
-            try:
-                ws.broadcast_job_completed(job_id, video_url, duration)
-            except Exception as e:
-                logger.error(f'Failed to broadcast job completed: {e}', exc_info=True)
+        _publish('job_completed', job_id=job_id, video_url=video_url, duration=duration)
 
     @staticmethod
     def broadcast_job_failed(job_id: str, error_message: str):
         """Broadcast job failure"""
-        ws = get_ws_server()
-        if ws:
-            try:
-                ws.broadcast_job_failed(job_id, error_message)
-            except Exception as e:
-                logger.error(f'Failed to broadcast job failed: {e}', exc_info=True)
+        _publish('job_failed', job_id=job_id, error_message=error_message)
 
     @staticmethod
     def broadcast_queue_update(queued_count: int, processing_count: int):
         """Broadcast queue status update"""
-        ws = get_ws_server()
-        if ws:
-            try:
-                ws.broadcast_queue_update(queued_count, processing_count)
-            except Exception as e:
-                logger.error(f'Failed to broadcast queue update: {e}', exc_info=True)
+        _publish('queue_update', queued_count=queued_count, processing_count=processing_count)
@@ -0,0 +1,247 @@
+"""
+Load-test harness for the WebSocket servers.
+Opens many simulated Socket.IO clients, publishes job status events through
+the broker, and reports the emit latency each client observes (receive time
+minus the server-side event timestamp) as percentiles.
+
+Usage:
+    python -m app.websocket.loadtest --clients 2000 --events 200
+    python -m app.websocket.loadtest --url http://localhost:8085 --clients 500
+
+Without --url an asyncio server is started in-process with a local broker.
+With --url events are published through the configured broker (Redis), so
+the target server must share it; latencies assume synchronized clocks.
+"""
+import math
+import time
+import asyncio
+import argparse
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+try:
+    import socketio
+except ImportError:
+    socketio = None
+
+from app.common.utils import get_logger
+from app.websocket.broker import LocalBroker, get_event_broker
+
+logger = get_logger(__name__)
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of values (q in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies_ms: List[float]) -> Dict[str, float]:
+    return {
+        'count': len(latencies_ms),
+        'p50_ms': round(percentile(latencies_ms, 50), 2),
+        'p90_ms': round(percentile(latencies_ms, 90), 2),
+        'p99_ms': round(percentile(latencies_ms, 99), 2),
+        'max_ms': round(max(latencies_ms), 2) if latencies_ms else 0.0,
+    }
+
+
+def _latency_ms(timestamp: str) -> float:
+    return (datetime.utcnow() - datetime.fromisoformat(timestamp)).total_seconds() * 1000.0
+
+
+class _LocalServer:
+    """Runs an AsyncWebSocketServer on its own thread and event loop."""
+
+    def __init__(self, broker, port: int, max_emit_rate: Optional[float]):
+        from aiohttp import web
+        from app.websocket.async_server import AsyncWebSocketServer
+
+        self.web = web
+        kwargs = {} if max_emit_rate is None else {'max_emit_rate': max_emit_rate}
+        self.server = AsyncWebSocketServer(broker=broker, **kwargs)
+        self.port = port
+        self._ready = threading.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner = None
+        self._thread = threading.Thread(target=self._run, name='ws-loadtest-server', daemon=True)
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+
+        async def start():
+            self._runner = self.web.AppRunner(self.server.aiohttp_app())
+            await self._runner.setup()
+            site = self.web.TCPSite(self._runner, '127.0.0.1', self.port)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+            self._ready.set()
+
+        self._loop.run_until_complete(start())
+        self._loop.run_forever()
+
+    def start(self) -> str:
+        self._thread.start()
+        if not self._ready.wait(10):
+            raise RuntimeError('Load-test server did not start')
+        return f'http://127.0.0.1:{self.port}'
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            await self._runner.cleanup()
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+
+async def _open_client(url: str, job_id: str, latencies: List[float], received: List[int]):
+    client = socketio.AsyncClient(reconnection=False)
+
+    @client.on('job_status_batch')
+    async def on_batch(data):
+        received[0] += 1
+        for update in data.get('updates', []):
+            latencies.append(_latency_ms(update['timestamp']))
+
+    @client.on('job_status_update')
+    async def on_update(data):
+        received[0] += 1
+        latencies.append(_latency_ms(data['timestamp']))
+
+    await client.connect(url, transports=['websocket'])
+    await client.emit('subscribe_jobs', {})
+    await client.emit('subscribe_job', {'jobId': job_id})
+    return client
+
+
+async def _run_clients(
+    url: str,
+    broker,
+    clients: int,
+    jobs: int,
+    events: int,
+    rate: float,
+    connect_concurrency: int,
+    settle: float,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    received = [0]
+    semaphore = asyncio.Semaphore(connect_concurrency)
+
+    async def open_one(i: int):
+        async with semaphore:
+            return await _open_client(url, f'load-{i % jobs}', latencies, received)
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(open_one(i) for i in range(clients)), return_exceptions=True)
+    connected = [c for c in results if not isinstance(c, BaseException)]
+    connect_seconds = time.monotonic() - started
+    if len(connected) < clients:
+        logger.warning(f'{clients - len(connected)} clients failed to connect')
+
+    # Give the server a moment to process the subscriptions
+    await asyncio.sleep(settle)
+
+    loop = asyncio.get_running_loop()
+    interval = 1.0 / rate if rate > 0 else 0.0
+    publish_started = time.monotonic()
+    for i in range(events):
+        event = {
+            'event': 'job_status',
+            'data': {'job_id': f'load-{i % jobs}', 'status': 'rendering', 'progress': i % 100},
+        }
+        await loop.run_in_executor(None, broker.publish, event)
+        if interval:
+            await asyncio.sleep(interval)
+    publish_seconds = time.monotonic() - publish_started
+
+    await asyncio.sleep(settle)
+    await asyncio.gather(*(c.disconnect() for c in connected), return_exceptions=True)
+
+    return {
+        'clients': clients,
+        'connected': len(connected),
+        'connect_seconds': round(connect_seconds, 2),
+        'events_published': events,
+        'publish_seconds': round(publish_seconds, 2),
+        'frames_received': received[0],
+        'latency': summarize(latencies),
+    }
+
+
+def run_load_test(
+    clients: int = 1000,
+    jobs: int = 50,
+    events: int = 200,
+    rate: float = 100.0,
+    url: Optional[str] = None,
+    max_emit_rate: Optional[float] = None,
+    connect_concurrency: int = 200,
+    settle: float = 1.0,
+) -> Dict[str, Any]:
+    """Run a load test and return connection counts and latency percentiles."""
+    if socketio is None:
+        raise ImportError('python-socketio[asyncio_client] is required for the load test')
+
+    server = None
+    if url is None:
+        broker = LocalBroker()
+        server = _LocalServer(broker, 0, max_emit_rate)
+        url = server.start()
+    else:
+        broker = get_event_broker()
+
+    try:
+        report = asyncio.run(_run_clients(url, broker, clients, jobs, events, rate, connect_concurrency, settle))
+    finally:
+        if server is not None:
+            server.stop()
+    report['url'] = url
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WebSocket fan-out load test')
+    parser.add_argument('--url', help='Target server; omit to start one in-process')
+    parser.add_argument('--clients', type=int, default=1000)
+    parser.add_argument('--jobs', type=int, default=50, help='Distinct jobs clients subscribe to')
+    parser.add_argument('--events', type=int, default=200, help='Status events to publish')
+    parser.add_argument('--rate', type=float, default=100.0, help='Events per second (0 = as fast as possible)')
+    parser.add_argument('--max-emit-rate', type=float, default=None, help='Coalescer flush rate for the in-process server')
+    parser.add_argument('--connect-concurrency', type=int, default=200)
+    args = parser.parse_args()
+
+    report = run_load_test(
+        clients=args.clients,
+        jobs=args.jobs,
+        events=args.events,
+        rate=args.rate,
+        url=args.url,
+        max_emit_rate=args.max_emit_rate,
+        connect_concurrency=args.connect_concurrency,
+    )
+    latency = report['latency']
+    print(f"Clients connected: {report['connected']}/{report['clients']} in {report['connect_seconds']}s")
+    print(f"Events published:  {report['events_published']} in {report['publish_seconds']}s")
+    print(f"Frames received:   {report['frames_received']}")
+    print(
+        f"Emit latency (ms): p50={latency['p50_ms']} p90={latency['p90_ms']} "
+        f"p99={latency['p99_ms']} max={latency['max_ms']} (n={latency['count']})"
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -10,26 +10,36 @@ from functools import wraps
 from flask import Flask, request
 from flask_socketio import SocketIO, emit, join_room, leave_room, rooms
 from flask_cors import CORS
-import redis
 
 from app.common.config import Config
 from app.common.utils import get_logger
+from app.websocket.broadcaster import JobEventBroadcaster, ALL_JOBS_ROOM, CORS_ORIGINS
 
 logger = get_logger(__name__)
 
-# Redis connection for pub/sub
-redis_client = redis.from_url(Config.REDIS_URL)
+# Modes Flask-SocketIO can run in; 'aiohttp' selects AsyncWebSocketServer instead
+FLASK_ASYNC_MODES = ('threading', 'eventlet', 'gevent', 'gevent_uwsgi')
 
 
-class WebSocketServer:
+class WebSocketServer(JobEventBroadcaster):
     """WebSocket server for real-time job updates"""
 
-    def __init__(self, app: Flask = None, socketio: SocketIO = None):
+    def __init__(
+        self,
+        app: Flask = None,
+        socketio: SocketIO = None,
+        broker=None,
+        async_mode: str = None,
+    ):
         self.app = app or Flask(__name__)
-        CORS(self.app, origins=['http://localhost:3000', 'http://localhost:3001', 'http://127.0.0.1:3000', 'http://127.0.0.1:3001'], supports_credentials=True)
-        self.socketio = socketio or SocketIO(self.app, cors_allowed_origins=['http://localhost:3000', 'http://localhost:3001', 'http://127.0.0.1:3000', 'http://127.0.0.1:3001'], async_mode='threading')
+        CORS(self.app, origins=CORS_ORIGINS, supports_credentials=True)
+        # threading holds an OS thread per client; eventlet/gevent use green threads
+        if async_mode is None:
+            async_mode = Config.WS_ASYNC_MODE if Config.WS_ASYNC_MODE in FLASK_ASYNC_MODES else 'threading'
+        self.socketio = socketio or SocketIO(self.app, cors_allowed_origins=CORS_ORIGINS, async_mode=async_mode)
         self.setup_routes()
         self.setup_event_handlers()
+        super().__init__(broker)
 
     def setup_routes(self):
         """Setup Flask routes"""
@@ -56,7 +66,10 @@ class WebSocketServer:
                 room = f'job_{job_id}'
                 join_room(room)
                 logger.info(f'Client {request.sid} subscribed to job {job_id}')
-                emit('subscribed', {'jobId': job_id})
+                events, info = self.replay_missed(data)
+                for event, payload in events:
+                    emit(event, payload)
+                emit('subscribed', info)
 
         @self.socketio.on('unsubscribe_job')
         def handle_unsubscribe_job(data):
@@ -66,74 +79,32 @@ class WebSocketServer:
                 leave_room(room)
                 logger.info(f'Client {request.sid} unsubscribed from job {job_id}')
 
+        @self.socketio.on('subscribe_jobs')
+        def handle_subscribe_jobs(data=None):
+            join_room(ALL_JOBS_ROOM)
+            logger.info(f'Client {request.sid} subscribed to all jobs')
+            emit('subscribed', {'all': True})
+
+        @self.socketio.on('unsubscribe_jobs')
+        def handle_unsubscribe_jobs(data=None):
+            leave_room(ALL_JOBS_ROOM)
+
         @self.socketio.on('get_active_jobs')
         def handle_get_active_jobs():
             # Return number of connected clients
             emit('active_jobs', {'count': len(self.socketio.server.clients)})
 
-    def broadcast_job_status(self, job_id: str, status: str, progress: int, message: str = None):
-        """Broadcast job status update to all subscribers"""
-        room = f'job_{job_id}'
-        payload = {
-            'jobId': job_id,
-            'status': status,
-            'progress': progress,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-        if message:
-            payload['message'] = message
-
-        logger.debug(f'Broadcasting job status: {payload}')
-        self.socketio.emit('job_status_update', payload, to=room)
-
-    def broadcast_job_log(self, job_id: str, level: str, message: str):
-        """Broadcast job log entry to all subscribers"""
-        room = f'job_{job_id}'
-        payload = {
-            'jobId': job_id,
-            'level': level,
-            'message': message,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-
-        logger.debug(f'Broadcasting job log: {payload}')
-        self.socketio.emit('job_log_entry', payload, to=room)
-
-    def broadcast_job_completed(self, job_id: str, video_url: str, duration: float):
-        """Broadcast job completion to all subscribers"""
-        room = f'job_{job_id}'
-        payload = {
-            'jobId': job_id,
-            'videoUrl': video_url,
-            'duration': duration,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-
-        logger.info(f'Broadcasting job completed: {payload}')
-        self.socketio.emit('job_completed', payload, to=room)
-
-    def broadcast_job_failed(self, job_id: str, error_message: str):
-        """Broadcast job failure to all subscribers"""
-        room = f'job_{job_id}'
-        payload = {
-            'jobId': job_id,
-            'errorMessage': error_message,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-
-        logger.error(f'Broadcasting job failed: {payload}')
-        self.socketio.emit('job_failed', payload, to=room)
-
-    def broadcast_queue_update(self, queued_count: int, processing_count: int):
-        """Broadcast queue status update to all clients"""
-        payload = {
-            'queued': queued_count,
-            'processing': processing_count,
-            'timestamp': datetime.utcnow().isoformat()
-        }
-
-        logger.debug(f'Broadcasting queue update: {payload}')
-        self.socketio.emit('queue_updated', payload, broadcast=True)
+    def _emit(self, event: str, payload: dict, room=None):
+        self.socketio.emit(event, payload, to=room)
+
+    def _start_flusher(self):
+        self.socketio.start_background_task(self._flush_loop)
+
+    def _flush_loop(self):
+        interval = 1.0 / self.max_emit_rate
+        while True:
+            self.socketio.sleep(interval)
+            self._flush_once()
 
     def run(self, host: str = '0.0.0.0', port: int = 8085, debug: bool = False):
         """Run the WebSocket server"""
@@ -0,0 +1,84 @@
+"""
+Per-job replay buffer for WebSocket events.
+Every event sent to a job room gets a per-job sequence number and is kept in
+a bounded ring buffer, so a client that reconnects with the last sequence it
+saw can be sent just the events it missed instead of refetching job state.
+"""
+import uuid
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.common.config import Config
+
+
+class _JobEvents:
+    __slots__ = ('seq', 'events')
+
+    def __init__(self, size: int):
+        self.seq = 0
+        self.events: Deque[Tuple[int, str, Dict[str, Any]]] = deque(maxlen=size)
+
+
+class EventReplayBuffer:
+    """Sequence-numbered ring buffers of recent events, one per job"""
+
+    def __init__(
+        self,
+        size: int = Config.WS_REPLAY_BUFFER_SIZE,
+        max_jobs: int = Config.WS_REPLAY_MAX_JOBS,
+    ):
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        # Sequence numbers are only meaningful within one buffer; clients that
+        # reconnect to another replica (or after a restart) see a new epoch
+        self.epoch = uuid.uuid4().hex[:12]
+        self._jobs: 'OrderedDict[str, _JobEvents]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, job_id: str, event: str, payload: Dict[str, Any]) -> int:
+        """Stamp payload with the job's next sequence number and keep it"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._jobs[job_id] = _JobEvents(self.size)
+                while len(self._jobs) > self.max_jobs:
+                    self._jobs.popitem(last=False)
+            else:
+                self._jobs.move_to_end(job_id)
+            job.seq += 1
+            payload['seq'] = job.seq
+            payload['epoch'] = self.epoch
+            job.events.append((job.seq, event, payload))
+            return job.seq
+
+    def since(
+        self, job_id: str, last_seq: Optional[int], epoch: Optional[str] = None
+    ) -> Tuple[List[Tuple[str, Dict[str, Any]]], Dict[str, Any]]:
+        """
+        Events after last_seq and a summary for the subscriber. 'gap' is true
+        when events the client has not seen are no longer buffered, in which
+        case it should refetch job state.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            latest = job.seq if job else 0
+            buffered = list(job.events) if job else []
+
+        if last_seq is None:
+            events, gap = [], False
+        elif epoch is not None and epoch != self.epoch:
+            events, gap = buffered, True
+        else:
+            events = [item for item in buffered if item[0] > last_seq]
+            oldest = buffered[0][0] if buffered else latest + 1
+            gap = last_seq < oldest - 1 or last_seq > latest
+
+        info = {
+            'jobId': job_id,
+            'epoch': self.epoch,
+            'lastSeq': latest,
+            'replayed': len(events),
+            'gap': gap,
+        }
+        return [(event, payload) for _, event, payload in events], info
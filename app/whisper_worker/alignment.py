@@ -0,0 +1,283 @@
+"""
+Word-level alignment of narration text against generated speech.
+Word timings come from Whisper word timestamps when a model is available,
+otherwise from an energy-based aligner that spreads words over the voiced
+regions of the audio. Results are cached per (text, voice, language, TTS
+engine), since each engine paces the same text differently.
+"""
+
+import re
+import hashlib
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.common.config import Config
+from app.common.utils import setup_logging, job_cache
+
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.01
+WORDS_PER_MINUTE = 150
+
+_VOWEL_GROUPS = re.compile(r"[aeiouy]+", re.IGNORECASE)
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def word_weights(words: List[str]) -> List[float]:
+    """Relative speaking time of each word, from syllables plus trailing pauses."""
+    weights = []
+    for word in words:
+        weight = float(max(1, len(_VOWEL_GROUPS.findall(word))))
+        if word.endswith((".", "!", "?")):
+            weight += 1.0
+        elif word.endswith((",", ";", ":")):
+            weight += 0.5
+        weights.append(weight)
+    return weights
+
+
+def estimate_word_timings(text: str, duration: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Spread words over a duration in proportion to their weights.
+    Without a duration, assumes WORDS_PER_MINUTE speech.
+    """
+    words = text.split()
+    if not words:
+        return []
+
+    weights = word_weights(words)
+    if duration is None:
+        duration = len(words) * 60.0 / WORDS_PER_MINUTE
+    scale = duration / sum(weights)
+
+    timings = []
+    current = 0.0
+    for word, weight in zip(words, weights):
+        end = current + weight * scale
+        timings.append({"text": word, "start": round(current, 3), "end": round(end, 3)})
+        current = end
+    return timings
+
+
+def load_audio_mono(path: str, sample_rate: int = SAMPLE_RATE) -> Optional["np.ndarray"]:
+    """Decode an audio file to mono float32 samples, or None if no decoder is available."""
+    if np is None:
+        return None
+
+    try:
+        import whisper
+        return whisper.load_audio(path, sr=sample_rate)
+    except ImportError:
+        pass
+
+    try:
+        from pydub import AudioSegment as PydubAudioSegment
+    except ImportError:
+        PydubAudioSegment = None
+
+    if PydubAudioSegment is not None:
+        segment = PydubAudioSegment.from_file(path).set_channels(1).set_frame_rate(sample_rate)
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32)
+        return samples / float(1 << (8 * segment.sample_width - 1))
+
+    try:
+        import soundfile
+    except ImportError:
+        return None
+
+    data, rate = soundfile.read(path, dtype="float32", always_2d=True)
+    data = data.mean(axis=1)
+    if rate != sample_rate:
+        positions = np.arange(0, len(data), rate / sample_rate)
+        data = np.interp(positions, np.arange(len(data)), data).astype(np.float32)
+    return data
+
+
+def align_by_energy(
+    audio: "np.ndarray",
+    words: List[str],
+    sample_rate: int = SAMPLE_RATE,
+    threshold_db: float = -35.0,
+) -> List[Dict[str, Any]]:
+    """
+    Place words on the voiced frames of the audio.
+    Word boundaries are distributed over voiced time by weight, then mapped
+    back to wall-clock time so pauses fall between words rather than inside them.
+    """
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    n_frames = len(audio) // frame
+    if n_frames == 0 or not words:
+        return estimate_word_timings(" ".join(words), len(audio) / sample_rate)
+
+    frames = audio[: n_frames * frame].reshape(n_frames, frame)
+    energy = 20.0 * np.log10(np.sqrt(np.mean(np.square(frames), axis=1)) + 1e-10)
+    voiced = energy > energy.max() + threshold_db
+    if not voiced.any():
+        return estimate_word_timings(" ".join(words), len(audio) / sample_rate)
+
+    voiced_time = np.cumsum(voiced) * FRAME_SECONDS
+    weights = np.asarray(word_weights(words), dtype=np.float64)
+    bounds = np.concatenate(([0.0], np.cumsum(weights) / weights.sum())) * voiced_time[-1]
+
+    starts = np.searchsorted(voiced_time, bounds[:-1], side="right") * FRAME_SECONDS
+    ends = (np.searchsorted(voiced_time, bounds[1:], side="left") + 1) * FRAME_SECONDS
+    ends = np.maximum(ends, starts + FRAME_SECONDS)
+
+    return [
+        {"text": word, "start": round(float(s), 3), "end": round(float(e), 3)}
+        for word, s, e in zip(words, starts, ends)
+    ]
+
+
+def _normalize(word: str) -> str:
+    return _NON_WORD.sub("", word.lower())
+
+
+def map_recognized_words(
+    words: List[str],
+    recognized: List[Dict[str, Any]],
+    duration: float,
+) -> List[Dict[str, Any]]:
+    """
+    Transfer timestamps from recognized words onto the script's words.
+    Script words the recognizer missed are interpolated between their matched
+    neighbours in proportion to their weights.
+    """
+    script = [_normalize(w) for w in words]
+    heard = [_normalize(r.get("word", "")) for r in recognized]
+
+    starts: List[Optional[float]] = [None] * len(words)
+    ends: List[Optional[float]] = [None] * len(words)
+    matcher = SequenceMatcher(None, script, heard, autojunk=False)
+    for block in matcher.get_matching_blocks():
+        for k in range(block.size):
+            rec = recognized[block.b + k]
+            starts[block.a + k] = float(rec["start"])
+            ends[block.a + k] = float(rec["end"])
+
+    weights = word_weights(words)
+    i = 0
+    while i < len(words):
+        if starts[i] is not None:
+            i += 1
+            continue
+        j = i
+        while j < len(words) and starts[j] is None:
+            j += 1
+        gap_start = ends[i - 1] if i > 0 else 0.0
+        gap_end = starts[j] if j < len(words) else duration
+        gap_end = max(gap_end, gap_start)
+        total = sum(weights[i:j])
+        current = gap_start
+        for k in range(i, j):
+            starts[k] = current
+            current += (gap_end - gap_start) * weights[k] / total
+            ends[k] = current
+        i = j
+
+    return [
+        {"text": word, "start": round(s, 3), "end": round(e, 3)}
+        for word, s, e in zip(words, starts, ends)
+    ]
+
+
+class WordAligner:
+    """Produces cached word timings for narration audio."""
+
+    def __init__(self, method: str = Config.ALIGNMENT_METHOD):
+        self.logger = setup_logging("WordAligner")
+        self.method = method  # auto, whisper, energy
+
+    @staticmethod
+    def cache_key(text: str, voice: str, language: str, engine: str = Config.TTS_ENGINE) -> str:
+        digest = hashlib.sha256(f"{engine}\0{language}\0{voice}\0{text}".encode()).hexdigest()
+        return f"alignment_{digest}"
+
+    def align(
+        self,
+        audio_file: Optional[str],
+        text: str,
+        language: str = Config.TTS_LANGUAGE,
+        voice: str = Config.TTS_VOICE,
+        engine: str = Config.TTS_ENGINE,
+    ) -> Dict[str, Any]:
+        """
+        Align text against audio produced by the named TTS engine.
+        Returns {"words": [...], "duration": seconds, "method": name}; there is
+        exactly one word entry per whitespace-separated word of the text.
+        """
+        key = self.cache_key(text, voice, language, engine)
+        cached = job_cache.get(key)
+        if cached:
+            return cached
+
+        words = text.split()
+        audio = None
+        if audio_file:
+            try:
+                audio = load_audio_mono(audio_file)
+            except Exception as e:
+                self.logger.warning(f"Could not decode {audio_file} for alignment: {str(e)}")
+
+        if audio is None or len(audio) == 0:
+            result = {
+                "words": estimate_word_timings(text),
+                "duration": None,
+                "method": "estimate",
+            }
+            # Not cached: a later call with real audio should replace the estimate
+            return self._finish(result)
+
+        duration = len(audio) / SAMPLE_RATE
+        result = None
+        if self.method in ("auto", "whisper"):
+            recognized = self._whisper_words(audio, language)
+            if recognized:
+                result = {
+                    "words": map_recognized_words(words, recognized, duration),
+                    "duration": round(duration, 3),
+                    "method": "whisper",
+                }
+
+        if result is None:
+            result = {
+                "words": align_by_energy(audio, words),
+                "duration": round(duration, 3),
+                "method": "energy",
+            }
+
+        job_cache.set(key, result)
+        return self._finish(result)
+
+    def _finish(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        self.logger.debug(f"Aligned {len(result['words'])} words using {result['method']}")
+        return result
+
+    def _whisper_words(self, audio: "np.ndarray", language: str) -> List[Dict[str, Any]]:
+        """Recognized words with timestamps, or [] when Whisper is unavailable."""
+        from app.whisper_worker.model_pool import get_model_pool
+
+        try:
+            with get_model_pool().acquire() as model:
+                if model is None:
+                    return []
+                result = model.transcribe(
+                    audio,
+                    language=language,
+                    word_timestamps=True,
+                    verbose=False,
+                )
+        except Exception as e:
+            self.logger.warning(f"Whisper word timestamps failed: {str(e)}")
+            return []
+
+        return [
+            word
+            for segment in result.get("segments", [])
+            for word in segment.get("words", [])
+        ]
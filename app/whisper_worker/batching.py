@@ -0,0 +1,318 @@
+"""
+Micro-batching inference queue for Whisper.
+Requests arriving within a short window are grouped per model, converted to
+log-mel spectrograms once, and run through language detection and decoding
+as a single batch. Decoding keeps Whisper's timestamp tokens so batched
+results carry the same per-segment timings as unbatched transcription.
+"""
+
+import time
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+from app.whisper_worker.model_pool import WhisperModelPool, get_model_pool
+from app.whisper_worker.longform import LongFormTranscriber
+
+
+# Whisper decodes fixed 30 second windows at 16 kHz
+SAMPLE_RATE = 16000
+WINDOW_SAMPLES = 30 * SAMPLE_RATE
+TIME_PRECISION = 0.02  # seconds per timestamp token
+
+
+def segments_from_tokens(
+    tokens: List[int], timestamp_begin: int, decode: Any, duration: float
+) -> List[Dict[str, Any]]:
+    """
+    Split one decoded window into segments at Whisper's timestamp tokens
+    (<|t0|> text <|t1|><|t1|> text <|t2|> ...). Text after the last timestamp
+    runs to the end of the audio; without any timestamps the whole window is
+    one segment.
+    """
+    segments: List[Dict[str, Any]] = []
+    start: Optional[float] = None
+    text_tokens: List[int] = []
+
+    def add(end: float):
+        text = decode(text_tokens)
+        if text.strip():
+            segments.append({
+                "id": len(segments),
+                "start": round(start or 0.0, 3),
+                "end": round(min(max(end, start or 0.0), duration), 3),
+                "text": text,
+            })
+
+    for token in tokens:
+        if token < timestamp_begin:
+            text_tokens.append(token)
+            continue
+        time = (token - timestamp_begin) * TIME_PRECISION
+        if text_tokens:
+            add(time)
+            text_tokens = []
+            start = None
+        else:
+            start = time
+    if text_tokens:
+        add(duration)
+    return segments
+
+
+@dataclass
+class InferenceRequest:
+    """A single queued transcription or detection request."""
+    audio_file: str
+    task: str = "transcribe"  # transcribe or detect
+    language: Optional[str] = None
+    model_name: str = Config.WHISPER_MODEL
+    future: Future = field(default_factory=Future)
+    features: Any = None
+    duration: float = 0.0
+    detected_language: Optional[str] = None
+
+
+class WhisperBatchBackend:
+    """Batch operations on top of openai-whisper."""
+
+    def prepare(self, model: Any, request: InferenceRequest) -> bool:
+        """
+        Load audio and compute the mel spectrogram of its first window.
+        Returns False when the audio is longer than one decode window.
+        """
+        import whisper
+
+        audio = whisper.load_audio(request.audio_file)
+        request.duration = len(audio) / SAMPLE_RATE
+
+        n_mels = getattr(getattr(model, "dims", None), "n_mels", 80)
+        window = whisper.pad_or_trim(audio)
+        request.features = whisper.log_mel_spectrogram(window, n_mels=n_mels).to(model.device)
+        return len(audio) <= WINDOW_SAMPLES
+
+    def detect(self, model: Any, requests: List[InferenceRequest]) -> List[str]:
+        """Detect the language of every request in one forward pass."""
+        import torch
+
+        mel = torch.stack([r.features for r in requests])
+        _, probs = model.detect_language(mel)
+        return [max(p, key=p.get) for p in probs]
+
+    def decode(
+        self, model: Any, requests: List[InferenceRequest], language: str
+    ) -> List[Dict[str, Any]]:
+        """Decode a batch of requests that share a language."""
+        import torch
+        import whisper
+        from whisper.tokenizer import get_tokenizer
+
+        mel = torch.stack([r.features for r in requests])
+        options = whisper.DecodingOptions(
+            language=language,
+            without_timestamps=False,  # segment boundaries come from the timestamp tokens
+            fp16=Config.WHISPER_DEVICE == "cuda",
+        )
+        results = whisper.decode(model, mel, options)
+        tokenizer = get_tokenizer(
+            model.is_multilingual, num_languages=model.num_languages, language=language, task="transcribe",
+        )
+        return [
+            {
+                "text": result.text,
+                "language": language,
+                "segments": segments_from_tokens(
+                    result.tokens, tokenizer.timestamp_begin, tokenizer.decode, request.duration,
+                ),
+                "error": None,
+            }
+            for request, result in zip(requests, results)
+        ]
+
+
+class BatchInferenceQueue:
+    """Collects concurrent Whisper requests and runs them as batches."""
+
+    def __init__(
+        self,
+        pool: Optional[WhisperModelPool] = None,
+        backend: Optional[WhisperBatchBackend] = None,
+        window_ms: float = Config.WHISPER_BATCH_WINDOW_MS,
+        max_batch_size: int = Config.WHISPER_MAX_BATCH_SIZE,
+        device: Optional[str] = None,
+        long_form: Optional[Callable[[InferenceRequest], Dict[str, Any]]] = None,
+    ):
+        self.logger = setup_logging("BatchInferenceQueue")
+        self.pool = pool or get_model_pool()
+        self.backend = backend or WhisperBatchBackend()
+        self.window = window_ms / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self.device = device or Config.WHISPER_DEVICE
+        self._queue: "queue.Queue[InferenceRequest]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batches_run = 0
+        # Audio longer than one window is chunked by LongFormTranscriber on its
+        # own threads, so short requests batched with it do not wait for it
+        self.long_form = long_form or self._transcribe_long
+        self._long_forms: Dict[str, LongFormTranscriber] = {}
+        self._long_executor = ThreadPoolExecutor(
+            max_workers=max(1, Config.WHISPER_LONGFORM_WORKERS), thread_name_prefix="whisper-longform",
+        )
+
+    def submit(
+        self,
+        audio_file: str,
+        task: str = "transcribe",
+        language: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> Future:
+        """Queue a request and return a future for its result."""
+        request = InferenceRequest(
+            audio_file=audio_file,
+            task=task,
+            language=language,
+            model_name=model_name or Config.WHISPER_MODEL,
+        )
+        self._ensure_started()
+        self._queue.put(request)
+        return request.future
+
+    def transcribe(self, audio_file: str, language: Optional[str] = None,
+                   model_name: Optional[str] = None) -> Dict[str, Any]:
+        """Blocking helper for a single batched transcription."""
+        return self.submit(audio_file, "transcribe", language, model_name).result()
+
+    def detect_language(self, audio_file: str, model_name: Optional[str] = None) -> str:
+        """Blocking helper for a single batched language detection."""
+        return self.submit(audio_file, "detect", None, model_name).result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="whisper-batcher",
+                    daemon=True,
+                )
+                self._thread.start()
+
+    def _collect(self) -> List[InferenceRequest]:
+        """Block for the first request, then gather more until the window closes."""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            by_model: Dict[str, List[InferenceRequest]] = {}
+            for request in batch:
+                by_model.setdefault(request.model_name, []).append(request)
+
+            for model_name, requests in by_model.items():
+                try:
+                    self._run_batch(model_name, requests)
+                except Exception as e:
+                    self.logger.error(f"Batch inference failed: {str(e)}", exc_info=True)
+                    for request in requests:
+                        if not request.future.done():
+                            request.future.set_exception(e)
+
+    def _run_batch(self, model_name: str, requests: List[InferenceRequest]):
+        """Run detection and decoding for requests that share a model."""
+        with self.pool.acquire(model_name, self.device) as model:
+            if model is None:
+                for request in requests:
+                    if request.task == "detect":
+                        request.future.set_result(Config.TTS_LANGUAGE)
+                    else:
+                        request.future.set_result({
+                            "text": "",
+                            "language": request.language or Config.TTS_LANGUAGE,
+                            "segments": [],
+                            "error": "Model not loaded",
+                        })
+                return
+
+            windowed: List[InferenceRequest] = []
+            for request in requests:
+                try:
+                    fits = self.backend.prepare(model, request)
+                    # Detection only ever looks at the first window, so it always batches
+                    if fits or request.task == "detect":
+                        windowed.append(request)
+                    else:
+                        self._long_executor.submit(self._run_long, request)
+                except Exception as e:
+                    self.logger.error(f"Error preparing {request.audio_file}: {str(e)}")
+                    request.future.set_exception(e)
+
+            if not windowed:
+                return
+
+            self.batches_run += 1
+            self.logger.debug(f"Running Whisper batch of {len(windowed)} on {model_name}")
+
+            # Detect once for every request without a known language; the mel is reused below
+            undetected = [r for r in windowed if r.language is None]
+            if undetected:
+                for request, language in zip(undetected, self.backend.detect(model, undetected)):
+                    request.detected_language = language
+
+            by_language: Dict[str, List[InferenceRequest]] = {}
+            for request in windowed:
+                if request.task == "detect":
+                    request.future.set_result(request.detected_language)
+                    continue
+                language = request.language or request.detected_language
+                by_language.setdefault(language, []).append(request)
+
+            for language, group in by_language.items():
+                for request, result in zip(group, self.backend.decode(model, group, language)):
+                    request.future.set_result(result)
+
+
+    def _run_long(self, request: InferenceRequest):
+        try:
+            request.future.set_result(self.long_form(request))
+        except Exception as e:
+            self.logger.error(f"Long-form transcription of {request.audio_file} failed: {str(e)}", exc_info=True)
+            request.future.set_exception(e)
+
+    def _transcribe_long(self, request: InferenceRequest) -> Dict[str, Any]:
+        with self._lock:
+            transcriber = self._long_forms.get(request.model_name)
+            if transcriber is None:
+                transcriber = LongFormTranscriber(request.model_name, self.device)
+                self._long_forms[request.model_name] = transcriber
+        return transcriber.transcribe(request.audio_file, request.language)
+
+
+# Global queue instance
+_batch_queue: Optional[BatchInferenceQueue] = None
+_batch_queue_lock = threading.Lock()
+
+
+def get_batch_queue() -> BatchInferenceQueue:
+    """Get the process-wide batching queue, creating it on first use."""
+    global _batch_queue
+    if _batch_queue is None:
+        with _batch_queue_lock:
+            if _batch_queue is None:
+                _batch_queue = BatchInferenceQueue()
+    return _batch_queue
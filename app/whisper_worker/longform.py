@@ -0,0 +1,279 @@
+"""
+Long-form transcription for narration longer than a single Whisper window.
+Audio is split at silences found by an energy-based VAD, chunks are
+transcribed in parallel worker processes, and the segments are stitched back
+together with their timestamps shifted to the original timeline.
+"""
+
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+SAMPLE_RATE = 16000
+
+
+def frame_energy_db(audio: "np.ndarray", frame_samples: int) -> "np.ndarray":
+    """RMS energy per frame in dBFS."""
+    n_frames = len(audio) // frame_samples
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = audio[: n_frames * frame_samples].reshape(n_frames, frame_samples)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+
+def find_silences(
+    audio: "np.ndarray",
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: float = 30.0,
+    threshold_db: float = -35.0,
+    min_silence_ms: float = 300.0,
+) -> List[Tuple[int, int]]:
+    """
+    Find silent regions as (start_sample, end_sample) pairs.
+    A frame is silent when it is threshold_db below the loudest frame.
+    """
+    frame_samples = max(1, int(sample_rate * frame_ms / 1000))
+    energy = frame_energy_db(audio, frame_samples)
+    if energy.size == 0:
+        return []
+
+    silent = (energy < energy.max() + threshold_db).astype(np.int8)
+    edges = np.diff(np.concatenate(([0], silent, [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    min_frames = max(1, int(min_silence_ms / frame_ms))
+    keep = (ends - starts) >= min_frames
+    return [
+        (int(s) * frame_samples, int(e) * frame_samples)
+        for s, e in zip(starts[keep], ends[keep])
+    ]
+
+
+def plan_chunks(
+    audio: "np.ndarray",
+    sample_rate: int = SAMPLE_RATE,
+    max_chunk: float = Config.WHISPER_LONGFORM_MAX_CHUNK,
+    min_chunk: float = 5.0,
+) -> List[Tuple[int, int]]:
+    """
+    Split audio into chunks no longer than max_chunk seconds.
+    Cuts are placed in the middle of the silence nearest the end of each
+    chunk; when no silence is available the quietest frame is used.
+    """
+    total = len(audio)
+    max_samples = int(max_chunk * sample_rate)
+    min_samples = int(min_chunk * sample_rate)
+    if total <= max_samples:
+        return [(0, total)]
+
+    cut_points = np.array(
+        [(s + e) // 2 for s, e in find_silences(audio, sample_rate)],
+        dtype=np.int64,
+    )
+    frame_samples = int(sample_rate * 0.03)
+
+    chunks: List[Tuple[int, int]] = []
+    start = 0
+    while total - start > max_samples:
+        lo, hi = start + min_samples, start + max_samples
+        candidates = cut_points[(cut_points > lo) & (cut_points <= hi)]
+        if candidates.size:
+            # Prefer the latest silence so chunks stay close to max length
+            cut = int(candidates[-1])
+        else:
+            energy = frame_energy_db(audio[lo:hi], frame_samples)
+            cut = lo + int(np.argmin(energy)) * frame_samples if energy.size else hi
+        chunks.append((start, cut))
+        start = cut
+    chunks.append((start, total))
+    return chunks
+
+
+def stitch_segments(chunk_results: List[Tuple[float, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Merge per-chunk transcriptions, shifting timestamps by each chunk's offset."""
+    texts: List[str] = []
+    segments: List[Dict[str, Any]] = []
+    language = None
+    errors = []
+
+    for offset, result in sorted(chunk_results, key=lambda r: r[0]):
+        if result.get("error"):
+            errors.append(result["error"])
+        language = language or result.get("language")
+        text = (result.get("text") or "").strip()
+        if text:
+            texts.append(text)
+        for segment in result.get("segments", []):
+            segments.append({
+                "id": len(segments),
+                "start": round((segment.get("start") or 0.0) + offset, 3),
+                "end": round((segment.get("end") or 0.0) + offset, 3),
+                "text": segment.get("text"),
+            })
+
+    return {
+        "text": " ".join(texts),
+        "language": language or Config.TTS_LANGUAGE,
+        "segments": segments,
+        "error": "; ".join(errors) if errors else None,
+    }
+
+
+def _transcribe_chunk(
+    audio: "np.ndarray",
+    offset: float,
+    language: Optional[str],
+    model_name: str,
+    device: str,
+) -> Tuple[float, Dict[str, Any]]:
+    """Worker entry point; each process keeps its own model pool."""
+    from app.whisper_worker.model_pool import get_model_pool
+
+    with get_model_pool().acquire(model_name, device) as model:
+        if model is None:
+            return offset, {"text": "", "segments": [], "language": language, "error": "Model not loaded"}
+        result = model.transcribe(audio, language=language, verbose=False)
+    return offset, {
+        "text": result.get("text", ""),
+        "language": result.get("language", language),
+        "segments": [
+            {"start": s.get("start"), "end": s.get("end"), "text": s.get("text")}
+            for s in result.get("segments", [])
+        ],
+        "error": None,
+    }
+
+
+def _detect_chunk_language(audio: "np.ndarray", model_name: str, device: str) -> Optional[str]:
+    """Worker entry point for a single-window language detection pass."""
+    import whisper
+    from app.whisper_worker.model_pool import get_model_pool
+
+    with get_model_pool().acquire(model_name, device) as model:
+        if model is None:
+            return None
+        n_mels = getattr(getattr(model, "dims", None), "n_mels", 80)
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(audio), n_mels=n_mels).to(model.device)
+        _, probs = model.detect_language(mel)
+        return max(probs, key=probs.get)
+
+
+class LongFormTranscriber:
+    """Transcribes long audio as parallel VAD-split chunks."""
+
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+        workers: int = Config.WHISPER_LONGFORM_WORKERS,
+    ):
+        self.logger = setup_logging("LongFormTranscriber")
+        self.model_name = model_name or Config.WHISPER_MODEL
+        self.device = device or Config.WHISPER_DEVICE
+        self.workers = max(1, workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Create the worker pool on first use; spawn avoids forking model state."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    def transcribe(
+        self,
+        audio_file: str,
+        language: Optional[str] = None,
+        on_segments: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Transcribe a file, splitting it when it exceeds one chunk.
+        on_segments receives each chunk's segments, in timeline order, as soon
+        as that chunk and all earlier ones have finished.
+        """
+        if np is None:
+            return {
+                "text": "",
+                "language": language or Config.TTS_LANGUAGE,
+                "segments": [],
+                "error": "numpy not installed",
+            }
+
+        try:
+            import whisper
+        except ImportError:
+            return {
+                "text": "",
+                "language": language or Config.TTS_LANGUAGE,
+                "segments": [],
+                "error": "Model not loaded",
+            }
+
+        try:
+            audio = whisper.load_audio(audio_file)
+            chunks = plan_chunks(audio)
+            self.logger.info(
+                f"Transcribing {len(audio) / SAMPLE_RATE:.1f}s of audio in {len(chunks)} chunks"
+            )
+
+            executor = self._get_executor()
+
+            # Detect once up front so every chunk decodes in the same language
+            if language is None and len(chunks) > 1:
+                start, end = chunks[0]
+                language = executor.submit(
+                    _detect_chunk_language, audio[start:end], self.model_name, self.device
+                ).result()
+
+            futures = [
+                executor.submit(
+                    _transcribe_chunk,
+                    audio[start:end],
+                    start / SAMPLE_RATE,
+                    language,
+                    self.model_name,
+                    self.device,
+                )
+                for start, end in chunks
+            ]
+            results = []
+            emitted = 0
+            for future in futures:
+                results.append(future.result())
+                if on_segments is not None:
+                    segments = stitch_segments(results)["segments"]
+                    on_segments(segments[emitted:])
+                    emitted = len(segments)
+            return stitch_segments(results)
+
+        except Exception as e:
+            self.logger.error(f"Error in long-form transcription: {str(e)}", exc_info=True)
+            return {
+                "text": "",
+                "language": language or Config.TTS_LANGUAGE,
+                "segments": [],
+                "error": str(e),
+            }
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
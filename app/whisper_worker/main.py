@@ -2,22 +2,29 @@
 Whisper worker service for audio transcription, language detection, and speech processing.
 """
 
-from typing import Dict, List, Tuple, Optional
+from typing import Callable, Dict, List, Tuple, Optional
+import os
 import json
-
-try:
-    import whisper
-except ImportError:
-    whisper = None
+import wave
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from pydub import AudioSegment as PydubAudioSegment
 except ImportError:
     PydubAudioSegment = None
 
-from app.common.models import AudioSegment, Subtitle
+from app.common.models import AudioSegment, Scene, Subtitle
 from app.common.config import Config
 from app.common.utils import setup_logging, log_job_event, job_cache
+from app.common.subtitles import generate_cues
+from app.whisper_worker.model_pool import WhisperModelPool, get_model_pool
+from app.whisper_worker.batching import get_batch_queue
+from app.whisper_worker.longform import LongFormTranscriber
+from app.whisper_worker.alignment import WordAligner
+from app.whisper_worker.tts_cache import TTSCache, split_sentences
+from app.whisper_worker.tts_engines import get_tts_engine, measure_duration
 
 
 logger = setup_logging("WhisperWorker")
@@ -26,152 +33,309 @@ logger = setup_logging("WhisperWorker")
 class WhisperProcessor:
     """Audio processing using OpenAI Whisper model."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+        pool: Optional[WhisperModelPool] = None,
+    ):
         self.logger = setup_logging("WhisperProcessor")
-        self.model = None
-        self.device = Config.WHISPER_DEVICE
-        self._load_model()
-
-    def _load_model(self):
-        """Load Whisper model."""
-        if whisper is None:
-            self.logger.warning("Whisper library not installed. Install with: pip install openai-whisper")
-            return
-
-        try:
-            model_name = Config.WHISPER_MODEL  # tiny, base, small, medium, large
-            self.logger.info(f"Loading Whisper model: {model_name} on device: {self.device}")
-            self.model = whisper.load_model(model_name, device=self.device)
-            self.logger.info("Whisper model loaded successfully")
-
-        except Exception as e:
-            self.logger.error(f"Error loading Whisper model: {str(e)}")
-            self.model = None
-
-    def transcribe_audio(self, audio_file: str, language: Optional[str] = None) -> Dict:
+        self.model_name = model_name or Config.WHISPER_MODEL  # tiny, base, small, medium, large
+        self.device = device or Config.WHISPER_DEVICE
+        # Models are loaded lazily from the shared pool on first inference
+        self.pool = pool or get_model_pool()
+        self._long_form: Optional[LongFormTranscriber] = None
+
+    def transcribe_audio(
+        self,
+        audio_file: str,
+        language: Optional[str] = None,
+        model_name: Optional[str] = None,
+    ) -> Dict:
         """
         Transcribe audio file using Whisper.
         """
-        if self.model is None:
-            self.logger.warning("Whisper model not available")
-            return {
-                "text": "",
-                "language": language or Config.TTS_LANGUAGE,
-                "segments": [],
-                "error": "Model not loaded",
-            }
-
-        try:
-            self.logger.info(f"Transcribing audio: {audio_file}")
-            
-            # Transcribe
-            result = self.model.transcribe(
-                audio_file,
-                language=language,
-                verbose=False,
-            )
-
-            segments = []
-            for segment in result.get("segments", []):
-                segments.append({
-                    "id": segment.get("id"),
-                    "start": segment.get("start"),
-                    "end": segment.get("end"),
-                    "text": segment.get("text"),
-                })
-
-            output = {
-                "text": result.get("text", ""),
-                "language": result.get("language", language or Config.TTS_LANGUAGE),
-                "segments": segments,
-                "error": None,
-            }
-
-            self.logger.info(f"Transcription complete: {len(output['text'])} characters")
-            return output
+        if Config.WHISPER_BATCHING_ENABLED:
+            try:
+                return get_batch_queue().transcribe(audio_file, language, model_name or self.model_name)
+            except Exception as e:
+                self.logger.error(f"Error transcribing audio: {str(e)}", exc_info=True)
+                return {
+                    "text": "",
+                    "language": language or Config.TTS_LANGUAGE,
+                    "segments": [],
+                    "error": str(e),
+                }
+
+        with self.pool.acquire(model_name or self.model_name, self.device) as model:
+            if model is None:
+                self.logger.warning("Whisper model not available")
+                return {
+                    "text": "",
+                    "language": language or Config.TTS_LANGUAGE,
+                    "segments": [],
+                    "error": "Model not loaded",
+                }
+
+            try:
+                self.logger.info(f"Transcribing audio: {audio_file}")
+                
+                # Transcribe
+                result = model.transcribe(
+                    audio_file,
+                    language=language,
+                    verbose=False,
+                )
 
-        except Exception as e:
-            self.logger.error(f"Error transcribing audio: {str(e)}", exc_info=True)
-            return {
-                "text": "",
-                "language": language or Config.TTS_LANGUAGE,
-                "segments": [],
-                "error": str(e),
-            }
+                segments = []
+                for segment in result.get("segments", []):
+                    segments.append({
+                        "id": segment.get("id"),
+                        "start": segment.get("start"),
+                        "end": segment.get("end"),
+                        "text": segment.get("text"),
+                    })
+
+                output = {
+                    "text": result.get("text", ""),
+                    "language": result.get("language", language or Config.TTS_LANGUAGE),
+                    "segments": segments,
+                    "error": None,
+                }
+
+                self.logger.info(f"Transcription complete: {len(output['text'])} characters")
+                return output
+
+            except Exception as e:
+                self.logger.error(f"Error transcribing audio: {str(e)}", exc_info=True)
+                return {
+                    "text": "",
+                    "language": language or Config.TTS_LANGUAGE,
+                    "segments": [],
+                    "error": str(e),
+                }
+
+    def transcribe_long_audio(
+        self,
+        audio_file: str,
+        language: Optional[str] = None,
+        on_segments: Optional[Callable[[List[Dict]], None]] = None,
+    ) -> Dict:
+        """
+        Transcribe long narration as VAD-split chunks decoded in parallel.
+        Latency is bounded by the longest chunk rather than the total length.
+        """
+        if self._long_form is None:
+            self._long_form = LongFormTranscriber(self.model_name, self.device)
+        self.logger.info(f"Transcribing long-form audio: {audio_file}")
+        return self._long_form.transcribe(audio_file, language, on_segments)
 
-    def detect_language(self, audio_file: str) -> str:
+    def detect_language(self, audio_file: str, model_name: Optional[str] = None) -> str:
         """
         Detect language of audio file.
         """
-        if self.model is None:
-            self.logger.warning("Whisper model not available for language detection")
-            return Config.TTS_LANGUAGE
-
-        try:
-            self.logger.info(f"Detecting language for: {audio_file}")
-            
-            # Load audio
-            import whisper as whisper_module
-            audio = whisper_module.load_audio(audio_file)
-            audio = whisper_module.pad_or_trim(audio)
+        if Config.WHISPER_BATCHING_ENABLED:
+            try:
+                return get_batch_queue().detect_language(audio_file, model_name or self.model_name)
+            except Exception as e:
+                self.logger.error(f"Error detecting language: {str(e)}")
+                return Config.TTS_LANGUAGE
+
+        with self.pool.acquire(model_name or self.model_name, self.device) as model:
+            if model is None:
+                self.logger.warning("Whisper model not available for language detection")
+                return Config.TTS_LANGUAGE
+
+            try:
+                self.logger.info(f"Detecting language for: {audio_file}")
+                
+                # Load audio
+                import whisper as whisper_module
+                audio = whisper_module.load_audio(audio_file)
+                audio = whisper_module.pad_or_trim(audio)
 
-            # Get mel spectrogram
-            mel = whisper_module.log_mel_spectrogram(audio).to(self.model.device)
+                # Get mel spectrogram
+                mel = whisper_module.log_mel_spectrogram(audio).to(model.device)
 
-            # Detect language
-            _, probs = self.model.detect_language(mel)
-            detected_lang = max(probs, key=probs.get)
+                # Detect language
+                _, probs = model.detect_language(mel)
+                detected_lang = max(probs, key=probs.get)
 
-            self.logger.info(f"Detected language: {detected_lang}")
-            return detected_lang
+                self.logger.info(f"Detected language: {detected_lang}")
+                return detected_lang
 
-        except Exception as e:
-            self.logger.error(f"Error detecting language: {str(e)}")
-            return Config.TTS_LANGUAGE
+            except Exception as e:
+                self.logger.error(f"Error detecting language: {str(e)}")
+                return Config.TTS_LANGUAGE
 
 
 class TTSProcessor:
     """Text-to-speech audio generation."""
 
-    def __init__(self):
+    def __init__(self, cache: Optional[TTSCache] = None, engine: Optional[str] = None):
         self.logger = setup_logging("TTSProcessor")
-        self.engine = Config.TTS_ENGINE
-
-    def generate_speech(self, text: str, language: str, output_file: str) -> bool:
+        self.backend = get_tts_engine(engine or Config.TTS_ENGINE)
+        self.engine = self.backend.name
+        if cache is None and Config.TTS_CACHE_ENABLED:
+            cache = TTSCache()
+        self.cache = cache
+
+    @property
+    def extension(self) -> str:
+        """File extension of the audio the engine produces."""
+        return self.backend.extension
+
+    def generate_speech(
+        self,
+        text: str,
+        language: str,
+        output_file: str,
+        voice: str = Config.TTS_VOICE,
+    ) -> bool:
         """
         Generate speech audio from text.
-        MVP implementation uses gTTS; can be extended with Azure, AWS, etc.
+        Each sentence is synthesized once and reused from the TTS cache, so
+        re-renders and edits only pay for sentences that changed.
         """
         try:
             self.logger.info(f"Generating speech for {len(text)} characters")
 
-            if self.engine == "gtts":
-                return self._generate_with_gtts(text, language, output_file)
-            else:
-                self.logger.warning(f"TTS engine '{self.engine}' not implemented, using fallback")
-                return self._generate_with_gtts(text, language, output_file)
+            if self.cache is None:
+                return self._synthesize(text, language, output_file, voice)
+
+            ext = self.extension
+            sentences = split_sentences(text) or [text]
+            if len(sentences) > 1 and ext != "wav" and PydubAudioSegment is None:
+                # Sample-level concatenation needs pydub; cache the narration as a whole
+                sentences = [text]
+
+            # Pieces are private copies: another worker sharing the cache
+            # directory may evict an entry while this narration is assembled
+            pieces = []
+            reused = 0
+            try:
+                for index, sentence in enumerate(sentences):
+                    key = TTSCache.key(self.engine, language, voice, sentence)
+                    part_file = f"{output_file}.{index}.{key[:12]}.part.{ext}"
+                    pieces.append(part_file)
+                    if self.cache.fetch(key, part_file, ext):
+                        reused += 1
+                        continue
+                    if not self._synthesize(sentence, language, part_file, voice):
+                        return False
+                    self.cache.put(key, part_file, ext)
+
+                self.logger.info(f"TTS cache reused {reused}/{len(sentences)} sentences")
+                return self._concatenate(pieces, output_file, ext)
+            finally:
+                for piece in pieces:
+                    if os.path.exists(piece):
+                        os.remove(piece)
 
         except Exception as e:
             self.logger.error(f"Error generating speech: {str(e)}", exc_info=True)
             return False
 
-    def _generate_with_gtts(self, text: str, language: str, output_file: str) -> bool:
-        """Generate speech using Google Text-to-Speech."""
-        try:
-            from gtts import gTTS
-        except ImportError:
-            self.logger.warning("gTTS not installed. Install with: pip install gtts")
-            return False
+    def warm_cache(self, text: str, language: str, voice: str = Config.TTS_VOICE) -> int:
+        """
+        Synthesize any sentences of text missing from the TTS cache, without
+        producing a narration file. Returns how many sentences were synthesized.
+        """
+        if self.cache is None:
+            return 0
+
+        ext = self.extension
+        synthesized = 0
+        for sentence in split_sentences(text):
+            key = TTSCache.key(self.engine, language, voice, sentence)
+            if self.cache.get(key, ext) is not None:
+                continue
+            part_file = f"/tmp/tts_warm_{key[:12]}_{os.getpid()}_{threading.get_ident()}.{ext}"
+            try:
+                if not self._synthesize(sentence, language, part_file, voice):
+                    continue
+                self.cache.put(key, part_file, ext)
+                synthesized += 1
+            finally:
+                if os.path.exists(part_file):
+                    os.remove(part_file)
+        return synthesized
+
+    def synthesize_scenes(
+        self,
+        job_id: str,
+        scenes: List[Scene],
+        language: str,
+        voice: str = Config.TTS_VOICE,
+        max_workers: int = Config.TTS_WORKERS,
+    ) -> List[AudioSegment]:
+        """
+        Synthesize narration for every scene concurrently.
+        Each scene's duration is set to its measured narration length and the
+        scene timeline is recomputed from the new durations.
+        """
+        def synthesize(index: int, scene: Scene) -> Tuple[str, float]:
+            text = scene.narration or scene.description
+            output_file = f"/tmp/{job_id}_scene_{index}.{self.extension}"
+            if not text or not self.generate_speech(text, language, output_file, voice):
+                return "", 0.0
+            return output_file, measure_duration(output_file)
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            outputs = list(executor.map(synthesize, range(len(scenes)), scenes))
+
+        audio_segments = []
+        timeline = 0.0
+        for index, (scene, (output_file, duration)) in enumerate(zip(scenes, outputs)):
+            if duration > 0:
+                scene.duration = round(duration, 3)
+            scene.start_time = round(timeline, 3)
+            scene.end_time = round(timeline + scene.duration, 3)
+
+            if output_file:
+                audio_segments.append(AudioSegment(
+                    text=scene.narration or scene.description,
+                    audio_url=output_file,
+                    duration=round(duration, 3),
+                    start_time=scene.start_time,
+                    language=language,
+                ))
+            timeline = scene.end_time
+
+        self.logger.info(
+            f"Synthesized narration for {len(audio_segments)}/{len(scenes)} scenes "
+            f"({timeline:.1f}s total)"
+        )
+        return audio_segments
+
+    def _synthesize(
+        self, text: str, language: str, output_file: str, voice: str = Config.TTS_VOICE
+    ) -> bool:
+        """Run the configured TTS engine for one piece of text."""
+        return self.backend.synthesize(text, language, voice, output_file)
+
+    def _concatenate(self, pieces: List[str], output_file: str, ext: str) -> bool:
+        """Join sentence audio at the sample level into one file."""
+        if len(pieces) == 1:
+            shutil.copyfile(pieces[0], output_file)
+            return True
 
-        try:
-            tts = gTTS(text=text, lang=language, slow=False)
-            tts.save(output_file)
+        if ext == "wav" and PydubAudioSegment is None:
+            with wave.open(output_file, "wb") as out:
+                for index, piece in enumerate(pieces):
+                    with wave.open(piece, "rb") as f:
+                        if index == 0:
+                            out.setparams(f.getparams())
+                        out.writeframes(f.readframes(f.getnframes()))
             self.logger.info(f"Speech generated: {output_file}")
             return True
 
-        except Exception as e:
-            self.logger.error(f"Error generating speech with gTTS: {str(e)}")
-            return False
+        combined = PydubAudioSegment.empty()
+        for piece in pieces:
+            combined += PydubAudioSegment.from_file(piece, format=ext)
+        combined.export(output_file, format=os.path.splitext(output_file)[1].lstrip(".") or ext)
+        self.logger.info(f"Speech generated: {output_file}")
+        return True
 
 
 class WhisperWorkerService:
@@ -181,9 +345,10 @@ class WhisperWorkerService:
         self.logger = setup_logging("WhisperWorkerService")
         self.whisper_processor = WhisperProcessor()
         self.tts_processor = TTSProcessor()
+        self.aligner = WordAligner()
 
     def process_audio_for_job(
-        self, job_id: str, text: str, language: str
+        self, job_id: str, text: str, language: str, voice: str = Config.TTS_VOICE
     ) -> Dict:
         """
         Process audio for a job: generate TTS and transcribe.
@@ -192,20 +357,26 @@ class WhisperWorkerService:
 
         try:
             # Generate TTS
-            audio_file = f"/tmp/{job_id}_narration.mp3"
+            audio_file = f"/tmp/{job_id}_narration.{self.tts_processor.extension}"
             
-            tts_success = self.tts_processor.generate_speech(text, language, audio_file)
+            tts_success = self.tts_processor.generate_speech(text, language, audio_file, voice)
             if not tts_success:
                 self.logger.warning("TTS generation failed, continuing with text")
 
-            # Transcribe (simulate perfect transcription of generated text)
-            segments = self._create_word_level_segments(text)
+            # Align the script against the generated speech for real word timings
+            alignment = self.aligner.align(
+                audio_file if tts_success else None, text, language, voice, self.tts_processor.engine
+            )
+            segments = alignment["words"]
+            duration = alignment["duration"]
+            if duration is None:
+                duration = segments[-1]["end"] if segments else 0.0
 
             # Create audio segments and subtitles
             audio_segment = AudioSegment(
                 text=text,
-                audio_url=f"s3://audio/{job_id}/narration.mp3",
-                duration=len(text) / 150 * 60,  # Rough estimate: 150 chars per minute
+                audio_url=f"s3://audio/{job_id}/narration.{self.tts_processor.extension}",
+                duration=duration,
                 language=language,
             )
 
@@ -215,6 +386,8 @@ class WhisperWorkerService:
                 "job_id": job_id,
                 "audio_segment": audio_segment.to_dict(),
                 "subtitles": [s.to_dict() for s in subtitles],
+                "words": segments,
+                "alignment_method": alignment["method"],
                 "language": language,
                 "error": None,
             }
@@ -233,54 +406,59 @@ class WhisperWorkerService:
                 "error": str(e),
             }
 
-    def _create_word_level_segments(self, text: str) -> List[Dict]:
-        """Create word-level segments for alignment."""
-        words = text.split()
-        segments = []
-        
-        # Rough timing: assume 150 words per minute = 0.4 seconds per word
-        words_per_second = 150 / 60
-        
-        current_time = 0
-        for word in words:
-            word_duration = len(word) / (150 * 60) * words_per_second
-            segments.append({
-                "text": word,
-                "start": current_time,
-                "end": current_time + word_duration,
-            })
-            current_time += word_duration
-
-        return segments
+    def process_scenes_for_job(
+        self, job_id: str, scenes: List[Scene], language: str, voice: str = Config.TTS_VOICE
+    ) -> Dict:
+        """
+        Generate per-scene narration in parallel and resize scenes to fit it.
+        Returns the retimed scenes with their audio segments and subtitle cues
+        aligned against each scene's narration.
+        """
+        self.logger.info(f"Processing scene narration for job {job_id}")
 
-    def _create_subtitles(self, text: str, segments: List[Dict]) -> List[Subtitle]:
-        """Create subtitle entries from segments."""
-        subtitles = []
-        
-        # Group words into subtitle chunks (roughly 8 words per subtitle)
-        chunk_size = 8
-        words = text.split()
-        
-        for i in range(0, len(words), chunk_size):
-            chunk_words = words[i:i+chunk_size]
-            chunk_text = " ".join(chunk_words)
-            
-            # Find timing for this chunk
-            start_segment = min(i, len(segments) - 1)
-            end_segment = min(i + chunk_size - 1, len(segments) - 1)
-            
-            if start_segment < len(segments) and end_segment < len(segments):
-                start_ms = int(segments[start_segment]["start"] * 1000)
-                end_ms = int(segments[end_segment]["end"] * 1000)
-                
-                subtitle = Subtitle(
-                    text=chunk_text,
-                    start_time=start_ms,
-                    end_time=end_ms,
+        try:
+            audio_segments = self.tts_processor.synthesize_scenes(job_id, scenes, language, voice)
+
+            words = []
+            for segment in audio_segments:
+                alignment = self.aligner.align(
+                    segment.audio_url, segment.text, language, voice, self.tts_processor.engine
+                )
+                words.extend(
+                    dict(word, start=word["start"] + segment.start_time, end=word["end"] + segment.start_time)
+                    for word in alignment["words"]
                 )
-                subtitles.append(subtitle)
 
-        return subtitles
+            log_job_event(
+                job_id,
+                "scene_audio_processed",
+                "COMPLETE",
+                {"scene_count": len(scenes), "audio_segments": len(audio_segments)},
+            )
+            return {
+                "job_id": job_id,
+                "scenes": [scene.to_dict() for scene in scenes],
+                "audio_segments": [segment.to_dict() for segment in audio_segments],
+                "subtitles": [cue.to_dict() for cue in generate_cues(words)],
+                "language": language,
+                "error": None,
+            }
+
+        except Exception as e:
+            self.logger.error(f"Error processing scene audio: {str(e)}", exc_info=True)
+            log_job_event(job_id, "scene_audio_processing_failed", "FAILED", {"error": str(e)})
+            return {
+                "job_id": job_id,
+                "scenes": [],
+                "audio_segments": [],
+                "subtitles": [],
+                "language": language,
+                "error": str(e),
+            }
+
+    def _create_subtitles(self, text: str, segments: List[Dict]) -> List[Subtitle]:
+        """Create subtitle cues from word-level segments."""
+        return list(generate_cues(segments))
 
 
 # Global service instance
@@ -293,4 +471,5 @@ def get_whisper_service() -> WhisperWorkerService:
 
 
 if __name__ == "__main__":
-    logger.info("Whisper worker service ready")
+    from app.whisper_worker.server import WhisperWorkerServer
+    WhisperWorkerServer().run()
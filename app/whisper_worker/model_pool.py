@@ -0,0 +1,213 @@
+"""
+Shared pool of lazily loaded Whisper models.
+Models are keyed by (model name, device), loaded on first use, limited to a
+fixed number of concurrent inference slots, and unloaded after sitting idle.
+"""
+
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+ModelKey = Tuple[str, str]
+
+
+class _PooledModel:
+    """A single pool entry and its bookkeeping."""
+
+    def __init__(self, key: ModelKey, slots: int):
+        self.key = key
+        self.model: Any = None
+        self.load_lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(slots)
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+
+def _load_whisper_model(model_name: str, device: str) -> Any:
+    """Default loader backed by openai-whisper, imported on first load."""
+    try:
+        import whisper
+    except ImportError:
+        return None
+    return whisper.load_model(model_name, device=device)
+
+
+class WhisperModelPool:
+    """Process-wide pool of Whisper models shared by all processors."""
+
+    def __init__(
+        self,
+        loader: Callable[[str, str], Any] = _load_whisper_model,
+        slots_per_model: int = Config.WHISPER_INFERENCE_SLOTS,
+        idle_timeout: float = Config.WHISPER_MODEL_IDLE_TIMEOUT,
+        max_models: int = Config.WHISPER_POOL_MAX_MODELS,
+    ):
+        self.logger = setup_logging("WhisperModelPool")
+        self.loader = loader
+        self.slots_per_model = max(1, slots_per_model)
+        self.idle_timeout = idle_timeout
+        self.max_models = max(1, max_models)
+        self._entries: Dict[ModelKey, _PooledModel] = {}
+        self._lock = threading.Lock()
+        self._reaper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def _checkout(self, key: ModelKey) -> _PooledModel:
+        """Get or create an entry and mark it in use so it cannot be evicted."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _PooledModel(key, self.slots_per_model)
+                self._entries[key] = entry
+            entry.in_use += 1
+            return entry
+
+    def _ensure_loaded(self, entry: _PooledModel) -> Any:
+        """Load the entry's model once, even under concurrent first use."""
+        if entry.model is not None:
+            return entry.model
+
+        with entry.load_lock:
+            if entry.model is None:
+                model_name, device = entry.key
+                self.logger.info(f"Loading Whisper model: {model_name} on device: {device}")
+                started = time.monotonic()
+                entry.model = self.loader(model_name, device)
+                if entry.model is None:
+                    self.logger.warning(
+                        "Whisper model unavailable. Install with: pip install openai-whisper"
+                    )
+                else:
+                    self.logger.info(
+                        f"Whisper model {model_name} loaded in {time.monotonic() - started:.2f}s"
+                    )
+                    self._evict_over_capacity(exclude=entry.key)
+                    self._start_reaper()
+        return entry.model
+
+    @contextmanager
+    def acquire(
+        self,
+        model_name: Optional[str] = None,
+        device: Optional[str] = None,
+    ) -> Iterator[Any]:
+        """
+        Borrow a model for one inference call.
+        Blocks while all of the model's inference slots are busy; yields None
+        when the model cannot be loaded.
+        """
+        key = (model_name or Config.WHISPER_MODEL, device or Config.WHISPER_DEVICE)
+        entry = self._checkout(key)
+        try:
+            try:
+                model = self._ensure_loaded(entry)
+            except Exception as e:
+                self.logger.error(f"Error loading Whisper model {key[0]}: {str(e)}")
+                model = None
+
+            if model is None:
+                yield None
+                return
+
+            with entry.slots:
+                yield model
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+                entry.last_used = time.monotonic()
+
+    def is_loaded(self, model_name: str, device: Optional[str] = None) -> bool:
+        """Check whether a model is currently resident."""
+        key = (model_name, device or Config.WHISPER_DEVICE)
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry is not None and entry.model is not None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-model load and usage information."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                f"{name}@{device}": {
+                    "loaded": entry.model is not None,
+                    "in_use": entry.in_use,
+                    "slots": self.slots_per_model,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                }
+                for (name, device), entry in self._entries.items()
+            }
+
+    def unload_idle(self, max_idle: Optional[float] = None) -> int:
+        """Drop models that have not been used for max_idle seconds."""
+        max_idle = self.idle_timeout if max_idle is None else max_idle
+        now = time.monotonic()
+        unloaded = 0
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.in_use == 0 and now - entry.last_used >= max_idle:
+                    del self._entries[key]
+                    if entry.model is not None:
+                        unloaded += 1
+                        self.logger.info(f"Unloaded idle Whisper model: {key[0]} on {key[1]}")
+        return unloaded
+
+    def _evict_over_capacity(self, exclude: ModelKey):
+        """Unload least recently used idle models beyond max_models."""
+        with self._lock:
+            loaded = [
+                e for k, e in self._entries.items()
+                if e.model is not None and k != exclude
+            ]
+            excess = len(loaded) + 1 - self.max_models
+            for entry in sorted(loaded, key=lambda e: e.last_used):
+                if excess <= 0:
+                    break
+                if entry.in_use == 0:
+                    del self._entries[entry.key]
+                    excess -= 1
+                    self.logger.info(f"Evicted Whisper model: {entry.key[0]} on {entry.key[1]}")
+
+    def _start_reaper(self):
+        """Start the idle-unload thread on first successful load."""
+        if self.idle_timeout <= 0:
+            return
+        with self._lock:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(
+                target=self._reap_loop,
+                name="whisper-model-reaper",
+                daemon=True,
+            )
+            self._reaper.start()
+
+    def _reap_loop(self):
+        interval = max(1.0, self.idle_timeout / 2)
+        while not self._stop.wait(interval):
+            self.unload_idle()
+
+    def shutdown(self):
+        """Stop the reaper and release every model."""
+        self._stop.set()
+        with self._lock:
+            self._entries.clear()
+
+
+# Global pool instance
+_model_pool: Optional[WhisperModelPool] = None
+_model_pool_lock = threading.Lock()
+
+
+def get_model_pool() -> WhisperModelPool:
+    """Get the process-wide Whisper model pool, creating it on first use."""
+    global _model_pool
+    if _model_pool is None:
+        with _model_pool_lock:
+            if _model_pool is None:
+                _model_pool = WhisperModelPool()
+    return _model_pool
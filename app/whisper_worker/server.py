@@ -0,0 +1,328 @@
+"""
+HTTP service for the Whisper worker.
+Requests go through a bounded queue served by a fixed number of inference
+slots; when the queue is full new work is rejected with 503 so callers can
+retry elsewhere. /health reports queue depth and busy slots for load-aware
+routing, and transcriptions can stream partial segments as NDJSON.
+"""
+
+import json
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    from flask import Flask, Response, request, jsonify
+except ImportError:
+    print("Flask is required. Install with: pip install flask")
+    Flask = None
+
+from app.common.config import Config
+from app.common.models import Scene
+from app.common.utils import setup_logging
+from app.whisper_worker.main import get_whisper_service
+
+
+logger = setup_logging("WhisperServer")
+
+
+@dataclass
+class WorkerTask:
+    """A unit of work waiting for or running on an inference slot."""
+    kind: str
+    fn: Callable[["WorkerTask"], Dict[str, Any]]
+    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    status: str = "queued"  # queued, running, complete, failed
+    segments: List[Dict[str, Any]] = field(default_factory=list)
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("complete", "failed")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "task_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "segments": self.segments,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at.isoformat(),
+        }
+
+
+class InferenceQueue:
+    """Bounded work queue drained by a fixed set of inference slots."""
+
+    def __init__(
+        self,
+        slots: int = Config.WHISPER_INFERENCE_SLOTS,
+        max_depth: int = Config.WHISPER_QUEUE_SIZE,
+        history: int = 256,
+    ):
+        self.logger = setup_logging("InferenceQueue")
+        self.slots = max(1, slots)
+        self.max_depth = max(1, max_depth)
+        self.history = history
+        self._queue: "queue.Queue[WorkerTask]" = queue.Queue(maxsize=self.max_depth)
+        self._cond = threading.Condition()
+        self._tasks: "OrderedDict[str, WorkerTask]" = OrderedDict()
+        self._busy = 0
+        self._accepted = 0
+        self._rejected = 0
+        self._completed = 0
+        self._workers = [
+            threading.Thread(target=self._run, name=f"whisper-slot-{i}", daemon=True)
+            for i in range(self.slots)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, kind: str, fn: Callable[[WorkerTask], Dict[str, Any]]) -> Optional[WorkerTask]:
+        """Queue work, or return None when the queue is full."""
+        task = WorkerTask(kind=kind, fn=fn)
+        with self._cond:
+            try:
+                self._queue.put_nowait(task)
+            except queue.Full:
+                self._rejected += 1
+                return None
+            self._accepted += 1
+            self._tasks[task.id] = task
+            self._trim_history()
+        return task
+
+    def get(self, task_id: str) -> Optional[WorkerTask]:
+        with self._cond:
+            return self._tasks.get(task_id)
+
+    def add_segments(self, task: WorkerTask, segments: List[Dict[str, Any]]):
+        """Publish partial segments to anyone streaming the task."""
+        with self._cond:
+            task.segments.extend(segments)
+            self._cond.notify_all()
+
+    def wait(self, task: WorkerTask, timeout: Optional[float] = None) -> bool:
+        """Block until the task finishes. Returns False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: task.done, timeout=timeout)
+
+    def stream(self, task: WorkerTask, timeout: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+        """Yield segments as they arrive, then the final task state."""
+        sent = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: task.done or len(task.segments) > sent, timeout=timeout)
+                pending = task.segments[sent:]
+                finished = task.done
+            for segment in pending:
+                yield {"type": "segment", "segment": segment}
+            sent += len(pending)
+            if finished:
+                yield {"type": "result", **task.to_dict()}
+                return
+            if not pending:
+                yield {"type": "timeout", "task_id": task.id}
+                return
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth and slot usage for /health."""
+        with self._cond:
+            depth = self._queue.qsize()
+            return {
+                "queue_depth": depth,
+                "max_queue_depth": self.max_depth,
+                "busy_slots": self._busy,
+                "slots": self.slots,
+                "accepting": depth < self.max_depth,
+                "accepted": self._accepted,
+                "rejected": self._rejected,
+                "completed": self._completed,
+            }
+
+    def _trim_history(self):
+        """Forget the oldest finished tasks beyond the history limit."""
+        excess = len(self._tasks) - self.history
+        for task_id in list(self._tasks):
+            if excess <= 0:
+                break
+            if self._tasks[task_id].done:
+                del self._tasks[task_id]
+                excess -= 1
+
+    def _run(self):
+        while True:
+            task = self._queue.get()
+            with self._cond:
+                self._busy += 1
+                task.status = "running"
+            try:
+                result = task.fn(task)
+                error = result.get("error") if isinstance(result, dict) else None
+                status = "failed" if error else "complete"
+            except Exception as e:
+                self.logger.error(f"Error running {task.kind} task: {str(e)}", exc_info=True)
+                result, error, status = None, str(e), "failed"
+            with self._cond:
+                task.result = result
+                task.error = error
+                task.status = status
+                self._busy -= 1
+                self._completed += 1
+                self._cond.notify_all()
+            self._queue.task_done()
+
+
+class WhisperWorkerServer:
+    """HTTP front end for transcription and narration work."""
+
+    def __init__(self, work_queue: Optional[InferenceQueue] = None):
+        if Flask is None:
+            raise ImportError("Flask is required for the Whisper worker server")
+
+        self.app = Flask(__name__)
+        self.service = get_whisper_service()
+        self.queue = work_queue or InferenceQueue()
+        self._setup_routes()
+
+    def _setup_routes(self):
+        """Register worker routes."""
+
+        @self.app.route("/health", methods=["GET"])
+        def health():
+            """Health and load report used for routing."""
+            stats = self.queue.stats()
+            return jsonify({
+                "status": "healthy" if stats["accepting"] else "saturated",
+                "service": "whisper",
+                **stats,
+                "models": self.service.whisper_processor.pool.stats(),
+            }), 200
+
+        @self.app.route("/transcribe", methods=["POST"])
+        def transcribe():
+            """Transcribe an audio file reachable from the worker."""
+            data = request.get_json(silent=True) or {}
+            audio_file = data.get("audio_file")
+            if not audio_file:
+                return jsonify({"error": "Missing required field: audio_file"}), 400
+            language = data.get("language")
+            processor = self.service.whisper_processor
+
+            def run(task: WorkerTask) -> Dict[str, Any]:
+                return processor.transcribe_long_audio(
+                    audio_file,
+                    language,
+                    on_segments=lambda segments: self.queue.add_segments(task, segments),
+                )
+
+            return self._dispatch("transcribe", run, data)
+
+        @self.app.route("/process_audio", methods=["POST"])
+        def process_audio():
+            """Generate narration and word timings for a job."""
+            data = request.get_json(silent=True) or {}
+            if not data.get("job_id") or not data.get("text"):
+                return jsonify({"error": "Missing required fields: job_id, text"}), 400
+
+            def run(task: WorkerTask) -> Dict[str, Any]:
+                return self.service.process_audio_for_job(
+                    data["job_id"],
+                    data["text"],
+                    data.get("language", Config.TTS_LANGUAGE),
+                    data.get("voice", Config.TTS_VOICE),
+                )
+
+            return self._dispatch("process_audio", run, data)
+
+        @self.app.route("/process_scenes", methods=["POST"])
+        def process_scenes():
+            """Generate narration per scene and return scenes resized to their measured audio."""
+            data = request.get_json(silent=True) or {}
+            if not data.get("job_id") or not isinstance(data.get("scenes"), list) or not data["scenes"]:
+                return jsonify({"error": "Missing required fields: job_id, scenes"}), 400
+            try:
+                scenes = [
+                    Scene(**{k: v for k, v in scene.items() if k in Scene.__dataclass_fields__})
+                    for scene in data["scenes"]
+                ]
+            except (TypeError, AttributeError):
+                return jsonify({"error": "Field scenes must be a list of scene objects"}), 400
+
+            def run(task: WorkerTask) -> Dict[str, Any]:
+                return self.service.process_scenes_for_job(
+                    data["job_id"],
+                    scenes,
+                    data.get("language", Config.TTS_LANGUAGE),
+                    data.get("voice", Config.TTS_VOICE),
+                )
+
+            return self._dispatch("process_scenes", run, data)
+
+        @self.app.route("/tasks/<task_id>", methods=["GET"])
+        def task_status(task_id: str):
+            """Status and partial segments of a queued task."""
+            task = self.queue.get(task_id)
+            if task is None:
+                return jsonify({"error": "Task not found"}), 404
+            return jsonify(task.to_dict()), 200
+
+        @self.app.errorhandler(404)
+        def not_found(error):
+            return jsonify({"error": "Endpoint not found"}), 404
+
+    def _dispatch(self, kind: str, fn: Callable[[WorkerTask], Dict[str, Any]], data: Dict[str, Any]):
+        """
+        Admit work to the queue and answer in the requested mode:
+        wait for the result (default), return 202 immediately ("async"),
+        or stream segments as NDJSON ("stream").
+        """
+        try:
+            timeout = float(data.get("timeout", Config.WHISPER_REQUEST_TIMEOUT))
+        except (TypeError, ValueError):
+            return jsonify({"error": "timeout must be a number of seconds"}), 400
+        if not timeout > 0:
+            return jsonify({"error": "timeout must be positive"}), 400
+        timeout = min(timeout, Config.WHISPER_REQUEST_TIMEOUT)
+
+        task = self.queue.submit(kind, fn)
+        if task is None:
+            logger.warning(f"Rejected {kind} request: queue full")
+            response = jsonify({"error": "Worker queue full", **self.queue.stats()})
+            response.headers["Retry-After"] = "1"
+            return response, 503
+
+        if data.get("stream"):
+            def generate():
+                for event in self.queue.stream(task, timeout=timeout):
+                    yield json.dumps(event) + "\n"
+
+            return Response(generate(), mimetype="application/x-ndjson")
+
+        if data.get("async"):
+            return jsonify({"task_id": task.id, "status": task.status}), 202
+
+        if not self.queue.wait(task, timeout=timeout):
+            return jsonify({"task_id": task.id, "status": task.status, "error": "Timed out"}), 504
+        return jsonify(task.to_dict()), 200 if task.status == "complete" else 500
+
+    def run(self, host: str = Config.WHISPER_WORKER_HOST, port: int = Config.WHISPER_WORKER_PORT):
+        """Start the worker server."""
+        logger.info(f"Starting Whisper worker on {host}:{port}")
+        self.app.run(host=host, port=port, debug=False, threaded=True)
+
+
+def create_app():
+    """Factory function to create the worker app."""
+    return WhisperWorkerServer().app
+
+
+if __name__ == "__main__":
+    WhisperWorkerServer().run()
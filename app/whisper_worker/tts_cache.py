@@ -0,0 +1,143 @@
+"""
+Content-addressed on-disk cache for synthesized speech.
+Entries are keyed by a hash of (engine, language, voice, text) and evicted
+least-recently-used first once the cache exceeds its size budget.
+Several worker processes may share one cache directory, so the budget is
+enforced against the directory itself under a lock file.
+"""
+
+import os
+import re
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+from typing import List, Optional, Tuple
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split narration at sentence boundaries, normalizing whitespace."""
+    sentences = [" ".join(s.split()) for s in _SENTENCE_BOUNDARY.split(text)]
+    return [s for s in sentences if s]
+
+
+class TTSCache:
+    """Disk cache of per-sentence speech audio under a size budget."""
+
+    LOCK_FILE = ".lock"
+
+    def __init__(
+        self,
+        cache_dir: str = Config.TTS_CACHE_DIR,
+        max_bytes: int = Config.TTS_CACHE_SIZE_MB * 1024 * 1024,
+    ):
+        self.logger = setup_logging("TTSCache")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entries(self) -> List[Tuple[float, int, str]]:
+        """(last used, size, path) of every entry currently in the directory."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.startswith(".") or entry.name.endswith(".tmp"):
+                continue
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue  # evicted by another process mid-scan
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    @staticmethod
+    def key(engine: str, language: str, voice: str, text: str) -> str:
+        """Content address for one piece of synthesized speech."""
+        payload = "\0".join([engine, language, voice, " ".join(text.split())])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.{ext}")
+
+    def get(self, key: str, ext: str = "mp3") -> Optional[str]:
+        """
+        Return the cached file for a key, marking it recently used.
+        Another process may evict the file at any time; use fetch() when the
+        audio itself is needed.
+        """
+        path = self._path(key, ext)
+        try:
+            os.utime(path, None)
+        except OSError:
+            return None
+        return path
+
+    def fetch(self, key: str, dest: str, ext: str = "mp3") -> bool:
+        """Copy a cached entry to dest. Returns False on a miss."""
+        path = self.get(key, ext)
+        if path is None:
+            return False
+        try:
+            shutil.copyfile(path, dest)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, key: str, source_file: str, ext: str = "mp3") -> str:
+        """Copy a synthesized file into the cache and enforce the budget."""
+        path = self._path(key, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(source_file, tmp_path)
+        os.replace(tmp_path, path)
+
+        self._evict(keep=path)
+        return path
+
+    @contextmanager
+    def _exclusive(self):
+        """Serialize eviction across threads and, where supported, processes."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(os.path.join(self.cache_dir, self.LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _evict(self, keep: str):
+        """Remove least recently used entries until the directory is under budget."""
+        with self._exclusive():
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                if path == keep:
+                    continue
+                total -= size
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self.logger.debug(f"Evicted TTS cache entry: {os.path.basename(path)}")
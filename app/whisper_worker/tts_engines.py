@@ -0,0 +1,179 @@
+"""
+Pluggable text-to-speech engines.
+Each engine turns one piece of text into an audio file; TTSProcessor handles
+caching, concatenation, and parallelism on top of them.
+"""
+
+import math
+import wave
+import shutil
+import struct
+import hashlib
+import subprocess
+from typing import Dict, Optional, Type
+
+from app.common.config import Config
+from app.common.utils import setup_logging
+
+
+class TTSEngine:
+    """Base class for TTS engines."""
+
+    name = "base"
+    extension = "wav"
+
+    def __init__(self):
+        self.logger = setup_logging(f"TTSEngine.{self.name}")
+
+    def is_available(self) -> bool:
+        """Whether the engine can run in this environment."""
+        return True
+
+    def synthesize(self, text: str, language: str, voice: str, output_file: str) -> bool:
+        """Write speech for text to output_file."""
+        raise NotImplementedError
+
+
+class GTTSEngine(TTSEngine):
+    """Google Text-to-Speech (requires network access)."""
+
+    name = "gtts"
+    extension = "mp3"
+
+    def is_available(self) -> bool:
+        try:
+            import gtts  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def synthesize(self, text: str, language: str, voice: str, output_file: str) -> bool:
+        try:
+            from gtts import gTTS
+        except ImportError:
+            self.logger.warning("gTTS not installed. Install with: pip install gtts")
+            return False
+
+        try:
+            tts = gTTS(text=text, lang=language, slow=False)
+            tts.save(output_file)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error generating speech with gTTS: {str(e)}")
+            return False
+
+
+class EspeakEngine(TTSEngine):
+    """Offline synthesis through an espeak-ng or espeak binary."""
+
+    name = "espeak"
+    extension = "wav"
+
+    def __init__(self):
+        super().__init__()
+        self.binary = shutil.which("espeak-ng") or shutil.which("espeak")
+
+    def is_available(self) -> bool:
+        return self.binary is not None
+
+    def synthesize(self, text: str, language: str, voice: str, output_file: str) -> bool:
+        if self.binary is None:
+            self.logger.warning("espeak not found. Install with: apt-get install espeak-ng")
+            return False
+
+        try:
+            result = subprocess.run(
+                [self.binary, "-v", language, "-w", output_file, "--stdin"],
+                input=text.encode(),
+                capture_output=True,
+                timeout=120,
+            )
+            if result.returncode != 0:
+                error_msg = result.stderr.decode() if result.stderr else "Unknown error"
+                self.logger.error(f"espeak error: {error_msg}")
+                return False
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error generating speech with espeak: {str(e)}")
+            return False
+
+
+class ToneEngine(TTSEngine):
+    """
+    Deterministic offline engine for tests and local development.
+    Emits one tone burst per word at 150 words per minute, with the pitch
+    derived from the text so identical input always yields identical audio.
+    """
+
+    name = "tone"
+    extension = "wav"
+    sample_rate = 16000
+    word_seconds = 0.3
+    gap_seconds = 0.1
+
+    def synthesize(self, text: str, language: str, voice: str, output_file: str) -> bool:
+        words = text.split()
+        digest = hashlib.sha256(f"{voice}\0{text}".encode()).digest()
+        frequency = 180 + digest[0]
+
+        burst_samples = int(self.sample_rate * self.word_seconds)
+        burst = struct.pack(
+            f"<{burst_samples}h",
+            *(
+                int(8000 * math.sin(2 * math.pi * frequency * i / self.sample_rate))
+                for i in range(burst_samples)
+            ),
+        )
+        gap = b"\x00\x00" * int(self.sample_rate * self.gap_seconds)
+
+        try:
+            with wave.open(output_file, "wb") as f:
+                f.setnchannels(1)
+                f.setsampwidth(2)
+                f.setframerate(self.sample_rate)
+                f.writeframes((burst + gap) * len(words))
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error generating tone speech: {str(e)}")
+            return False
+
+
+TTS_ENGINES: Dict[str, Type[TTSEngine]] = {
+    GTTSEngine.name: GTTSEngine,
+    EspeakEngine.name: EspeakEngine,
+    ToneEngine.name: ToneEngine,
+}
+
+
+def get_tts_engine(name: Optional[str] = None) -> TTSEngine:
+    """Instantiate a TTS engine by name, falling back to gTTS for unknown names."""
+    name = name or Config.TTS_ENGINE
+    engine_cls = TTS_ENGINES.get(name)
+    if engine_cls is None:
+        setup_logging("TTSEngine").warning(f"TTS engine '{name}' not implemented, using fallback")
+        engine_cls = GTTSEngine
+    return engine_cls()
+
+
+def measure_duration(audio_file: str) -> float:
+    """Duration of an audio file in seconds, or 0.0 if it cannot be read."""
+    try:
+        with wave.open(audio_file, "rb") as f:
+            return f.getnframes() / float(f.getframerate())
+    except (wave.Error, EOFError, OSError):
+        pass
+
+    try:
+        import soundfile
+        return float(soundfile.info(audio_file).duration)
+    except Exception:
+        pass
+
+    try:
+        from pydub import AudioSegment as PydubAudioSegment
+        return len(PydubAudioSegment.from_file(audio_file)) / 1000.0
+    except Exception:
+        return 0.0
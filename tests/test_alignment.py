@@ -0,0 +1,116 @@
+"""
+Tests for word timings from narration audio.
+Run with: pytest tests/test_alignment.py -v
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import app.whisper_worker.alignment as alignment
+from app.common.utils import job_cache
+from app.whisper_worker.alignment import (
+    SAMPLE_RATE,
+    WordAligner,
+    align_by_energy,
+    estimate_word_timings,
+    map_recognized_words,
+)
+from app.whisper_worker.tts_engines import ToneEngine
+
+
+def _bursts(pattern):
+    """Audio of tone bursts and silences: [(seconds, voiced), ...]."""
+    pieces = []
+    for seconds, voiced in pattern:
+        t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+        pieces.append(0.25 * np.sin(2 * np.pi * 220 * t) if voiced else np.zeros_like(t))
+    return np.concatenate(pieces).astype(np.float32)
+
+
+class TestEstimates:
+    """Test the text-only fallback."""
+
+    def test_words_take_realistic_time(self):
+        """150 words per minute is 0.4s per word, not a few milliseconds."""
+        timings = estimate_word_timings("cat dog sun fox")
+        assert timings[-1]["end"] == pytest.approx(1.6)
+        assert all(word["end"] - word["start"] == pytest.approx(0.4) for word in timings)
+
+    def test_longer_words_and_sentence_ends_get_more_time(self):
+        timings = estimate_word_timings("cat elephant.", duration=3.0)
+        assert timings[0]["end"] == pytest.approx(0.6)
+        assert timings[1]["end"] == pytest.approx(3.0)
+
+
+class TestAlignByEnergy:
+    """Test placing words on voiced audio."""
+
+    def test_words_land_on_bursts_and_skip_gaps(self):
+        audio = _bursts([(0.3, True), (0.2, False), (0.3, True), (0.5, False), (0.3, True)])
+        words = align_by_energy(audio, ["cat", "dog", "sun"])
+
+        assert [w["start"] for w in words] == pytest.approx([0.0, 0.5, 1.3], abs=0.02)
+        assert [w["end"] for w in words] == pytest.approx([0.3, 0.8, 1.6], abs=0.02)
+
+    def test_silence_falls_back_to_even_spread(self):
+        words = align_by_energy(np.zeros(SAMPLE_RATE, dtype=np.float32), ["cat", "dog"])
+        assert [w["end"] for w in words] == pytest.approx([0.5, 1.0])
+
+
+class TestMapRecognizedWords:
+    """Test transferring recognizer timestamps onto the script."""
+
+    def test_missed_words_are_interpolated(self):
+        recognized = [
+            {"word": " Cats", "start": 0.0, "end": 0.4},
+            {"word": " sleep.", "start": 1.2, "end": 1.6},
+        ]
+        words = map_recognized_words(["Cats", "often", "sleep."], recognized, duration=2.0)
+        assert [w["text"] for w in words] == ["Cats", "often", "sleep."]
+        assert words[1] == {"text": "often", "start": 0.4, "end": 1.2}
+        assert words[2]["end"] == 1.6
+
+
+class TestWordAligner:
+    """Test alignment of generated speech and its cache."""
+
+    TEXT = "cat dog sun"
+
+    @pytest.fixture
+    def tone_audio(self, tmp_path):
+        path = str(tmp_path / "speech.wav")
+        assert ToneEngine().synthesize(self.TEXT, "en", "v", path)
+        keys = [WordAligner.cache_key(self.TEXT, "v", "en", engine) for engine in ("tone", "gtts")]
+        for key in keys:
+            job_cache.delete(key)
+        yield path
+        for key in keys:
+            job_cache.delete(key)
+
+    def test_aligns_tone_speech(self, tone_audio):
+        result = WordAligner(method="energy").align(tone_audio, self.TEXT, "en", "v", "tone")
+        assert result["method"] == "energy"
+        assert result["duration"] == pytest.approx(1.2)
+        # ToneEngine: 0.3s burst then 0.1s gap per word
+        assert [w["start"] for w in result["words"]] == pytest.approx([0.0, 0.4, 0.8], abs=0.02)
+        assert [w["end"] for w in result["words"]] == pytest.approx([0.3, 0.7, 1.1], abs=0.02)
+
+    def test_cache_hit_skips_decoding_and_is_per_engine(self, tone_audio, monkeypatch):
+        decoded = []
+        real_load = alignment.load_audio_mono
+        monkeypatch.setattr(alignment, "load_audio_mono", lambda path: decoded.append(path) or real_load(path))
+        aligner = WordAligner(method="energy")
+
+        first = aligner.align(tone_audio, self.TEXT, "en", "v", "tone")
+        second = aligner.align(tone_audio, self.TEXT, "en", "v", "tone")
+        assert second == first and len(decoded) == 1
+
+        aligner.align(tone_audio, self.TEXT, "en", "v", "gtts")
+        assert len(decoded) == 2
+
+    def test_estimate_without_audio_is_not_cached(self):
+        aligner = WordAligner(method="energy")
+        result = aligner.align(None, "never cached words", "en", "v", "tone")
+        assert result["method"] == "estimate" and result["duration"] is None
+        assert job_cache.get(WordAligner.cache_key("never cached words", "v", "en", "tone")) is None
@@ -0,0 +1,120 @@
+"""
+Tests for the in-process audio mixer.
+Run with: pytest tests/test_audio_mixer.py -v
+"""
+
+import pytest
+
+np = pytest.importorskip("numpy")
+sf = pytest.importorskip("soundfile")
+
+from app.renderer.audio_mixer import AudioMixer, MixSource
+
+
+def _tone(path, seconds, sample_rate, frequency=220.0, amplitude=0.3):
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    sf.write(str(path), amplitude * np.sin(2 * np.pi * frequency * t), sample_rate)
+
+
+def _peak(data, rate, at, window=0.1):
+    start = int(at * rate)
+    return float(np.abs(data[start:start + int(window * rate)]).max())
+
+
+class TestAudioMixer:
+    """Test narration placement, ducking, and normalization."""
+
+    def test_narration_is_placed_at_offsets(self, tmp_path):
+        """Segments should be audible only from their start_time onward."""
+        _tone(tmp_path / "a.wav", 1.0, 22050)
+        _tone(tmp_path / "b.wav", 1.0, 16000)
+        out = tmp_path / "mix.wav"
+
+        mixer = AudioMixer(chunk_seconds=0.5)
+        assert mixer.mix(
+            [MixSource(str(tmp_path / "a.wav"), 0.5), MixSource(str(tmp_path / "b.wav"), 2.0)],
+            str(out),
+        )
+
+        data, rate = sf.read(str(out))
+        assert rate == mixer.sample_rate
+        assert len(data) == 3 * rate
+        assert _peak(data, rate, 0.1) == 0.0
+        assert _peak(data, rate, 0.8) > 0.05
+        assert _peak(data, rate, 1.7) == 0.0
+        assert _peak(data, rate, 2.5) > 0.05
+        assert np.abs(data).max() <= 10 ** (-1.0 / 20) + 1e-3
+
+    def test_music_bed_is_ducked_under_narration(self, tmp_path):
+        """The looping bed should be quieter while narration plays."""
+        _tone(tmp_path / "voice.wav", 1.0, 48000, frequency=440.0)
+        _tone(tmp_path / "music.wav", 0.5, 48000, frequency=110.0, amplitude=0.5)
+        out = tmp_path / "mix.wav"
+
+        mixer = AudioMixer(chunk_seconds=1.0, music_gain_db=0.0, duck_db=-20.0)
+        assert mixer.mix(
+            [MixSource(str(tmp_path / "voice.wav"), 2.0)],
+            str(out),
+            duration=4.0,
+            music_file=str(tmp_path / "music.wav"),
+        )
+
+        data, rate = sf.read(str(out))
+        music_alone = _peak(data, rate, 1.0)
+        assert music_alone > 0.0
+        # Unducked, voice (0.3) on top of the bed (0.5) would peak well above the bed alone
+        assert _peak(data, rate, 2.5) < music_alone
+        # The bed loops past the end of the 0.5s music file
+        assert _peak(data, rate, 3.8) == pytest.approx(music_alone, rel=0.1)
+
+    def test_release_carries_across_chunk_boundaries(self, tmp_path):
+        """Narration ending just before a chunk boundary keeps the bed ducked past it."""
+        _tone(tmp_path / "voice.wav", 0.5, 48000, frequency=440.0)
+        _tone(tmp_path / "music.wav", 0.5, 48000, frequency=110.0, amplitude=0.5)
+        out = tmp_path / "mix.wav"
+
+        mixer = AudioMixer(chunk_seconds=1.0, music_gain_db=0.0, duck_db=-20.0, duck_release=0.4)
+        assert mixer.mix(
+            [MixSource(str(tmp_path / "voice.wav"), 0.45)],
+            str(out),
+            duration=3.0,
+            music_file=str(tmp_path / "music.wav"),
+        )
+
+        data, rate = sf.read(str(out))
+        music_alone = _peak(data, rate, 2.5)
+        assert _peak(data, rate, 1.02, window=0.2) < 0.2 * music_alone
+
+
+class TestMixSources:
+    """Test resolving storyboard audio segments to local files."""
+
+    def test_remote_audio_is_downloaded_once(self, tmp_path):
+        fetched = []
+
+        def fetch(url, destination):
+            fetched.append(url)
+            sf.write(destination, np.zeros(8000), 16000, format="WAV")
+            return True
+
+        mixer = AudioMixer(fetch=fetch, fetch_dir=str(tmp_path / "fetched"))
+        segments = [{"audio_url": "s3://audio/job/scene_0.wav", "start_time": 1.5}]
+
+        first = mixer.sources_from_segments(segments)
+        second = mixer.sources_from_segments(segments)
+
+        assert fetched == ["s3://audio/job/scene_0.wav"]
+        assert first == second and first[0].start_time == 1.5
+        assert first[0].path.endswith(".wav") and sf.info(first[0].path).duration == pytest.approx(0.5)
+
+    def test_unavailable_segments_are_skipped(self, tmp_path):
+        _tone(tmp_path / "local.wav", 0.5, 16000)
+        mixer = AudioMixer(fetch=lambda url, destination: False, fetch_dir=str(tmp_path / "fetched"))
+        sources = mixer.sources_from_segments([
+            {"audio_url": "s3://audio/missing.wav"},
+            {"audio_url": str(tmp_path / "gone.wav")},
+            {"audio_path": str(tmp_path / "local.wav"), "start_time": 2.0},
+            {},
+        ])
+        assert [s.path for s in sources] == [str(tmp_path / "local.wav")]
+        assert not list((tmp_path / "fetched").iterdir())
@@ -0,0 +1,100 @@
+"""
+Tests for batch job submission.
+Run with: pytest tests/test_batch_generate.py -v
+"""
+
+import json
+
+import pytest
+
+pytest.importorskip("flask_cors")
+
+import app.api.main as api_main
+from app.api.main import VideoGenerationAPI
+
+
+class RecordingEvents:
+    calls = []
+
+    @classmethod
+    def broadcast_queue_update(cls, queued, processing):
+        cls.calls.append(("queue_update", queued, processing))
+
+    @classmethod
+    def broadcast_job_status(cls, *args):
+        cls.calls.append(("job_status",) + args)
+
+
+@pytest.fixture
+def api(monkeypatch):
+    RecordingEvents.calls = []
+    monkeypatch.setattr(api_main, "WebSocketEventManager", RecordingEvents)
+    return VideoGenerationAPI()
+
+
+class TestBatchGenerate:
+    """Test POST /mcp/generate/batch."""
+
+    def test_json_array(self, api):
+        response = api.app.test_client().post(
+            "/mcp/generate/batch",
+            json=[{"prompt": "a sunrise"}, {"prompt": "a forest", "priority": 8}],
+        )
+
+        assert response.status_code == 202
+        body = response.get_json()
+        assert body["count"] == 2
+        assert all(job_id in api.jobs for job_id in body["job_ids"])
+        assert api.jobs[body["job_ids"][1]].priority == 8
+
+    def test_requests_object(self, api):
+        response = api.app.test_client().post(
+            "/mcp/generate/batch", json={"requests": [{"prompt": "a river"}]}
+        )
+        assert response.status_code == 202
+
+    def test_ndjson(self, api):
+        lines = "\n".join(json.dumps({"prompt": p}) for p in ["one", "two", "three"]) + "\n"
+        response = api.app.test_client().post(
+            "/mcp/generate/batch", data=lines, content_type="application/x-ndjson"
+        )
+        assert response.status_code == 202
+        assert response.get_json()["count"] == 3
+
+    def test_one_queue_update_for_whole_batch(self, api):
+        api.app.test_client().post(
+            "/mcp/generate/batch", json=[{"prompt": f"prompt {i}"} for i in range(20)]
+        )
+        assert RecordingEvents.calls == [("queue_update", 20, 0)]
+
+    def test_invalid_item_rejects_whole_batch(self, api):
+        response = api.app.test_client().post(
+            "/mcp/generate/batch",
+            json=[{"prompt": "fine"}, {"style": "social"}, {"prompt": "x", "priority": "high"}],
+        )
+
+        assert response.status_code == 400
+        assert [e["index"] for e in response.get_json()["errors"]] == [1, 2]
+        assert api.jobs == {}
+
+    def test_bad_ndjson_line_is_reported(self, api):
+        response = api.app.test_client().post(
+            "/mcp/generate/batch",
+            data='{"prompt": "ok"}\n{not json\n',
+            content_type="application/x-ndjson",
+        )
+        assert response.status_code == 400
+        assert response.get_json()["errors"][0]["index"] == 1
+
+    def test_empty_and_malformed_bodies(self, api):
+        client = api.app.test_client()
+        assert client.post("/mcp/generate/batch", json=[]).status_code == 400
+        assert client.post("/mcp/generate/batch", json={"prompt": "x"}).status_code == 400
+
+    def test_size_limit(self, api, monkeypatch):
+        monkeypatch.setattr(api_main.Config, "GENERATE_BATCH_MAX", 2)
+        response = api.app.test_client().post(
+            "/mcp/generate/batch", json=[{"prompt": "a"}] * 3
+        )
+        assert response.status_code == 413
+        assert api.jobs == {}
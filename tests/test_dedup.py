@@ -0,0 +1,175 @@
+"""
+Tests for request fingerprinting and result deduplication.
+Run with: pytest tests/test_dedup.py -v
+"""
+
+import threading
+import time
+
+import pytest
+
+import app.orchestrator.main as orchestrator_main
+from app.common.job_logs import FileJobLogStore, set_job_log_store
+from app.common.models import JobProgress, JobStatus, VideoRequest
+from app.common.utils import job_cache
+from app.orchestrator.dedup import Claim, RequestDeduplicator, request_fingerprint
+
+
+class TestFingerprint:
+    """Test which request fields make two jobs identical."""
+
+    def test_normalizes_whitespace_and_case(self):
+        a = VideoRequest(prompt="A  sunrise over\nthe sea", style="Cinematic")
+        b = VideoRequest(prompt="A sunrise over the sea", style="cinematic ")
+        assert request_fingerprint(a) == request_fingerprint(b)
+
+    def test_output_fields_matter(self):
+        base = VideoRequest(prompt="A sunrise")
+        assert request_fingerprint(base) != request_fingerprint(VideoRequest(prompt="A sunrise", duration_target=30))
+        assert request_fingerprint(base) != request_fingerprint(VideoRequest(prompt="A sunrise", voice="en-GB"))
+        assert request_fingerprint(base) != request_fingerprint(VideoRequest(prompt="A sunrise", scene_count=3))
+
+    def test_delivery_fields_do_not_matter(self):
+        a = VideoRequest(prompt="A sunrise", priority=1, callback_url="http://a")
+        b = VideoRequest(prompt="A sunrise", priority=9)
+        assert request_fingerprint(a) == request_fingerprint(b)
+
+
+class TestRequestDeduplicator:
+    """Test lead / attach / reuse decisions."""
+
+    def test_lead_then_attach_then_reuse(self):
+        dedup = RequestDeduplicator(window=60)
+        assert dedup.claim("fp", "job-1").kind == Claim.LEAD
+
+        attached = dedup.claim("fp", "job-2")
+        assert attached.kind == Claim.ATTACH and attached.job_id == "job-1"
+
+        dedup.complete("fp", "job-1", {"video_url": "v"})
+        assert attached.flight.done.is_set() and attached.flight.result == {"video_url": "v"}
+
+        reused = dedup.claim("fp", "job-3")
+        assert reused.kind == Claim.COMPLETED and reused.result == {"video_url": "v"}
+
+    def test_results_expire_after_window(self, clock):
+        dedup = RequestDeduplicator(window=60, clock=clock)
+        dedup.claim("fp", "job-1")
+        dedup.complete("fp", "job-1", {})
+
+        clock.now = 61
+        assert dedup.claim("fp", "job-2").kind == Claim.LEAD
+        assert dedup.stats() == {"in_flight": 1, "completed": 0}
+
+    def test_zero_window_only_shares_in_flight_work(self):
+        dedup = RequestDeduplicator(window=0)
+        dedup.claim("fp", "job-1")
+        dedup.complete("fp", "job-1", {})
+        assert dedup.claim("fp", "job-2").kind == Claim.LEAD
+
+    def test_failure_releases_attached_jobs_without_result(self):
+        dedup = RequestDeduplicator(window=60)
+        dedup.claim("fp", "job-1")
+        attached = dedup.claim("fp", "job-2")
+
+        dedup.fail("fp", "job-1")
+
+        assert attached.flight.done.is_set() and attached.flight.result is None
+        assert dedup.claim("fp", "job-2").kind == Claim.LEAD
+
+
+class TestOrchestratorDedup:
+    """Test that identical jobs share one pipeline run."""
+
+    @pytest.fixture
+    def orchestrator(self, tmp_path, monkeypatch):
+        set_job_log_store(FileJobLogStore(root=str(tmp_path)))
+        monkeypatch.setattr(orchestrator_main, "WebSocketEventManager", None)
+        orchestrator = orchestrator_main.JobOrchestrator()
+        orchestrator.runs = []
+        release = threading.Event()
+        orchestrator.release = release
+
+        def render(job_id, job_request, job_progress):
+            orchestrator.runs.append(job_id)
+            job_progress.status = JobStatus.RENDERING
+            job_progress.overall_progress = 80.0
+            orchestrator._publish_progress(job_progress)
+            release.wait(5)
+            if job_request.prompt == "fail":
+                raise RuntimeError("render failed")
+            job_cache.set(f"result_{job_id}", {"job_id": job_id, "video_url": f"s3://videos/{job_id}/output.mp4"})
+
+        for stage in ("_plan_scenes", "_retrieve_assets", "_generate_audio"):
+            monkeypatch.setattr(orchestrator, stage, lambda *args: None)
+        monkeypatch.setattr(orchestrator, "_render_video", render)
+        yield orchestrator
+        set_job_log_store(None)
+
+    def _run(self, orchestrator, request):
+        progress = JobProgress(job_id=request.id)
+        thread = threading.Thread(target=orchestrator.orchestrate_job, args=(request, progress))
+        thread.start()
+        return progress, thread
+
+    def test_completed_result_is_reused(self, orchestrator):
+        orchestrator.release.set()
+        first = VideoRequest(prompt="Waves at dusk")
+        orchestrator.orchestrate_job(first, JobProgress(job_id=first.id))
+
+        second = VideoRequest(prompt="Waves  at dusk")
+        progress = JobProgress(job_id=second.id)
+        orchestrator.orchestrate_job(second, progress)
+
+        assert orchestrator.runs == [first.id]
+        assert progress.status == JobStatus.COMPLETED
+        result = job_cache.get(f"result_{second.id}")
+        assert result["job_id"] == second.id and result["deduplicated_from"] == first.id
+        assert result["video_url"] == f"s3://videos/{first.id}/output.mp4"
+
+    def test_in_flight_job_is_shared(self, orchestrator):
+        first = VideoRequest(prompt="City lights")
+        second = VideoRequest(prompt="City lights")
+        leader, leader_thread = self._run(orchestrator, first)
+        while not orchestrator.runs:
+            time.sleep(0.01)
+
+        follower, follower_thread = self._run(orchestrator, second)
+        # Attaching does not hold the worker while the leader runs
+        follower_thread.join(5)
+        assert not follower_thread.is_alive()
+        assert orchestrator.running_jobs() == 1
+        assert follower.status == JobStatus.RENDERING and follower.overall_progress == 80.0
+
+        orchestrator.release.set()
+        leader_thread.join(5)
+
+        assert orchestrator.runs == [first.id]
+        assert follower.status == JobStatus.COMPLETED
+        assert job_cache.get(f"result_{second.id}")["deduplicated_from"] == first.id
+
+    def test_follower_runs_itself_when_leader_fails(self, orchestrator):
+        first = VideoRequest(prompt="fail")
+        second = VideoRequest(prompt="fail")
+        leader, leader_thread = self._run(orchestrator, first)
+        while not orchestrator.runs:
+            time.sleep(0.01)
+        follower, follower_thread = self._run(orchestrator, second)
+        follower_thread.join(5)
+
+        orchestrator.release.set()
+        leader_thread.join(5)
+        deadline = time.monotonic() + 5
+        while not follower.is_terminal and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        assert leader.status == JobStatus.FAILED
+        assert orchestrator.runs == [first.id, second.id]
+        assert follower.status == JobStatus.FAILED
+
+    def test_opt_out_runs_the_pipeline(self, orchestrator):
+        orchestrator.release.set()
+        first = VideoRequest(prompt="Mountain trail")
+        second = VideoRequest(prompt="Mountain trail", dedupe=False)
+        orchestrator.orchestrate_job(first, JobProgress(job_id=first.id))
+        orchestrator.orchestrate_job(second, JobProgress(job_id=second.id))
+        assert orchestrator.runs == [first.id, second.id]
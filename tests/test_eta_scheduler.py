@@ -0,0 +1,205 @@
+"""
+Tests for learned stage durations, job ETAs and scheduling policies.
+Run with: pytest tests/test_eta_scheduler.py -v
+"""
+
+import threading
+
+import pytest
+
+import app.orchestrator.main as orchestrator_main
+from app.common.config import Config
+from app.common.job_logs import FileJobLogStore, set_job_log_store
+from app.common.models import JobProgress, JobStatus, VideoRequest
+from app.common.utils import job_cache
+from app.orchestrator.estimator import STAGES, StageEstimator, job_features
+from app.orchestrator.scheduler import JobScheduler
+
+
+RENDERING = JobStatus.RENDERING.value
+
+
+def _x(scenes, quality="medium", hits=0.0):
+    return job_features(VideoRequest(duration_target=scenes * 5, quality=quality), scenes, hits)
+
+
+class TestStageEstimator:
+    """Test online duration models and the ETA helpers built on them."""
+
+    def test_unobserved_stage_uses_per_scene_prior(self):
+        estimator = StageEstimator(state_path=None)
+        assert estimator.predict(RENDERING, _x(10)) == pytest.approx(2 * estimator.predict(RENDERING, _x(5)))
+
+    def test_learns_effect_of_scenes_quality_and_cache_hits(self):
+        estimator = StageEstimator(state_path=None, forgetting=1.0)
+        for scenes in range(2, 12):
+            for quality, extra in (("low", -1.0), ("medium", 0.0), ("high", 4.0)):
+                for hits in (0.0, 0.5, 1.0):
+                    estimator.observe(RENDERING, _x(scenes, quality, hits), 2.0 + 3.0 * scenes + extra - 2.0 * hits)
+
+        assert estimator.predict(RENDERING, _x(20)) == pytest.approx(62.0, abs=0.5)
+        assert estimator.predict(RENDERING, _x(20, "high")) == pytest.approx(66.0, abs=0.5)
+        assert estimator.predict(RENDERING, _x(20, hits=1.0)) == pytest.approx(60.0, abs=0.5)
+
+    def test_forgetting_tracks_a_slowdown(self):
+        estimator = StageEstimator(state_path=None, forgetting=0.9)
+        for seconds in [10.0] * 50 + [20.0] * 50:
+            estimator.observe(RENDERING, _x(5), seconds)
+        assert estimator.predict(RENDERING, _x(5)) == pytest.approx(20.0, rel=0.05)
+
+    def test_covariance_does_not_wind_up(self):
+        """Unexcited features (no high quality jobs) must not blow up the covariance."""
+        estimator = StageEstimator(state_path=None, forgetting=0.9)
+        for i in range(2000):
+            estimator.observe(RENDERING, _x(5 + i % 3), 10.0 + 2.0 * (i % 3))
+        model = estimator.models[RENDERING]
+
+        assert max(model.p[i][i] for i in range(len(model.p))) <= 1000.0 * (1 + 1e-9)
+        assert estimator.predict(RENDERING, _x(6)) == pytest.approx(12.0, abs=0.1)
+
+    def test_remaining_and_progress(self):
+        estimator = StageEstimator(state_path=None)
+        x = _x(4)
+        total = estimator.expected_total(x)
+        assert estimator.remaining(STAGES[0], x) == pytest.approx(total)
+        assert estimator.remaining(RENDERING, x, float("inf")) == 0.0
+        assert estimator.progress(STAGES[0], x) == 0.0
+        assert 0 < estimator.progress(RENDERING, x) < estimator.progress(RENDERING, x, 1.0) <= 99.0
+
+    def test_state_survives_restart(self, tmp_path):
+        path = str(tmp_path / "eta.json")
+        estimator = StageEstimator(state_path=path)
+        for _ in range(10):
+            estimator.observe(RENDERING, _x(3), 7.0)
+        estimator.observe_cache_hits(1.0)
+        estimator.save()
+
+        reloaded = StageEstimator(state_path=path)
+        assert reloaded.predict(RENDERING, _x(3)) == pytest.approx(estimator.predict(RENDERING, _x(3)))
+        assert reloaded.cache_hit_ratio == pytest.approx(0.1)
+
+    def test_unreadable_state_is_ignored(self, tmp_path):
+        path = tmp_path / "eta.json"
+        path.write_text("not json")
+        assert StageEstimator(state_path=str(path)).predict(RENDERING, _x(1)) > 0
+
+
+class TestJobScheduler:
+    """Test the order in which queued jobs start."""
+
+    def _drain(self, policy, jobs, estimates, clock, aging=0.0):
+        """Queue jobs behind a blocking one on a single worker; the order the rest ran in."""
+        started, release = [], threading.Event()
+        done = threading.Semaphore(0)
+
+        def run(job_request, job_progress):
+            if job_request.id == "blocker":
+                release.wait(5)
+            else:
+                started.append(job_request.id)
+            done.release()
+
+        scheduler = JobScheduler(run=run, estimate=lambda job: estimates.get(job.id, 1.0), policy=policy,
+                                 workers=1, aging=aging, clock=clock)
+        scheduler.submit(VideoRequest(id="blocker"), JobProgress(job_id="blocker"))
+        progresses = {}
+        for job in jobs:
+            progresses[job.id] = JobProgress(job_id=job.id)
+            scheduler.submit(job, progresses[job.id])
+            clock.now += 10
+        release.set()
+        for _ in range(len(jobs) + 1):
+            assert done.acquire(timeout=5)
+        return started, progresses
+
+    def test_fifo(self, clock):
+        jobs = [VideoRequest(id=name) for name in ("a", "b", "c")]
+        started, _ = self._drain("fifo", jobs, {"a": 30, "b": 10, "c": 20}, clock)
+        assert started == ["a", "b", "c"]
+
+    def test_priority(self, clock):
+        jobs = [VideoRequest(id="a", priority=2), VideoRequest(id="b", priority=9), VideoRequest(id="c", priority=5)]
+        started, _ = self._drain("priority", jobs, {}, clock)
+        assert started == ["b", "c", "a"]
+
+    def test_shortest_expected_job_first(self, clock):
+        jobs = [VideoRequest(id=name) for name in ("a", "b", "c")]
+        started, progresses = self._drain("sejf", jobs, {"a": 30, "b": 10, "c": 20}, clock)
+        assert started == ["b", "c", "a"]
+        assert progresses["a"].estimated_time_remaining == 30
+
+    def test_aging_lets_long_jobs_start(self, clock):
+        jobs = [VideoRequest(id="long"), VideoRequest(id="short")]
+        # "short" arrives 10s later; with aging 2 that outweighs its 15s advantage
+        started, _ = self._drain("sejf", jobs, {"long": 20, "short": 5}, clock, aging=2.0)
+        assert started == ["long", "short"]
+
+    def test_cancelled_jobs_are_skipped(self):
+        scheduler = JobScheduler(run=lambda *args: None, estimate=lambda job: 1.0, workers=1)
+        cancelled = JobProgress(job_id="a", status=JobStatus.CANCELLED)
+        scheduler._queue.put((0.0, 0, VideoRequest(id="a"), cancelled))
+        scheduler._queue.put((0.0, 1, VideoRequest(id="b"), JobProgress(job_id="b")))
+        assert scheduler.next_job(timeout=1)[0].id == "b"
+        assert scheduler.next_job(timeout=0.01) is None
+
+
+class TestOrchestratorEstimates:
+    """Test that pipeline runs report learned ETAs and feed the estimator."""
+
+    @pytest.fixture
+    def orchestrator(self, tmp_path, monkeypatch):
+        set_job_log_store(FileJobLogStore(root=str(tmp_path)))
+        monkeypatch.setattr(orchestrator_main, "WebSocketEventManager", None)
+        orchestrator = orchestrator_main.JobOrchestrator()
+        orchestrator.estimator = StageEstimator(state_path=str(tmp_path / "eta.json"))
+        orchestrator.seen = []
+
+        def stage(job_id, job_request, job_progress):
+            orchestrator.seen.append((job_progress.overall_progress, job_progress.estimated_time_remaining))
+            job_progress.total_scenes = 3
+            job_cache.set(f"result_{job_id}", {"job_id": job_id})
+
+        for name in ("_plan_scenes", "_retrieve_assets", "_generate_audio", "_render_video"):
+            monkeypatch.setattr(orchestrator, name, stage)
+        yield orchestrator
+        set_job_log_store(None)
+
+    def test_progress_and_eta_come_from_estimates(self, orchestrator, tmp_path):
+        job = VideoRequest(prompt="Rain on a window", duration_target=15, dedupe=False)
+        progress = JobProgress(job_id=job.id)
+        orchestrator.orchestrate_job(job, progress)
+
+        progresses = [seen[0] for seen in orchestrator.seen]
+        etas = [seen[1] for seen in orchestrator.seen]
+        assert progresses == sorted(progresses) and progresses[0] == 0.0
+        assert progresses[-1] not in (0.0, 20.0, 40.0, 60.0)
+        assert etas[0] > etas[-1] > 0
+        assert progress.status == JobStatus.COMPLETED
+        assert progress.overall_progress == 100.0 and progress.estimated_time_remaining == 0.0
+
+        assert all(model.count == 1 for model in orchestrator.estimator.models.values())
+        assert (tmp_path / "eta.json").exists()
+
+    def test_submit_reports_expected_duration(self, orchestrator, monkeypatch):
+        monkeypatch.setattr(orchestrator.scheduler, "_start", lambda: None)
+        job = VideoRequest(prompt="Rain on a window", duration_target=15)
+        progress = JobProgress(job_id=job.id)
+        expected = orchestrator.submit(job, progress)
+        assert expected == pytest.approx(orchestrator.expected_duration(job)) and expected > 0
+        assert progress.estimated_time_remaining == expected
+
+
+class TestQualityField:
+    """Test the quality option on generate requests."""
+
+    def test_validation(self, monkeypatch):
+        pytest.importorskip("flask_cors")
+        from app.api.main import VideoGenerationAPI
+
+        monkeypatch.setattr(Config, "API_RUN_JOBS", False)
+        api = VideoGenerationAPI()
+        client = api.app.test_client()
+        assert client.post("/mcp/generate", json={"prompt": "x", "quality": "ultra"}).status_code == 400
+        response = client.post("/mcp/generate", json={"prompt": "x", "quality": "high"})
+        assert response.status_code == 202
+        assert api.jobs[response.get_json()["job_id"]].quality == "high"
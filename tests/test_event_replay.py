@@ -0,0 +1,108 @@
+"""
+Tests for replaying missed WebSocket events to resubscribing clients.
+Run with: pytest tests/test_event_replay.py -v
+"""
+
+import pytest
+
+from app.websocket.broker import LocalBroker
+from app.websocket.replay import EventReplayBuffer
+
+
+class TestEventReplayBuffer:
+    """Test sequence numbering and replay windows."""
+
+    def test_sequences_are_per_job_and_monotonic(self):
+        buffer = EventReplayBuffer(size=10)
+        first, second, other = {}, {}, {}
+        assert buffer.record("a", "job_log_entry", first) == 1
+        assert buffer.record("a", "job_log_entry", second) == 2
+        assert buffer.record("b", "job_log_entry", other) == 1
+        assert first["seq"] == 1 and first["epoch"] == buffer.epoch
+
+    def test_replays_only_missed_events(self):
+        buffer = EventReplayBuffer(size=10)
+        for i in range(5):
+            buffer.record("a", "job_status_update", {"progress": i})
+
+        events, info = buffer.since("a", 3, buffer.epoch)
+
+        assert [payload["progress"] for _, payload in events] == [3, 4]
+        assert info == {"jobId": "a", "epoch": buffer.epoch, "lastSeq": 5, "replayed": 2, "gap": False}
+
+    def test_up_to_date_client_gets_nothing(self):
+        buffer = EventReplayBuffer(size=10)
+        buffer.record("a", "job_log_entry", {})
+        events, info = buffer.since("a", 1)
+        assert events == [] and not info["gap"]
+
+    def test_first_subscribe_does_not_replay(self):
+        buffer = EventReplayBuffer(size=10)
+        buffer.record("a", "job_log_entry", {})
+        events, info = buffer.since("a", None)
+        assert events == [] and info["lastSeq"] == 1 and not info["gap"]
+
+    def test_gap_when_missed_events_were_evicted(self):
+        buffer = EventReplayBuffer(size=3)
+        for i in range(10):
+            buffer.record("a", "job_log_entry", {"i": i})
+
+        events, info = buffer.since("a", 2)
+
+        assert [payload["i"] for _, payload in events] == [7, 8, 9]
+        assert info["gap"]
+
+    def test_other_epoch_is_a_gap(self):
+        """Sequences from another replica or a restarted server do not line up."""
+        buffer = EventReplayBuffer(size=10)
+        buffer.record("a", "job_log_entry", {})
+        events, info = buffer.since("a", 1, "some-other-epoch")
+        assert len(events) == 1 and info["gap"]
+
+    def test_least_recently_updated_jobs_are_dropped(self):
+        buffer = EventReplayBuffer(size=10, max_jobs=2)
+        buffer.record("a", "job_log_entry", {})
+        buffer.record("b", "job_log_entry", {})
+        buffer.record("a", "job_log_entry", {})
+        buffer.record("c", "job_log_entry", {})
+
+        assert buffer.since("a", 0)[1]["lastSeq"] == 2
+        assert buffer.since("b", 0)[1]["lastSeq"] == 0
+        assert buffer.since("c", 0)[1]["lastSeq"] == 1
+
+
+class TestServerReplay:
+    """Test that broadcast events are recorded and replayed on subscribe."""
+
+    @pytest.fixture
+    def server(self):
+        pytest.importorskip("flask_socketio")
+        from app.websocket.main import WebSocketServer
+
+        server = WebSocketServer(broker=LocalBroker())
+        server.emitted = []
+        server.socketio.emit = lambda event, payload, **kwargs: server.emitted.append(
+            (event, payload, kwargs.get("to"))
+        )
+        return server
+
+    def test_resubscribe_replays_emitted_events(self, server):
+        server.broadcast_job_log("job-1", "INFO", "first")
+        server.coalescer.flush()
+        server.broadcast_job_status("job-1", "rendering", 50)
+        server.broadcast_job_log("job-1", "INFO", "second")
+        server.coalescer.flush()
+        server.broadcast_job_completed("job-1", "/videos/job-1.mp4", 12.0)
+
+        sent = [payload for event, payload, room in server.emitted if room != "jobs"]
+        assert [payload["seq"] for payload in sent] == [1, 2, 3, 4]
+
+        events, info = server.replay_missed({"jobId": "job-1", "lastSeq": 1, "epoch": server.replay.epoch})
+
+        assert [event for event, _ in events] == ["job_log_entry", "job_status_update", "job_completed"]
+        assert info["lastSeq"] == 4 and not info["gap"]
+
+    def test_invalid_last_seq_is_treated_as_fresh_subscribe(self, server):
+        server.broadcast_job_failed("job-2", "boom")
+        events, info = server.replay_missed({"jobId": "job-2", "lastSeq": "nope"})
+        assert events == [] and info["lastSeq"] == 1
@@ -0,0 +1,138 @@
+"""
+Tests for bounded job log storage and range reads.
+Run with: pytest tests/test_job_logs.py -v
+"""
+
+import pytest
+
+from app.common.job_logs import FileJobLogStore, set_job_log_store
+from app.common.models import JobProgress
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = FileJobLogStore(root=str(tmp_path), max_bytes=4096, segment_bytes=512)
+    set_job_log_store(store)
+    yield store
+    set_job_log_store(None)
+
+
+class TestFileJobLogStore:
+    """Test appends, range reads and the size cap."""
+
+    def test_sequences_and_range_reads(self, store):
+        for i in range(5):
+            assert store.append("job-1", f"line {i}") == i + 1
+
+        page = store.read("job-1", after=2)
+
+        assert [e["message"] for e in page["entries"]] == ["line 2", "line 3", "line 4"]
+        assert page["next_after"] == 5 and not page["has_more"] and not page["truncated"]
+
+    def test_limit_pages_through_segments(self, store):
+        for i in range(40):
+            store.append("job-1", f"line {i:02d}")
+
+        seen, after = [], 0
+        while True:
+            page = store.read("job-1", after=after, limit=7)
+            seen.extend(e["seq"] for e in page["entries"])
+            after = page["next_after"]
+            if not page["has_more"]:
+                break
+
+        assert seen == list(range(1, 41))
+
+    def test_oldest_segments_are_dropped_over_cap(self, store, tmp_path):
+        for i in range(200):
+            store.append("job-1", "y" * 60)
+
+        files = list((tmp_path / "job-1").iterdir())
+        assert sum(f.stat().st_size for f in files) <= 4096 + 512
+        page = store.read("job-1", after=0, limit=1000)
+        assert page["truncated"]
+        assert page["entries"][0]["seq"] == page["first_seq"] > 1
+        assert page["entries"][-1]["seq"] == page["last_seq"] == 200
+
+    def test_tail(self, store):
+        for i in range(30):
+            store.append("job-1", f"line {i}")
+        assert [e["seq"] for e in store.tail("job-1", 3)] == [28, 29, 30]
+
+    def test_index_survives_restart(self, store, tmp_path):
+        for i in range(20):
+            store.append("job-1", f"line {i} " + "z" * 40)
+
+        reopened = FileJobLogStore(root=str(tmp_path), max_bytes=4096, segment_bytes=512)
+
+        assert reopened.append("job-1", "after restart") == 21
+        assert reopened.read("job-1", after=19)["entries"][-1]["message"] == "after restart"
+
+    def test_unknown_job_is_empty(self, store):
+        page = store.read("missing")
+        assert page["entries"] == [] and page["last_seq"] == 0 and not page["truncated"]
+
+
+class TestJobProgressLogs:
+    """Test that status payloads carry only a tail."""
+
+    def test_add_log_keeps_short_tail(self, store, monkeypatch):
+        from app.common.config import Config
+
+        monkeypatch.setattr(Config, "JOB_LOG_TAIL", 3)
+        progress = JobProgress(job_id="job-2")
+        for i in range(10):
+            progress.add_log(f"step {i}")
+
+        assert progress.logs == ["step 7", "step 8", "step 9"]
+        assert progress.log_seq == 10
+        assert len(store.read("job-2", limit=100)["entries"]) == 10
+
+
+    def test_zero_tail_keeps_no_lines(self, store, monkeypatch):
+        from app.common.config import Config
+
+        monkeypatch.setattr(Config, "JOB_LOG_TAIL", 0)
+        progress = JobProgress(job_id="job-3")
+        for i in range(5):
+            progress.add_log(f"step {i}")
+
+        assert progress.logs == [] and progress.log_seq == 5
+
+    def test_store_outage_does_not_fail_the_job(self, monkeypatch):
+        redis = pytest.importorskip("redis")
+        import app.orchestrator.main as orchestrator_main
+        from app.common.job_logs import set_job_log_store
+
+        class DownStore:
+            def append(self, job_id, message, level="INFO"):
+                raise redis.ConnectionError("Redis is down")
+
+        set_job_log_store(DownStore())
+        monkeypatch.setattr(orchestrator_main, "WebSocketEventManager", None)
+        try:
+            progress = JobProgress(job_id="job-4")
+            orchestrator_main.JobOrchestrator()._log(progress, "still running")
+        finally:
+            set_job_log_store(None)
+        assert progress.logs == []
+
+
+class TestLogsEndpoint:
+    """Test GET /mcp/logs/<job_id>."""
+
+    def test_range_read(self, store):
+        pytest.importorskip("flask_cors")
+        from app.api.main import VideoGenerationAPI
+
+        api = VideoGenerationAPI()
+        client = api.app.test_client()
+        job_id = client.post("/mcp/generate", json={"prompt": "a forest"}).get_json()["job_id"]
+        progress = api.job_progress[job_id]
+        for i in range(4):
+            progress.add_log(f"line {i}")
+
+        page = client.get(f"/mcp/logs/{job_id}?after=2").get_json()
+
+        assert [e["message"] for e in page["entries"]] == ["line 2", "line 3"]
+        assert client.get("/mcp/logs/nope").status_code == 404
@@ -0,0 +1,115 @@
+"""
+Tests for recency-weighted popularity and predictive clip warming.
+Run with: pytest tests/test_predictive_prefetch.py -v
+"""
+
+import pytest
+
+from app.common.models import PexelsClip
+from app.common.utils import job_cache
+from app.orchestrator.warmer import DecayingCounter, PredictiveWarmer
+
+
+def _clip(clip_id):
+    return PexelsClip(id=clip_id, url="", video_url=f"https://cdn/{clip_id}.mp4", duration=5,
+                      width=1920, height=1080, user_name="u", user_url="")
+
+
+class TestDecayingCounter:
+    """Test recency weighting."""
+
+    def test_weight_halves_every_half_life(self, clock):
+        counter = DecayingCounter(half_life=100, clock=clock)
+        counter.add("a")
+        counter.add("a")
+        clock.now += 100
+        assert counter.score("a") == pytest.approx(1.0)
+
+    def test_recent_use_outranks_older_popularity(self, clock):
+        counter = DecayingCounter(half_life=100, clock=clock)
+        for _ in range(3):
+            counter.add("old")
+        clock.now += 300  # 3 uses are now worth 0.375
+        counter.add("new")
+        assert [key for key, _ in counter.top(2)] == ["new", "old"]
+
+    def test_weakest_keys_are_forgotten_past_the_cap(self, clock):
+        counter = DecayingCounter(half_life=100, max_items=10, clock=clock)
+        counter.add("popular", weight=5)
+        for i in range(10):
+            counter.add(f"k{i}")
+        assert len(counter) <= 10 and "popular" in counter
+
+
+class FakeStore:
+    def __init__(self):
+        self.ensured = []
+
+    def ensure(self, clip_id, video_url):
+        self.ensured.append(clip_id)
+        return f"/clips/{clip_id}.mp4"
+
+
+class FakeRetriever:
+    def __init__(self):
+        self.pexels = self
+        self.clip_store = FakeStore()
+        self.searched = []
+
+    def search_clips(self, query, per_page=5):
+        self.searched.append(query)
+        return []
+
+
+@pytest.fixture
+def jobs():
+    """Cache get_best_clip results for a few completed jobs."""
+    data = {
+        "job-1": {"s1": {"clip": _clip("beach"), "query": "Sunset  Beach", "match_score": 1.0},
+                  "s2": {"clip": _clip("city"), "query": "city night", "match_score": 1.0}},
+        "job-2": {"s1": {"clip": _clip("beach"), "query": "sunset beach", "match_score": 1.0},
+                  "s2": {"clip": None, "query": "rare thing", "match_score": 0.0}},
+    }
+    for job_id, assets in data.items():
+        job_cache.set(f"assets_{job_id}", assets)
+    yield list(data)
+    for job_id in data:
+        job_cache.delete(f"assets_{job_id}")
+
+
+class TestPredictiveWarmer:
+    """Test mining completed jobs and warming during idle time."""
+
+    def test_observe_counts_normalized_queries_and_clips(self, jobs):
+        warmer = PredictiveWarmer(retriever=FakeRetriever(), interval=0)
+        for job_id in jobs:
+            assert warmer.observe(job_id)
+        assert not warmer.observe("job-1")  # already counted
+        assert not warmer.observe("unknown")
+
+        assert warmer.queries.top(1)[0] == ("sunset beach", pytest.approx(2.0))
+        assert warmer.clips.top(1)[0][0] == "beach"
+
+    def test_warm_once_fetches_most_popular_first(self, jobs):
+        retriever = FakeRetriever()
+        warmer = PredictiveWarmer(retriever=retriever, interval=0, top_queries=2, top_clips=1)
+        for job_id in jobs:
+            warmer.observe(job_id)
+
+        stats = warmer.warm_once()
+
+        assert stats == {"queries": 2, "clips": 1, "interrupted": False}
+        assert retriever.searched[0] == "sunset beach"
+        assert retriever.clip_store.ensured == ["beach"]
+
+    def test_stops_when_jobs_need_capacity(self, jobs):
+        retriever = FakeRetriever()
+        busy = iter([False, False, True])
+        warmer = PredictiveWarmer(retriever=retriever, busy=lambda: next(busy, True), interval=0)
+        for job_id in jobs:
+            warmer.observe(job_id)
+
+        stats = warmer.warm_once()
+
+        assert stats["interrupted"] and stats["queries"] == 1
+        assert retriever.clip_store.ensured == []
@@ -0,0 +1,280 @@
+"""
+Tests for /mcp/prefetch cache warming, the clip store and the search cache.
+Run with: pytest tests/test_prefetch.py -v
+"""
+
+import os
+import sys
+import json
+import threading
+import subprocess
+
+import pytest
+
+import app.orchestrator.prefetch as prefetch_main
+import app.retriever.main as retriever_main
+from app.common.config import Config
+from app.common.models import PexelsClip, VideoRequest
+from app.common.utils import job_cache
+from app.orchestrator.prefetch import PrefetchTask, PrefetchWorker, set_prefetch_worker
+from app.retriever.clip_store import ClipStore
+
+
+def _clip(clip_id="101", duration=6):
+    return PexelsClip(
+        id=clip_id, url=f"https://pexels/{clip_id}", video_url=f"https://cdn/{clip_id}.mp4",
+        duration=duration, width=1920, height=1080, user_name="u", user_url="",
+    )
+
+
+def _fake_download(calls, size=100):
+    def download(url, destination):
+        calls.append(url)
+        with open(destination, "wb") as f:
+            f.write(b"v" * size)
+        return True
+    return download
+
+
+class FakeRunner:
+    """Stands in for ffmpeg; writes the output file unless told to fail."""
+
+    def __init__(self, returncode=0):
+        self.returncode = returncode
+        self.commands = []
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command)
+        if self.returncode == 0:
+            with open(command[-1], "wb") as f:
+                f.write(b"normalized")
+
+        class Result:
+            returncode = self.returncode
+        return Result()
+
+
+class TestClipStore:
+    """Test downloading, normalizing and evicting clips."""
+
+    def test_clip_is_downloaded_and_normalized_once(self, tmp_path):
+        calls, runner = [], FakeRunner()
+        store = ClipStore(str(tmp_path), download=_fake_download(calls), runner=runner)
+
+        first = store.ensure("101", "https://cdn/101.mp4")
+        second = store.ensure("101", "https://cdn/101.mp4")
+
+        assert first == second == store.get("101")
+        assert calls == ["https://cdn/101.mp4"] and len(runner.commands) == 1
+        assert open(first, "rb").read() == b"normalized"
+        assert "-g" in runner.commands[0]
+
+    def test_failed_normalization_keeps_download(self, tmp_path):
+        store = ClipStore(str(tmp_path), download=_fake_download([]), runner=FakeRunner(returncode=1))
+        path = store.ensure("101", "https://cdn/101.mp4")
+        assert open(path, "rb").read() == b"v" * 100
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["101.mp4"]
+
+    def test_least_recently_used_clips_are_evicted(self, tmp_path):
+        store = ClipStore(str(tmp_path), max_bytes=250, download=_fake_download([]), normalize=False)
+        store.ensure("a", "u")
+        store.ensure("b", "u")
+        store.get("a")
+        store.ensure("c", "u")
+        assert store.get("b") is None
+        assert store.get("a") and store.get("c")
+
+    def test_failed_fetch_keeps_lock_for_waiting_threads(self, tmp_path):
+        """A failed fetch must not drop the clip lock while a waiter is still fetching."""
+        started = [threading.Event(), threading.Event()]
+        release = [threading.Event(), threading.Event()]
+        active, overlaps, calls = [], [], []
+
+        def download(url, destination):
+            attempt = len(calls)
+            calls.append(url)
+            active.append(url)
+            overlaps.append(len(active) > 1)
+            if attempt < 2:
+                started[attempt].set()
+                release[attempt].wait(5)
+            active.pop()
+            if attempt == 0:
+                return False
+            with open(destination, "wb") as f:
+                f.write(b"v")
+            return True
+
+        store = ClipStore(str(tmp_path), download=download, normalize=False)
+        results = []
+
+        def ensure():
+            results.append(store.ensure("a", "u"))
+
+        threads = [threading.Thread(target=ensure), threading.Thread(target=ensure)]
+        threads[0].start()
+        assert started[0].wait(5)
+        threads[1].start()
+        release[0].set()
+        assert started[1].wait(5)  # the waiter retries after the failed fetch
+        threads.append(threading.Thread(target=ensure))
+        threads[2].start()
+        release[1].set()
+        for thread in threads:
+            thread.join(5)
+
+        assert not any(overlaps)
+        assert calls == ["u", "u"] and results.count(None) == 1
+        assert store._fetching == {}
+
+    def test_store_survives_restart(self, tmp_path):
+        ClipStore(str(tmp_path), download=_fake_download([]), normalize=False).ensure("a", "u")
+        assert ClipStore(str(tmp_path)).get("a")
+
+
+class TestSearchCache:
+    """Test reuse of Pexels search results."""
+
+    def test_cached_search_skips_the_api(self, monkeypatch):
+        retriever = retriever_main.PexelsRetriever()
+        key = retriever.search_cache_key("Sunset  Beach", 5)
+        job_cache.set(key, [_clip().to_dict()])
+        monkeypatch.setattr(retriever_main, "requests", None)
+        try:
+            clips = retriever.search_clips("sunset beach", per_page=5)
+        finally:
+            job_cache.delete(key)
+        assert [c.id for c in clips] == ["101"]
+
+
+class FakeRetriever:
+    def __init__(self):
+        self.pexels = self
+        self.fetched = []
+
+    def get_best_clip(self, scenes):
+        return {scene.id: {"clip": _clip(str(i)), "query": scene.description, "match_score": 1.0}
+                for i, scene in enumerate(scenes)}
+
+    def fetch_clips(self, assets):
+        for asset in assets.values():
+            self.fetched.append(asset["clip"].id)
+            asset["path"] = f"/clips/{asset['clip'].id}.mp4"
+        return assets
+
+
+class FakeTTS:
+    def __init__(self):
+        self.texts = []
+
+    def warm_cache(self, text, language):
+        self.texts.append(text)
+        return 1
+
+
+class TestPrefetchWorker:
+    """Test the stages a prefetch runs and its idle-only scheduling."""
+
+    def test_run_warms_every_cache(self):
+        retriever, tts = FakeRetriever(), FakeTTS()
+        worker = PrefetchWorker(retriever=retriever, tts=tts, busy=lambda: False)
+        prefetch = PrefetchTask(VideoRequest(prompt="Waves crash. Gulls fly.", duration_target=10, scene_count=2))
+
+        worker.run(prefetch)
+
+        assert prefetch.status == "completed"
+        assert prefetch.stages["scenes"]["count"] == 2
+        assert prefetch.stages["clips"]["stored"] == 2
+        assert retriever.fetched == ["0", "1"]
+        assert tts.texts == ["Waves crash Gulls fly"]
+
+    def test_waits_while_jobs_are_running(self):
+        busy = iter([True, True, False])
+        worker = PrefetchWorker(retriever=FakeRetriever(), tts=FakeTTS(),
+                                busy=lambda: next(busy, False), idle_poll=0.01)
+        prefetch = PrefetchTask(VideoRequest(prompt="Waves crash."))
+        worker.run(prefetch)
+        assert prefetch.status == "completed"
+
+    def test_default_busy_check_follows_where_jobs_run(self, monkeypatch):
+        monkeypatch.setattr(Config, "API_RUN_JOBS", False)
+        monkeypatch.setattr(prefetch_main, "get_orchestrator", lambda: pytest.fail("no local jobs to count"))
+        assert not PrefetchWorker(retriever=FakeRetriever()).busy()
+
+        class Running:
+            def running_jobs(self):
+                return Config.PREFETCH_IDLE_JOBS
+
+        monkeypatch.setattr(Config, "API_RUN_JOBS", True)
+        monkeypatch.setattr(prefetch_main, "get_orchestrator", lambda: Running())
+        assert PrefetchWorker(retriever=FakeRetriever()).busy()
+
+    def test_tts_stage_skipped_with_remote_services(self, monkeypatch):
+        monkeypatch.setattr(Config, "USE_REMOTE_SERVICES", True)
+        worker = PrefetchWorker(retriever=FakeRetriever(), busy=lambda: False)
+        prefetch = PrefetchTask(VideoRequest(prompt="Waves crash."))
+        worker.run(prefetch)
+        assert prefetch.status == "completed" and "tts" not in prefetch.stages
+
+    def test_queries_do_not_depend_on_the_hash_seed(self):
+        """Prefetch (API process) and the job (orchestrator) must search the same queries."""
+        script = (
+            "import json\n"
+            "from app.orchestrator.main import ScenePlanner\n"
+            "scenes = ScenePlanner().plan_scenes("
+            "'Golden waves crash against rugged cliffs while seabirds circle above the misty harbor', 10, 2)\n"
+            "print(json.dumps([' '.join(s.keywords[:3]) for s in scenes]))\n"
+        )
+        queries = []
+        for seed in ("1", "2", "3"):
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, timeout=60,
+                                    cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+            assert output.returncode == 0, output.stderr.decode()
+            queries.append(json.loads(output.stdout.decode().strip().splitlines()[-1]))
+        assert queries[0] == queries[1] == queries[2]
+
+    def test_identical_pending_prefetch_is_shared(self):
+        release = threading.Event()
+        worker = PrefetchWorker(retriever=FakeRetriever(), tts=FakeTTS(), busy=lambda: not release.is_set(),
+                                idle_poll=0.01)
+        first = worker.submit(VideoRequest(prompt="Waves crash."))
+        second = worker.submit(VideoRequest(prompt="Waves  crash."))
+        other = worker.submit(VideoRequest(prompt="Gulls fly."))
+        release.set()
+
+        assert first is second and other is not first
+        assert worker.get(first.id) is first
+
+
+class TestPrefetchEndpoint:
+    """Test POST /mcp/prefetch and GET /mcp/prefetch/<id>."""
+
+    @pytest.fixture
+    def api(self):
+        pytest.importorskip("flask_cors")
+        from app.api.main import VideoGenerationAPI
+
+        release = threading.Event()
+        set_prefetch_worker(PrefetchWorker(retriever=FakeRetriever(), tts=FakeTTS(),
+                                           busy=lambda: not release.is_set(), idle_poll=0.01))
+        yield VideoGenerationAPI()
+        release.set()
+        set_prefetch_worker(None)
+
+    def test_prefetch_is_tracked_outside_the_job_index(self, api):
+        client = api.app.test_client()
+        response = client.post("/mcp/prefetch", json={"prompt": "Waves crash."})
+
+        assert response.status_code == 202
+        prefetch_id = response.get_json()["prefetch_id"]
+        assert prefetch_id.startswith("prefetch_")
+        assert client.get(f"/mcp/prefetch/{prefetch_id}").get_json()["status"] in ("queued", "running")
+        assert api.jobs == {}
+        assert client.get("/mcp/jobs").get_json()["summary"]["total_jobs"] == 0
+
+    def test_validation(self, api):
+        client = api.app.test_client()
+        assert client.post("/mcp/prefetch", json={}).status_code == 400
+        assert client.post("/mcp/prefetch", json={"prompt": "x", "duration_target": "long"}).status_code == 400
+        assert client.get("/mcp/prefetch/nope").status_code == 404
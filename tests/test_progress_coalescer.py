@@ -0,0 +1,60 @@
+"""
+Tests for coalesced progress broadcasting.
+Run with: pytest tests/test_progress_coalescer.py -v
+"""
+
+from app.websocket.coalescer import ProgressCoalescer
+
+
+def _coalescer(max_pending_logs=50):
+    sent = {"statuses": [], "logs": []}
+    coalescer = ProgressCoalescer(
+        emit_statuses=sent["statuses"].append,
+        emit_log=sent["logs"].append,
+        max_pending_logs=max_pending_logs,
+    )
+    return coalescer, sent
+
+
+def _log(job_id, i):
+    return {"jobId": job_id, "message": f"line {i}", "timestamp": f"t{i}"}
+
+
+class TestProgressCoalescer:
+    """Test latest-wins statuses, batching, and log dropping."""
+
+    def test_keeps_latest_status_per_job_in_one_batch(self):
+        """Many updates across jobs should flush as one batch of latest values."""
+        coalescer, sent = _coalescer()
+        for progress in range(1000):
+            coalescer.offer_status("a", {"jobId": "a", "progress": progress})
+        coalescer.offer_status("b", {"jobId": "b", "progress": 5})
+
+        coalescer.flush()
+
+        assert sent["statuses"] == [[{"jobId": "a", "progress": 999}, {"jobId": "b", "progress": 5}]]
+        assert coalescer.coalesced_statuses == 999
+        coalescer.flush()
+        assert len(sent["statuses"]) == 1
+
+    def test_drops_oldest_logs_under_backpressure(self):
+        """Only the newest lines are kept, preceded by a drop notice."""
+        coalescer, sent = _coalescer(max_pending_logs=3)
+        for i in range(10):
+            coalescer.offer_log("a", _log("a", i))
+
+        coalescer.flush()
+
+        assert sent["logs"][0]["dropped"] == 7
+        assert [line["message"] for line in sent["logs"][1:]] == ["line 7", "line 8", "line 9"]
+
+    def test_flush_job_only_emits_that_job(self):
+        """Terminal events flush their own job without touching others."""
+        coalescer, sent = _coalescer()
+        coalescer.offer_status("a", {"jobId": "a", "progress": 90})
+        coalescer.offer_status("b", {"jobId": "b", "progress": 10})
+
+        coalescer.flush_job("a")
+
+        assert sent["statuses"] == [[{"jobId": "a", "progress": 90}]]
+        assert coalescer.pending()
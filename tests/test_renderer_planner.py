@@ -0,0 +1,150 @@
+"""
+Tests for render planning and the ffprobe metadata cache.
+Run with: pytest tests/test_renderer_planner.py -v
+"""
+
+import pytest
+from app.renderer.planner import ClipProbe, ProbeCache, RenderPlanner
+
+
+def _fake_probe(calls, **overrides):
+    """Build a probe function that records calls instead of running ffprobe."""
+    def probe(path, file_hash):
+        calls.append(path)
+        data = {
+            "file_hash": file_hash,
+            "duration": 10.0,
+            "video_codec": "h264",
+            "width": 1920,
+            "height": 1080,
+            "fps": 30.0,
+            "keyframes": [0.0, 2.0, 4.0, 6.0, 8.0],
+            "gop_size": 2.0,
+        }
+        data.update(overrides)
+        return ClipProbe(**data)
+    return probe
+
+
+@pytest.fixture
+def clip(tmp_path):
+    path = tmp_path / "clip.mp4"
+    path.write_bytes(b"fake clip data")
+    return str(path)
+
+
+class TestProbeCache:
+    """Test persistent probe caching."""
+
+    def test_probe_runs_once_per_clip(self, tmp_path, clip):
+        """Repeat lookups should not re-probe the clip."""
+        calls = []
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe(calls))
+
+        first = cache.get(clip)
+        second = cache.get(clip)
+
+        assert first == second
+        assert len(calls) == 1
+
+    def test_probe_cache_persists_on_disk(self, tmp_path, clip):
+        """A fresh cache instance should load entries written by another."""
+        calls = []
+        ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe(calls)).get(clip)
+        probe = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe(calls)).get(clip)
+
+        assert probe.video_codec == "h264"
+        assert len(calls) == 1
+
+
+class TestRenderPlanner:
+    """Test render plan generation."""
+
+    def test_matching_clip_uses_stream_copy(self, tmp_path, clip):
+        """Clips matching the output format should be stream copied."""
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe([]))
+        planner = RenderPlanner(cache)
+        storyboard = {"scenes": [{"id": "s1", "duration": 5.0, "clip_path": clip, "trim_start": 3.0}]}
+
+        plan = planner.plan("job", storyboard)
+
+        assert plan.segments[0].mode == "copy"
+        assert plan.segments[0].trim_start == 2.0
+
+    def test_mismatched_clip_is_transcoded(self, tmp_path, clip):
+        """Clips with a different frame rate need a transcode."""
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe([], fps=25.0))
+        planner = RenderPlanner(cache)
+        storyboard = {"scenes": [{"id": "s1", "duration": 5.0, "clip_path": clip}]}
+
+        plan = planner.plan("job", storyboard)
+
+        assert plan.segments[0].mode == "transcode"
+        assert any("fps" in r for r in plan.segments[0].reasons)
+
+    def test_plan_is_deterministic(self, tmp_path, clip):
+        """Identical storyboards should produce identical plans."""
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe([]))
+        planner = RenderPlanner(cache)
+        storyboard = {"scenes": [
+            {"id": "s1", "duration": 5.0, "clip_path": clip},
+            {"id": "s2", "duration": 4.0},
+        ]}
+
+        first = planner.plan("job_a", storyboard)
+        second = planner.plan("job_b", storyboard)
+
+        assert first.fingerprint() == second.fingerprint()
+        assert second.segments[1].mode == "placeholder"
+        assert second.total_duration == 9.0
+
+    def test_duration_clamped_to_clip_after_trim(self, tmp_path, clip):
+        """A trimmed clip only has probe.duration - trim_start seconds to give."""
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe([]))
+        planner = RenderPlanner(cache)
+        storyboard = {"scenes": [{"id": "s1", "duration": 5.0, "clip_path": clip, "trim_start": 7.0}]}
+
+        segment = planner.plan("job", storyboard).segments[0]
+
+        # Snapped back to the 6.0s keyframe, leaving 4s of clip
+        assert segment.trim_start == 6.0
+        assert segment.duration == 4.0
+        assert "clip shorter than scene" in segment.reasons
+
+    def test_trim_past_clip_end_starts_from_zero(self, tmp_path, clip):
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe([]))
+        planner = RenderPlanner(cache)
+        storyboard = {"scenes": [{"id": "s1", "duration": 5.0, "clip_path": clip, "trim_start": 12.0}]}
+
+        segment = planner.plan("job", storyboard).segments[0]
+
+        assert segment.trim_start == 0.0 and segment.duration == 5.0
+
+
+class TestFFmpegCommand:
+    """Test the single-pass concat command honours the plan's segment modes."""
+
+    @pytest.fixture
+    def renderer(self, monkeypatch):
+        from app.renderer.main import FFmpegRenderer
+        monkeypatch.setattr(FFmpegRenderer, "_check_ffmpeg", lambda self: None)
+        return FFmpegRenderer()
+
+    def _plan(self, tmp_path, clip, **overrides):
+        cache = ProbeCache(str(tmp_path / "cache"), probe_fn=_fake_probe([], **overrides))
+        return RenderPlanner(cache).plan("job", {"scenes": [{"id": "s1", "duration": 5.0, "clip_path": clip}]})
+
+    def test_copy_plan_is_stream_copied(self, renderer, tmp_path, clip):
+        command = renderer._build_ffmpeg_command("c.txt", "out.mp4", "medium", plan=self._plan(tmp_path, clip))
+        assert command[command.index("-c:v") + 1] == "copy"
+        assert "-vf" not in command
+
+    def test_transcode_plan_or_captions_reencode(self, renderer, tmp_path, clip):
+        plan = self._plan(tmp_path, clip, fps=25.0)
+        command = renderer._build_ffmpeg_command("c.txt", "out.mp4", "medium", plan=plan)
+        assert command[command.index("-c:v") + 1] != "copy"
+
+        plan = self._plan(tmp_path, clip)
+        command = renderer._build_ffmpeg_command("c.txt", "out.mp4", "medium", None, "subs.ass", plan)
+        assert command[command.index("-c:v") + 1] != "copy"
+        assert "subtitles=subs.ass" in command[command.index("-vf") + 1]
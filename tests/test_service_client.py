@@ -0,0 +1,157 @@
+"""
+Tests for the load-aware service client, using in-process stub services.
+Run with: pytest tests/test_service_client.py -v
+"""
+
+import time
+
+import pytest
+
+flask = pytest.importorskip("flask")
+
+from app.common.service_client import (
+    CircuitBreaker,
+    LocalTransport,
+    ServiceClient,
+    ServiceUnavailableError,
+)
+
+
+def _stub(name, queue_depth=0, status=200, delay=0.0):
+    """A replica that reports a fixed load and answers /work."""
+    app = flask.Flask(name)
+    calls = []
+
+    @app.route("/health")
+    def health():
+        return flask.jsonify({"queue_depth": queue_depth, "busy_slots": 0})
+
+    @app.route("/work", methods=["GET", "POST"])
+    def work():
+        calls.append(name)
+        time.sleep(delay)
+        return flask.jsonify({"replica": name, "queue_depth": queue_depth}), status
+
+    app.calls = calls
+    return app
+
+
+def _client(apps, **kwargs):
+    urls = [f"http://{name}" for name in apps]
+    transport = LocalTransport({f"http://{name}": app for name, app in apps.items()})
+    kwargs.setdefault("hedge_delay", 0)
+    return ServiceClient("test", urls, transport=transport, **kwargs)
+
+
+class TestServiceClient:
+    """Test replica selection, failover, and hedging."""
+
+    def test_prefers_less_loaded_replica(self):
+        """With two replicas, power-of-two choices always picks the idle one."""
+        client = _client({"busy": _stub("busy", queue_depth=10), "idle": _stub("idle")})
+        replicas = {client.post("/work")["replica"] for _ in range(10)}
+        assert replicas == {"idle"}
+
+    def test_overloaded_replica_fails_over(self):
+        """A 503 from one replica should be retried on another."""
+        full = _stub("full", status=503)
+        client = _client({"full": full, "ok": _stub("ok", queue_depth=5)})
+        assert client.post("/work")["replica"] == "ok"
+        assert len(full.calls) == 1
+
+    def test_all_replicas_down(self):
+        """Errors from every replica should surface as ServiceUnavailableError."""
+        client = _client({"a": _stub("a", status=500), "b": _stub("b", status=500)})
+        with pytest.raises(ServiceUnavailableError):
+            client.post("/work")
+
+    def test_failed_post_is_not_repeated_elsewhere(self):
+        """A POST that reached a replica may have run, so a 500 is not retried."""
+        broken, ok = _stub("broken", status=500), _stub("ok", queue_depth=5)
+        client = _client({"broken": broken, "ok": ok})
+        with pytest.raises(ServiceUnavailableError):
+            client.post("/work")
+        assert broken.calls == ["broken"] and ok.calls == []
+
+    def test_refused_post_fails_over(self):
+        """A POST that never connected is safe to send to another replica."""
+        ok = _stub("ok", queue_depth=5)
+        transport = LocalTransport({"http://ok": ok})
+        client = ServiceClient("test", ["http://gone", "http://ok"], transport=transport, hedge_delay=0)
+        client.endpoints[0].queue_depth = -10  # make the missing replica the first choice
+        assert client.post("/work")["replica"] == "ok"
+
+    def test_non_json_gateway_error_fails_over(self):
+        """A proxy's HTML 502 is an ordinary failure, not a parse error."""
+        proxy = flask.Flask("proxy")
+
+        @proxy.route("/health")
+        def health():
+            return flask.jsonify({"queue_depth": 0})
+
+        @proxy.route("/work")
+        def work():
+            return "<html>Bad Gateway</html>", 502
+
+        client = _client({"proxy": proxy, "ok": _stub("ok", queue_depth=5)})
+        assert client.get("/work")["replica"] == "ok"
+        assert client.endpoints[0].breaker.failures == 1
+
+    def test_application_errors_do_not_open_breaker(self):
+        """Repeated 500s leave a reachable replica's circuit closed."""
+        client = _client({"a": _stub("a", status=500)})
+        for _ in range(5):
+            with pytest.raises(ServiceUnavailableError):
+                client.get("/work")
+        assert client.endpoints[0].breaker.state == "closed"
+
+    def test_replica_timeouts_do_not_open_breaker(self):
+        """A JSON 504 is the replica's own task timeout: busy, not broken."""
+        client = _client({"busy": _stub("busy", status=504)})
+        for _ in range(5):
+            with pytest.raises(ServiceUnavailableError):
+                client.post("/work")
+        assert client.endpoints[0].breaker.state == "closed"
+
+    def test_idempotent_request_is_hedged(self):
+        """A slow replica should be raced by a hedge to another replica."""
+        slow = _stub("slow", delay=0.5)
+        client = _client({"slow": slow, "fast": _stub("fast", queue_depth=1)}, hedge_delay=0.05)
+
+        start = time.monotonic()
+        assert client.get("/work")["replica"] == "fast"
+        assert time.monotonic() - start < 0.4
+        assert slow.calls == ["slow"]
+
+
+    def test_early_primary_failure_falls_back_to_hedge(self):
+        """A primary refusing before the hedge delay must not use up the backup unsent."""
+        ok = _stub("ok", queue_depth=5)
+        transport = LocalTransport({"http://ok": ok})
+        client = ServiceClient("test", ["http://gone", "http://ok"], transport=transport, hedge_delay=0.5)
+        client.endpoints[0].queue_depth = -10  # the refusing replica is always chosen first
+        for _ in range(5):
+            client.endpoints[0].breaker.record_success()
+            assert client.get("/work")["replica"] == "ok"
+        assert len(ok.calls) == 5
+
+
+class TestCircuitBreaker:
+    """Test breaker state transitions."""
+
+    def test_opens_then_allows_single_probe(self):
+        """After the threshold the breaker opens; after reset one probe is allowed."""
+        now = [0.0]
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+
+        breaker.record_failure()
+        assert breaker.state == "closed"
+        breaker.record_failure()
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+        now[0] = 11.0
+        assert breaker.allow()
+        assert not breaker.allow()
+        breaker.record_success()
+        assert breaker.state == "closed"
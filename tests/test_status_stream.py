@@ -0,0 +1,185 @@
+"""
+Tests for long-poll and Server-Sent Events job status.
+Run with: pytest tests/test_status_stream.py -v
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("flask_cors")
+
+from app.api.main import VideoGenerationAPI
+from app.common.models import JobProgress, JobStatus
+
+
+def _later(delay, fn):
+    timer = threading.Timer(delay, fn)
+    timer.start()
+    return timer
+
+
+@pytest.fixture
+def api():
+    api = VideoGenerationAPI()
+    api.job_progress["job-1"] = JobProgress(job_id="job-1")
+    return api
+
+
+class TestJobProgressChanges:
+    """Test the change notification on JobProgress."""
+
+    def test_assignments_bump_version(self):
+        progress = JobProgress(job_id="j")
+        assert progress.version == 0
+        progress.status = JobStatus.RENDERING
+        progress.overall_progress = 80.0
+        assert progress.version == 2
+
+    def test_touch_records_in_place_changes(self):
+        progress = JobProgress(job_id="j")
+        progress.logs.append("line")
+        progress.touch()
+        assert progress.version == 1
+
+    def test_wait_for_change_wakes_on_update(self):
+        progress = JobProgress(job_id="j")
+        _later(0.05, lambda: setattr(progress, "current_step", "Rendering"))
+        assert progress.wait_for_change(0, timeout=2)
+        assert progress.current_step == "Rendering"
+
+    def test_wait_for_change_times_out(self):
+        progress = JobProgress(job_id="j")
+        assert not progress.wait_for_change(0, timeout=0.05)
+
+    def test_version_in_dict(self):
+        progress = JobProgress(job_id="j")
+        progress.status = JobStatus.RENDERING
+        data = progress.to_dict()
+        assert data["version"] == 1 and data["status"] == "rendering"
+
+
+class TestLongPoll:
+    """Test GET /mcp/status/<job_id>?since=..."""
+
+    def test_plain_status_does_not_block(self, api):
+        started = time.monotonic()
+        response = api.app.test_client().get("/mcp/status/job-1")
+        assert response.status_code == 200
+        assert time.monotonic() - started < 1
+
+    def test_returns_when_version_changes(self, api):
+        progress = api.job_progress["job-1"]
+        _later(0.05, lambda: setattr(progress, "overall_progress", 40.0))
+
+        response = api.app.test_client().get("/mcp/status/job-1?since=0&wait=5")
+
+        assert response.get_json()["overall_progress"] == 40.0
+        assert response.get_json()["version"] == 1
+
+    def test_stale_version_returns_immediately(self, api):
+        api.job_progress["job-1"].overall_progress = 20.0
+        started = time.monotonic()
+        response = api.app.test_client().get("/mcp/status/job-1?since=0&wait=5")
+        assert response.get_json()["version"] == 1
+        assert time.monotonic() - started < 1
+
+    def test_wait_times_out_with_current_state(self, api):
+        response = api.app.test_client().get("/mcp/status/job-1?since=0&wait=0.05")
+        assert response.status_code == 200
+        assert response.get_json()["version"] == 0
+
+    def test_unknown_job(self, api):
+        assert api.app.test_client().get("/mcp/status/nope?since=0").status_code == 404
+
+
+class TestStatusStream:
+    """Test GET /mcp/status/<job_id>/stream."""
+
+    def _frames(self, response):
+        for chunk in response.response:
+            text = chunk.decode() if isinstance(chunk, bytes) else chunk
+            if text.startswith("id:"):
+                yield json.loads(text.split("data: ", 1)[1])
+
+    def test_streams_changes_until_terminal(self, api):
+        progress = api.job_progress["job-1"]
+        response = api.app.test_client().get("/mcp/status/job-1/stream", buffered=False)
+        assert response.mimetype == "text/event-stream"
+
+        def finish():
+            progress.overall_progress = 60.0
+            time.sleep(0.05)
+            progress.status = JobStatus.COMPLETED
+
+        _later(0.05, finish)
+        frames = list(self._frames(response))
+
+        assert frames[0]["version"] == 0
+        assert frames[-1]["status"] == "completed"
+        assert [f["version"] for f in frames] == sorted({f["version"] for f in frames})
+
+    def test_resume_from_last_event_id(self, api):
+        progress = api.job_progress["job-1"]
+        progress.status = JobStatus.COMPLETED
+        response = api.app.test_client().get(
+            "/mcp/status/job-1/stream", headers={"Last-Event-ID": str(progress.version)}
+        )
+        assert response.get_data(as_text=True) == ""
+
+    def test_resume_from_since_parameter(self, api):
+        progress = api.job_progress["job-1"]
+        progress.status = JobStatus.COMPLETED
+        response = api.app.test_client().get(f"/mcp/status/job-1/stream?since={progress.version}")
+        assert response.get_data(as_text=True) == ""
+
+    def test_unknown_job(self, api):
+        assert api.app.test_client().get("/mcp/status/nope/stream").status_code == 404
+
+
+class TestConditionalGet:
+    """Test ETag / If-None-Match on status and job listings."""
+
+    def test_status_not_modified(self, api):
+        client = api.app.test_client()
+        first = client.get("/mcp/status/job-1")
+        etag = first.headers["ETag"]
+
+        again = client.get("/mcp/status/job-1", headers={"If-None-Match": etag})
+        assert again.status_code == 304
+        assert again.get_data() == b""
+
+        api.job_progress["job-1"].overall_progress = 50.0
+        changed = client.get("/mcp/status/job-1", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.headers["ETag"] != etag
+
+    def test_status_json_is_cached_per_version(self, api):
+        progress = api.job_progress["job-1"]
+        assert progress.to_json() is progress.to_json()
+        before = progress.to_json()
+        progress.current_step = "Rendering"
+        assert json.loads(progress.to_json())["current_step"] == "Rendering"
+        assert progress.to_json() is not before
+
+    def test_job_list_not_modified_until_a_job_changes(self, api):
+        client = api.app.test_client()
+        client.post("/mcp/generate", json={"prompt": "a sunrise"})
+        first = client.get("/mcp/jobs")
+        assert first.status_code == 200
+        assert first.get_json()["summary"]["total_jobs"] == 2
+        etag = first.headers["ETag"]
+
+        assert client.get("/mcp/jobs", headers={"If-None-Match": etag}).status_code == 304
+
+        api.job_progress["job-1"].status = JobStatus.RENDERING
+        refreshed = client.get("/mcp/jobs", headers={"If-None-Match": etag})
+        assert refreshed.status_code == 200
+        assert refreshed.headers["ETag"] != etag
+
+    def test_relative_date_ranges_are_not_tagged(self, api):
+        response = api.app.test_client().get("/mcp/jobs?date_range=week")
+        assert response.status_code == 200
+        assert "ETag" not in response.headers
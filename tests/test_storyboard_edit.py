@@ -0,0 +1,346 @@
+"""
+Tests for storyboard edits and incremental re-rendering.
+Run with: pytest tests/test_storyboard_edit.py -v
+"""
+
+import pytest
+
+import app.orchestrator.main as orchestrator_main
+from app.common.config import Config
+from app.common.job_logs import FileJobLogStore, set_job_log_store
+from app.common.models import JobProgress, JobStatus, VideoRequest
+from app.common.utils import job_cache
+from app.orchestrator.storyboard_edit import (
+    apply_storyboard_patch,
+    diff_storyboards,
+    place_narration,
+    rebuild_audio_segments,
+    rebuild_subtitles,
+    scenes_to_narrate,
+)
+from app.renderer.planner import RenderPlan, SegmentPlan
+from app.renderer.segments import SegmentCache, SegmentRenderer, local_cues
+
+
+def _storyboard():
+    scenes = []
+    for i, (scene_id, narration) in enumerate([("a", "The sun rises."), ("b", "Birds sing."), ("c", "The day begins.")]):
+        scenes.append({
+            "id": scene_id, "description": f"scene {scene_id}", "duration": 5.0,
+            "keywords": [], "shot_type": "general", "narration": narration,
+            "clip_id": f"clip-{scene_id}", "clip_url": None,
+            "start_time": i * 5.0, "end_time": (i + 1) * 5.0,
+        })
+    return {
+        "job_id": "job-1",
+        "scenes": scenes,
+        "total_duration": 15.0,
+        "subtitles": [
+            {"text": "The sun rises.", "start_time": 0.0, "end_time": 2000.0, "speaker": "narrator"},
+            {"text": "Birds sing.", "start_time": 5000.0, "end_time": 7000.0, "speaker": "narrator"},
+            {"text": "The day begins.", "start_time": 10000.0, "end_time": 12000.0, "speaker": "narrator"},
+        ],
+        "audio_segments": [
+            {"id": f"seg-{i}", "text": s["narration"], "audio_url": f"/tmp/{s['id']}.wav",
+             "duration": 2.0, "start_time": s["start_time"], "language": "en", "speaker": "narrator"}
+            for i, s in enumerate(scenes)
+        ],
+    }
+
+
+def _ids(*ids):
+    return {"scenes": [{"id": i} for i in ids]}
+
+
+class TestApplyPatch:
+    """Test merging a patch into a storyboard."""
+
+    def test_updates_fields_and_retimes(self):
+        old = _storyboard()
+        new = apply_storyboard_patch(old, {"scenes": [{"id": "a", "duration": 3.0}, {"id": "b"}, {"id": "c"}]})
+        assert [s["start_time"] for s in new["scenes"]] == [0.0, 3.0, 8.0]
+        assert new["total_duration"] == 13.0
+        assert old["scenes"][0]["duration"] == 5.0  # input left untouched
+
+    def test_add_remove_and_reorder(self):
+        new = apply_storyboard_patch(_storyboard(), {"scenes": [{"id": "c"}, {"narration": "Night falls.", "duration": 4.0}, {"id": "a"}]})
+        assert new["scenes"][0]["id"] == "c" and new["scenes"][2]["id"] == "a"
+        assert new["scenes"][1]["narration"] == "Night falls." and new["scenes"][1]["id"]
+        assert "b" not in [s["id"] for s in new["scenes"]]
+
+    @pytest.mark.parametrize("patch", [
+        None,
+        {"scenes": []},
+        {"scenes": [{"id": "zzz"}]},
+        {"scenes": [{"id": "a"}, {"id": "a"}]},
+        {"scenes": [{"id": "a", "start_time": 3}]},
+        {"scenes": [{"id": "a", "duration": 0}]},
+        {"scenes": [{"id": "a"}], "prompt": "x"},
+    ])
+    def test_rejects_invalid_patches(self, patch):
+        with pytest.raises(ValueError):
+            apply_storyboard_patch(_storyboard(), patch)
+
+
+class TestDiff:
+    """Test scene-level classification."""
+
+    def test_narration_edit_only_dirties_that_scene(self):
+        old = _storyboard()
+        new = apply_storyboard_patch(old, {"scenes": [{"id": "a"}, {"id": "b", "narration": "Birds chirp."}, {"id": "c"}]})
+        diff = diff_storyboards(old, new)
+        assert diff.rerender_scenes == ["b"]
+        assert diff.reused_scenes == ["a", "c"]
+        assert diff.subtitle_ranges == [(5.0, 10.0)]
+
+    def test_moved_scenes_are_retimed_not_rerendered(self):
+        old = _storyboard()
+        new = apply_storyboard_patch(old, _ids("b", "c"))
+        diff = diff_storyboards(old, new)
+        assert diff.removed == ["a"]
+        assert diff.rerender_scenes == []
+        assert [s["change"] for s in diff.scenes] == ["retimed", "retimed"]
+        assert diff.changed
+
+    def test_no_op_patch(self):
+        old = _storyboard()
+        diff = diff_storyboards(old, apply_storyboard_patch(old, _ids("a", "b", "c")))
+        assert not diff.changed and diff.reused_scenes == ["a", "b", "c"]
+
+
+class TestRebuild:
+    """Test that only changed scenes get new cues and audio."""
+
+    def test_subtitles_shift_with_scenes_and_regenerate_for_edits(self):
+        old = _storyboard()
+        new = apply_storyboard_patch(old, {"scenes": [{"id": "b", "narration": "Birds chirp loudly."}, {"id": "c"}]})
+        subtitles = rebuild_subtitles(old, new, diff_storyboards(old, new))
+
+        assert subtitles[0]["text"] == "Birds chirp loudly."
+        assert 0.0 <= subtitles[0]["start_time"] < 5000.0
+        # Scene c moved from 10s to 5s and kept its cue
+        assert subtitles[-1] == dict(old["subtitles"][2], start_time=5000.0, end_time=7000.0)
+
+    def test_audio_reused_for_unchanged_narration(self):
+        old = _storyboard()
+        new = apply_storyboard_patch(old, {"scenes": [{"id": "b", "narration": "Birds chirp."}, {"id": "c"}]})
+        segments = rebuild_audio_segments(old, new, diff_storyboards(old, new))
+
+        assert segments[0]["text"] == "Birds chirp." and segments[0]["audio_url"] is None
+        assert segments[1]["id"] == "seg-2" and segments[1]["start_time"] == 5.0
+
+    def test_narration_is_placed_on_the_edited_scene(self):
+        old = _storyboard()
+        new = apply_storyboard_patch(old, {"scenes": [{"id": "a"}, {"id": "b", "narration": "Birds chirp."}, {"id": "c"}]})
+        diff = diff_storyboards(old, new)
+        new["audio_segments"] = rebuild_audio_segments(old, new, diff)
+        new["subtitles"] = rebuild_subtitles(old, new, diff)
+        assert [s["id"] for s in scenes_to_narrate(new, diff)] == ["b"]
+
+        # As returned by /process_scenes for scene b alone, on its own timeline
+        place_narration(new, {
+            "scenes": [dict(new["scenes"][1], start_time=0.0, end_time=1.5, duration=1.5)],
+            "audio_segments": [{"text": "Birds chirp.", "audio_url": "/tmp/b2.wav", "start_time": 0.0, "duration": 1.5}],
+            "subtitles": [{"text": "Birds chirp.", "start_time": 0.0, "end_time": 1500.0}],
+        })
+
+        assert [s["audio_url"] for s in new["audio_segments"]] == ["/tmp/a.wav", "/tmp/b2.wav", "/tmp/c.wav"]
+        assert new["audio_segments"][1]["start_time"] == 5.0
+        assert [(c["text"], c["start_time"]) for c in new["subtitles"]] == [
+            ("The sun rises.", 0.0), ("Birds chirp.", 5000.0), ("The day begins.", 10000.0),
+        ]
+
+
+def _plan(*segments):
+    plan = RenderPlan(job_id="job-1", quality="medium", width=1280, height=720, fps=30)
+    timeline = 0.0
+    for scene_id, duration in segments:
+        plan.segments.append(SegmentPlan(scene_id=scene_id, source=None, file_hash=None, mode="placeholder",
+                                         duration=duration, timeline_start=timeline))
+        timeline += duration
+    return plan
+
+
+class FakeFFmpeg:
+    """Records commands and writes the output file instead of encoding."""
+
+    def __init__(self):
+        self.commands = []
+
+    def __call__(self, command, **kwargs):
+        self.commands.append(command)
+        with open(command[-1], "wb") as f:
+            f.write(b"x" * 100)
+
+        class Result:
+            returncode = 0
+            stderr = b""
+        return Result()
+
+
+class TestSegmentRenderer:
+    """Test that unchanged segments are served from the cache."""
+
+    def test_local_cues_are_segment_relative(self):
+        segment = SegmentPlan(scene_id="b", source=None, file_hash=None, mode="placeholder",
+                              duration=5.0, timeline_start=5.0)
+        cues = local_cues(_storyboard()["subtitles"], segment)
+        assert [(c["start_time"], c["end_time"]) for c in cues] == [(0.0, 2000.0)]
+
+    def test_only_changed_segments_are_encoded(self, tmp_path):
+        runner = FakeFFmpeg()
+        renderer = SegmentRenderer(SegmentCache(str(tmp_path)), runner=runner)
+        storyboard = {"subtitles": [{"text": "Hello", "start_time": 0.0, "end_time": 1000.0}]}
+
+        _, first = renderer.render_segments("job-1", storyboard, _plan(("a", 5.0), ("b", 5.0), ("c", 5.0)))
+        # Drop scene a: b and c move earlier but render identically
+        paths, second = renderer.render_segments("job-1", {"subtitles": []}, _plan(("b", 5.0), ("c", 5.0), ("d", 2.0)))
+
+        assert first == {"reused": 1, "encoded": 2}  # a has a cue; b and c are identical black
+        assert second == {"reused": 2, "encoded": 1}
+        assert len(paths) == 3 and all(p.startswith(str(tmp_path)) for p in paths)
+
+    def test_cache_evicts_least_recently_used(self, tmp_path):
+        cache = SegmentCache(str(tmp_path), max_bytes=250)
+        for key in ("a", "b", "c"):
+            tmp = tmp_path / f"{key}.tmp"
+            tmp.write_bytes(b"x" * 100)
+            cache.put(key, str(tmp))
+            if key == "b":
+                cache.get("a")
+        assert cache.get("b") is None
+        assert cache.get("a") and cache.get("c")
+
+
+class TestStoryboardPatchEndpoint:
+    """Test PATCH /mcp/storyboard/<job_id>."""
+
+    @pytest.fixture
+    def api(self, tmp_path, monkeypatch):
+        pytest.importorskip("flask_cors")
+        from app.api.main import VideoGenerationAPI
+
+        set_job_log_store(FileJobLogStore(root=str(tmp_path)))
+        monkeypatch.setattr(orchestrator_main, "WebSocketEventManager", None)
+        api = VideoGenerationAPI()
+        job = VideoRequest(id="job-1", prompt="A sunrise")
+        api.jobs[job.id] = job
+        api.job_progress[job.id] = JobProgress(job_id=job.id, status=JobStatus.COMPLETED)
+        job_cache.set("storyboard_job-1", _storyboard())
+        yield api
+        job_cache.delete("storyboard_job-1")
+        set_job_log_store(None)
+
+    def test_edit_without_render(self, api):
+        response = api.app.test_client().patch(
+            "/mcp/storyboard/job-1?render=false",
+            json={"scenes": [{"id": "a"}, {"id": "b", "narration": "Birds chirp."}, {"id": "c"}]},
+        )
+        assert response.status_code == 200
+        body = response.get_json()
+        assert body["diff"]["rerender_scenes"] == ["b"] and not body["rerender"]
+        assert job_cache.get("storyboard_job-1")["scenes"][1]["narration"] == "Birds chirp."
+
+    def test_edit_starts_rerender(self, api, monkeypatch):
+        calls = []
+        monkeypatch.setattr(orchestrator_main.get_orchestrator(), "rerender_job", lambda *args: calls.append(args))
+        response = api.app.test_client().patch("/mcp/storyboard/job-1", json=_ids("c", "b"))
+        assert response.status_code == 202 and response.get_json()["rerender"]
+        assert api.job_progress["job-1"].status == JobStatus.PENDING
+
+    def test_rejects_running_job_and_bad_patch(self, api):
+        client = api.app.test_client()
+        assert client.patch("/mcp/storyboard/job-1", json={"scenes": "nope"}).status_code == 400
+        api.job_progress["job-1"].status = JobStatus.RENDERING
+        assert client.patch("/mcp/storyboard/job-1", json=_ids("a")).status_code == 409
+        assert client.patch("/mcp/storyboard/nope", json=_ids("a")).status_code == 404
+
+
+class _FakeNarrator:
+    """Stands in for the Whisper worker's per-scene narration."""
+
+    def __init__(self):
+        self.narrated = []
+
+    def process_scenes_for_job(self, job_id, scenes, language, voice):
+        self.narrated.extend(scene.id for scene in scenes)
+        timeline, segments, subtitles = 0.0, [], []
+        for scene in scenes:
+            scene.duration, scene.start_time, scene.end_time = 1.0, timeline, timeline + 1.0
+            segments.append({"text": scene.narration, "audio_url": f"/tmp/{job_id}_{scene.id}.wav",
+                             "start_time": timeline, "duration": 1.0})
+            subtitles.append({"text": scene.narration, "start_time": timeline * 1000.0,
+                              "end_time": (timeline + 1.0) * 1000.0})
+            timeline += 1.0
+        return {"scenes": [scene.to_dict() for scene in scenes], "audio_segments": segments,
+                "subtitles": subtitles, "error": None}
+
+
+class TestRerenderJob:
+    """Test that an edit narrates and encodes only the scenes it changed."""
+
+    @pytest.fixture
+    def renderer(self, tmp_path, monkeypatch):
+        import app.renderer.main as renderer_main
+        import app.whisper_worker.main as whisper_main
+
+        set_job_log_store(FileJobLogStore(root=str(tmp_path / "logs")))
+        monkeypatch.setattr(orchestrator_main, "WebSocketEventManager", None)
+        monkeypatch.setattr(Config, "RENDER_OUTPUT_DIR", str(tmp_path / "output"))
+        narrator = _FakeNarrator()
+        monkeypatch.setattr(whisper_main, "get_whisper_service", lambda: narrator)
+
+        service = renderer_main.RendererService()
+        ffmpeg = FakeFFmpeg()
+        service.renderer.segments = SegmentRenderer(SegmentCache(str(tmp_path / "segments")), runner=ffmpeg)
+        monkeypatch.setattr(renderer_main, "get_renderer_service", lambda: service)
+        job_cache.set("storyboard_job-1", _storyboard())
+        yield service, narrator, ffmpeg
+        for key in ("storyboard_job-1", "result_job-1", "render_plan_job-1", "storyboard_job-2", "result_job-2"):
+            job_cache.delete(key)
+        set_job_log_store(None)
+
+    def test_only_changed_scene_is_narrated_and_encoded(self, renderer, tmp_path):
+        service, narrator, ffmpeg = renderer
+        assert service.render_job("job-1", str(tmp_path / "first.mp4"))["segments"] == {"reused": 0, "encoded": 3}
+
+        orchestrator = orchestrator_main.get_orchestrator()
+        job = VideoRequest(id="job-1", prompt="A sunrise")
+        progress = JobProgress(job_id=job.id, status=JobStatus.COMPLETED)
+        diff = orchestrator.edit_storyboard(
+            job, progress, {"scenes": [{"id": "a"}, {"id": "b", "narration": "Birds chirp."}, {"id": "c"}]},
+        )
+        ffmpeg.commands.clear()
+        orchestrator.rerender_job(job, progress, diff)
+
+        assert progress.status == JobStatus.COMPLETED, progress.error
+        assert narrator.narrated == ["b"]
+        result = job_cache.get("result_job-1")
+        assert result["segments"] == {"reused": 2, "encoded": 1}
+        assert result["video_path"].startswith(str(tmp_path / "output"))
+        encodes = [c for c in ffmpeg.commands if "-an" in c]
+        assert len(encodes) == 1
+        cues = job_cache.get("storyboard_job-1")["subtitles"]
+        assert ("Birds chirp.", 5000.0) in [(c["text"], c["start_time"]) for c in cues]
+
+    def test_rerender_does_not_overwrite_a_shared_video(self, renderer):
+        orchestrator = orchestrator_main.get_orchestrator()
+        leader = VideoRequest(id="job-1", prompt="A sunrise")
+        leader_result = {"job_id": "job-1", "video_url": "s3://videos/job-1/output.mp4"}
+        job_cache.set("result_job-1", leader_result)
+        follower = VideoRequest(id="job-2", prompt="A sunrise")
+        orchestrator._complete_from(follower, JobProgress(job_id="job-2"), "job-1", leader_result)
+
+        progress = JobProgress(job_id="job-1", status=JobStatus.COMPLETED)
+        paths = []
+        for narration in ("Birds chirp.", "Birds hum."):
+            diff = orchestrator.edit_storyboard(
+                leader, progress, {"scenes": [{"id": "a"}, {"id": "b", "narration": narration}, {"id": "c"}]},
+            )
+            orchestrator.rerender_job(leader, progress, diff)
+            assert progress.status == JobStatus.COMPLETED, progress.error
+            paths.append(job_cache.get("result_job-1")["video_path"])
+
+        assert job_cache.get("result_job-1")["video_url"] == "s3://videos/job-1/v2/output.mp4"
+        assert job_cache.get("result_job-2")["video_url"] == "s3://videos/job-1/output.mp4"
+        assert len(set(paths)) == 2
@@ -0,0 +1,87 @@
+"""
+Tests for subtitle cue generation and writers.
+Run with: pytest tests/test_subtitles.py -v
+"""
+
+import io
+
+from app.common.models import Subtitle
+from app.common.subtitles import (
+    MAX_CHARS_PER_LINE,
+    break_lines,
+    generate_cues,
+    write_srt,
+    write_vtt,
+)
+
+
+def _words(text, start=0.0, step=0.3):
+    return [
+        {"text": word, "start": start + i * step, "end": start + i * step + step * 0.8}
+        for i, word in enumerate(text.split())
+    ]
+
+
+class TestCueGeneration:
+    """Test line breaking and reading-speed constraints."""
+
+    def test_break_lines_balances_two_lines(self):
+        """Long text should split into two lines of similar length."""
+        words = "the quick brown fox jumps over the lazy dog near the river bank".split()
+        lines = break_lines(words)
+        assert len(lines) == 2
+        assert all(len(line) <= MAX_CHARS_PER_LINE for line in lines)
+        assert abs(len(lines[0]) - len(lines[1])) < 10
+
+    def test_break_lines_reports_words_that_do_not_fit(self):
+        """Two lines under the total budget that cannot be split within a line are rejected."""
+        words = ["a" * 40, "b" * 40]
+        assert break_lines(words) == ["a" * 40, "b" * 40]
+        assert break_lines(["a" * 30, "b" * 30, "c" * 20]) is None
+        assert break_lines(["x" * 50]) == ["x" * 50]
+
+    def test_cues_never_exceed_line_limit(self):
+        """generate_cues starts a new cue instead of overfilling a line."""
+        text = " ".join(["a" * 30, "b" * 30, "c" * 20, "d" * 5])
+        cues = list(generate_cues(_words(text)))
+
+        assert len(cues) == 2
+        for cue in cues:
+            assert all(len(line) <= MAX_CHARS_PER_LINE for line in cue.text.split("\n"))
+
+    def test_cues_respect_limits_and_do_not_overlap(self):
+        """Cues should fit the line budget and stay in order without overlap."""
+        text = (
+            "Mountains rise above the valley at dawn. Light spills across the fields, "
+            "waking the birds and the farmers alike. By noon the town is busy."
+        )
+        cues = list(generate_cues(_words(text)))
+
+        assert len(cues) > 1
+        for cue in cues:
+            lines = cue.text.split("\n")
+            assert len(lines) <= 2
+            assert all(len(line) <= MAX_CHARS_PER_LINE for line in lines)
+        for prev, nxt in zip(cues, cues[1:]):
+            assert prev.end_time <= nxt.start_time
+
+    def test_short_cue_is_extended_for_reading(self):
+        """A lone word should stay on screen for at least the minimum duration."""
+        cues = list(generate_cues([{"text": "Hello.", "start": 0.0, "end": 0.2}]))
+        assert cues[0].end_time - cues[0].start_time >= 1000
+
+
+class TestWriters:
+    """Test SRT and VTT formatting."""
+
+    def test_srt_and_vtt_timestamps(self):
+        """Timestamps should use the separator each format expects."""
+        cues = [Subtitle(text="Hi", start_time=1500, end_time=3723004)]
+
+        srt = io.StringIO()
+        assert write_srt(cues, srt) == 1
+        assert srt.getvalue() == "1\n00:00:01,500 --> 01:02:03,004\nHi\n\n"
+
+        vtt = io.StringIO()
+        assert write_vtt(cues, vtt) == 1
+        assert vtt.getvalue().startswith("WEBVTT\n\n00:00:01.500 --> 01:02:03.004\n")
@@ -0,0 +1,151 @@
+"""
+Tests for the content-addressed TTS cache and scene synthesis.
+Run with: pytest tests/test_tts_cache.py -v
+"""
+
+import os
+
+from app.common.models import Scene
+from app.whisper_worker.tts_cache import TTSCache, split_sentences
+from app.whisper_worker.main import TTSProcessor
+
+
+class TestTTSCache:
+    """Test sentence splitting, keys, and eviction."""
+
+    def test_split_sentences(self):
+        """Narration should split on sentence punctuation."""
+        text = "The sun rises.  Birds   sing! Do you hear them?"
+        assert split_sentences(text) == ["The sun rises.", "Birds sing!", "Do you hear them?"]
+
+    def test_key_depends_on_voice_and_text(self):
+        """Keys should change with voice but ignore whitespace differences."""
+        base = TTSCache.key("gtts", "en", "voice-a", "Hello  world.")
+        assert base == TTSCache.key("gtts", "en", "voice-a", "Hello world.")
+        assert base != TTSCache.key("gtts", "en", "voice-b", "Hello world.")
+
+    def test_eviction_keeps_cache_under_budget(self, tmp_path):
+        """Oldest entries should be evicted once the budget is exceeded."""
+        cache = TTSCache(str(tmp_path / "cache"), max_bytes=250)
+        source = tmp_path / "audio.mp3"
+        source.write_bytes(b"x" * 100)
+
+        first = cache.put("a", str(source))
+        os.utime(first, (1, 1))
+        cache.put("b", str(source))
+        cache.put("c", str(source))
+
+        assert cache.get("a") is None
+        assert cache.get("c") is not None
+        assert cache.total_bytes <= 250
+
+    def test_instances_sharing_a_directory_share_the_budget(self, tmp_path):
+        """Caches in different processes should not each get the full budget."""
+        first = TTSCache(str(tmp_path / "cache"), max_bytes=250)
+        second = TTSCache(str(tmp_path / "cache"), max_bytes=250)
+        source = tmp_path / "audio.mp3"
+        source.write_bytes(b"x" * 100)
+
+        for index, key in enumerate("abcd"):
+            path = (first if index % 2 == 0 else second).put(key, str(source))
+            os.utime(path, (index + 1, index + 1))
+
+        assert first.total_bytes <= 250
+        assert first.get("a") is None
+        assert second.get("d") is not None
+
+    def test_fetch_misses_entry_evicted_elsewhere(self, tmp_path):
+        """An entry removed by another instance should read as a miss."""
+        cache = TTSCache(str(tmp_path / "cache"))
+        source = tmp_path / "audio.mp3"
+        source.write_bytes(b"speech")
+        os.remove(cache.put("a", str(source)))
+
+        assert not cache.fetch("a", str(tmp_path / "out.mp3"))
+
+
+class TestTTSProcessorCaching:
+    """Test that repeated narration is served from the cache."""
+
+    def test_repeat_synthesis_hits_cache(self, tmp_path):
+        """A second request for the same text should not call the engine."""
+        calls = []
+        processor = TTSProcessor(cache=TTSCache(str(tmp_path / "cache")))
+
+        def fake_synthesize(text, language, output_file, voice=None):
+            calls.append(text)
+            with open(output_file, "wb") as f:
+                f.write(text.encode())
+            return True
+
+        processor._synthesize = fake_synthesize
+
+        out1 = tmp_path / "first.mp3"
+        out2 = tmp_path / "second.mp3"
+        assert processor.generate_speech("A single sentence.", "en", str(out1))
+        assert processor.generate_speech("A single sentence.", "en", str(out2))
+
+        assert calls == ["A single sentence."]
+        assert out2.read_bytes() == b"A single sentence."
+
+    def test_warm_cache_synthesizes_only_missing_sentences(self, tmp_path):
+        """Warming should fill the cache so generate_speech needs no engine calls."""
+        calls = []
+        processor = TTSProcessor(cache=TTSCache(str(tmp_path / "cache")))
+
+        def fake_synthesize(text, language, output_file, voice=None):
+            calls.append(text)
+            with open(output_file, "wb") as f:
+                f.write(text.encode())
+            return True
+
+        processor._synthesize = fake_synthesize
+
+        assert processor.warm_cache("First one. Second one.", "en") == 2
+        assert processor.warm_cache("First one. Third one.", "en") == 1
+        assert processor.generate_speech("Second one.", "en", str(tmp_path / "out.mp3"))
+        assert calls == ["First one.", "Second one.", "Third one."]
+
+    def test_evicted_sentence_is_synthesized_again(self, tmp_path):
+        """Losing a cache entry to another worker should cost a synthesis, not the request."""
+        calls = []
+        cache = TTSCache(str(tmp_path / "cache"))
+        processor = TTSProcessor(cache=cache)
+
+        def fake_synthesize(text, language, output_file, voice=None):
+            calls.append(text)
+            with open(output_file, "wb") as f:
+                f.write(text.encode())
+            return True
+
+        processor._synthesize = fake_synthesize
+
+        assert processor.warm_cache("A single sentence.", "en") == 1
+        for name in os.listdir(cache.cache_dir):
+            os.remove(os.path.join(cache.cache_dir, name))
+
+        out = tmp_path / "out.mp3"
+        assert processor.generate_speech("A single sentence.", "en", str(out))
+        assert out.read_bytes() == b"A single sentence."
+        assert calls == ["A single sentence.", "A single sentence."]
+        assert not [name for name in os.listdir(tmp_path) if ".part." in name]
+
+
+class TestSceneSynthesis:
+    """Test parallel per-scene synthesis with the offline tone engine."""
+
+    def test_scene_durations_follow_narration(self, tmp_path):
+        """Scene durations and timeline should come from the measured audio."""
+        processor = TTSProcessor(cache=TTSCache(str(tmp_path / "cache")), engine="tone")
+        scenes = [
+            Scene(narration="One two three four five.", duration=10.0),
+            Scene(narration="Six seven. Eight nine ten.", duration=10.0),
+        ]
+
+        segments = processor.synthesize_scenes("job_tts", scenes, "en", max_workers=2)
+
+        assert len(segments) == 2
+        assert scenes[0].duration == 2.0
+        assert scenes[1].duration == 2.0
+        assert scenes[1].start_time == scenes[0].end_time == 2.0
+        assert segments[1].start_time == 2.0
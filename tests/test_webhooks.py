@@ -0,0 +1,90 @@
+"""
+Tests for background webhook delivery.
+Run with: pytest tests/test_webhooks.py -v
+"""
+
+import time
+import threading
+
+from app.orchestrator.webhooks import WebhookDispatcher, WebhookOutbox
+
+
+class _Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FakeTransport:
+    """Records posts and answers with a scripted sequence of status codes."""
+
+    def __init__(self, statuses=None):
+        self.statuses = list(statuses or [])
+        self.posts = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, json=None, timeout=None):
+        with self._lock:
+            self.posts.append((url, json))
+            return _Response(self.statuses.pop(0) if self.statuses else 200)
+
+
+def _dispatcher(tmp_path, transport, **kwargs):
+    outbox = WebhookOutbox(str(tmp_path / "outbox.db"))
+    kwargs.setdefault("retry_base", 0.01)
+    return WebhookDispatcher(outbox=outbox, transport=transport, **kwargs)
+
+
+class TestWebhookDispatcher:
+    """Test delivery, retries, batching, and durability."""
+
+    def test_delivers_in_background(self, tmp_path):
+        """Enqueue should return immediately and the payload arrive as-is."""
+        transport = FakeTransport()
+        dispatcher = _dispatcher(tmp_path, transport)
+        dispatcher.enqueue("http://hook.test/a", {"job_id": "1"})
+
+        assert dispatcher.flush(5)
+        assert transport.posts == [("http://hook.test/a", {"job_id": "1"})]
+        assert dispatcher.outbox.counts() == {}
+        dispatcher.stop()
+
+    def test_retries_then_gives_up(self, tmp_path):
+        """Failures should be retried and parked as dead after max attempts."""
+        transport = FakeTransport([500, 500, 500])
+        dispatcher = _dispatcher(tmp_path, transport, max_attempts=3)
+        dispatcher.enqueue("http://hook.test/a", {"job_id": "1"})
+
+        for _ in range(250):
+            if dispatcher.outbox.counts().get("dead"):
+                break
+            time.sleep(0.02)
+        assert len(transport.posts) == 3
+        assert dispatcher.outbox.counts() == {"dead": 1}
+        dispatcher.stop()
+
+    def test_batches_events_per_url(self, tmp_path):
+        """Events for one URL inside the window should share a request."""
+        transport = FakeTransport()
+        dispatcher = _dispatcher(tmp_path, transport, batch_window=0.2, batch_max=10)
+        dispatcher.enqueue("http://hook.test/a", {"job_id": "1"})
+        dispatcher.enqueue("http://hook.test/a", {"job_id": "2"})
+        dispatcher.enqueue("http://hook.test/b", {"job_id": "3"})
+
+        assert dispatcher.flush(5)
+        posts = dict(transport.posts)
+        assert posts["http://hook.test/a"] == {"events": [{"job_id": "1"}, {"job_id": "2"}]}
+        assert posts["http://hook.test/b"] == {"job_id": "3"}
+        dispatcher.stop()
+
+    def test_outbox_survives_restart(self, tmp_path):
+        """Undelivered entries, including in-flight ones, should be picked up again."""
+        path = str(tmp_path / "outbox.db")
+        outbox = WebhookOutbox(path)
+        outbox.add("http://hook.test/a", {"job_id": "1"}, 0)
+        outbox.claim_due(1.0, 1)
+
+        transport = FakeTransport()
+        dispatcher = WebhookDispatcher(outbox=WebhookOutbox(path), transport=transport)
+        assert dispatcher.flush(5)
+        assert transport.posts == [("http://hook.test/a", {"job_id": "1"})]
+        dispatcher.stop()
@@ -0,0 +1,31 @@
+"""
+Tests for the asyncio WebSocket server and load-test harness.
+Run with: pytest tests/test_websocket_async.py -v
+"""
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("socketio")
+
+from app.websocket.loadtest import percentile, run_load_test
+
+
+class TestLoadTest:
+    """Test end-to-end delivery through the asyncio server."""
+
+    def test_percentile(self):
+        """Nearest-rank percentiles over a known distribution."""
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 50) == 0.0
+
+    def test_clients_receive_published_events(self):
+        """Every client should get its job updates and the batch frames."""
+        report = run_load_test(clients=20, jobs=4, events=8, rate=0, max_emit_rate=0, settle=0.3)
+
+        assert report["connected"] == 20
+        # Each event reaches its 5 job watchers individually and all 20 clients in a batch frame
+        assert report["frames_received"] == 8 * (5 + 20)
+        assert report["latency"]["p99_ms"] >= report["latency"]["p50_ms"] >= 0
@@ -0,0 +1,103 @@
+"""
+Tests for broker fan-out from producers to WebSocket servers.
+Run with: pytest tests/test_websocket_broker.py -v
+"""
+
+import pytest
+
+pytest.importorskip("flask_socketio")
+
+import app.websocket.broker as broker_main
+from app.common.config import Config
+from app.websocket.broker import LocalBroker, RedisBroker, get_event_broker, set_event_broker
+from app.websocket.events import WebSocketEventManager
+from app.websocket.main import ALL_JOBS_ROOM, WebSocketServer
+
+
+@pytest.fixture
+def broker():
+    broker = LocalBroker()
+    set_event_broker(broker)
+    yield broker
+    set_event_broker(None)
+
+
+def _recording_server(broker):
+    """A server whose socket emits are recorded instead of sent."""
+    server = WebSocketServer(broker=broker)
+    server.emitted = []
+    server.socketio.emit = lambda event, payload, **kwargs: server.emitted.append(
+        (event, payload, kwargs.get("to"))
+    )
+    return server
+
+
+class TestBrokerFanOut:
+    """Test that published events reach every replica's rooms."""
+
+    def test_every_replica_receives_published_events(self, broker):
+        """Producers publish once; each subscribed replica broadcasts it."""
+        replicas = [_recording_server(broker) for _ in range(2)]
+
+        WebSocketEventManager.broadcast_job_status("job-1", "rendering", 80, "Rendering video...")
+
+        for server in replicas:
+            server.coalescer.flush()
+            (event, payload, room), (batch_event, batch, batch_room) = server.emitted
+            assert (event, room) == ("job_status_update", "job_job-1")
+            assert payload["progress"] == 80
+            assert (batch_event, batch_room) == ("job_status_batch", ALL_JOBS_ROOM)
+            assert batch["updates"] == [payload]
+
+    def test_logs_stay_in_job_room(self, broker):
+        """Log lines are only for clients watching that job."""
+        server = _recording_server(broker)
+        WebSocketEventManager.broadcast_job_log("job-2", "INFO", "hello")
+        server.coalescer.flush()
+        assert server.emitted[0][0] == "job_log_entry"
+        assert server.emitted[0][2] == "job_job-2"
+
+    def test_unknown_events_are_ignored(self, broker):
+        """Malformed broker messages should not raise."""
+        server = _recording_server(broker)
+        broker.publish({"event": "nope", "data": {}})
+        assert server.emitted == []
+
+    def test_subscribe_jobs_joins_all_jobs_room(self, broker):
+        """Dashboard clients should join the all-jobs room."""
+        server = WebSocketServer(broker=broker)
+        client = server.socketio.test_client(server.app)
+        client.emit("subscribe_jobs", {})
+
+        rooms = server.socketio.server.manager.rooms["/"]
+        assert ALL_JOBS_ROOM in rooms
+
+
+class TestBrokerSelection:
+    """Test that the Redis client is created lazily with timeouts."""
+
+    def test_redis_client_created_on_first_use(self, monkeypatch):
+        calls = []
+
+        class FakeClient:
+            def ping(self):
+                return True
+
+        class FakeRedis:
+            @staticmethod
+            def from_url(url, **kwargs):
+                calls.append(kwargs)
+                return FakeClient()
+
+        monkeypatch.setattr(broker_main, "redis", FakeRedis)
+        monkeypatch.setattr(Config, "WS_EVENT_BROKER", "redis")
+        set_event_broker(None)
+        try:
+            assert calls == []
+            assert isinstance(get_event_broker(), RedisBroker)
+            assert isinstance(get_event_broker(), RedisBroker)
+        finally:
+            set_event_broker(None)
+
+        assert len(calls) == 1
+        assert calls[0]["socket_timeout"] > 1.0 and calls[0]["socket_connect_timeout"] == 2
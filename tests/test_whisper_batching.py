@@ -0,0 +1,148 @@
+"""
+Tests for the Whisper micro-batching queue.
+Run with: pytest tests/test_whisper_batching.py -v
+"""
+
+import threading
+from concurrent.futures import wait
+
+from app.whisper_worker.batching import BatchInferenceQueue, segments_from_tokens
+from app.whisper_worker.model_pool import WhisperModelPool
+
+
+class _FakeBackend:
+    """Backend stub that records batch sizes instead of running Whisper."""
+
+    def __init__(self):
+        self.prepared = []
+        self.detect_batches = []
+        self.decode_batches = []
+
+    def prepare(self, model, request):
+        self.prepared.append(request.audio_file)
+        request.features = request.audio_file
+        return not request.audio_file.startswith("long")
+
+    def detect(self, model, requests):
+        self.detect_batches.append([r.audio_file for r in requests])
+        return ["fr" if "fr" in r.audio_file else "en" for r in requests]
+
+    def decode(self, model, requests, language):
+        self.decode_batches.append((language, [r.audio_file for r in requests]))
+        return [
+            {"text": r.audio_file, "language": language, "segments": [], "error": None}
+            for r in requests
+        ]
+
+
+def _long_form(request):
+    return {"text": "long", "language": "en", "segments": [], "error": None}
+
+
+def _make_queue(backend, long_form=_long_form):
+    pool = WhisperModelPool(loader=lambda name, device: object(), idle_timeout=0)
+    return BatchInferenceQueue(
+        pool=pool, backend=backend, window_ms=200, max_batch_size=8, long_form=long_form,
+    )
+
+
+class TestBatchInferenceQueue:
+    """Test request batching and mel reuse."""
+
+    def test_concurrent_requests_share_one_batch(self):
+        """Requests submitted within the window should decode together."""
+        backend = _FakeBackend()
+        batcher = _make_queue(backend)
+
+        futures = [batcher.submit(f"clip_{i}.wav", language="en") for i in range(4)]
+        wait(futures, timeout=5)
+
+        assert [f.result()["text"] for f in futures] == [f"clip_{i}.wav" for i in range(4)]
+        assert backend.decode_batches == [("en", [f"clip_{i}.wav" for i in range(4)])]
+        assert batcher.batches_run == 1
+
+    def test_detection_reuses_prepared_features(self):
+        """Detection and decoding should run off a single prepare per file."""
+        backend = _FakeBackend()
+        batcher = _make_queue(backend)
+
+        futures = [
+            batcher.submit("a_en.wav"),
+            batcher.submit("b_fr.wav"),
+            batcher.submit("c_fr.wav", task="detect"),
+        ]
+        wait(futures, timeout=5)
+
+        assert futures[0].result()["language"] == "en"
+        assert futures[1].result()["language"] == "fr"
+        assert futures[2].result() == "fr"
+        assert sorted(backend.prepared) == ["a_en.wav", "b_fr.wav", "c_fr.wav"]
+        assert len(backend.detect_batches) == 1
+
+    def test_long_audio_falls_back_to_full_transcription(self):
+        """Audio longer than one window should bypass the batch decoder."""
+        backend = _FakeBackend()
+        batcher = _make_queue(backend)
+
+        result = batcher.transcribe("long_narration.wav", language="en")
+
+        assert result["text"] == "long"
+        assert backend.decode_batches == []
+
+    def test_long_audio_does_not_hold_up_its_batch(self):
+        """Short requests batched with a long one should finish without waiting for it."""
+        release = threading.Event()
+
+        def slow_long_form(request):
+            release.wait(timeout=5)
+            return _long_form(request)
+
+        backend = _FakeBackend()
+        batcher = _make_queue(backend, long_form=slow_long_form)
+
+        long_future = batcher.submit("long_narration.wav", language="en")
+        short_future = batcher.submit("clip.wav", language="en")
+
+        try:
+            assert short_future.result(timeout=2)["text"] == "clip.wav"
+            assert not long_future.done()
+        finally:
+            release.set()
+        assert long_future.result(timeout=5)["text"] == "long"
+
+    def test_long_audio_failure_reaches_the_caller(self):
+        def broken_long_form(request):
+            raise RuntimeError("chunking failed")
+
+        batcher = _make_queue(_FakeBackend(), long_form=broken_long_form)
+        future = batcher.submit("long_narration.wav", language="en")
+
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+
+
+class TestSegmentsFromTokens:
+    """Test splitting a batched decode into timestamped segments."""
+
+    BEGIN = 1000  # first timestamp token id
+
+    def _decode(self, tokens):
+        return "".join(f" w{t}" for t in tokens)
+
+    def test_timestamp_pairs_become_segments(self):
+        # <|0.00|> w1 w2 <|1.20|><|1.20|> w3 <|2.50|>
+        tokens = [1000, 1, 2, 1060, 1060, 3, 1125]
+        segments = segments_from_tokens(tokens, self.BEGIN, self._decode, duration=3.0)
+
+        assert [(s["start"], s["end"], s["text"]) for s in segments] == [
+            (0.0, 1.2, " w1 w2"),
+            (1.2, 2.5, " w3"),
+        ]
+        assert [s["id"] for s in segments] == [0, 1]
+
+    def test_unterminated_text_runs_to_the_end(self):
+        segments = segments_from_tokens([1000, 1, 1050, 1050, 2], self.BEGIN, self._decode, duration=4.0)
+        assert segments[-1] == {"id": 1, "start": 1.0, "end": 4.0, "text": " w2"}
+
+    def test_no_timestamps_is_one_segment(self):
+        segments = segments_from_tokens([1, 2], self.BEGIN, self._decode, duration=2.5)
+        assert segments == [{"id": 0, "start": 0.0, "end": 2.5, "text": " w1 w2"}]
@@ -0,0 +1,55 @@
+"""
+Tests for long-form chunked transcription helpers.
+Run with: pytest tests/test_whisper_longform.py -v
+"""
+
+import pytest
+
+from app.whisper_worker.longform import plan_chunks, stitch_segments
+
+
+class TestStitchSegments:
+    """Test merging of per-chunk transcriptions."""
+
+    def test_offsets_are_applied_in_order(self):
+        """Segments should be shifted by their chunk offset and renumbered."""
+        results = [
+            (28.5, {"text": " world", "language": "en", "segments": [
+                {"start": 0.0, "end": 1.0, "text": " world"},
+            ]}),
+            (0.0, {"text": "hello", "language": "en", "segments": [
+                {"start": 0.2, "end": 0.9, "text": "hello"},
+            ]}),
+        ]
+
+        merged = stitch_segments(results)
+
+        assert merged["text"] == "hello world"
+        assert [s["id"] for s in merged["segments"]] == [0, 1]
+        assert merged["segments"][1]["start"] == 28.5
+        assert merged["segments"][1]["end"] == 29.5
+        assert merged["error"] is None
+
+    def test_chunk_errors_are_reported(self):
+        """A failed chunk should surface in the merged error."""
+        merged = stitch_segments([(0.0, {"text": "", "segments": [], "error": "boom"})])
+        assert merged["error"] == "boom"
+
+
+class TestPlanChunks:
+    """Test VAD-based chunk planning."""
+
+    def test_split_lands_in_silence(self):
+        """Cuts should fall inside silent gaps and respect the max length."""
+        np = pytest.importorskip("numpy")
+        sr = 16000
+        tone = 0.5 * np.sin(np.linspace(0, 440 * 2 * np.pi * 20, 20 * sr)).astype(np.float32)
+        gap = np.zeros(sr, dtype=np.float32)
+        audio = np.concatenate([tone, gap, tone, gap, tone])
+
+        chunks = plan_chunks(audio, sr, max_chunk=30.0)
+
+        assert chunks[0][0] == 0 and chunks[-1][1] == len(audio)
+        assert all(end - start <= 30 * sr for start, end in chunks)
+        for _, cut in chunks[:-1]:
+            assert np.abs(audio[cut - 100:cut + 100]).max() == 0.0
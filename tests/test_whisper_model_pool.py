@@ -0,0 +1,88 @@
+"""
+Tests for the shared Whisper model pool.
+Run with: pytest tests/test_whisper_model_pool.py -v
+"""
+
+import threading
+import time
+
+from app.whisper_worker.model_pool import WhisperModelPool
+
+
+class _CountingLoader:
+    """Loader stub that records how often each model is loaded."""
+
+    def __init__(self, delay: float = 0.0):
+        self.loads = []
+        self.delay = delay
+        self._lock = threading.Lock()
+
+    def __call__(self, model_name, device):
+        time.sleep(self.delay)
+        with self._lock:
+            self.loads.append((model_name, device))
+        return object()
+
+
+class TestWhisperModelPool:
+    """Test lazy loading, sharing, and unloading of models."""
+
+    def test_models_load_lazily(self):
+        """Nothing should be loaded until first use."""
+        loader = _CountingLoader()
+        pool = WhisperModelPool(loader=loader, idle_timeout=0)
+
+        assert loader.loads == []
+        with pool.acquire("tiny", "cpu") as model:
+            assert model is not None
+        assert pool.is_loaded("tiny", "cpu")
+
+    def test_concurrent_first_use_loads_once(self):
+        """Concurrent callers must share a single load."""
+        loader = _CountingLoader(delay=0.05)
+        pool = WhisperModelPool(loader=loader, slots_per_model=4, idle_timeout=0)
+        seen = []
+
+        def worker():
+            with pool.acquire("base", "cpu") as model:
+                seen.append(model)
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert loader.loads == [("base", "cpu")]
+        assert len({id(m) for m in seen}) == 1
+
+    def test_mixed_models_are_kept_separately(self):
+        """Different model names should not evict each other under capacity."""
+        loader = _CountingLoader()
+        pool = WhisperModelPool(loader=loader, idle_timeout=0, max_models=3)
+
+        for name in ["tiny", "base", "tiny", "small", "base"]:
+            with pool.acquire(name, "cpu"):
+                pass
+
+        assert sorted(loader.loads) == [("base", "cpu"), ("small", "cpu"), ("tiny", "cpu")]
+
+    def test_idle_models_are_unloaded(self):
+        """Idle models should be released by unload_idle."""
+        pool = WhisperModelPool(loader=_CountingLoader(), idle_timeout=0)
+        with pool.acquire("tiny", "cpu"):
+            pass
+
+        assert pool.unload_idle(max_idle=0) == 1
+        assert not pool.is_loaded("tiny", "cpu")
+
+    def test_capacity_evicts_least_recently_used(self):
+        """Loading beyond max_models should evict the oldest idle model."""
+        pool = WhisperModelPool(loader=_CountingLoader(), idle_timeout=0, max_models=1)
+        with pool.acquire("tiny", "cpu"):
+            pass
+        with pool.acquire("base", "cpu"):
+            pass
+
+        assert not pool.is_loaded("tiny", "cpu")
+        assert pool.is_loaded("base", "cpu")
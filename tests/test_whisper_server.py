@@ -0,0 +1,184 @@
+"""
+Tests for the Whisper worker HTTP service.
+Run with: pytest tests/test_whisper_server.py -v
+"""
+
+import json
+import time
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+
+from app.whisper_worker.server import InferenceQueue, WhisperWorkerServer
+
+
+class TestInferenceQueue:
+    """Test admission control and partial results."""
+
+    def test_rejects_when_full(self):
+        """Work beyond the queue bound should be refused, not buffered."""
+        release = threading.Event()
+        work_queue = InferenceQueue(slots=1, max_depth=1)
+
+        def blocked(task):
+            release.wait(5)
+            return {"error": None}
+
+        running = work_queue.submit("test", blocked)
+        # Wait for the slot to pick up the first task so the queue is empty
+        for _ in range(100):
+            if work_queue.stats()["busy_slots"] == 1:
+                break
+            time.sleep(0.01)
+        queued = work_queue.submit("test", blocked)
+
+        assert running is not None and queued is not None
+        assert work_queue.submit("test", blocked) is None
+        stats = work_queue.stats()
+        assert stats["queue_depth"] == 1
+        assert stats["busy_slots"] == 1
+        assert stats["rejected"] == 1
+        assert not stats["accepting"]
+
+        release.set()
+        assert work_queue.wait(queued, timeout=5)
+        assert queued.status == "complete"
+
+    def test_stream_yields_segments_then_result(self):
+        """Segments published by a task should stream before the final result."""
+        work_queue = InferenceQueue(slots=1, max_depth=2)
+
+        def produce(task):
+            work_queue.add_segments(task, [{"id": 0, "text": "hello"}])
+            work_queue.add_segments(task, [{"id": 1, "text": "world"}])
+            return {"text": "hello world", "error": None}
+
+        task = work_queue.submit("transcribe", produce)
+        events = list(work_queue.stream(task, timeout=5))
+
+        assert [e["segment"]["text"] for e in events if e["type"] == "segment"] == ["hello", "world"]
+        assert events[-1]["type"] == "result"
+        assert events[-1]["result"]["text"] == "hello world"
+
+
+class TestWhisperWorkerServer:
+    """Test the HTTP routes with a stubbed transcriber."""
+
+    @pytest.fixture
+    def client(self, monkeypatch):
+        server = WhisperWorkerServer(InferenceQueue(slots=1, max_depth=2))
+
+        def fake_transcribe(audio_file, language=None, on_segments=None):
+            segments = [{"id": 0, "start": 0.0, "end": 1.0, "text": "hi"}]
+            on_segments(segments)
+            return {"text": "hi", "language": "en", "segments": segments, "error": None}
+
+        monkeypatch.setattr(server.service.whisper_processor, "transcribe_long_audio", fake_transcribe)
+        return server.app.test_client()
+
+    def test_health_reports_load(self, client):
+        """Health should expose queue depth and slot usage."""
+        data = client.get("/health").get_json()
+        assert data["service"] == "whisper"
+        assert data["queue_depth"] == 0
+        assert data["busy_slots"] == 0
+        assert data["slots"] == 1
+
+    def test_transcribe_waits_for_result(self, client):
+        """A plain request should return the finished transcription."""
+        response = client.post("/transcribe", json={"audio_file": "/tmp/a.wav"})
+        assert response.status_code == 200
+        assert response.get_json()["result"]["text"] == "hi"
+
+    def test_transcribe_stream(self, client):
+        """Streaming requests should return NDJSON segment events."""
+        response = client.post("/transcribe", json={"audio_file": "/tmp/a.wav", "stream": True})
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        assert events[0] == {"type": "segment", "segment": {"id": 0, "start": 0.0, "end": 1.0, "text": "hi"}}
+        assert events[-1]["status"] == "complete"
+
+    def test_invalid_timeout_is_rejected_before_admission(self, client):
+        """A bad timeout must not leave a task running behind an error response."""
+        response = client.post("/transcribe", json={"audio_file": "/tmp/a.wav", "timeout": "soon"})
+        assert response.status_code == 400
+        assert client.post("/transcribe", json={"audio_file": "/tmp/a.wav", "timeout": -1}).status_code == 400
+        assert client.get("/health").get_json()["queue_depth"] == 0
+
+    def test_timeout_is_capped(self, client, monkeypatch):
+        from app.common.config import Config
+        from app.whisper_worker.server import InferenceQueue
+
+        waits = []
+        original = InferenceQueue.wait
+
+        def wait(self, task, timeout):
+            waits.append(timeout)
+            return original(self, task, timeout)
+
+        monkeypatch.setattr(InferenceQueue, "wait", wait)
+        client.post("/transcribe", json={"audio_file": "/tmp/a.wav", "timeout": 1e9})
+        assert waits == [Config.WHISPER_REQUEST_TIMEOUT]
+
+    def test_missing_audio_file(self, client):
+        """Requests without audio_file should be rejected."""
+        assert client.post("/transcribe", json={}).status_code == 400
+
+
+class TestSceneAudio:
+    """Test /process_scenes and the orchestrator writing measured durations back."""
+
+    @pytest.fixture
+    def server(self, tmp_path, monkeypatch):
+        from app.whisper_worker.main import TTSProcessor
+        from app.whisper_worker.tts_cache import TTSCache
+
+        server = WhisperWorkerServer(InferenceQueue(slots=1, max_depth=2))
+        tts = TTSProcessor(cache=TTSCache(str(tmp_path / "cache")), engine="tone")
+        monkeypatch.setattr(server.service, "tts_processor", tts)
+        return server
+
+    def test_route_returns_retimed_scenes(self, server):
+        client = server.app.test_client()
+        response = client.post("/process_scenes", json={
+            "job_id": "job-scenes",
+            "scenes": [{"id": "a", "narration": "One two three four five.", "duration": 9.0}],
+        })
+        result = response.get_json()["result"]
+        assert response.status_code == 200
+        assert result["scenes"][0]["id"] == "a" and result["scenes"][0]["duration"] == 2.0
+        assert result["audio_segments"][0]["duration"] == 2.0
+        assert result["subtitles"]
+        assert client.post("/process_scenes", json={"job_id": "x", "scenes": []}).status_code == 400
+
+    def test_orchestrator_uses_measured_durations(self, server, monkeypatch):
+        import app.orchestrator.main as orchestrator_main
+        from app.common.config import Config
+        from app.common.models import JobProgress, VideoRequest
+        from app.common.service_client import LocalTransport, ServiceClient
+        from app.common.utils import job_cache
+
+        client = ServiceClient("whisper", ["http://whisper"], hedge_delay=0,
+                               transport=LocalTransport({"http://whisper": server.app}))
+        monkeypatch.setattr(orchestrator_main, "get_service_client", lambda name: client)
+        monkeypatch.setattr(orchestrator_main, "WebSocketEventManager", None)
+        monkeypatch.setattr(Config, "USE_REMOTE_SERVICES", True)
+
+        job = VideoRequest(id="job-remote-audio", prompt="x")
+        job_cache.set(f"storyboard_{job.id}", {"scenes": [
+            {"id": "a", "narration": "One two three four five.", "duration": 9.0, "start_time": 0.0, "end_time": 9.0},
+            {"id": "b", "narration": "Six seven. Eight nine ten.", "duration": 9.0, "start_time": 9.0, "end_time": 18.0},
+        ], "total_duration": 18.0})
+        orchestrator = orchestrator_main.JobOrchestrator()
+        monkeypatch.setattr(orchestrator, "_log", lambda *args, **kwargs: None)
+        try:
+            orchestrator._generate_audio(job.id, job, JobProgress(job_id=job.id))
+            storyboard = job_cache.get(f"storyboard_{job.id}")
+        finally:
+            job_cache.delete(f"storyboard_{job.id}")
+
+        assert [s["duration"] for s in storyboard["scenes"]] == [2.0, 2.0]
+        assert storyboard["scenes"][1]["start_time"] == 2.0
+        assert storyboard["total_duration"] == 4.0
+        assert len(storyboard["audio_segments"]) == 2
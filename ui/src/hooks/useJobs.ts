@@ -1,4 +1,4 @@
-import { useCallback, useEffect } from 'react';
+import { useCallback, useEffect, useRef } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
 import { RootState, AppDispatch } from '@store';
 import {
@@ -11,7 +11,7 @@ import {
 } from '@store/jobsSlice';
 import { jobsApi } from '@services/api';
 import webSocketService from '@services/websocket';
-import { JobFilters } from '@types';
+import { JobFilters, JobStatus } from '@types';
 
 export const useJobs = () => {
   const dispatch = useDispatch<AppDispatch>();
@@ -36,6 +36,52 @@ export const useJobs = () => {
     }
   }, [dispatch, jobs.currentPage, jobs.pageSize]);
 
+  // Keep the list current from pushed events instead of re-fetching it.
+  // An event for a job we have not loaded yet (e.g. just submitted)
+  // triggers a single list refresh.
+  const knownJobIds = useRef<Set<string>>(new Set());
+  const refreshPending = useRef(false);
+  knownJobIds.current = new Set(jobs.jobs.map((j: any) => j.id));
+
+  useEffect(() => {
+    webSocketService.subscribeToAllJobs();
+
+    const applyStatus = (jobId: string, status: any, progress: number) => {
+      if (!knownJobIds.current.has(jobId)) {
+        if (!refreshPending.current) {
+          refreshPending.current = true;
+          fetchJobs().finally(() => {
+            refreshPending.current = false;
+          });
+        }
+        return;
+      }
+      dispatch(updateJobStatus({ jobId, status, progress }));
+    };
+
+    const handleStatusBatch = (event: any) => {
+      event.payload.updates.forEach((update: any) => {
+        applyStatus(update.jobId, update.status, update.progress);
+      });
+    };
+    const handleCompleted = (event: any) => {
+      applyStatus(event.payload.jobId, JobStatus.COMPLETED, 100);
+    };
+    const handleFailed = (event: any) => {
+      applyStatus(event.payload.jobId, JobStatus.FAILED, 0);
+    };
+
+    webSocketService.on('job_status_batch', handleStatusBatch);
+    webSocketService.on('job_completed', handleCompleted);
+    webSocketService.on('job_failed', handleFailed);
+
+    return () => {
+      webSocketService.off('job_status_batch', handleStatusBatch);
+      webSocketService.off('job_completed', handleCompleted);
+      webSocketService.off('job_failed', handleFailed);
+    };
+  }, [dispatch, fetchJobs]);
+
   const generateVideo = useCallback(async (prompt: string, priority?: string) => {
     dispatch(setJobsLoading(true));
     try {
@@ -44,7 +90,12 @@ export const useJobs = () => {
         priority: priority as any
       });
       if (response.data?.jobId) {
-        await fetchJobs();
+        // Fall back to a fetch only when push updates are unavailable
+        if (!webSocketService.isConnected()) {
+          await fetchJobs();
+        } else {
+          dispatch(setJobsLoading(false));
+        }
         return response.data.jobId;
       }
     } catch (error: any) {
@@ -56,7 +107,9 @@ export const useJobs = () => {
   const cancelJob = useCallback(async (jobId: string) => {
     try {
       await jobsApi.cancelJob(jobId);
-      await fetchJobs();
+      if (!webSocketService.isConnected()) {
+        await fetchJobs();
+      }
     } catch (error: any) {
       dispatch(setJobsError(error.message));
       throw error;
@@ -109,12 +162,32 @@ export const useJobDetails = (jobId: string | null) => {
       }
     };
 
+    // Missed events could not be replayed after a reconnect; refetch once
+    const handleResync = async (event: any) => {
+      if (event.jobId !== jobId) return;
+      try {
+        const response = await jobsApi.getStatus(event.jobId);
+        const current = response.data?.job;
+        if (current) {
+          dispatch(updateJobStatus({
+            jobId: event.jobId,
+            status: current.status,
+            progress: current.progress
+          }));
+        }
+      } catch (error) {
+        console.error('Failed to resync job:', error);
+      }
+    };
+
     webSocketService.on('job_status_update', handleStatusUpdate);
     webSocketService.on('job_log_entry', handleLogEntry);
+    webSocketService.on('job_resync', handleResync);
 
     return () => {
       webSocketService.off('job_status_update', handleStatusUpdate);
       webSocketService.off('job_log_entry', handleLogEntry);
+      webSocketService.off('job_resync', handleResync);
     };
   }, [jobId, dispatch]);
 
@@ -59,6 +59,12 @@ export const jobsApi = {
     return response.data;
   },
 
+  // Read job log lines after a sequence number (status carries only a tail)
+  getLogs: async (jobId: string, after: number = 0, limit: number = 500): Promise<any> => {
+    const response = await apiClient.get(`/mcp/logs/${jobId}`, { params: { after, limit } });
+    return response.data;
+  },
+
   // List jobs with filters
   listJobs: async (
     filters?: JobFilters,
@@ -120,9 +126,32 @@ export const jobsApi = {
     return response.data;
   },
 
-  // Prefetch assets
-  prefetchAssets: async (jobId: string): Promise<ApiResponse<{ success: boolean }>> => {
-    const response = await apiClient.post(`/mcp/prefetch/${jobId}`);
+  // Edit storyboard scenes; only changed scenes are re-rendered
+  editStoryboard: async (
+    jobId: string,
+    scenes: Array<Record<string, any>>,
+    render: boolean = true
+  ): Promise<ApiResponse<any>> => {
+    const response = await apiClient.patch(
+      `/mcp/storyboard/${jobId}`,
+      { scenes },
+      { params: render ? {} : { render: false } }
+    );
+    return response.data;
+  },
+
+  // Prefetch assets: warm caches for a prompt before generating it
+  prefetchAssets: async (
+    prompt: string,
+    options: Record<string, any> = {}
+  ): Promise<ApiResponse<{ prefetch_id: string; status: string }>> => {
+    const response = await apiClient.post('/mcp/prefetch', { prompt, ...options });
+    return response.data;
+  },
+
+  // Get prefetch progress
+  getPrefetchStatus: async (prefetchId: string): Promise<ApiResponse<any>> => {
+    const response = await apiClient.get(`/mcp/prefetch/${prefetchId}`);
     return response.data;
   }
 };
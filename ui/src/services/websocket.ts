@@ -9,6 +9,11 @@ import {
 class WebSocketService {
   private socket: Socket | null = null;
   private listeners: Map<string, Function[]> = new Map();
+  private jobSubscriptions: Set<string> = new Set();
+  private allJobsSubscribed = false;
+  // Last event sequence seen per subscribed job, sent on resubscribe so the
+  // server replays only the events missed while disconnected
+  private jobCursors: Map<string, { seq: number; epoch: string }> = new Map();
   private maxReconnectAttempts = 10;
   private reconnectDelay = 1000;
 
@@ -25,6 +30,7 @@ class WebSocketService {
 
         this.socket.on('connect', () => {
           console.log('WebSocket connected');
+          this.restoreSubscriptions();
           resolve();
         });
 
@@ -57,6 +63,7 @@ class WebSocketService {
 
     // Job status updates
     this.socket.on('job_status_update', (data: any) => {
+      if (!this.advanceCursor(data)) return;
       this.emit('job_status_update', {
         type: 'job_status_update',
         payload: data,
@@ -64,8 +71,18 @@ class WebSocketService {
       } as JobStatusUpdateEvent);
     });
 
+    // Coalesced status updates for clients watching many jobs
+    this.socket.on('job_status_batch', (data: any) => {
+      this.emit('job_status_batch', {
+        type: 'job_status_batch',
+        payload: data,
+        timestamp: new Date().toISOString()
+      });
+    });
+
     // Job log entries
     this.socket.on('job_log_entry', (data: any) => {
+      if (!this.advanceCursor(data)) return;
       this.emit('job_log_entry', {
         type: 'job_log_entry',
         payload: data,
@@ -75,6 +92,7 @@ class WebSocketService {
 
     // Job completed
     this.socket.on('job_completed', (data: any) => {
+      if (!this.advanceCursor(data)) return;
       this.emit('job_completed', {
         type: 'job_completed',
         payload: data,
@@ -84,6 +102,7 @@ class WebSocketService {
 
     // Job failed
     this.socket.on('job_failed', (data: any) => {
+      if (!this.advanceCursor(data)) return;
       this.emit('job_failed', {
         type: 'job_failed',
         payload: data,
@@ -91,6 +110,18 @@ class WebSocketService {
       } as JobFailedEvent);
     });
 
+    // Replay summary after subscribe_job; a gap means the missed events
+    // are no longer buffered and the job should be refetched
+    this.socket.on('subscribed', (data: any) => {
+      if (!data?.jobId) return;
+      if (data.gap) {
+        this.jobCursors.set(data.jobId, { seq: data.lastSeq, epoch: data.epoch });
+        this.emit('job_resync', { jobId: data.jobId });
+      } else if (!this.jobCursors.has(data.jobId)) {
+        this.jobCursors.set(data.jobId, { seq: data.lastSeq, epoch: data.epoch });
+      }
+    });
+
     // Queue updates
     this.socket.on('queue_updated', (data: any) => {
       this.emit('queue_updated', {
@@ -101,6 +132,16 @@ class WebSocketService {
     });
   }
 
+  // Record a job event's sequence; false for a duplicate already delivered
+  // (events emitted while a replay is in flight can arrive twice)
+  private advanceCursor(data: any): boolean {
+    if (data?.seq === undefined || !this.jobSubscriptions.has(data.jobId)) return true;
+    const cursor = this.jobCursors.get(data.jobId);
+    if (cursor && cursor.epoch === data.epoch && data.seq <= cursor.seq) return false;
+    this.jobCursors.set(data.jobId, { seq: data.seq, epoch: data.epoch });
+    return true;
+  }
+
   on(event: string, callback: Function): void {
     if (!this.listeners.has(event)) {
       this.listeners.set(event, []);
@@ -134,6 +175,7 @@ class WebSocketService {
 
   // Subscribe to job updates
   subscribeToJob(jobId: string): void {
+    this.jobSubscriptions.add(jobId);
     if (this.socket) {
       this.socket.emit('subscribe_job', { jobId });
     }
@@ -141,11 +183,43 @@ class WebSocketService {
 
   // Unsubscribe from job updates
   unsubscribeFromJob(jobId: string): void {
+    this.jobSubscriptions.delete(jobId);
+    this.jobCursors.delete(jobId);
     if (this.socket) {
       this.socket.emit('unsubscribe_job', { jobId });
     }
   }
 
+  // Receive status, completion and failure events for every job
+  subscribeToAllJobs(): void {
+    this.allJobsSubscribed = true;
+    if (this.socket) {
+      this.socket.emit('subscribe_jobs', {});
+    }
+  }
+
+  unsubscribeFromAllJobs(): void {
+    this.allJobsSubscribed = false;
+    if (this.socket) {
+      this.socket.emit('unsubscribe_jobs', {});
+    }
+  }
+
+  // Rooms are per connection, so rejoin them after a reconnect
+  private restoreSubscriptions(): void {
+    if (!this.socket) return;
+    if (this.allJobsSubscribed) {
+      this.socket.emit('subscribe_jobs', {});
+    }
+    this.jobSubscriptions.forEach(jobId => {
+      const cursor = this.jobCursors.get(jobId);
+      this.socket!.emit(
+        'subscribe_job',
+        cursor ? { jobId, lastSeq: cursor.seq, epoch: cursor.epoch } : { jobId }
+      );
+    });
+  }
+
   isConnected(): boolean {
     return this.socket?.connected ?? false;
   }
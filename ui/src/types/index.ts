@@ -32,6 +32,7 @@ export interface VideoGenerationRequest {
   duration?: number;
   voiceId?: string;
   priority?: Priority;
+  quality?: 'low' | 'medium' | 'high';
   metadata?: Record<string, any>;
 }
 
@@ -11,6 +11,15 @@ import logging
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.common.config import Config
+
+# Green-thread modes must patch the standard library before anything else imports it
+if Config.WS_ASYNC_MODE == 'eventlet':
+    import eventlet
+    eventlet.monkey_patch()
+elif Config.WS_ASYNC_MODE == 'gevent':
+    from gevent import monkey
+    monkey.patch_all()
+
 from app.common.utils import get_logger
 from app.websocket.main import WebSocketServer
 
@@ -25,17 +34,22 @@ def main():
 
     try:
         # Create and run WebSocket server
-        ws_server = WebSocketServer()
+        if Config.WS_ASYNC_MODE == 'aiohttp':
+            from app.websocket.async_server import AsyncWebSocketServer
+            ws_server = AsyncWebSocketServer()
+        else:
+            ws_server = WebSocketServer()
 
         logger.info(f"WebSocket Server Configuration:")
         logger.info(f"  - Host: 0.0.0.0")
         logger.info(f"  - Port: 8085")
         logger.info(f"  - CORS: Enabled (all origins)")
         logger.info(f"  - Redis: {Config.REDIS_URL}")
+        logger.info(f"  - Mode: {Config.WS_ASYNC_MODE}")
         logger.info("=" * 60)
 
         # Run server
-        ws_server.run(host='0.0.0.0', port=8085, debug=False)
+        ws_server.run(host='0.0.0.0', port=8085)
 
     except Exception as e:
         logger.error(f"Failed to start WebSocket server: {e}", exc_info=True)